@@ -115,6 +115,17 @@ def _parse_subjective_state(text: str) -> Dict[str, str]:
     return {"energy": energy, "soreness": soreness, "sleep": sleep}
 
 
+def mentions_training_details(text: str) -> bool:
+    """Cheap lexical check (no LLM) for an activity, duration, metric or how-it-felt note."""
+    text = str(text or "")
+    return bool(
+        _detect_activity_type(text)
+        or _extract_duration(text)
+        or _extract_key_metric(text)
+        or _extract_subjective_feedback(text)
+    )
+
+
 def parse_manual_activity_snapshot_from_email(body: str, now_epoch: int) -> Optional[Dict[str, Any]]:
     """
     Returns manual activity snapshot dict or None when no check-in signal is detected.
@@ -1,14 +1,23 @@
 """
-Lambda handler: orchestration only.
+Lambda handlers: orchestration only.
+
+Import layering keeps cold starts cheap for senders that never reach an LLM:
+module load pulls in only boto3-backed auth, rate-limit and verification
+code; business.py (and through it coaching, the skills and the OpenAI SDK)
+is imported on the first reply turn.
+
+- lambda_handler: one SNS-delivered email per invocation
+- sqs_batch_handler: SQS batches, reporting partial batch failures
 - Parse inbound (EmailProcessor)
 - Auth & rate limits (auth, rate_limits)
 - Business reply (business.get_reply_for_inbound)
-- Send (EmailReplySender)
+- Send (EmailReplySender, through outbound_mail: inline or queued)
 All business/LLM logic lives in business.py, skill modules, response_evaluator.py, coaching.py, and profile.py.
 """
 import sys
 import logging
-from typing import Optional, Dict, Any
+from contextlib import nullcontext
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 
 sys.path.append("vendor")
 sys.path.append(".")
@@ -18,17 +27,66 @@ from dynamodb_models import (
     canonicalize_email,
     ensure_athlete_id_for_email,
     ensure_progress_snapshot_exists,
+    athlete_state_snapshot,
+    coach_profile_unit_of_work,
+    CoachProfileFlushError,
+    claim_inbound_message,
+    record_inbound_reply,
+    complete_inbound_message,
+    release_inbound_message,
+    INBOUND_LEDGER_REPLIED,
+    INBOUND_LEDGER_SUPPRESSED,
 )
 from auth import is_registered, handle_unverified_sender
 from rate_limits import check_verified_quota_or_block
-from business import SUPPRESSED_REPLY, get_reply_for_inbound
+from inbound_message import SUPPRESSED_REPLY, build_message_key
+from config import (
+    ENABLE_INBOUND_IDEMPOTENCY_LEDGER,
+    INBOUND_LEDGER_STALE_SECONDS,
+    INBOUND_LEDGER_TTL_SECONDS,
+    SQS_BATCH_MAX_WORKERS,
+    ENABLE_ATHLETE_LEASE_LOCK,
+    ATHLETE_LEASE_MODE,
+    ATHLETE_LEASE_SECONDS,
+    ATHLETE_LEASE_TTL_SECONDS,
+    ATHLETE_LEASE_WAIT_SECONDS,
+    ATHLETE_LEASE_MAX_PENDING,
+    ATHLETE_LEASE_MAX_FOLLOW_UP_TURNS,
+    ATHLETE_LEASE_REPLAY_QUEUE_URL,
+    ENABLE_COACH_PROFILE_UNIT_OF_WORK,
+)
+from inbound_batch import BatchItem, run_keyed_batch
+from llm_usage import llm_usage_accounting
+from memory_refresh_queue import drain_local_memory_refresh_queue, is_memory_refresh_deferred
+from outbound_mail import drain_local_outbound_mail_queue, is_outbound_mail_queued
+from athlete_lock import (
+    AthleteLease,
+    AthleteLeaseLostError,
+    AthleteTurnBusyError,
+    LEASE_MODE_COALESCE,
+    LEASE_MODE_WAIT,
+    TURN_BUSY,
+    TURN_COALESCED,
+    claim_athlete_turn,
+    merge_coalesced_emails,
+    replay_athlete_messages,
+)
 from email_processor import EmailProcessor
+from inbound_s3 import InboundContentUnavailableError
 from email_reply_sender import EmailReplySender
 from email_copy import EmailCopy
+from telemetry import request_telemetry, set_property, span
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+def get_reply_for_inbound(**kwargs: Any) -> Any:
+    """Lazy entry point into the reply pipeline; see the module docstring."""
+    from business import get_reply_for_inbound as _get_reply_for_inbound
+
+    return _get_reply_for_inbound(**kwargs)
+
+
 def _aws_request_id_from_context(context: Any) -> Optional[str]:
     if context and hasattr(context, "aws_request_id"):
         return context.aws_request_id
@@ -54,6 +112,7 @@ def _log_inbound_outcome(
     if aws_request_id:
         log_parts.append(f"aws_request_id={aws_request_id}")
     logger.info(", ".join(log_parts))
+    set_property("result", result)
 
 
 def _handle_unregistered_sender(
@@ -78,27 +137,352 @@ def _handle_unregistered_sender(
     return {"statusCode": 200, "body": f"Registration required. Message ID: {message_id}"}
 
 
+def _inbound_message_key(email_data: Dict[str, Any]) -> str:
+    inbound_message_id = str(email_data.get("message_id", "")).strip() or None
+    return build_message_key(inbound_message_id, email_data.get("body", ""))
+
+
+def _handle_duplicate_delivery(
+    email_data: Dict[str, Any],
+    message_key: str,
+    ledger_record: Optional[Dict[str, Any]],
+    aws_request_id: Optional[str],
+) -> Dict[str, Any]:
+    _log_inbound_outcome(
+        from_email=email_data["sender"],
+        verified=True,
+        result="duplicate_delivery_skipped",
+        aws_request_id=aws_request_id,
+        message_key=message_key,
+        ledger_status=(ledger_record or {}).get("status"),
+    )
+    return {"statusCode": 200, "body": "Duplicate delivery ignored."}
+
+
+def _send_ledgered_reply(
+    email_data: Dict[str, Any],
+    message_keys: Sequence[str],
+    reply_body: Any,
+) -> Optional[str]:
+    """Sends a reply and moves the ledger rows to replied; releases them if the send fails."""
+    from_email = email_data["sender"]
+    with span("send_reply"):
+        message_id = EmailReplySender.send_reply(email_data, reply_body, include_thread_context=True)
+    for message_key in message_keys:
+        if message_id:
+            complete_inbound_message(
+                from_email,
+                message_key,
+                INBOUND_LEDGER_REPLIED,
+                outbound_message_id=message_id,
+            )
+        else:
+            release_inbound_message(from_email, message_key)
+    return message_id
+
+
+def _run_reply_turn(
+    email_data: Dict[str, Any],
+    athlete_id: str,
+    aws_request_id: Optional[str],
+    ledger_keys: Sequence[str],
+    lease: Optional[AthleteLease] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Generates and sends one reply. Returns the response and whether the
+    ledger rows for ``ledger_keys`` were settled; unsettled rows are left for
+    the caller to release. Raises AthleteLeaseLostError, before the profile
+    writes are flushed or the reply is recorded, when ``lease`` has lapsed.
+    """
+    with llm_usage_accounting(athlete_id):
+        return _generate_and_send_reply(email_data, athlete_id, aws_request_id, ledger_keys, lease)
+
+
+def _generate_and_send_reply(
+    email_data: Dict[str, Any],
+    athlete_id: str,
+    aws_request_id: Optional[str],
+    ledger_keys: Sequence[str],
+    lease: Optional[AthleteLease],
+) -> Tuple[Dict[str, Any], bool]:
+    from_email = email_data["sender"]
+    ensure_held = lease.ensure_held if lease is not None else None
+    unit_of_work = (
+        coach_profile_unit_of_work(athlete_id, guard=ensure_held)
+        if ENABLE_COACH_PROFILE_UNIT_OF_WORK
+        else nullcontext()
+    )
+    with athlete_state_snapshot(athlete_id, email=from_email), unit_of_work, span("generate_reply"):
+        reply_body = get_reply_for_inbound(
+            athlete_id=athlete_id,
+            from_email=from_email,
+            email_data=email_data,
+            aws_request_id=aws_request_id,
+            log_outcome=_log_inbound_outcome,
+        )
+    if ensure_held is not None:
+        # Another invocation may own the turn by now; its reply wins.
+        ensure_held()
+    if reply_body is SUPPRESSED_REPLY:
+        for message_key in ledger_keys:
+            complete_inbound_message(from_email, message_key, INBOUND_LEDGER_SUPPRESSED)
+        _log_inbound_outcome(
+            from_email=from_email,
+            verified=True,
+            result="reply_suppressed_no_reply_needed",
+            aws_request_id=aws_request_id,
+            athlete_id=athlete_id,
+            message_id=email_data.get("message_id"),
+        )
+        return {"statusCode": 200, "body": "No reply sent because no coaching response was needed."}, True
+    if reply_body is None:
+        _log_inbound_outcome(
+            from_email=from_email,
+            verified=True,
+            result="reply_suppressed_generation_failed",
+            aws_request_id=aws_request_id,
+            athlete_id=athlete_id,
+            message_id=email_data.get("message_id"),
+        )
+        return {"statusCode": 200, "body": "No reply sent due to response-generation failure."}, False
+    if ledger_keys:
+        for message_key in ledger_keys:
+            record_inbound_reply(from_email, message_key, reply_body)
+        message_id = _send_ledgered_reply(email_data, ledger_keys, reply_body)
+    else:
+        with span("send_reply"):
+            message_id = EmailReplySender.send_reply(email_data, reply_body, include_thread_context=True)
+    return {"statusCode": 200, "body": f"Reply sent! Message ID: {message_id}"}, True
+
+
+_TURN_BUSY_STATUS_CODE = 503
+
+
+def _claim_athlete_turn(
+    email_data: Dict[str, Any],
+    athlete_id: str,
+    message_key: Optional[str],
+    aws_request_id: Optional[str],
+) -> Tuple[Optional[AthleteLease], Optional[Dict[str, Any]]]:
+    """Returns (lease, None) when this invocation owns the turn, else (None, response)."""
+    mode = ATHLETE_LEASE_MODE
+    if mode == LEASE_MODE_COALESCE and not ATHLETE_LEASE_REPLAY_QUEUE_URL:
+        # Without a replay queue a queued message the holder fails to answer would be lost.
+        mode = LEASE_MODE_WAIT
+    claim = claim_athlete_turn(
+        athlete_id,
+        {"email_data": email_data, "message_key": message_key},
+        mode=mode,
+        lease_seconds=ATHLETE_LEASE_SECONDS,
+        ttl_seconds=ATHLETE_LEASE_TTL_SECONDS,
+        wait_seconds=ATHLETE_LEASE_WAIT_SECONDS,
+        max_pending=ATHLETE_LEASE_MAX_PENDING,
+        owner=aws_request_id,
+    )
+    if claim.lease is not None:
+        return claim.lease, None
+    result = "coalesced_into_inflight_turn" if claim.status == TURN_COALESCED else "athlete_turn_busy"
+    _log_inbound_outcome(
+        from_email=email_data["sender"],
+        verified=True,
+        result=result,
+        aws_request_id=aws_request_id,
+        athlete_id=athlete_id,
+        message_id=email_data.get("message_id"),
+    )
+    if claim.status == TURN_BUSY:
+        return None, {
+            "statusCode": _TURN_BUSY_STATUS_CODE,
+            "body": "Another message from this athlete is being processed.",
+        }
+    return None, {"statusCode": 200, "body": "Message queued for the in-flight coaching turn."}
+
+
+def _end_athlete_turn(
+    lease: AthleteLease,
+    athlete_id: str,
+    unanswered: Sequence[Dict[str, Any]] = (),
+) -> None:
+    """
+    Expires the lease and re-publishes every message it still holds (plus
+    ``unanswered`` ones already taken off it) as fresh inbound deliveries.
+    Messages that cannot be published go back on the lease row.
+    """
+    pending = list(unanswered) + lease.release_taking_pending()
+    if not pending:
+        return
+    for entry in pending:
+        if entry.get("message_key"):
+            # The replayed delivery claims the ledger row again.
+            release_inbound_message(entry["email_data"]["sender"], str(entry["message_key"]))
+    unsent = replay_athlete_messages(athlete_id, pending, queue_url=ATHLETE_LEASE_REPLAY_QUEUE_URL)
+    logger.info(
+        "coalesced_messages_replayed athlete_id=%s messages=%s unsent=%s",
+        athlete_id,
+        len(pending),
+        len(unsent),
+    )
+    if unsent:
+        lease.requeue(unsent)
+
+
+def _drain_coalesced_turns(
+    lease: AthleteLease,
+    athlete_id: str,
+    aws_request_id: Optional[str],
+) -> None:
+    """
+    Answers messages queued during the turn with one combined turn per drain;
+    a failed follow-up or anything left after the last one is replayed.
+    """
+    for _ in range(max(0, ATHLETE_LEASE_MAX_FOLLOW_UP_TURNS)):
+        pending = lease.take_pending_or_release()
+        if not pending:
+            return
+        emails: List[Dict[str, Any]] = [dict(entry["email_data"]) for entry in pending]
+        ledger_keys = [str(entry["message_key"]) for entry in pending if entry.get("message_key")]
+        merged = merge_coalesced_emails(emails)
+        logger.info(
+            "coalesced_turn_started athlete_id=%s messages=%s",
+            athlete_id,
+            len(emails),
+        )
+        try:
+            _, settled = _run_reply_turn(merged, athlete_id, aws_request_id, ledger_keys, lease)
+        except Exception as e:
+            logger.error("Coalesced turn failed athlete_id=%s: %s", athlete_id, e)
+            settled = False
+        if not settled:
+            _end_athlete_turn(lease, athlete_id, pending)
+            return
+    _end_athlete_turn(lease, athlete_id)
+
+
 def lambda_handler(event, context):
     """AWS Lambda function handler."""
-    try:
-        email_data = EmailProcessor.parse_sns_event(event)
+    email_data = EmailProcessor.parse_sns_event(event)
+    if not email_data:
+        return {"statusCode": 400, "body": "Invalid email data."}
+    # An SNS-invoked function is only redelivered when it raises; a returned
+    # 503 would drop the message. CoachProfileFlushError and AthleteLeaseLostError
+    # propagate as is.
+    response = _process_inbound_email(email_data, _aws_request_id_from_context(context))
+    if response.get("statusCode") == _TURN_BUSY_STATUS_CODE:
+        raise AthleteTurnBusyError(response["body"])
+    return response
+
+
+def sqs_batch_handler(event, context):
+    """
+    SQS-fed handler: processes distinct senders concurrently and one sender's
+    emails in order, returning batchItemFailures so only failed records retry.
+    Unparseable records are dropped (logged) rather than retried forever.
+    """
+    aws_request_id = _aws_request_id_from_context(context)
+    items = []
+    failed_ids: List[str] = []
+    for record in event.get("Records", []):
+        try:
+            email_data = EmailProcessor.parse_sqs_record(record)
+        except InboundContentUnavailableError:
+            # Stored message not readable yet; retry the record instead of dropping it.
+            failed_ids.append(record["messageId"])
+            continue
         if not email_data:
-            return {"statusCode": 400, "body": "Invalid email data."}
+            logger.error("Dropping unparseable SQS record message_id=%s", record.get("messageId"))
+            continue
+        items.append(
+            BatchItem(
+                item_id=record["messageId"],
+                key=canonicalize_email(email_data["sender"]),
+                payload=email_data,
+            )
+        )
+
+    def _process(email_data: Dict[str, Any]) -> bool:
+        response = _process_inbound_email(email_data, aws_request_id)
+        return int(response.get("statusCode", 500)) < 500
+
+    failed_ids.extend(run_keyed_batch(items, _process, max_workers=SQS_BATCH_MAX_WORKERS))
+    logger.info(
+        "sqs_batch_processed records=%s parsed=%s failed=%s",
+        len(event.get("Records", [])),
+        len(items),
+        len(failed_ids),
+    )
+    return {"batchItemFailures": [{"itemIdentifier": item_id} for item_id in failed_ids]}
+
 
+def _process_inbound_email(email_data: Dict[str, Any], aws_request_id: Optional[str]) -> Dict[str, Any]:
+    """Handles one inbound email; with telemetry on, emits one EMF record for it."""
+    with request_telemetry(aws_request_id=aws_request_id) as telemetry:
+        try:
+            response = _handle_inbound_email(email_data, aws_request_id)
+        finally:
+            _drain_local_queues()
+        if telemetry is not None:
+            telemetry.set_property("status_code", response.get("statusCode"))
+        return response
+
+
+def _drain_local_queues() -> None:
+    """
+    Runs work queued in-process once the email is handled: outbound mail
+    first, so the reply is out before deferred memory refreshes call the LLM.
+    """
+    if is_outbound_mail_queued():
+        drain_local_outbound_mail_queue()
+    if is_memory_refresh_deferred():
+        drain_local_memory_refresh_queue()
+
+
+def _handle_inbound_email(email_data: Dict[str, Any], aws_request_id: Optional[str]) -> Dict[str, Any]:
+    ledger_claim: Optional[Dict[str, str]] = None
+    try:
         from_email = canonicalize_email(email_data["sender"])
         email_data["sender"] = from_email
-        aws_request_id = _aws_request_id_from_context(context)
 
-        if not is_registered(from_email):
+        with span("sender_checks"):
+            registered = is_registered(from_email)
+            verified = registered and is_verified(from_email)
+        if not registered:
             return _handle_unregistered_sender(email_data, aws_request_id)
 
-        if not is_verified(from_email):
+        if not verified:
             return handle_unverified_sender(from_email, aws_request_id)
 
         logger.info("User %s is verified. Proceeding with response.", from_email)
 
-        quota_block_response = check_verified_quota_or_block(from_email, aws_request_id)
+        if ENABLE_INBOUND_IDEMPOTENCY_LEDGER:
+            message_key = _inbound_message_key(email_data)
+            claim = claim_inbound_message(
+                from_email,
+                message_key,
+                stale_after_seconds=INBOUND_LEDGER_STALE_SECONDS,
+                ttl_seconds=INBOUND_LEDGER_TTL_SECONDS,
+            )
+            if not claim["claimed"]:
+                return _handle_duplicate_delivery(email_data, message_key, claim["record"], aws_request_id)
+            ledger_claim = {"email": from_email, "message_key": message_key}
+            stored_reply = (claim["record"] or {}).get("reply_body")
+            if stored_reply:
+                _log_inbound_outcome(
+                    from_email=from_email,
+                    verified=True,
+                    result="stored_reply_reserved",
+                    aws_request_id=aws_request_id,
+                    message_key=message_key,
+                )
+                message_id = _send_ledgered_reply(email_data, [message_key], stored_reply)
+                ledger_claim = None
+                return {"statusCode": 200, "body": f"Reply sent! Message ID: {message_id}"}
+
+        with span("quota_check"):
+            quota_block_response = check_verified_quota_or_block(from_email, aws_request_id)
         if quota_block_response is not None:
+            if ledger_claim is not None:
+                complete_inbound_message(from_email, ledger_claim["message_key"], INBOUND_LEDGER_SUPPRESSED)
+                ledger_claim = None
             return quota_block_response
 
         athlete_id = ensure_athlete_id_for_email(from_email)
@@ -107,36 +491,41 @@ def lambda_handler(event, context):
             return {"statusCode": 500, "body": "Could not initialize athlete profile state."}
         ensure_progress_snapshot_exists(athlete_id)
 
-        reply_body = get_reply_for_inbound(
-            athlete_id=athlete_id,
-            from_email=from_email,
-            email_data=email_data,
-            aws_request_id=aws_request_id,
-            log_outcome=_log_inbound_outcome,
-        )
-        if reply_body is SUPPRESSED_REPLY:
-            _log_inbound_outcome(
-                from_email=from_email,
-                verified=True,
-                result="reply_suppressed_no_reply_needed",
-                aws_request_id=aws_request_id,
-                athlete_id=athlete_id,
-                message_id=email_data.get("message_id"),
-            )
-            return {"statusCode": 200, "body": "No reply sent because no coaching response was needed."}
-        if reply_body is None:
-            _log_inbound_outcome(
-                from_email=from_email,
-                verified=True,
-                result="reply_suppressed_generation_failed",
-                aws_request_id=aws_request_id,
-                athlete_id=athlete_id,
-                message_id=email_data.get("message_id"),
+        lease: Optional[AthleteLease] = None
+        if ENABLE_ATHLETE_LEASE_LOCK:
+            lease, claim_response = _claim_athlete_turn(
+                email_data,
+                athlete_id,
+                (ledger_claim or {}).get("message_key"),
+                aws_request_id,
             )
-            return {"statusCode": 200, "body": "No reply sent due to response-generation failure."}
-        message_id = EmailReplySender.send_reply(email_data, reply_body, include_thread_context=True)
-        return {"statusCode": 200, "body": f"Reply sent! Message ID: {message_id}"}
+            if claim_response is not None:
+                if claim_response["statusCode"] < 500:
+                    # The lease holder settles this ledger row with its follow-up reply.
+                    ledger_claim = None
+                return claim_response
+
+        ledger_keys = [ledger_claim["message_key"]] if ledger_claim is not None else []
+        try:
+            response, settled = _run_reply_turn(email_data, athlete_id, aws_request_id, ledger_keys, lease)
+        except Exception:
+            if lease is not None:
+                _end_athlete_turn(lease, athlete_id)
+            raise
+        if settled:
+            ledger_claim = None
+        if lease is not None:
+            _drain_coalesced_turns(lease, athlete_id, aws_request_id)
+        return response
 
+    except (CoachProfileFlushError, AthleteLeaseLostError) as e:
+        # The turn's writes were not stored or its lease lapsed; raise so the delivery is retried.
+        logger.error("Lambda execution error: %s", e)
+        raise
     except Exception as e:
         logger.error("Lambda execution error: %s", e)
         return {"statusCode": 500, "body": f"Error: {str(e)}"}
+    finally:
+        # Generation failed or raised: let the next delivery take the message over.
+        if ledger_claim is not None:
+            release_inbound_message(ledger_claim["email"], ledger_claim["message_key"])
@@ -0,0 +1,233 @@
+"""
+Per-athlete lease lock around the reply turn.
+
+A turn reads continuity state and sectioned memory and writes them back, so
+two concurrent turns for one athlete would lose one set of writes. The
+lease is a DynamoDB row with an owner and an expiry that a heartbeat thread
+keeps extending while the turn runs.
+
+Two contention modes:
+- coalesce: a message that finds the lease held is queued on the lease row
+  and the holder folds every queued message into a single follow-up turn.
+  Queued messages the holder cannot answer (a failed turn, or follow-up
+  turns used up) are re-published to the inbound SQS queue.
+- wait: the message polls for the lease and gives up after a bounded wait so
+  the caller can ask for redelivery.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import AWS_REGION
+from dynamodb_models import (
+    acquire_athlete_lease,
+    enqueue_athlete_message,
+    release_athlete_lease_taking_pending,
+    renew_athlete_lease,
+    requeue_athlete_messages,
+    take_pending_or_release_athlete_lease,
+)
+from inbound_message import REPLAYED_EMAIL_FIELD
+
+logger = logging.getLogger(__name__)
+
+LEASE_MODE_COALESCE = "coalesce"
+LEASE_MODE_WAIT = "wait"
+
+TURN_HELD = "held"
+TURN_COALESCED = "coalesced"
+TURN_BUSY = "busy"
+
+COALESCED_BODY_SEPARATOR = "\n\n-----\n\n"
+
+_WAIT_POLL_SECONDS = 0.5
+_COALESCE_ATTEMPTS = 3
+
+
+class AthleteTurnBusyError(RuntimeError):
+    """The lease stayed held past the wait; raised so the delivery is retried."""
+
+
+class AthleteLeaseLostError(AthleteTurnBusyError):
+    """The lease lapsed mid-turn; the turn is abandoned so the delivery is retried."""
+
+
+class AthleteLease:
+    """A held lease plus the heartbeat thread that keeps it alive."""
+
+    def __init__(self, athlete_id: str, owner: str, *, lease_seconds: int, ttl_seconds: int):
+        self.athlete_id = athlete_id
+        self.owner = owner
+        self.lease_seconds = int(lease_seconds)
+        self.ttl_seconds = int(ttl_seconds)
+        self.lost = False
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def try_acquire(self) -> bool:
+        result = acquire_athlete_lease(
+            self.athlete_id,
+            self.owner,
+            lease_seconds=self.lease_seconds,
+            ttl_seconds=self.ttl_seconds,
+        )
+        return bool(result["acquired"])
+
+    def start_heartbeat(self) -> None:
+        interval = max(1.0, self.lease_seconds / 3.0)
+
+        def _beat() -> None:
+            while not self._stop.wait(interval):
+                if not renew_athlete_lease(self.athlete_id, self.owner, lease_seconds=self.lease_seconds):
+                    self.lost = True
+                    logger.warning("athlete_lease_lost athlete_id=%s owner=%s", self.athlete_id, self.owner)
+                    return
+
+        self._heartbeat = threading.Thread(target=_beat, name="athlete-lease-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _stop_heartbeat(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout=1.0)
+
+    def ensure_held(self) -> None:
+        """Raises AthleteLeaseLostError once the heartbeat has lost the lease."""
+        if self.lost:
+            raise AthleteLeaseLostError(f"athlete lease lost for {self.athlete_id}")
+
+    def take_pending_or_release(self) -> List[Dict[str, Any]]:
+        """Returns queued messages (keeping the lease) or releases the lease and returns []."""
+        if self.lost:
+            self._stop_heartbeat()
+            return []
+        pending = take_pending_or_release_athlete_lease(self.athlete_id, self.owner)
+        if not pending:
+            self._stop_heartbeat()
+        return pending
+
+    def release_taking_pending(self) -> List[Dict[str, Any]]:
+        """Expires the lease and returns the messages still queued on it."""
+        self._stop_heartbeat()
+        if self.lost:
+            return []
+        return release_athlete_lease_taking_pending(self.athlete_id, self.owner)
+
+    def requeue(self, messages: Sequence[Dict[str, Any]]) -> bool:
+        """Puts messages back on the lease row for the next holder."""
+        return requeue_athlete_messages(self.athlete_id, messages)
+
+
+@dataclass(frozen=True)
+class TurnClaim:
+    status: str
+    lease: Optional[AthleteLease] = None
+
+
+def claim_athlete_turn(
+    athlete_id: str,
+    pending_message: Dict[str, Any],
+    *,
+    mode: str,
+    lease_seconds: int,
+    ttl_seconds: int,
+    wait_seconds: float,
+    max_pending: int,
+    owner: Optional[str] = None,
+) -> TurnClaim:
+    """
+    Acquires the athlete's lease, or hands ``pending_message`` to the current
+    holder (coalesce mode), or reports the athlete as busy.
+    """
+    lease = AthleteLease(
+        athlete_id,
+        owner or uuid.uuid4().hex,
+        lease_seconds=lease_seconds,
+        ttl_seconds=ttl_seconds,
+    )
+    if mode == LEASE_MODE_WAIT:
+        deadline = time.monotonic() + max(0.0, float(wait_seconds))
+        while True:
+            if lease.try_acquire():
+                lease.start_heartbeat()
+                return TurnClaim(status=TURN_HELD, lease=lease)
+            if time.monotonic() >= deadline:
+                return TurnClaim(status=TURN_BUSY)
+            time.sleep(_WAIT_POLL_SECONDS)
+
+    for _ in range(_COALESCE_ATTEMPTS):
+        if lease.try_acquire():
+            lease.start_heartbeat()
+            return TurnClaim(status=TURN_HELD, lease=lease)
+        if enqueue_athlete_message(athlete_id, pending_message, max_pending=max_pending):
+            return TurnClaim(status=TURN_COALESCED)
+    return TurnClaim(status=TURN_BUSY)
+
+
+_sqs_client: Any = None
+
+
+def _get_sqs_client() -> Any:
+    global _sqs_client
+    if _sqs_client is None:
+        import boto3  # type: ignore
+
+        _sqs_client = boto3.client("sqs", region_name=AWS_REGION)
+    return _sqs_client
+
+
+def replay_athlete_messages(
+    athlete_id: str,
+    messages: Sequence[Dict[str, Any]],
+    *,
+    queue_url: str,
+) -> List[Dict[str, Any]]:
+    """
+    Re-publishes queued messages to the inbound SQS queue, each as its own
+    delivery. Returns the messages that could not be sent.
+    """
+    if not queue_url:
+        return list(messages)
+    unsent: List[Dict[str, Any]] = []
+    for message in messages:
+        kwargs: Dict[str, Any] = {
+            "QueueUrl": queue_url,
+            "MessageBody": json.dumps(
+                {REPLAYED_EMAIL_FIELD: dict(message.get("email_data") or {})},
+                sort_keys=True,
+                default=str,
+            ),
+        }
+        if queue_url.endswith(".fifo"):
+            kwargs["MessageGroupId"] = athlete_id
+            kwargs["MessageDeduplicationId"] = hashlib.sha256(
+                str(message.get("message_key") or kwargs["MessageBody"]).encode("utf-8")
+            ).hexdigest()
+        try:
+            _get_sqs_client().send_message(**kwargs)
+        except Exception as e:
+            logger.error("Error replaying athlete message athlete_id=%s: %s", athlete_id, e)
+            unsent.append(message)
+    return unsent
+
+
+def merge_coalesced_emails(emails: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Folds queued emails into one email_data: the latest email supplies the
+    headers used for threading and the bodies are joined in arrival order.
+    """
+    if not emails:
+        raise ValueError("merge_coalesced_emails requires at least one email")
+    merged = dict(emails[-1])
+    merged["body"] = COALESCED_BODY_SEPARATOR.join(
+        str(email.get("body", "")).strip() for email in emails
+    )
+    return merged
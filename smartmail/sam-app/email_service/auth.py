@@ -19,21 +19,31 @@ from config import (
     VERIFY_TOKEN_TTL_MINUTES,
 )
 from email_copy import EmailCopy
+from lookup_cache import is_lookup_cache_enabled, registration_cache
+from outbound_mail import build_simple_email, deliver
+from telemetry import instrument_aws_resource
 
 logger = logging.getLogger(__name__)
 dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
+instrument_aws_resource(dynamodb)
 
 
 def is_registered(email_address: str) -> bool:
     """
     Checks if the email exists in the DynamoDB 'users' table.
     Returns True if found, False if not found or on error.
+    With ENABLE_LOOKUP_CACHE a positive answer is reused for the cache TTL.
     """
+    cache_enabled = is_lookup_cache_enabled()
+    if cache_enabled and registration_cache.get(email_address.lower()):
+        return True
     try:
         table = dynamodb.Table(USERS_TABLE)
         response = table.get_item(Key={"email_address": email_address.lower()})
         if "Item" in response:
             logger.info("User %s is registered.", email_address)
+            if cache_enabled:
+                registration_cache.put(email_address.lower(), True)
             return True
         logger.info("User %s is not registered.", email_address)
         return False
@@ -96,8 +106,6 @@ class VerificationEmailSender:
 
     @staticmethod
     def send_verification_email(email: str, token_id: str) -> bool:
-        import boto3  # type: ignore
-
         try:
             if not ACTION_BASE_URL:
                 logger.error("ACTION_BASE_URL environment variable not set")
@@ -108,17 +116,15 @@ class VerificationEmailSender:
                 verification_link=verification_link,
                 verify_token_ttl_minutes=VERIFY_TOKEN_TTL_MINUTES,
             )
-            ses_client = boto3.client("ses", region_name=AWS_REGION)
-            ses_client.send_email(
-                Source=from_address,
-                Destination={"ToAddresses": [email]},
-                Message={
-                    "Subject": {"Data": copy["subject"], "Charset": "UTF-8"},
-                    "Body": {
-                        "Text": {"Data": copy["text"], "Charset": "UTF-8"},
-                        "Html": {"Data": copy["html"], "Charset": "UTF-8"},
-                    },
-                },
+            deliver(
+                build_simple_email(
+                    "verification",
+                    source=from_address,
+                    recipient=email,
+                    subject=copy["subject"],
+                    text=copy["text"],
+                    html=copy["html"],
+                )
             )
             logger.info("Verification email sent to %s", email)
             return True
@@ -3,44 +3,121 @@ Business logic: single entry point for "what reply to send."
 Combine profile gating and conversation intelligence in one place.
 Auth, rate limits, and sending stay in auth.py, rate_limits.py, and email_reply_sender.py.
 """
-import hashlib
+import logging
 from datetime import date
 from typing import Optional, Dict, Any, Callable
 
-from coaching import SUPPRESSED_REPLY, build_profile_gated_reply
+from activity_snapshot import mentions_training_details
+from coaching import (
+    SUPPRESSED_REPLY,
+    build_profile_gated_reply,
+    prefetch_profile_updates,
+    profile_intake_pending,
+)
+from inbound_message import build_message_key
 from conversation_intelligence import (
     analyze_conversation_intelligence,
     ConversationIntelligenceError,
 )
 from inbound_rule_router import route_inbound_with_rule_engine
 from dynamodb_models import put_message_intelligence
+from llm_usage import spend_budget_exceeded
+from skills.planner import (
+    SessionCheckinExtractionProposalError,
+    run_session_checkin_extraction_workflow,
+)
+from stage_executor import PipelineStage, StageResult, run_stage_dag, summarize_stage_results
+from telemetry import span
 from config import (
     LIGHTWEIGHT_RESPONSE_MODEL,
     ADVANCED_RESPONSE_MODEL,
     MODEL_ROUTING_LIGHTWEIGHT_MAX_COMPLEXITY,
+    ENABLE_PARALLEL_INBOUND_STAGES,
+    INBOUND_STAGE_TIMEOUT_SECONDS,
+    INBOUND_STAGE_MAX_WORKERS,
 )
 
-def _build_message_key(inbound_message_id: Optional[str], inbound_body: str) -> str:
-    message_id = str(inbound_message_id or "").strip()
-    if message_id:
-        return message_id[:256]
-    body_digest = hashlib.sha256(inbound_body.encode("utf-8")).hexdigest()[:24]
-    return f"bodyhash:{body_digest}"
+logger = logging.getLogger(__name__)
 
-
-def _route_model_by_complexity(complexity_score: int) -> Dict[str, str]:
+def _route_model_by_complexity(complexity_score: int, *, athlete_id: Optional[str] = None) -> Dict[str, str]:
     threshold = max(1, min(int(MODEL_ROUTING_LIGHTWEIGHT_MAX_COMPLEXITY), 4))
     if int(complexity_score) <= threshold:
         return {
             "routing_decision": "lightweight",
             "selected_model": LIGHTWEIGHT_RESPONSE_MODEL,
         }
+    budget_scope = spend_budget_exceeded(athlete_id)
+    if budget_scope is not None:
+        logger.info(
+            "model_route_budget_downgrade athlete_id=%s scope=%s complexity=%s",
+            athlete_id,
+            budget_scope,
+            complexity_score,
+        )
+        return {
+            "routing_decision": f"budget_downgrade_{budget_scope}",
+            "selected_model": LIGHTWEIGHT_RESPONSE_MODEL,
+        }
     return {
         "routing_decision": "advanced",
         "selected_model": ADVANCED_RESPONSE_MODEL,
     }
 
 
+def _run_inbound_stages_in_parallel(athlete_id: str, inbound_body: str) -> Dict[str, StageResult]:
+    """
+    Fans out the LLM stages that depend only on the inbound body.
+
+    Session check-in extraction runs speculatively only when a lexical
+    pre-check finds training details in the body, and profile extraction
+    only while the stored profile still misses required fields. Otherwise
+    each runs on demand, so routes that never reach them (off_topic,
+    safety_concern, suppressed replies) never pay for the call.
+    """
+    stages = [
+        PipelineStage(
+            name="conversation_intelligence",
+            run=lambda _upstream: analyze_conversation_intelligence(inbound_body),
+        ),
+    ]
+    if profile_intake_pending(athlete_id):
+        stages.append(
+            PipelineStage(
+                name="profile_extraction",
+                run=lambda _upstream: prefetch_profile_updates(athlete_id, inbound_body),
+            )
+        )
+    if mentions_training_details(inbound_body):
+        stages.append(
+            PipelineStage(
+                name="session_checkin_extraction",
+                run=lambda _upstream: run_session_checkin_extraction_workflow(inbound_body),
+            )
+        )
+    results = run_stage_dag(
+        stages,
+        max_workers=INBOUND_STAGE_MAX_WORKERS,
+        default_timeout_seconds=INBOUND_STAGE_TIMEOUT_SECONDS,
+    )
+    logger.info(
+        "inbound_stages_completed athlete_id=%s stages=%s",
+        athlete_id,
+        ",".join(summarize_stage_results(results)),
+    )
+    return results
+
+
+def _prefetched_checkin_extraction_fn(result: StageResult) -> Callable[[str], Dict[str, Any]]:
+    def _extract(_inbound_body: str) -> Dict[str, Any]:
+        if result.ok:
+            return result.value
+        if isinstance(result.error, SessionCheckinExtractionProposalError):
+            raise result.error
+        raise SessionCheckinExtractionProposalError(f"session_checkin_extraction_{result.status}")
+
+    return _extract
+
+
 def get_reply_for_inbound(
     athlete_id: str,
     from_email: str,
@@ -57,10 +134,22 @@ def get_reply_for_inbound(
     inbound_body = email_data.get("body", "")
     inbound_subject = email_data.get("subject", "")
     inbound_message_id = str(email_data.get("message_id", "")).strip() or None
-    message_key = _build_message_key(inbound_message_id, inbound_body)
+    message_key = build_message_key(inbound_message_id, inbound_body)
+
+    stage_results: Optional[Dict[str, StageResult]] = None
+    if ENABLE_PARALLEL_INBOUND_STAGES:
+        stage_results = _run_inbound_stages_in_parallel(athlete_id, inbound_body)
 
     try:
-        intelligence = analyze_conversation_intelligence(inbound_body)
+        if stage_results is None:
+            intelligence = analyze_conversation_intelligence(inbound_body)
+        else:
+            intelligence_result = stage_results["conversation_intelligence"]
+            if not intelligence_result.ok:
+                raise ConversationIntelligenceError(
+                    f"conversation_intelligence_{intelligence_result.status}"
+                )
+            intelligence = intelligence_result.value
     except ConversationIntelligenceError:
         if log_outcome is not None:
             log_outcome(
@@ -71,7 +160,7 @@ def get_reply_for_inbound(
             )
         return None
 
-    route = _route_model_by_complexity(intelligence["complexity_score"])
+    route = _route_model_by_complexity(intelligence["complexity_score"], athlete_id=athlete_id)
     stored = put_message_intelligence(
         athlete_id=athlete_id,
         message_id=message_key,
@@ -108,14 +197,21 @@ def get_reply_for_inbound(
             selected_model=route["selected_model"],
         )
 
-    rule_engine_decision = route_inbound_with_rule_engine(
-        athlete_id=athlete_id,
-        from_email=from_email,
-        email_data=email_data,
-        conversation_intelligence=intelligence,
-        aws_request_id=aws_request_id,
-        log_outcome=log_outcome,
-    )
+    route_kwargs: Dict[str, Any] = {}
+    if stage_results is not None and "session_checkin_extraction" in stage_results:
+        route_kwargs["run_checkin_extraction_fn"] = _prefetched_checkin_extraction_fn(
+            stage_results["session_checkin_extraction"]
+        )
+    with span("rule_engine_route"):
+        rule_engine_decision = route_inbound_with_rule_engine(
+            athlete_id=athlete_id,
+            from_email=from_email,
+            email_data=email_data,
+            conversation_intelligence=intelligence,
+            aws_request_id=aws_request_id,
+            log_outcome=log_outcome,
+            **route_kwargs,
+        )
 
     build_kwargs = {
         "athlete_id": athlete_id,
@@ -130,6 +226,9 @@ def get_reply_for_inbound(
     }
     if effective_today is not None:
         build_kwargs["effective_today"] = effective_today
+    profile_result = (stage_results or {}).get("profile_extraction")
+    if profile_result is not None and profile_result.ok:
+        build_kwargs["prefetched_profile_updates"] = profile_result.value
 
     return build_profile_gated_reply(
         **build_kwargs,
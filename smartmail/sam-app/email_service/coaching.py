@@ -5,7 +5,7 @@ Business logic only; auth/verification/rate limits are handled by the handler.
 import hashlib
 import logging
 import json
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, Tuple
 
 from datetime import date
 
@@ -54,6 +54,7 @@ from rule_engine_orchestrator import (
     apply_rule_engine_plan_update,
     run_rule_engine_for_week,
 )
+from prompt_budget import estimate_tokens, prompt_token_budget
 from response_generation_contract import normalize_reply_mode
 from response_generation_assembly import build_response_brief, build_response_generation_input
 from skills.coaching_reasoning import CoachingReasoningError, run_coaching_reasoning_workflow
@@ -61,15 +62,28 @@ from skills.response_generation import (
     ResponseGenerationProposalError,
     run_response_generation_workflow,
 )
-from skills.obedience_eval import run_obedience_eval
-from config import LIGHTWEIGHT_RESPONSE_MODEL
+from skills.obedience_eval import (
+    decide_obedience_eval,
+    prescreen_obedience,
+    prescreen_outcome_label,
+    run_obedience_eval,
+    skipped_obedience_result,
+)
+from config import (
+    ENABLE_OBEDIENCE_PRESCREEN,
+    LIGHTWEIGHT_RESPONSE_MODEL,
+    OBEDIENCE_EVAL_SAMPLE_RATE,
+)
+from inbound_message import SUPPRESSED_REPLY
+from memory_refresh_queue import enqueue_memory_refresh, is_memory_refresh_deferred
 import skills.runtime as skill_runtime
+from telemetry import timed
 
 logger = logging.getLogger(__name__)
 _READ_ONLY_REPLY_INTENTS = {"question"}
 _LIGHTWEIGHT_ACTIONS = {"checkin_ack", "clarify_only"}
 _QUICK_REPLY_ACTIONS = {"checkin_ack"}
-SUPPRESSED_REPLY = object()
+_QUICK_REPLY_MAX_WORDS = 60
 
 # Last obedience eval result — set after each response generation for observability.
 # Consumers (e.g. live_athlete_sim_runner) can read this after each turn.
@@ -222,6 +236,60 @@ def _build_quick_reply_avoid_list(
     return avoid
 
 
+@timed("obedience_gate")
+def _evaluate_obedience(
+    *,
+    athlete_id: str,
+    email_body: str,
+    directive: Dict[str, Any],
+    continuity_context: Optional[Dict[str, Any]],
+    source_texts: Tuple[str, ...],
+    check_content_plan: bool = True,
+    max_words: Optional[int] = None,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Runs the obedience evaluator, behind the deterministic pre-screen when
+    ENABLE_OBEDIENCE_PRESCREEN is on. Returns (result, gate) where gate is the
+    pre-screen decision and tuning outcome, or None when the gate is off.
+    """
+    if not ENABLE_OBEDIENCE_PRESCREEN:
+        result = run_obedience_eval(
+            email_body=email_body,
+            directive=directive,
+            continuity_context=continuity_context,
+        )
+        return result, None
+
+    prescreen = prescreen_obedience(
+        email_body,
+        directive,
+        continuity_context,
+        source_texts=source_texts,
+        check_content_plan=check_content_plan,
+        max_words=max_words,
+    )
+    decision = decide_obedience_eval(prescreen, sample_rate=OBEDIENCE_EVAL_SAMPLE_RATE)
+    if decision.invoke_llm:
+        result = run_obedience_eval(
+            email_body=email_body,
+            directive=directive,
+            continuity_context=continuity_context,
+        )
+    else:
+        result = skipped_obedience_result()
+    outcome = prescreen_outcome_label(decision, result["passed"] if decision.invoke_llm else None)
+    logger.info(
+        "obedience_prescreen athlete_id=%s outcome=%s reason=%s flags=%s word_count=%s sample_rate=%s",
+        athlete_id,
+        outcome,
+        decision.reason,
+        ",".join(prescreen.flags),
+        prescreen.word_count,
+        OBEDIENCE_EVAL_SAMPLE_RATE,
+    )
+    return result, {**decision.to_dict(), "outcome": outcome}
+
+
 def _generate_quick_reply(
     *,
     athlete_id: str,
@@ -311,6 +379,7 @@ def _build_logical_request_id(
     return f"reply_mutation:bodyhash:{body_digest}"
 
 
+@timed("rule_engine_mutation")
 def _maybe_apply_rule_engine_mutation(
     *,
     athlete_id: str,
@@ -408,6 +477,7 @@ def _resolve_reply_mode(
     return normalize_reply_mode("normal_coaching")
 
 
+@timed("coaching_reply")
 def _generate_llm_reply(
     *,
     athlete_id: str,
@@ -498,10 +568,14 @@ def _generate_llm_reply(
                 "tone": "warm, brief",
             }
             try:
-                obedience_result = run_obedience_eval(
+                obedience_result, obedience_gate = _evaluate_obedience(
+                    athlete_id=athlete_id,
                     email_body=quick_reply,
                     directive=quick_directive,
                     continuity_context=current_continuity_context,
+                    source_texts=(inbound_body,),
+                    check_content_plan=False,
+                    max_words=_QUICK_REPLY_MAX_WORDS,
                 )
                 if obedience_result["passed"]:
                     logger.info("quick_reply_obedience_passed athlete_id=%s", athlete_id)
@@ -519,6 +593,8 @@ def _generate_llm_reply(
                     "original_email_body": quick_reply if not obedience_result["passed"] else None,
                     "reasoning": obedience_result["reasoning"],
                 }
+                if obedience_gate is not None:
+                    last_obedience_eval_result["gate"] = obedience_gate
             except Exception:
                 logger.warning(
                     "quick_reply_obedience_error athlete_id=%s — using original",
@@ -540,6 +616,7 @@ def _generate_llm_reply(
                 get_sectioned_memory_fn=get_sectioned_memory,
                 get_continuity_summary_fn=get_continuity_summary,
                 replace_memory_fn=replace_memory,
+                defer_fn=enqueue_memory_refresh if is_memory_refresh_deferred() else None,
             )
             last_pipeline_trace = {
                 "strategist_input": {"reply_mode": reply_mode, "quick_reply": True},
@@ -567,6 +644,8 @@ def _generate_llm_reply(
         intake_completed_this_turn=intake_just_completed and reply_mode == "normal_coaching",
         current_plan=current_plan,
         active_monitoring_rules=active_monitoring_rules,
+        token_budget=prompt_token_budget(selected_model_name),
+        reserved_tokens=estimate_tokens(current_continuity_context),
     )
 
     coaching_result = None
@@ -657,10 +736,12 @@ def _generate_llm_reply(
             logger.info("obedience_eval_skipped athlete_id=%s reason=profile_incomplete", athlete_id)
         else:
             try:
-                obedience_result = run_obedience_eval(
+                obedience_result, obedience_gate = _evaluate_obedience(
+                    athlete_id=athlete_id,
                     email_body=reply,
                     directive=directive,
                     continuity_context=next_continuity_context,
+                    source_texts=(inbound_body,),
                 )
                 original_reply = reply
                 if obedience_result["passed"]:
@@ -681,6 +762,8 @@ def _generate_llm_reply(
                     "original_email_body": original_reply if not obedience_result["passed"] else None,
                     "reasoning": obedience_result["reasoning"],
                 }
+                if obedience_gate is not None:
+                    last_obedience_eval_result["gate"] = obedience_gate
             except Exception:
                 logger.warning("obedience_eval_error athlete_id=%s — using original email", athlete_id, exc_info=True)
                 last_obedience_eval_result = {"passed": None, "error": True}
@@ -722,6 +805,7 @@ def _generate_llm_reply(
             get_sectioned_memory_fn=get_sectioned_memory,
             get_continuity_summary_fn=get_continuity_summary,
             replace_memory_fn=replace_memory,
+            defer_fn=enqueue_memory_refresh if is_memory_refresh_deferred() else None,
         )
     return reply
 
@@ -754,6 +838,21 @@ def _log_response_generation_failure(
     )
 
 
+def profile_intake_pending(athlete_id: str) -> bool:
+    """True while the stored profile still misses required fields."""
+    return bool(get_missing_required_profile_fields(get_coach_profile(athlete_id) or {}))
+
+
+def prefetch_profile_updates(athlete_id: str, inbound_body: str) -> Dict[str, Any]:
+    """Runs profile extraction ahead of the profile gate so it can overlap other LLM stages."""
+    profile_before = get_coach_profile(athlete_id) or {}
+    missing_fields = get_missing_required_profile_fields(profile_before) or None
+    return {
+        "missing_fields": missing_fields,
+        "updates": parse_profile_updates_from_email(inbound_body, missing_fields=missing_fields),
+    }
+
+
 def _apply_profile_updates(
     *,
     athlete_id: str,
@@ -761,7 +860,17 @@ def _apply_profile_updates(
     from_email: str,
     aws_request_id: Optional[str],
     log: Callable[..., None],
+    prefetched_profile_updates: Optional[Dict[str, Any]] = None,
 ) -> tuple[Dict[str, Any], list[str], Dict[str, Any]]:
+    def parse_updates(body: str, *, missing_fields: Optional[list[str]] = None) -> Dict[str, Any]:
+        # The prefetch is only reusable when it was extracted for the same missing fields.
+        if (
+            isinstance(prefetched_profile_updates, dict)
+            and prefetched_profile_updates.get("missing_fields") == missing_fields
+        ):
+            return dict(prefetched_profile_updates.get("updates") or {})
+        return parse_profile_updates_from_email(body, missing_fields=missing_fields)
+
     return apply_profile_updates_phase(
         athlete_id=athlete_id,
         inbound_body=inbound_body,
@@ -770,7 +879,7 @@ def _apply_profile_updates(
         log=log,
         get_profile_fn=get_coach_profile,
         get_missing_fields_fn=get_missing_required_profile_fields,
-        parse_updates_fn=parse_profile_updates_from_email,
+        parse_updates_fn=parse_updates,
         merge_profile_fn=merge_coach_profile_fields,
     )
 
@@ -829,6 +938,7 @@ def build_profile_gated_reply(
     aws_request_id: Optional[str] = None,
     log_outcome: Optional[Callable[..., None]] = None,
     effective_today: Optional[date] = None,
+    prefetched_profile_updates: Optional[Dict[str, Any]] = None,
 ) -> Optional[str]:
     """
     Applies profile updates from the email, then returns the reply text:
@@ -837,6 +947,9 @@ def build_profile_gated_reply(
 
     log_outcome(from_email=..., verified=..., result=..., **kwargs) is called
     for structured logging when provided.
+
+    prefetched_profile_updates is the output of prefetch_profile_updates when
+    profile extraction already ran concurrently with other inbound stages.
     """
     def log(*, result: str, **kwargs: Any) -> None:
         if log_outcome is None:
@@ -849,6 +962,7 @@ def build_profile_gated_reply(
         from_email=from_email,
         aws_request_id=aws_request_id,
         log=log,
+        prefetched_profile_updates=prefetched_profile_updates,
     )
     manual_snapshot = _maybe_store_manual_snapshot(
         athlete_id=athlete_id,
@@ -1,6 +1,8 @@
 """Memory-refresh orchestration helpers for coaching.
 
 Sectioned durable memory: post-reply candidate refresh applies ops to the sectioned store.
+The refresh runs inline by default; with a defer_fn it is handed to
+memory_refresh_queue and applied after the reply has been sent.
 """
 
 import logging
@@ -56,6 +58,40 @@ def build_memory_refresh_context(
     return context
 
 
+def refresh_and_persist_memory(
+    *,
+    athlete_id: str,
+    interaction_context: Dict[str, Any],
+    get_sectioned_memory_fn: Callable[[str], Dict[str, Any]],
+    get_continuity_summary_fn: Callable[[str], Optional[Dict[str, Any]]],
+    replace_memory_fn: Callable[[str, Dict[str, Any], Dict[str, Any]], bool],
+) -> Dict[str, Any]:
+    """
+    Reads current memory, runs the refresh LLM, reduces and writes the result.
+    Raises MemoryRefreshError when the write is rejected.
+    """
+    current_memory = get_sectioned_memory_fn(athlete_id)
+    current_continuity = get_continuity_summary_fn(athlete_id)
+
+    validated = run_sectioned_memory_refresh(
+        current_memory=current_memory,
+        current_continuity=current_continuity,
+        interaction_context=interaction_context,
+    )
+
+    now_epoch = int(time.time())
+    persisted = apply_sectioned_refresh(validated, current_memory, now_epoch)
+
+    write_ok = replace_memory_fn(
+        athlete_id,
+        persisted["sectioned_memory"],
+        persisted["continuity_summary"],
+    )
+    if not write_ok:
+        raise MemoryRefreshError("memory persistence failed")
+    return persisted
+
+
 def maybe_post_reply_memory_refresh(
     *,
     athlete_id: str,
@@ -71,8 +107,14 @@ def maybe_post_reply_memory_refresh(
     get_sectioned_memory_fn: Callable[[str], Dict[str, Any]],
     get_continuity_summary_fn: Callable[[str], Optional[Dict[str, Any]]],
     replace_memory_fn: Callable[[str, Dict[str, Any], Dict[str, Any]], bool],
+    defer_fn: Optional[Callable[[str, Dict[str, Any]], bool]] = None,
 ) -> None:
-    """Runs sectioned candidate memory refresh after response generation."""
+    """
+    Runs sectioned candidate memory refresh after response generation.
+
+    When defer_fn accepts the job the refresh is skipped here; if enqueueing
+    fails the refresh runs inline as before.
+    """
     if not should_attempt_memory_refresh(reply_kind=reply_kind, parsed_updates=parsed_updates):
         log(result="memory_refresh_skipped_by_gate", reply_kind=reply_kind)
         return
@@ -87,27 +129,18 @@ def maybe_post_reply_memory_refresh(
         reply_text=reply_text,
     )
 
-    current_memory = get_sectioned_memory_fn(athlete_id)
-    current_continuity = get_continuity_summary_fn(athlete_id)
+    if defer_fn is not None and defer_fn(athlete_id, interaction_context):
+        log(result="memory_refresh_deferred", reply_kind=reply_kind)
+        return
 
     try:
-        validated = run_sectioned_memory_refresh(
-            current_memory=current_memory,
-            current_continuity=current_continuity,
+        persisted = refresh_and_persist_memory(
+            athlete_id=athlete_id,
             interaction_context=interaction_context,
+            get_sectioned_memory_fn=get_sectioned_memory_fn,
+            get_continuity_summary_fn=get_continuity_summary_fn,
+            replace_memory_fn=replace_memory_fn,
         )
-
-        now_epoch = int(time.time())
-        persisted = apply_sectioned_refresh(validated, current_memory, now_epoch)
-
-        write_ok = replace_memory_fn(
-            athlete_id,
-            persisted["sectioned_memory"],
-            persisted["continuity_summary"],
-        )
-        if not write_ok:
-            raise MemoryRefreshError("memory persistence failed")
-
     except (MemoryRefreshError, SectionedCandidateReducerError) as exc:
         logger.warning("Post-reply memory refresh did not persist: %s", exc)
         log(result="memory_refresh_failed")
@@ -55,3 +55,141 @@ LANGUAGE_RENDER_MODEL = os.getenv("LANGUAGE_RENDER_MODEL", OPENAI_GENERIC_MODEL)
 ENABLE_COACHING_REASONING = (
     os.getenv("ENABLE_COACHING_REASONING", "true").strip().lower() == "true"
 )
+
+# Inbound pipeline fan-out: run conversation intelligence, session check-in
+# extraction and profile extraction concurrently (they only read the inbound body).
+# The two extractions are speculative and start only when likely to be used:
+# check-in extraction when the body mentions training details, profile
+# extraction while the athlete's profile still misses required fields.
+ENABLE_PARALLEL_INBOUND_STAGES = (
+    os.getenv("ENABLE_PARALLEL_INBOUND_STAGES", "false").strip().lower() == "true"
+)
+INBOUND_STAGE_TIMEOUT_SECONDS = float(os.getenv("INBOUND_STAGE_TIMEOUT_SECONDS", "45"))
+INBOUND_STAGE_MAX_WORKERS = int(os.getenv("INBOUND_STAGE_MAX_WORKERS", "3"))
+
+# Idempotent inbound processing: SNS redeliveries of an already claimed
+# message short-circuit before any LLM call. A claim older than the stale
+# window (longer than the Lambda timeout) can be taken over.
+ENABLE_INBOUND_IDEMPOTENCY_LEDGER = (
+    os.getenv("ENABLE_INBOUND_IDEMPOTENCY_LEDGER", "false").strip().lower() == "true"
+)
+INBOUND_LEDGER_STALE_SECONDS = int(os.getenv("INBOUND_LEDGER_STALE_SECONDS", "960"))
+INBOUND_LEDGER_TTL_SECONDS = int(os.getenv("INBOUND_LEDGER_TTL_SECONDS", str(14 * 86400)))
+
+# SQS batch ingestion: distinct senders in one batch are processed concurrently.
+SQS_BATCH_MAX_WORKERS = int(os.getenv("SQS_BATCH_MAX_WORKERS", "4"))
+
+# Per-athlete lease lock around the reply turn. In "coalesce" mode a message
+# that arrives while a turn is running is queued and folded into one follow-up
+# turn; in "wait" mode it waits for the lease, then asks for redelivery.
+# Queued messages the holder does not answer are re-published to
+# ATHLETE_LEASE_REPLAY_QUEUE_URL (the inbound SQS queue read by
+# app.sqs_batch_handler); coalesce mode without it falls back to wait mode,
+# since nothing would redeliver them.
+ENABLE_ATHLETE_LEASE_LOCK = (
+    os.getenv("ENABLE_ATHLETE_LEASE_LOCK", "false").strip().lower() == "true"
+)
+ATHLETE_LEASE_MODE = os.getenv("ATHLETE_LEASE_MODE", "coalesce").strip().lower()
+ATHLETE_LEASE_SECONDS = int(os.getenv("ATHLETE_LEASE_SECONDS", "60"))
+ATHLETE_LEASE_TTL_SECONDS = int(os.getenv("ATHLETE_LEASE_TTL_SECONDS", "86400"))
+ATHLETE_LEASE_WAIT_SECONDS = float(os.getenv("ATHLETE_LEASE_WAIT_SECONDS", "20"))
+ATHLETE_LEASE_MAX_PENDING = int(os.getenv("ATHLETE_LEASE_MAX_PENDING", "10"))
+ATHLETE_LEASE_MAX_FOLLOW_UP_TURNS = int(os.getenv("ATHLETE_LEASE_MAX_FOLLOW_UP_TURNS", "3"))
+ATHLETE_LEASE_REPLAY_QUEUE_URL = os.getenv("ATHLETE_LEASE_REPLAY_QUEUE_URL", "").strip()
+
+# Post-reply memory refresh: "sync" runs the sectioned-memory LLM before the
+# reply is sent; "deferred" enqueues it (SQS when MEMORY_REFRESH_QUEUE_URL is
+# set, otherwise an in-process queue drained after the send).
+MEMORY_REFRESH_MODE = os.getenv("MEMORY_REFRESH_MODE", "sync").strip().lower()
+MEMORY_REFRESH_QUEUE_URL = os.getenv("MEMORY_REFRESH_QUEUE_URL", "").strip()
+MEMORY_REFRESH_MAX_VERSION_RETRIES = int(os.getenv("MEMORY_REFRESH_MAX_VERSION_RETRIES", "1"))
+
+# Obedience evaluation gate: a deterministic pre-screen runs first and the LLM
+# evaluator only runs for flagged replies or a sampled share of clean ones.
+ENABLE_OBEDIENCE_PRESCREEN = (
+    os.getenv("ENABLE_OBEDIENCE_PRESCREEN", "false").strip().lower() == "true"
+)
+OBEDIENCE_EVAL_SAMPLE_RATE = float(os.getenv("OBEDIENCE_EVAL_SAMPLE_RATE", "0.1"))
+
+# Coalesce a reply turn's coach_profiles writes into one state_version-guarded
+# UpdateItem (or the plan-update transaction) instead of one write per call.
+ENABLE_COACH_PROFILE_UNIT_OF_WORK = (
+    os.getenv("ENABLE_COACH_PROFILE_UNIT_OF_WORK", "false").strip().lower() == "true"
+)
+
+# Token-budgeted response brief: memory facts are trimmed (context →
+# preferences → schedule) to fit a per-model token budget. Per-model
+# overrides are "model=tokens" pairs separated by commas.
+ENABLE_PROMPT_TOKEN_BUDGET = (
+    os.getenv("ENABLE_PROMPT_TOKEN_BUDGET", "false").strip().lower() == "true"
+)
+PROMPT_TOKEN_BUDGET_DEFAULT = int(os.getenv("PROMPT_TOKEN_BUDGET_DEFAULT", "6000"))
+PROMPT_TOKEN_BUDGETS = os.getenv("PROMPT_TOKEN_BUDGETS", "").strip()
+
+# Per-request latency telemetry: stage spans, DynamoDB/SES call timings, LLM
+# token usage, retries and cache hits are collected per inbound email and
+# printed as one CloudWatch Embedded Metric Format (EMF) record.
+ENABLE_REQUEST_TELEMETRY = (
+    os.getenv("ENABLE_REQUEST_TELEMETRY", "false").strip().lower() == "true"
+)
+TELEMETRY_NAMESPACE = os.getenv("TELEMETRY_NAMESPACE", "SmartMail/EmailService").strip()
+TELEMETRY_SERVICE_NAME = os.getenv("TELEMETRY_SERVICE_NAME", "email_service").strip()
+
+# LLM cost accounting: token usage of every skill call is priced per model
+# and added to a per-athlete (and fleet-wide) daily rollup in DynamoDB.
+# Prices are USD per 1M tokens as "model=input:cached_input:output" pairs
+# separated by commas. A daily budget of 0 disables that check; once a
+# budget is exceeded, replies that would use ADVANCED_RESPONSE_MODEL are
+# routed to LIGHTWEIGHT_RESPONSE_MODEL for the rest of the day.
+ENABLE_LLM_COST_ACCOUNTING = (
+    os.getenv("ENABLE_LLM_COST_ACCOUNTING", "false").strip().lower() == "true"
+)
+LLM_USAGE_ROLLUP_TTL_DAYS = int(os.getenv("LLM_USAGE_ROLLUP_TTL_DAYS", "90"))
+LLM_MODEL_PRICES = os.getenv(
+    "LLM_MODEL_PRICES",
+    "gpt-5=1.25:0.125:10,gpt-5-mini=0.25:0.025:2,gpt-5-nano=0.05:0.005:0.4",
+).strip()
+LLM_ATHLETE_DAILY_BUDGET_USD = float(os.getenv("LLM_ATHLETE_DAILY_BUDGET_USD", "0"))
+LLM_FLEET_DAILY_BUDGET_USD = float(os.getenv("LLM_FLEET_DAILY_BUDGET_USD", "0"))
+
+# Inbound reply splitting: the email body handed to the skills keeps only the
+# athlete's new text; quoted thread history, signatures and disclaimers are
+# split off (quoted history is kept on email_data["quoted_body"]).
+ENABLE_REPLY_QUOTE_STRIPPING = (
+    os.getenv("ENABLE_REPLY_QUOTE_STRIPPING", "false").strip().lower() == "true"
+)
+
+# Inbound messages too large for SES to inline (the S3 receipt action) are
+# streamed from S3 in chunks of this size.
+INBOUND_S3_READ_CHUNK_BYTES = int(os.getenv("INBOUND_S3_READ_CHUNK_BYTES", "65536"))
+
+# Outbound mail: "sync" sends through SES inline; "queued" enqueues the raw
+# message on OUTBOUND_MAIL_QUEUE_URL and returns (consumed by
+# outbound_mail.sqs_outbound_mail_handler). Queued mode without a queue URL
+# sends inline, since nothing would retry a failed send. Sends are paced by a token bucket at
+# OUTBOUND_SES_MAX_SEND_RATE (the account's SES max send rate, per second)
+# and retried with exponential backoff when SES throttles.
+OUTBOUND_MAIL_MODE = os.getenv("OUTBOUND_MAIL_MODE", "sync").strip().lower()
+OUTBOUND_MAIL_QUEUE_URL = os.getenv("OUTBOUND_MAIL_QUEUE_URL", "").strip()
+OUTBOUND_SES_MAX_SEND_RATE = float(os.getenv("OUTBOUND_SES_MAX_SEND_RATE", "14"))
+OUTBOUND_SEND_MAX_ATTEMPTS = int(os.getenv("OUTBOUND_SEND_MAX_ATTEMPTS", "4"))
+OUTBOUND_SEND_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOUND_SEND_BACKOFF_BASE_SECONDS", "0.5"))
+OUTBOUND_SEND_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOUND_SEND_BACKOFF_MAX_SECONDS", "8"))
+OUTBOUND_MAIL_STATUS_TTL_DAYS = int(os.getenv("OUTBOUND_MAIL_STATUS_TTL_DAYS", "30"))
+
+# Verified-quota negative cache: once a sender is over quota, this container
+# blocks them without a rate_limits claim until the hour (or day) bucket
+# they exceeded rolls over.
+ENABLE_QUOTA_NEGATIVE_CACHE = (
+    os.getenv("ENABLE_QUOTA_NEGATIVE_CACHE", "false").strip().lower() == "true"
+)
+QUOTA_NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTA_NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
+
+# Warm-container lookup caches: registration, verified-session expiry and the
+# email -> athlete_id mapping are remembered per container, and the
+# idempotent ensure_* writes are skipped once a record is known to exist.
+ENABLE_LOOKUP_CACHE = (
+    os.getenv("ENABLE_LOOKUP_CACHE", "false").strip().lower() == "true"
+)
+LOOKUP_CACHE_TTL_SECONDS = float(os.getenv("LOOKUP_CACHE_TTL_SECONDS", "300"))
+LOOKUP_CACHE_MAX_ENTRIES = int(os.getenv("LOOKUP_CACHE_MAX_ENTRIES", "5000"))
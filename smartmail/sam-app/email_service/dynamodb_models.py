@@ -17,13 +17,25 @@ import uuid
 import json
 import hashlib
 import math
+import random
+import threading
+from copy import deepcopy
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
 from datetime import date, datetime, timezone
-from typing import Optional, Dict, Any, List
+from typing import Optional, Callable, Dict, Any, Iterator, List, Sequence, Tuple
 from botocore.exceptions import ClientError
 import boto3
 from boto3.dynamodb.conditions import Key
-from boto3.dynamodb.types import TypeSerializer
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from telemetry import increment, instrument_aws_resource
+from lookup_cache import (
+    athlete_id_cache,
+    is_lookup_cache_enabled,
+    progress_snapshot_cache,
+    verified_session_cache,
+)
 from sectioned_memory_contract import (
     ContinuitySummary,
     SectionedMemoryContractError,
@@ -39,6 +51,7 @@ logger = logging.getLogger()
 
 # Initialize DynamoDB resource
 dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-west-2"))
+instrument_aws_resource(dynamodb)
 
 # Table names
 COACH_PROFILES_TABLE = os.getenv("COACH_PROFILES_TABLE_NAME", "coach_profiles")
@@ -60,6 +73,482 @@ MANUAL_ACTIVITY_SNAPSHOTS_TABLE = os.getenv(
     "MANUAL_ACTIVITY_SNAPSHOTS_TABLE_NAME", "manual_activity_snapshots"
 )
 PROGRESS_SNAPSHOTS_TABLE = os.getenv("PROGRESS_SNAPSHOTS_TABLE_NAME", "progress_snapshots")
+RULE_STATE_TABLE = os.getenv("RULE_STATE_TABLE_NAME", "rule_state")
+INBOUND_LEDGER_TABLE = os.getenv("INBOUND_LEDGER_TABLE_NAME", "inbound_message_ledger")
+ATHLETE_LOCKS_TABLE = os.getenv("ATHLETE_LOCKS_TABLE_NAME", "athlete_locks")
+LLM_USAGE_ROLLUPS_TABLE = os.getenv("LLM_USAGE_ROLLUPS_TABLE_NAME", "llm_usage_rollups")
+OUTBOUND_MAIL_STATUS_TABLE = os.getenv("OUTBOUND_MAIL_STATUS_TABLE_NAME", "outbound_mail_status")
+
+
+# ============================================================================
+# REQUEST-SCOPED ATHLETE STATE SNAPSHOT
+# ============================================================================
+
+_MISSING = object()
+
+# BatchGetItem rounds for a snapshot before unprocessed keys fall back to GetItem.
+_SNAPSHOT_BATCH_MAX_ATTEMPTS = 3
+_SNAPSHOT_BACKOFF_BASE_SECONDS = 0.05
+_SNAPSHOT_BACKOFF_MAX_SECONDS = 1.0
+
+
+def _unprocessed_keys_backoff(attempt: int) -> float:
+    """Full-jitter exponential delay before retrying unprocessed keys."""
+    ceiling = min(_SNAPSHOT_BACKOFF_MAX_SECONDS, _SNAPSHOT_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class AthleteStateSnapshot:
+    """
+    Request-scoped read cache for one athlete's per-turn state.
+
+    Loads the coach_profiles, athlete_identities, rule_state and
+    progress_snapshots items through a single BatchGetItem. Accessors serve
+    reads from memory; writes in the same request invalidate the affected
+    table so the next read goes back to DynamoDB.
+    """
+
+    def __init__(self, athlete_id: str, email: Optional[str] = None):
+        self.athlete_id = athlete_id
+        self.email = canonicalize_email(email) if email else ""
+        self._items: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.batch_reads = 0
+        # Parallel pipeline stages share one snapshot through copied contexts.
+        self._lock = threading.RLock()
+
+    def _keys(self) -> Dict[str, Dict[str, Any]]:
+        keys: Dict[str, Dict[str, Any]] = {
+            COACH_PROFILES_TABLE: {"athlete_id": self.athlete_id},
+            RULE_STATE_TABLE: {"athlete_id": self.athlete_id},
+            PROGRESS_SNAPSHOTS_TABLE: {"athlete_id": self.athlete_id},
+        }
+        if self.email:
+            keys[ATHLETE_IDENTITIES_TABLE] = {"email": self.email}
+        return keys
+
+    def load(self) -> bool:
+        """
+        Loads every table not already cached in one BatchGetItem round trip.
+        Unprocessed keys are retried with jittered backoff a bounded number of
+        times, then read with GetItem.
+        """
+        with self._lock:
+            return self._load_locked()
+
+    def _load_locked(self) -> bool:
+        pending = {
+            table_name: key
+            for table_name, key in self._keys().items()
+            if table_name not in self._items
+        }
+        if not pending:
+            return True
+        request_items: Dict[str, Any] = {
+            table_name: {"Keys": [key], "ConsistentRead": True}
+            for table_name, key in pending.items()
+        }
+        loaded: Dict[str, Optional[Dict[str, Any]]] = {}
+        try:
+            for attempt in range(_SNAPSHOT_BATCH_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(_unprocessed_keys_backoff(attempt - 1))
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+                self.batch_reads += 1
+                for table_name, items in (response.get("Responses") or {}).items():
+                    loaded[table_name] = items[0] if items else None
+                request_items = response.get("UnprocessedKeys") or {}
+                if not request_items:
+                    break
+            if request_items:
+                # Still throttled after the bounded retries: read the rest one item at a time.
+                logger.warning(
+                    "athlete_state_snapshot_unprocessed_keys athlete_id=%s tables=%s",
+                    self.athlete_id,
+                    ",".join(sorted(request_items)),
+                )
+                for table_name, spec in request_items.items():
+                    for key in spec.get("Keys") or []:
+                        response = dynamodb.Table(table_name).get_item(Key=key, ConsistentRead=True)
+                        loaded[table_name] = response.get("Item")
+        except ClientError as e:
+            logger.error(f"Error loading athlete state snapshot athlete_id={self.athlete_id}: {e}")
+            return False
+        for table_name in pending:
+            self._items[table_name] = loaded.get(table_name)
+        return True
+
+    def get_item(self, table_name: str) -> Any:
+        """Returns the cached raw item (or None), or _MISSING when the table is not served."""
+        if table_name not in self._keys():
+            return _MISSING
+        with self._lock:
+            if table_name not in self._items and not self._load_locked():
+                return _MISSING
+            return deepcopy(self._items.get(table_name))
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        with self._lock:
+            if table_name is None:
+                self._items.clear()
+                return
+            self._items.pop(table_name, None)
+
+
+_active_snapshot: ContextVar[Optional[AthleteStateSnapshot]] = ContextVar(
+    "athlete_state_snapshot", default=None
+)
+
+
+@contextmanager
+def athlete_state_snapshot(athlete_id: str, email: Optional[str] = None) -> Iterator[AthleteStateSnapshot]:
+    """Activates a request-scoped AthleteStateSnapshot for the enclosed block."""
+    snapshot = AthleteStateSnapshot(athlete_id, email=email)
+    token = _active_snapshot.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _active_snapshot.reset(token)
+
+
+def get_active_athlete_state_snapshot(athlete_id: str) -> Optional[AthleteStateSnapshot]:
+    snapshot = _active_snapshot.get()
+    if snapshot is None or snapshot.athlete_id != athlete_id:
+        return None
+    return snapshot
+
+
+def lookup_athlete_state_snapshot(
+    athlete_id: str,
+    table_name: str,
+) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """Returns (hit, item) for the active snapshot; hit is False when the caller must read DynamoDB."""
+    snapshot = get_active_athlete_state_snapshot(athlete_id)
+    if snapshot is None:
+        return False, None
+    item = snapshot.get_item(table_name)
+    if item is _MISSING:
+        return False, None
+    increment("state_snapshot_hits")
+    return True, item
+
+
+def invalidate_athlete_state_snapshot(athlete_id: str, table_name: str) -> None:
+    snapshot = get_active_athlete_state_snapshot(athlete_id)
+    if snapshot is not None:
+        snapshot.invalidate(table_name)
+
+
+# ============================================================================
+# COACH PROFILE UNIT OF WORK
+# ============================================================================
+
+_STATE_VERSION_MAX_ATTEMPTS = 2
+
+
+def _coach_profile_set_parts(
+    sets: Dict[str, Any],
+    increments: Optional[Dict[str, int]] = None,
+) -> Tuple[List[str], Dict[str, str], Dict[str, Any]]:
+    """SET clauses, names and values for plain attribute writes plus the state_version bump."""
+    clauses: List[str] = []
+    names: Dict[str, str] = {"#state_version": "state_version"}
+    values: Dict[str, Any] = {":sv_zero": 0, ":sv_one": 1}
+    for index, (attribute, value) in enumerate(sets.items()):
+        names[f"#u{index}"] = attribute
+        values[f":u{index}"] = value
+        if attribute == "created_at":
+            clauses.append(f"#u{index} = if_not_exists(#u{index}, :u{index})")
+        else:
+            clauses.append(f"#u{index} = :u{index}")
+    for index, (attribute, delta) in enumerate((increments or {}).items()):
+        names[f"#i{index}"] = attribute
+        values[f":i{index}"] = int(delta)
+        clauses.append(f"#i{index} = if_not_exists(#i{index}, :sv_zero) + :i{index}")
+    clauses.append("#state_version = if_not_exists(#state_version, :sv_zero) + :sv_one")
+    return clauses, names, values
+
+
+def _state_version_condition(expected_version: int, values: Dict[str, Any]) -> str:
+    values[":expected_state_version"] = int(expected_version)
+    if int(expected_version) == 0:
+        return "(attribute_not_exists(#state_version) OR #state_version = :expected_state_version)"
+    return "#state_version = :expected_state_version"
+
+
+def _item_state_version(item: Optional[Dict[str, Any]]) -> int:
+    try:
+        return int((item or {}).get("state_version") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+# Written by every coach_profiles write, so a concurrent change to them is not a conflict.
+_UNIT_OF_WORK_BOOKKEEPING_ATTRIBUTES = frozenset({"created_at", "updated_at"})
+
+
+class CoachProfileFlushError(RuntimeError):
+    """Buffered coach_profiles writes could not be written; the turn should be retried."""
+
+
+class CoachProfileUnitOfWork:
+    """
+    Write-coalescing unit of work for one athlete's coach_profiles item.
+
+    While active, plain attribute writes (profile fields, memory, continuity
+    state) are buffered instead of written; later writes to an attribute
+    replace earlier ones and profile reads see the buffer overlaid. flush()
+    writes the buffer as one UpdateItem guarded by the state_version read
+    before the first buffered write, and a plan update folds the buffer into
+    its TransactWriteItems. Every coach_profiles write bumps state_version.
+
+    On a state_version conflict the item is re-read and the buffer is
+    re-based onto it only when the concurrent write left every buffered
+    attribute as it was first read; otherwise the unit refuses to write.
+    """
+
+    def __init__(self, athlete_id: str):
+        self.athlete_id = athlete_id
+        self._sets: Dict[str, Any] = {}
+        self._increments: Dict[str, int] = {}
+        self._expected_version: Optional[int] = None
+        # The stored item as of _expected_version; conflicts are judged against it.
+        self._base: Dict[str, Any] = {}
+        self._folded_sets: Dict[str, Any] = {}
+        self._folded_increments: Dict[str, int] = {}
+        self.conflicted = False
+        self.writes_buffered = 0
+        self._writes_at_fold = 0
+        self.round_trips = 0
+        # Parallel pipeline stages share one unit of work through copied contexts.
+        self._lock = threading.RLock()
+
+    @property
+    def pending(self) -> bool:
+        with self._lock:
+            return bool(self._sets or self._increments)
+
+    def stage(self, sets: Dict[str, Any], increments: Optional[Dict[str, int]] = None) -> None:
+        with self._lock:
+            if self._expected_version is None:
+                self._read_base()
+            self._sets.update(deepcopy(sets))
+            for attribute, delta in (increments or {}).items():
+                self._increments[attribute] = self._increments.get(attribute, 0) + int(delta)
+            self.writes_buffered += 1
+
+    def _read_base(self) -> None:
+        item = _get_stored_coach_profile(self.athlete_id) or {}
+        self._base = deepcopy(item)
+        self._expected_version = _item_state_version(item)
+
+    def overlay(self, item: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Returns ``item`` as it will read once the buffer is written."""
+        with self._lock:
+            if not (self._sets or self._increments):
+                return item
+            merged = dict(item or {})
+            merged["athlete_id"] = self.athlete_id
+            for attribute, value in self._sets.items():
+                if attribute == "created_at" and attribute in merged:
+                    continue
+                merged[attribute] = deepcopy(value)
+            for attribute, delta in self._increments.items():
+                merged[attribute] = int(merged.get(attribute) or 0) + delta
+            merged["state_version"] = int(self._expected_version or 0) + 1
+            return merged
+
+    def fold(self, sets: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, int], int]:
+        """Buffer plus ``sets`` (which win) and the expected state_version, for a caller-issued write."""
+        with self._lock:
+            if self.conflicted:
+                raise CoachProfileFlushError(
+                    f"coach_profiles writes for athlete_id={self.athlete_id} conflict with a concurrent write"
+                )
+            if self._expected_version is None:
+                self._read_base()
+            self._writes_at_fold = self.writes_buffered
+            merged = dict(self._sets)
+            merged.update(sets)
+            self._folded_sets = deepcopy(merged)
+            self._folded_increments = dict(self._increments)
+            return merged, dict(self._increments), self._expected_version
+
+    def mark_written(self, state_version: int) -> None:
+        """
+        Records a write that carried the folded buffer. Writes staged after
+        the fold stay buffered: their sets along with the earlier ones
+        (re-sending earlier values is harmless), but only the increments
+        staged since the fold, since the written ones were already applied.
+        """
+        with self._lock:
+            if self.writes_buffered == self._writes_at_fold:
+                self._sets.clear()
+                self._increments.clear()
+                self.writes_buffered = 0
+            else:
+                for attribute, delta in self._folded_increments.items():
+                    remaining = self._increments.get(attribute, 0) - delta
+                    if remaining:
+                        self._increments[attribute] = remaining
+                    else:
+                        self._increments.pop(attribute, None)
+            self._writes_at_fold = self.writes_buffered
+            self._base.update(self._folded_sets)
+            self._base["state_version"] = int(state_version)
+            self._folded_sets = {}
+            self._folded_increments = {}
+            self._expected_version = int(state_version)
+            self.round_trips += 1
+
+    def observe_direct_write(self, state_version: int) -> None:
+        """Advances the expected version past an unbuffered write when nothing else wrote in between."""
+        with self._lock:
+            if self._expected_version is not None and int(state_version) == self._expected_version + 1:
+                self._expected_version = int(state_version)
+
+    def mark_conflict(self) -> bool:
+        """
+        Re-reads the item after a state_version conflict and re-bases the
+        buffer onto it. Returns False, and marks the unit conflicted, when the
+        concurrent write changed an attribute the buffer also sets: writing
+        the buffer would then silently overwrite that change.
+        """
+        with self._lock:
+            self.round_trips += 1
+            self._folded_sets = {}
+            self._folded_increments = {}
+            current = _get_stored_coach_profile(self.athlete_id) or {}
+            overlapping = sorted(
+                attribute
+                for attribute in self._sets
+                if attribute not in _UNIT_OF_WORK_BOOKKEEPING_ATTRIBUTES
+                and current.get(attribute) != self._base.get(attribute)
+            )
+            if overlapping:
+                logger.warning(
+                    "coach_profile_unit_of_work_conflict athlete_id=%s attributes=%s",
+                    self.athlete_id,
+                    ",".join(overlapping),
+                )
+                self.conflicted = True
+                return False
+            self._base = deepcopy(current)
+            self._expected_version = _item_state_version(current)
+            return True
+
+    def flush(self) -> bool:
+        """
+        Writes the buffer in one conditional UpdateItem, re-basing it after a
+        state_version conflict. False means the buffered writes were not written.
+        """
+        with self._lock:
+            if not (self._sets or self._increments):
+                return True
+            if self.conflicted:
+                return False
+            table = dynamodb.Table(COACH_PROFILES_TABLE)
+            for attempt in range(_STATE_VERSION_MAX_ATTEMPTS):
+                if self._expected_version is None:
+                    self._read_base()
+                expected = self._expected_version
+                clauses, names, values = _coach_profile_set_parts(self._sets, self._increments)
+                condition = _state_version_condition(expected, values)
+                invalidate_athlete_state_snapshot(self.athlete_id, COACH_PROFILES_TABLE)
+                try:
+                    table.update_item(
+                        Key={"athlete_id": self.athlete_id},
+                        UpdateExpression="SET " + ", ".join(clauses),
+                        ConditionExpression=condition,
+                        ExpressionAttributeNames=names,
+                        ExpressionAttributeValues=serialize_dynamodb_payload(values),
+                    )
+                except ClientError as e:
+                    if _is_conditional_check_failure(e):
+                        logger.warning(
+                            "coach_profile_state_version_conflict athlete_id=%s expected_version=%s attempt=%s",
+                            self.athlete_id,
+                            expected,
+                            attempt + 1,
+                        )
+                        if not self.mark_conflict():
+                            return False
+                        continue
+                    logger.error(f"Error flushing coach profile writes for athlete_id={self.athlete_id}: {e}")
+                    self.round_trips += 1
+                    return False
+                logger.info(
+                    "coach_profile_unit_of_work_flushed athlete_id=%s writes=%s attributes=%s state_version=%s",
+                    self.athlete_id,
+                    self.writes_buffered,
+                    len(self._sets) + len(self._increments),
+                    expected + 1,
+                )
+                self._sets.clear()
+                self._increments.clear()
+                self.writes_buffered = 0
+                self._writes_at_fold = 0
+                self._expected_version = expected + 1
+                self.round_trips += 1
+                return True
+            logger.error(
+                "coach_profile_unit_of_work_gave_up athlete_id=%s reason=state_version_conflicts",
+                self.athlete_id,
+            )
+            return False
+
+
+_active_unit_of_work: ContextVar[Optional[CoachProfileUnitOfWork]] = ContextVar(
+    "coach_profile_unit_of_work", default=None
+)
+
+
+@contextmanager
+def coach_profile_unit_of_work(
+    athlete_id: str,
+    *,
+    guard: Optional[Callable[[], None]] = None,
+) -> Iterator[CoachProfileUnitOfWork]:
+    """
+    Buffers the enclosed block's coach_profiles writes for ``athlete_id`` and
+    flushes them on exit, including when the block raises (the writes would
+    already have landed without the unit of work). Raises
+    CoachProfileFlushError when the block succeeded but the flush did not,
+    so the turn fails and is retried instead of dropping its writes.
+
+    ``guard`` runs before the flush; when it raises, the buffered writes are
+    dropped and its error propagates.
+    """
+    unit = CoachProfileUnitOfWork(athlete_id)
+    token = _active_unit_of_work.set(unit)
+    try:
+        yield unit
+    finally:
+        _active_unit_of_work.reset(token)
+        if guard is not None:
+            guard()
+        flushed = unit.flush()
+    if not flushed:
+        raise CoachProfileFlushError(f"coach_profiles writes for athlete_id={athlete_id} were not written")
+
+
+def get_active_coach_profile_unit_of_work(athlete_id: str) -> Optional[CoachProfileUnitOfWork]:
+    unit = _active_unit_of_work.get()
+    if unit is None or unit.athlete_id != athlete_id:
+        return None
+    return unit
+
+
+def _stage_coach_profile_write(
+    athlete_id: str,
+    sets: Dict[str, Any],
+    increments: Optional[Dict[str, int]] = None,
+) -> bool:
+    """Buffers the write when a unit of work is active for the athlete; False means write now."""
+    unit = get_active_coach_profile_unit_of_work(athlete_id)
+    if unit is None:
+        return False
+    unit.stage(sets, increments)
+    return True
 
 
 # ============================================================================
@@ -90,6 +579,7 @@ _PROFILE_TEXT_FIELDS = {
 
 
 _TYPE_SERIALIZER = TypeSerializer()
+_TYPE_DESERIALIZER = TypeDeserializer()
 
 
 def canonicalize_email(email: str) -> str:
@@ -156,6 +646,10 @@ def _to_dynamodb_decimal(value: Any) -> Optional[Decimal]:
     return Decimal(str(numeric))
 
 
+def _is_conditional_check_failure(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code", "") == "ConditionalCheckFailedException"
+
+
 def serialize_dynamodb_payload(value: Any) -> Any:
     if isinstance(value, bool):
         return value
@@ -321,10 +815,20 @@ def get_athlete_id_for_email(email: str) -> Optional[str]:
     canonical_email = canonicalize_email(email)
     if not canonical_email:
         return None
+    if is_lookup_cache_enabled():
+        cached_athlete_id = athlete_id_cache.get(canonical_email)
+        if cached_athlete_id:
+            return cached_athlete_id
     try:
-        table = dynamodb.Table(ATHLETE_IDENTITIES_TABLE)
-        response = table.get_item(Key={"email": canonical_email})
-        item = response.get("Item", {})
+        snapshot = _active_snapshot.get()
+        item: Any = _MISSING
+        if snapshot is not None and snapshot.email == canonical_email:
+            item = snapshot.get_item(ATHLETE_IDENTITIES_TABLE)
+        if item is _MISSING:
+            table = dynamodb.Table(ATHLETE_IDENTITIES_TABLE)
+            response = table.get_item(Key={"email": canonical_email})
+            item = response.get("Item")
+        item = item or {}
         athlete_id = item.get("athlete_id")
         if isinstance(athlete_id, str) and athlete_id.strip():
             return athlete_id
@@ -337,10 +841,17 @@ def get_athlete_id_for_email(email: str) -> Optional[str]:
 def ensure_athlete_id_for_email(email: str) -> Optional[str]:
     """
     Ensures email -> athlete_id mapping exists and an athlete-keyed profile shell exists.
+    With ENABLE_LOOKUP_CACHE both writes are skipped once this container has
+    ensured them for the email.
     """
     canonical_email = canonicalize_email(email)
     if not canonical_email:
         return None
+    cache_enabled = is_lookup_cache_enabled()
+    if cache_enabled:
+        cached_athlete_id = athlete_id_cache.get(canonical_email)
+        if cached_athlete_id:
+            return cached_athlete_id
     try:
         identity_table = dynamodb.Table(ATHLETE_IDENTITIES_TABLE)
         now = int(time.time())
@@ -369,6 +880,8 @@ def ensure_athlete_id_for_email(email: str) -> Optional[str]:
         if not isinstance(athlete_id, str) or not athlete_id.strip():
             return None
 
+        invalidate_athlete_state_snapshot(athlete_id, ATHLETE_IDENTITIES_TABLE)
+        invalidate_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
         profile_table = dynamodb.Table(COACH_PROFILES_TABLE)
         profile_table.update_item(
             Key={"athlete_id": athlete_id},
@@ -384,7 +897,8 @@ def ensure_athlete_id_for_email(email: str) -> Optional[str]:
                     #accountability_preferences = if_not_exists(#accountability_preferences, :accountability_preferences),
                     #feedback_style_preference = if_not_exists(#feedback_style_preference, :feedback_style_preference),
                     #coach_expectations = if_not_exists(#coach_expectations, :coach_expectations),
-                    #response_cadence_expectation = if_not_exists(#response_cadence_expectation, :response_cadence_expectation)
+                    #response_cadence_expectation = if_not_exists(#response_cadence_expectation, :response_cadence_expectation),
+                    #state_version = if_not_exists(#state_version, :zero) + :one
             """,
             ExpressionAttributeNames={
                 "#created_at": "created_at",
@@ -399,6 +913,7 @@ def ensure_athlete_id_for_email(email: str) -> Optional[str]:
                 "#feedback_style_preference": "feedback_style_preference",
                 "#coach_expectations": "coach_expectations",
                 "#response_cadence_expectation": "response_cadence_expectation",
+                "#state_version": "state_version",
             },
             ExpressionAttributeValues=serialize_dynamodb_payload({
                 ":created_at": now,
@@ -413,8 +928,12 @@ def ensure_athlete_id_for_email(email: str) -> Optional[str]:
                 ":feedback_style_preference": "",
                 ":coach_expectations": "",
                 ":response_cadence_expectation": "unknown",
+                ":zero": 0,
+                ":one": 1,
             }),
         )
+        if cache_enabled:
+            athlete_id_cache.put(canonical_email, athlete_id)
         return athlete_id
     except ClientError as e:
         logger.error(f"Error ensuring athlete_id for {email}: {e}")
@@ -423,16 +942,10 @@ def ensure_athlete_id_for_email(email: str) -> Optional[str]:
 
 def get_coach_profile(athlete_id: str) -> Optional[Dict[str, Any]]:
     """Retrieves an athlete profile by athlete_id."""
-    try:
-        table = dynamodb.Table(COACH_PROFILES_TABLE)
-        response = table.get_item(Key={"athlete_id": athlete_id})
-        item = response.get("Item")
-        if not item:
-            return None
-        return normalize_profile_record(item)
-    except ClientError as e:
-        logger.error(f"Error getting coach profile for athlete_id={athlete_id}: {e}")
+    item = _get_raw_coach_profile(athlete_id)
+    if not item:
         return None
+    return normalize_profile_record(item)
 
 
 def merge_coach_profile_fields(athlete_id: str, updates: Dict[str, Any]) -> bool:
@@ -443,20 +956,30 @@ def merge_coach_profile_fields(athlete_id: str, updates: Dict[str, Any]) -> bool
     if not sanitized_updates:
         return False
 
+    now = int(time.time())
+    if _stage_coach_profile_write(
+        athlete_id,
+        {"created_at": now, "updated_at": now, **sanitized_updates},
+    ):
+        return True
+
     try:
         table = dynamodb.Table(COACH_PROFILES_TABLE)
-        now = int(time.time())
         expression_attribute_names = {
             "#created_at": "created_at",
             "#updated_at": "updated_at",
+            "#state_version": "state_version",
         }
         expression_attribute_values = {
             ":created_at": now,
             ":updated_at": now,
+            ":sv_zero": 0,
+            ":sv_one": 1,
         }
         set_clauses = [
             "#created_at = if_not_exists(#created_at, :created_at)",
             "#updated_at = :updated_at",
+            "#state_version = if_not_exists(#state_version, :sv_zero) + :sv_one",
         ]
 
         for field_name, field_value in sanitized_updates.items():
@@ -466,6 +989,7 @@ def merge_coach_profile_fields(athlete_id: str, updates: Dict[str, Any]) -> bool
             expression_attribute_values[value_token] = field_value
             set_clauses.append(f"{name_token} = {value_token}")
 
+        invalidate_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
         table.update_item(
             Key={"athlete_id": athlete_id},
             UpdateExpression="SET " + ", ".join(set_clauses),
@@ -544,12 +1068,30 @@ def get_sectioned_memory(athlete_id: str) -> Dict[str, Any]:
         return empty_sectioned_memory()
 
 
+def get_memory_version(athlete_id: str) -> int:
+    """Returns the memory_version counter bumped by every replace_memory write (0 if never written)."""
+    profile = _get_raw_coach_profile(athlete_id) or {}
+    try:
+        return int(profile.get("memory_version") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
 def replace_memory(
     athlete_id: str,
     sectioned_memory: Dict[str, Any],
     continuity_summary: Dict[str, Any],
+    *,
+    expected_version: Optional[int] = None,
 ) -> bool:
-    """Atomically replaces memory_notes (sectioned JSON) + continuity_summary on coach_profiles."""
+    """
+    Atomically replaces memory_notes (sectioned JSON) + continuity_summary on coach_profiles.
+
+    Every write bumps memory_version. When expected_version is given the
+    write only lands if the stored version still matches (optimistic check);
+    a mismatch returns False. Unconditional writes join an active
+    coach-profile unit of work.
+    """
     try:
         validated_memory = validate_sectioned_memory(sectioned_memory)
         validated_continuity = ContinuitySummary.from_dict(continuity_summary).to_dict()
@@ -561,32 +1103,70 @@ def replace_memory(
         )
         return False
 
-    table = dynamodb.Table(COACH_PROFILES_TABLE)
     now = int(time.time())
+    if expected_version is None and _stage_coach_profile_write(
+        athlete_id,
+        {
+            "created_at": now,
+            "updated_at": now,
+            "memory_notes": validated_memory,
+            "continuity_summary": validated_continuity,
+        },
+        increments={"memory_version": 1},
+    ):
+        return True
+
+    table = dynamodb.Table(COACH_PROFILES_TABLE)
+    invalidate_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
+    update_kwargs: Dict[str, Any] = {
+        "Key": {"athlete_id": athlete_id},
+        "UpdateExpression": (
+            "SET #created_at = if_not_exists(#created_at, :created_at), "
+            "#updated_at = :updated_at, "
+            "#memory_notes = :memory_notes, "
+            "#continuity_summary = :continuity_summary, "
+            "#memory_version = if_not_exists(#memory_version, :zero) + :one, "
+            "#state_version = if_not_exists(#state_version, :zero) + :one"
+        ),
+        "ExpressionAttributeNames": {
+            "#created_at": "created_at",
+            "#updated_at": "updated_at",
+            "#memory_notes": "memory_notes",
+            "#continuity_summary": "continuity_summary",
+            "#memory_version": "memory_version",
+            "#state_version": "state_version",
+        },
+        "ExpressionAttributeValues": {
+            ":created_at": now,
+            ":updated_at": now,
+            ":memory_notes": validated_memory,
+            ":continuity_summary": validated_continuity,
+            ":zero": 0,
+            ":one": 1,
+        },
+    }
+    if expected_version is not None:
+        if int(expected_version) == 0:
+            update_kwargs["ConditionExpression"] = (
+                "attribute_not_exists(#memory_version) OR #memory_version = :expected_version"
+            )
+        else:
+            update_kwargs["ConditionExpression"] = "#memory_version = :expected_version"
+        update_kwargs["ExpressionAttributeValues"][":expected_version"] = int(expected_version)
+    update_kwargs["ExpressionAttributeValues"] = serialize_dynamodb_payload(
+        update_kwargs["ExpressionAttributeValues"]
+    )
     try:
-        table.update_item(
-            Key={"athlete_id": athlete_id},
-            UpdateExpression=(
-                "SET #created_at = if_not_exists(#created_at, :created_at), "
-                "#updated_at = :updated_at, "
-                "#memory_notes = :memory_notes, "
-                "#continuity_summary = :continuity_summary"
-            ),
-            ExpressionAttributeNames={
-                "#created_at": "created_at",
-                "#updated_at": "updated_at",
-                "#memory_notes": "memory_notes",
-                "#continuity_summary": "continuity_summary",
-            },
-            ExpressionAttributeValues=serialize_dynamodb_payload({
-                ":created_at": now,
-                ":updated_at": now,
-                ":memory_notes": validated_memory,
-                ":continuity_summary": validated_continuity,
-            }),
-        )
+        table.update_item(**update_kwargs)
         return True
     except ClientError as e:
+        if expected_version is not None and _is_conditional_check_failure(e):
+            logger.warning(
+                "memory_version_conflict athlete_id=%s expected_version=%s",
+                athlete_id,
+                expected_version,
+            )
+            return False
         logger.error(f"Error replacing memory for athlete_id={athlete_id}: {e}")
         return False
 
@@ -652,25 +1232,36 @@ def update_continuity_state(athlete_id: str, state_dict: Dict[str, Any]) -> bool
         )
         return False
 
-    table = dynamodb.Table(COACH_PROFILES_TABLE)
     now = int(time.time())
+    if _stage_coach_profile_write(
+        athlete_id,
+        {"created_at": now, "updated_at": now, "continuity_state": validated},
+    ):
+        return True
+
+    table = dynamodb.Table(COACH_PROFILES_TABLE)
+    invalidate_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
     try:
         table.update_item(
             Key={"athlete_id": athlete_id},
             UpdateExpression=(
                 "SET #created_at = if_not_exists(#created_at, :created_at), "
                 "#updated_at = :updated_at, "
-                "#continuity_state = :continuity_state"
+                "#continuity_state = :continuity_state, "
+                "#state_version = if_not_exists(#state_version, :zero) + :one"
             ),
             ExpressionAttributeNames={
                 "#created_at": "created_at",
                 "#updated_at": "updated_at",
                 "#continuity_state": "continuity_state",
+                "#state_version": "state_version",
             },
             ExpressionAttributeValues=serialize_dynamodb_payload({
                 ":created_at": now,
                 ":updated_at": now,
                 ":continuity_state": validated,
+                ":zero": 0,
+                ":one": 1,
             }),
         )
         return True
@@ -1027,10 +1618,14 @@ def normalize_progress_snapshot(record: Optional[Dict[str, Any]], athlete_id: st
 
 def ensure_progress_snapshot_exists(athlete_id: str) -> bool:
     """Ensures a progress snapshot record exists (defaulted) for this athlete."""
+    cache_enabled = is_lookup_cache_enabled()
+    if cache_enabled and progress_snapshot_cache.get(athlete_id):
+        return True
     try:
         table = dynamodb.Table(PROGRESS_SNAPSHOTS_TABLE)
         now = int(time.time())
         defaults = _default_progress_snapshot(athlete_id, now=now)
+        invalidate_athlete_state_snapshot(athlete_id, PROGRESS_SNAPSHOTS_TABLE)
         table.update_item(
             Key={"athlete_id": athlete_id},
             UpdateExpression="""
@@ -1076,6 +1671,8 @@ def ensure_progress_snapshot_exists(athlete_id: str) -> bool:
                 ":data_quality": defaults["data_quality"],
             }),
         )
+        if cache_enabled:
+            progress_snapshot_cache.put(athlete_id, True)
         return True
     except ClientError as e:
         logger.error(f"Error ensuring progress snapshot athlete_id={athlete_id}: {e}")
@@ -1088,9 +1685,11 @@ def ensure_progress_snapshot_exists(athlete_id: str) -> bool:
 
 def get_progress_snapshot(athlete_id: str) -> Optional[Dict[str, Any]]:
     try:
-        table = dynamodb.Table(PROGRESS_SNAPSHOTS_TABLE)
-        response = table.get_item(Key={"athlete_id": athlete_id})
-        item = response.get("Item")
+        hit, item = lookup_athlete_state_snapshot(athlete_id, PROGRESS_SNAPSHOTS_TABLE)
+        if not hit:
+            table = dynamodb.Table(PROGRESS_SNAPSHOTS_TABLE)
+            response = table.get_item(Key={"athlete_id": athlete_id})
+            item = response.get("Item")
         if not item:
             return normalize_progress_snapshot(None, athlete_id=athlete_id)
         return normalize_progress_snapshot(item, athlete_id=athlete_id)
@@ -1148,23 +1747,38 @@ def put_manual_activity_snapshot(
     return recompute_progress_snapshot(athlete_id, now_epoch=int(timestamp))
 
 
+_MANUAL_SNAPSHOT_MAX_KEY = "9999999999#~"
+
+
+def _query_all_pages(table: Any, **query_kwargs: Any) -> List[Dict[str, Any]]:
+    items: List[Dict[str, Any]] = []
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return items
+        query_kwargs["ExclusiveStartKey"] = last_key
+
+
 def _query_manual_snapshots_between(
     athlete_id: str,
     start_ts: int,
-    end_ts: int,
+    end_ts: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
+    """Newest-first snapshots in [start_ts, end_ts]; no upper bound when end_ts is None."""
     try:
         from boto3.dynamodb.conditions import Key
 
         table = dynamodb.Table(MANUAL_ACTIVITY_SNAPSHOTS_TABLE)
         start_key = f"{int(start_ts):010d}#"
-        end_key = f"{int(end_ts):010d}#~"
-        response = table.query(
+        end_key = f"{int(end_ts):010d}#~" if end_ts is not None else _MANUAL_SNAPSHOT_MAX_KEY
+        return _query_all_pages(
+            table,
             KeyConditionExpression=Key("athlete_id").eq(athlete_id)
             & Key("snapshot_key").between(start_key, end_key),
             ScanIndexForward=False,
         )
-        return response.get("Items", [])
     except ClientError as e:
         logger.error(
             f"Error querying manual snapshots athlete_id={athlete_id}, start={start_ts}, end={end_ts}: {e}"
@@ -1189,10 +1803,47 @@ def _latest_manual_snapshot(athlete_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def _count_recent_snapshots(athlete_id: str, now_epoch: int, days: int) -> int:
-    window_start = now_epoch - (days * 86400)
-    items = _query_manual_snapshots_between(athlete_id, window_start, now_epoch)
-    return len(items)
+def _snapshot_key_timestamp(item: Dict[str, Any]) -> int:
+    snapshot_key = str(item.get("snapshot_key") or "")
+    prefix = snapshot_key.split("#", 1)[0]
+    if prefix.isdigit():
+        return int(prefix)
+    return int(item.get("timestamp", 0))
+
+
+def _aggregate_manual_snapshots(items: List[Dict[str, Any]], now_epoch: int) -> Dict[str, Any]:
+    """
+    Folds one newest-first query result into the progress-snapshot windows.
+
+    Window bounds match the snapshot_key ranges: last 7 days is
+    [now-7d, now], last 14 days is [now-14d, now] and the trend compares the
+    last 7 days with [now-14d, now-7d-1].
+    """
+    current_start = now_epoch - (7 * 86400)
+    previous_start = now_epoch - (14 * 86400)
+    last_7d = 0
+    last_14d = 0
+    previous_7d = 0
+    latest: Optional[Dict[str, Any]] = None
+    latest_key = ""
+    for item in items:
+        snapshot_key = str(item.get("snapshot_key") or "")
+        if latest is None or snapshot_key > latest_key:
+            latest, latest_key = item, snapshot_key
+        timestamp = _snapshot_key_timestamp(item)
+        if timestamp > now_epoch or timestamp < previous_start:
+            continue
+        last_14d += 1
+        if timestamp >= current_start:
+            last_7d += 1
+        else:
+            previous_7d += 1
+    return {
+        "latest": latest,
+        "last_7d": last_7d,
+        "last_14d": last_14d,
+        "trend_direction": _trend_from_counts(last_7d, previous_7d),
+    }
 
 
 def _consistency_status(last_7d_count: int) -> str:
@@ -1203,12 +1854,7 @@ def _consistency_status(last_7d_count: int) -> str:
     return "low"
 
 
-def _trend_direction(athlete_id: str, now_epoch: int) -> str:
-    current_start = now_epoch - (7 * 86400)
-    previous_start = now_epoch - (14 * 86400)
-    previous_end = current_start - 1
-    current_count = len(_query_manual_snapshots_between(athlete_id, current_start, now_epoch))
-    previous_count = len(_query_manual_snapshots_between(athlete_id, previous_start, previous_end))
+def _trend_from_counts(current_count: int, previous_count: int) -> str:
     if current_count == 0 and previous_count == 0:
         return "unknown"
     if current_count > previous_count:
@@ -1267,12 +1913,18 @@ def _data_quality(snapshot: Dict[str, Any]) -> str:
 
 def recompute_progress_snapshot(athlete_id: str, now_epoch: Optional[int] = None) -> bool:
     now = int(now_epoch if now_epoch is not None else time.time())
-    latest = _latest_manual_snapshot(athlete_id)
+    # One paginated query from the start of the 14-day window onward covers
+    # every window count and, for active athletes, the latest snapshot.
+    aggregate = _aggregate_manual_snapshots(
+        _query_manual_snapshots_between(athlete_id, now - (14 * 86400)),
+        now,
+    )
+    latest = aggregate["latest"] or _latest_manual_snapshot(athlete_id)
     if latest is None:
         return ensure_progress_snapshot_exists(athlete_id)
 
-    last_7d = _count_recent_snapshots(athlete_id, now, 7)
-    last_14d = _count_recent_snapshots(athlete_id, now, 14)
+    last_7d = aggregate["last_7d"]
+    last_14d = aggregate["last_14d"]
     subjective = _extract_subjective_state(latest)
 
     snapshot: Dict[str, Any] = {
@@ -1282,7 +1934,7 @@ def recompute_progress_snapshot(athlete_id: str, now_epoch: Optional[int] = None
         "last_7d_activity_count": last_7d,
         "last_14d_activity_count": last_14d,
         "consistency_status": _consistency_status(last_7d),
-        "trend_direction": _trend_direction(athlete_id, now),
+        "trend_direction": aggregate["trend_direction"],
         "goal_alignment": _goal_alignment(last_7d, last_14d),
         "last_reported_energy": subjective["last_reported_energy"],
         "last_reported_soreness": subjective["last_reported_soreness"],
@@ -1292,6 +1944,7 @@ def recompute_progress_snapshot(athlete_id: str, now_epoch: Optional[int] = None
     snapshot["data_quality"] = _data_quality(snapshot)
     snapshot = normalize_progress_snapshot(snapshot, athlete_id=athlete_id)
 
+    invalidate_athlete_state_snapshot(athlete_id, PROGRESS_SNAPSHOTS_TABLE)
     try:
         table = dynamodb.Table(PROGRESS_SNAPSHOTS_TABLE)
         table.put_item(Item=serialize_dynamodb_payload(snapshot))
@@ -1479,6 +2132,468 @@ def put_message_intelligence(
         return False
 
 
+# ============================================================================
+# LLM USAGE ROLLUPS (Daily token and cost totals per athlete and fleet-wide)
+# ============================================================================
+
+LLM_USAGE_ROLLUP_FIELDS = ("calls", "input_tokens", "cached_input_tokens", "output_tokens", "cost_micro_usd")
+LLM_USAGE_SKILL_FIELDS = ("calls", "cost_micro_usd")
+
+
+def add_llm_usage_rollup(
+    athlete_id: str,
+    usage_date: str,
+    usage_by_skill: Dict[str, Dict[str, int]],
+    *,
+    ttl_seconds: Optional[int] = None,
+) -> bool:
+    """
+    Adds one request's LLM usage to the (athlete_id, usage_date) rollup with a
+    single atomic ADD. Totals are top-level counters; each skill keeps
+    ``<skill>.calls`` and ``<skill>.cost_micro_usd`` so the item stays flat.
+    """
+    if not usage_by_skill:
+        return True
+    names: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
+    additions: List[str] = []
+
+    def _add(attribute: str, amount: int) -> None:
+        index = len(additions)
+        names[f"#a{index}"] = attribute
+        values[f":a{index}"] = int(amount)
+        additions.append(f"#a{index} :a{index}")
+
+    for field in LLM_USAGE_ROLLUP_FIELDS:
+        _add(field, sum(int(usage.get(field, 0)) for usage in usage_by_skill.values()))
+    for skill, usage in sorted(usage_by_skill.items()):
+        for field in LLM_USAGE_SKILL_FIELDS:
+            _add(f"{skill}.{field}", usage.get(field, 0))
+
+    now = int(time.time())
+    update_expression = "ADD " + ", ".join(additions) + " SET updated_at = :now"
+    values[":now"] = now
+    if ttl_seconds is not None:
+        update_expression += ", expires_at = :expires_at"
+        values[":expires_at"] = now + int(ttl_seconds)
+    try:
+        dynamodb.Table(LLM_USAGE_ROLLUPS_TABLE).update_item(
+            Key={"athlete_id": athlete_id, "usage_date": str(usage_date)},
+            UpdateExpression=update_expression,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+        return True
+    except ClientError as e:
+        logger.error(
+            "Error adding LLM usage rollup athlete_id=%s, usage_date=%s: %s",
+            athlete_id,
+            usage_date,
+            e,
+        )
+        return False
+
+
+def get_llm_usage_rollup(athlete_id: str, usage_date: str) -> Optional[Dict[str, Any]]:
+    """Returns the daily rollup with counters as ints, or None when nothing was recorded."""
+    try:
+        response = dynamodb.Table(LLM_USAGE_ROLLUPS_TABLE).get_item(
+            Key={"athlete_id": athlete_id, "usage_date": str(usage_date)}
+        )
+    except ClientError as e:
+        logger.error(
+            "Error reading LLM usage rollup athlete_id=%s, usage_date=%s: %s",
+            athlete_id,
+            usage_date,
+            e,
+        )
+        return None
+    item = response.get("Item")
+    if not item:
+        return None
+    return {key: int(value) if isinstance(value, Decimal) else value for key, value in item.items()}
+
+
+# ============================================================================
+# OUTBOUND MAIL STATUS (Delivery bookkeeping for queued SES sends)
+# ============================================================================
+
+
+def put_outbound_mail_status(
+    message_id: str,
+    status: str,
+    *,
+    ttl_seconds: Optional[int] = None,
+    **fields: Any,
+) -> bool:
+    """
+    Sets the delivery status of one outbound message (keyed by its RFC 5322
+    Message-ID) and any extra fields, e.g. ses_message_id or error.
+    """
+    now = int(time.time())
+    names: Dict[str, str] = {"#status": "status"}
+    values: Dict[str, Any] = {":status": str(status), ":now": now}
+    assignments = ["#status = :status", "updated_at = :now"]
+    for index, (name, value) in enumerate(sorted(fields.items())):
+        if value is None:
+            continue
+        names[f"#f{index}"] = name
+        values[f":f{index}"] = value
+        assignments.append(f"#f{index} = :f{index}")
+    if ttl_seconds is not None:
+        values[":expires_at"] = now + int(ttl_seconds)
+        assignments.append("expires_at = :expires_at")
+    try:
+        dynamodb.Table(OUTBOUND_MAIL_STATUS_TABLE).update_item(
+            Key={"message_id": str(message_id)},
+            UpdateExpression="SET " + ", ".join(assignments),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+        return True
+    except ClientError as e:
+        logger.error("Error setting outbound mail status message_id=%s status=%s: %s", message_id, status, e)
+        return False
+
+
+def get_outbound_mail_status(message_id: str) -> Optional[Dict[str, Any]]:
+    """Returns the delivery status row for one outbound message, or None."""
+    try:
+        response = dynamodb.Table(OUTBOUND_MAIL_STATUS_TABLE).get_item(Key={"message_id": str(message_id)})
+    except ClientError as e:
+        logger.error("Error reading outbound mail status message_id=%s: %s", message_id, e)
+        return None
+    item = response.get("Item")
+    if not item:
+        return None
+    return {key: int(value) if isinstance(value, Decimal) else value for key, value in item.items()}
+
+
+# ============================================================================
+# INBOUND MESSAGE LEDGER (Idempotent processing of redelivered inbound mail)
+# ============================================================================
+
+INBOUND_LEDGER_IN_PROGRESS = "in_progress"
+INBOUND_LEDGER_REPLIED = "replied"
+INBOUND_LEDGER_SUPPRESSED = "suppressed"
+
+
+def claim_inbound_message(
+    email: str,
+    message_key: str,
+    *,
+    stale_after_seconds: int,
+    ttl_seconds: int,
+    now: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Claims one inbound message for processing with a conditional update.
+
+    The claim succeeds when no ledger row exists, or when an in_progress row
+    has gone stale (crashed invocation or a released claim). A takeover keeps
+    the row's stored reply, so it is re-served however many sends fail. Returns
+    {"claimed": bool, "record": Optional[dict]} where record is the previous
+    row on a takeover and the blocking row when the claim is refused.
+    """
+    now = int(time.time()) if now is None else int(now)
+    key = {"email": canonicalize_email(email), "message_key": str(message_key)}
+    table = dynamodb.Table(INBOUND_LEDGER_TABLE)
+    try:
+        response = table.update_item(
+            Key=key,
+            UpdateExpression="SET #status = :in_progress, claimed_at = :now, expires_at = :expires_at",
+            ConditionExpression=(
+                "attribute_not_exists(message_key) OR "
+                "(#status = :in_progress AND claimed_at < :stale_before)"
+            ),
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={
+                ":in_progress": INBOUND_LEDGER_IN_PROGRESS,
+                ":now": now,
+                ":expires_at": now + int(ttl_seconds),
+                ":stale_before": now - int(stale_after_seconds),
+            },
+            ReturnValues="ALL_OLD",
+        )
+        previous = (response or {}).get("Attributes") or None
+        return {"claimed": True, "record": previous}
+    except ClientError as e:
+        error_code = e.response.get("Error", {}).get("Code", "")
+        if error_code != "ConditionalCheckFailedException":
+            raise
+    existing = table.get_item(Key=key, ConsistentRead=True).get("Item")
+    return {"claimed": False, "record": existing}
+
+
+def record_inbound_reply(email: str, message_key: str, reply_body: Any) -> bool:
+    """Stores the generated reply before sending so a redelivery can re-serve it."""
+    try:
+        dynamodb.Table(INBOUND_LEDGER_TABLE).update_item(
+            Key={"email": canonicalize_email(email), "message_key": str(message_key)},
+            UpdateExpression="SET reply_body = :reply_body",
+            ExpressionAttributeValues={":reply_body": serialize_dynamodb_payload(reply_body)},
+        )
+        return True
+    except ClientError as e:
+        logger.error("Error storing inbound reply email=%s message_key=%s: %s", email, message_key, e)
+        return False
+
+
+def complete_inbound_message(
+    email: str,
+    message_key: str,
+    status: str,
+    *,
+    outbound_message_id: Optional[str] = None,
+) -> bool:
+    """Moves a claimed message to its terminal replied/suppressed status."""
+    if status not in {INBOUND_LEDGER_REPLIED, INBOUND_LEDGER_SUPPRESSED}:
+        raise ValueError(f"invalid terminal ledger status: {status}")
+    update_expression = "SET #status = :status, completed_at = :now"
+    values: Dict[str, Any] = {":status": status, ":now": int(time.time())}
+    if outbound_message_id:
+        update_expression += ", outbound_message_id = :outbound_message_id"
+        values[":outbound_message_id"] = str(outbound_message_id)
+    try:
+        dynamodb.Table(INBOUND_LEDGER_TABLE).update_item(
+            Key={"email": canonicalize_email(email), "message_key": str(message_key)},
+            UpdateExpression=update_expression,
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues=values,
+        )
+        return True
+    except ClientError as e:
+        logger.error("Error completing inbound message email=%s message_key=%s: %s", email, message_key, e)
+        return False
+
+
+def release_inbound_message(email: str, message_key: str) -> bool:
+    """
+    Marks an in_progress claim as immediately stale so the next delivery can
+    take it over. Any stored reply is kept and re-served on takeover.
+    """
+    try:
+        dynamodb.Table(INBOUND_LEDGER_TABLE).update_item(
+            Key={"email": canonicalize_email(email), "message_key": str(message_key)},
+            UpdateExpression="SET claimed_at = :released",
+            ConditionExpression="#status = :in_progress",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":released": 0, ":in_progress": INBOUND_LEDGER_IN_PROGRESS},
+        )
+        return True
+    except ClientError as e:
+        logger.error("Error releasing inbound message email=%s message_key=%s: %s", email, message_key, e)
+        return False
+
+
+# ============================================================================
+# ATHLETE LEASE LOCK (Serializes the per-athlete read-modify-write turn)
+# ============================================================================
+
+
+def acquire_athlete_lease(
+    athlete_id: str,
+    owner: str,
+    *,
+    lease_seconds: int,
+    ttl_seconds: int,
+    now: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Takes the athlete's lease when it is free, expired, or already ours.
+
+    Uses an update rather than a put so messages queued under an expired
+    holder stay on the row for the new holder to drain. Returns
+    {"acquired": bool, "record": Optional[dict]} where record is the row after
+    a successful acquire and the blocking row otherwise.
+    """
+    now = int(time.time()) if now is None else int(now)
+    table = dynamodb.Table(ATHLETE_LOCKS_TABLE)
+    key = {"athlete_id": athlete_id}
+    try:
+        response = table.update_item(
+            Key=key,
+            UpdateExpression=(
+                "SET #owner = :owner, lease_expires_at = :lease_expires_at, expires_at = :expires_at"
+            ),
+            ConditionExpression=(
+                "attribute_not_exists(athlete_id) OR lease_expires_at < :now OR #owner = :owner"
+            ),
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={
+                ":owner": owner,
+                ":now": now,
+                ":lease_expires_at": now + int(lease_seconds),
+                ":expires_at": now + int(ttl_seconds),
+            },
+            ReturnValues="ALL_NEW",
+        )
+        return {"acquired": True, "record": (response or {}).get("Attributes") or None}
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            raise
+    existing = table.get_item(Key=key, ConsistentRead=True).get("Item")
+    return {"acquired": False, "record": existing}
+
+
+def renew_athlete_lease(
+    athlete_id: str,
+    owner: str,
+    *,
+    lease_seconds: int,
+    now: Optional[int] = None,
+) -> bool:
+    """Extends a held lease; returns False when the lease is no longer ours."""
+    now = int(time.time()) if now is None else int(now)
+    try:
+        dynamodb.Table(ATHLETE_LOCKS_TABLE).update_item(
+            Key={"athlete_id": athlete_id},
+            UpdateExpression="SET lease_expires_at = :lease_expires_at",
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": owner, ":lease_expires_at": now + int(lease_seconds)},
+        )
+        return True
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            logger.error("Error renewing athlete lease athlete_id=%s: %s", athlete_id, e)
+        return False
+
+
+def enqueue_athlete_message(
+    athlete_id: str,
+    message: Dict[str, Any],
+    *,
+    max_pending: int,
+    now: Optional[int] = None,
+) -> bool:
+    """
+    Appends a message to a live lease's pending list for the holder to fold
+    into its next turn. Returns False when the lease is gone or expired, or
+    the pending list is full.
+    """
+    now = int(time.time()) if now is None else int(now)
+    try:
+        dynamodb.Table(ATHLETE_LOCKS_TABLE).update_item(
+            Key={"athlete_id": athlete_id},
+            UpdateExpression="SET pending = list_append(if_not_exists(pending, :empty), :message)",
+            ConditionExpression=(
+                "attribute_exists(athlete_id) AND lease_expires_at >= :now "
+                "AND (attribute_not_exists(pending) OR size(pending) < :max_pending)"
+            ),
+            ExpressionAttributeValues={
+                ":empty": [],
+                ":message": [serialize_dynamodb_payload(message)],
+                ":now": now,
+                ":max_pending": int(max_pending),
+            },
+        )
+        return True
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            logger.error("Error queueing athlete message athlete_id=%s: %s", athlete_id, e)
+        return False
+
+
+def take_pending_or_release_athlete_lease(athlete_id: str, owner: str) -> List[Dict[str, Any]]:
+    """
+    Deletes the lease row when nothing is queued; otherwise removes and
+    returns the queued messages while keeping the lease. An empty list means
+    the lease was released (or had already been lost).
+    """
+    table = dynamodb.Table(ATHLETE_LOCKS_TABLE)
+    key = {"athlete_id": athlete_id}
+    try:
+        table.delete_item(
+            Key=key,
+            ConditionExpression="#owner = :owner AND (attribute_not_exists(pending) OR size(pending) = :zero)",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": owner, ":zero": 0},
+        )
+        return []
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            logger.error("Error releasing athlete lease athlete_id=%s: %s", athlete_id, e)
+            return []
+    try:
+        response = table.update_item(
+            Key=key,
+            UpdateExpression="REMOVE pending",
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": owner},
+            ReturnValues="UPDATED_OLD",
+        )
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            logger.error("Error draining athlete lease athlete_id=%s: %s", athlete_id, e)
+        return []
+    return list(((response or {}).get("Attributes") or {}).get("pending") or [])
+
+
+def release_athlete_lease_taking_pending(athlete_id: str, owner: str) -> List[Dict[str, Any]]:
+    """
+    Expires a held lease and removes its queued messages in one write,
+    returning them for the caller to hand off. Returns [] when the lease was
+    lost, leaving the queue to the new holder.
+    """
+    try:
+        response = dynamodb.Table(ATHLETE_LOCKS_TABLE).update_item(
+            Key={"athlete_id": athlete_id},
+            UpdateExpression="SET lease_expires_at = :released REMOVE pending",
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": owner, ":released": 0},
+            ReturnValues="UPDATED_OLD",
+        )
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            logger.error("Error releasing athlete lease athlete_id=%s: %s", athlete_id, e)
+        return []
+    return list(((response or {}).get("Attributes") or {}).get("pending") or [])
+
+
+def requeue_athlete_messages(athlete_id: str, messages: Sequence[Dict[str, Any]]) -> bool:
+    """
+    Puts messages back at the front of the lease row's pending list, ahead of
+    anything queued since, for the next holder to drain.
+    """
+    try:
+        dynamodb.Table(ATHLETE_LOCKS_TABLE).update_item(
+            Key={"athlete_id": athlete_id},
+            UpdateExpression="SET pending = list_append(:messages, if_not_exists(pending, :empty))",
+            ConditionExpression="attribute_exists(athlete_id)",
+            ExpressionAttributeValues={
+                ":messages": [serialize_dynamodb_payload(message) for message in messages],
+                ":empty": [],
+            },
+        )
+        return True
+    except ClientError as e:
+        logger.error("Error requeueing athlete messages athlete_id=%s: %s", athlete_id, e)
+        return False
+
+
+def release_athlete_lease(athlete_id: str, owner: str) -> bool:
+    """
+    Expires a held lease without deleting it, so any queued messages survive
+    for the next holder.
+    """
+    try:
+        dynamodb.Table(ATHLETE_LOCKS_TABLE).update_item(
+            Key={"athlete_id": athlete_id},
+            UpdateExpression="SET lease_expires_at = :released",
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": owner, ":released": 0},
+        )
+        return True
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            logger.error("Error releasing athlete lease athlete_id=%s: %s", athlete_id, e)
+        return False
+
+
 # ============================================================================
 # CURRENT PLAN (Stored in coach_profiles.current_plan)
 # ============================================================================
@@ -1637,6 +2752,10 @@ def _serialize_values(values: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     return {k: _TYPE_SERIALIZER.serialize(v) for k, v in serialized_values.items()}
 
 
+def _deserialize_item(item: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: _TYPE_DESERIALIZER.deserialize(v) for k, v in item.items()}
+
+
 def _normalize_changes_from_previous(changes_from_previous: Optional[List[str]]) -> List[str]:
     if not changes_from_previous:
         return []
@@ -1674,6 +2793,42 @@ def _normalize_plan_updates(updates: Dict[str, Any]) -> Dict[str, Any]:
     return normalized
 
 
+def _plan_profile_update(
+    athlete_id: str,
+    merged_plan: Dict[str, Any],
+    expected_version: int,
+    now: int,
+) -> Tuple[Dict[str, Any], Optional[CoachProfileUnitOfWork], int]:
+    """
+    coach_profiles update for a plan write: guarded by the plan_version and,
+    inside a unit of work, also by state_version with the buffered writes
+    folded in. Returns (update parts with raw values, unit, expected state_version).
+    """
+    unit = get_active_coach_profile_unit_of_work(athlete_id)
+    plan_sets = {"updated_at": now, "current_plan": merged_plan}
+    if unit is None:
+        clauses, names, values = _coach_profile_set_parts(plan_sets)
+        condition = "#current_plan.#plan_version = :expected_version"
+        expected_state_version = -1
+    else:
+        sets, increments, expected_state_version = unit.fold(plan_sets)
+        clauses, names, values = _coach_profile_set_parts(sets, increments)
+        condition = (
+            "#current_plan.#plan_version = :expected_version AND "
+            + _state_version_condition(expected_state_version, values)
+        )
+    names["#current_plan"] = "current_plan"
+    names["#plan_version"] = "plan_version"
+    values[":expected_version"] = expected_version
+    update = {
+        "UpdateExpression": "SET " + ", ".join(clauses),
+        "ConditionExpression": condition,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+    return update, unit, expected_state_version
+
+
 def _apply_plan_update_without_transaction(
     *,
     athlete_id: str,
@@ -1683,28 +2838,21 @@ def _apply_plan_update_without_transaction(
     ledger_item: Dict[str, Any],
     history_item: Dict[str, Any],
 ) -> Dict[str, Any]:
+    invalidate_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
+    update, unit, expected_state_version = _plan_profile_update(
+        athlete_id, merged_plan, expected_version, int(time.time())
+    )
     try:
         profile_table = dynamodb.Table(COACH_PROFILES_TABLE)
-        profile_table.update_item(
-            Key={"athlete_id": athlete_id},
-            UpdateExpression="SET #updated_at = :updated_at, #current_plan = :current_plan",
-            ConditionExpression="#current_plan.#plan_version = :expected_version",
-            ExpressionAttributeNames={
-                "#updated_at": "updated_at",
-                "#current_plan": "current_plan",
-                "#plan_version": "plan_version",
-            },
-            ExpressionAttributeValues=serialize_dynamodb_payload(
-                {
-                    ":updated_at": int(time.time()),
-                    ":current_plan": merged_plan,
-                    ":expected_version": expected_version,
-                }
-            ),
-        )
+        update["ExpressionAttributeValues"] = serialize_dynamodb_payload(update["ExpressionAttributeValues"])
+        profile_table.update_item(Key={"athlete_id": athlete_id}, **update)
+        if unit is not None:
+            unit.mark_written(expected_state_version + 1)
     except ClientError as e:
         error_code = e.response.get("Error", {}).get("Code", "")
         if error_code == "ConditionalCheckFailedException":
+            if unit is not None:
+                unit.mark_conflict()
             return {
                 "status": "retryable_concurrency_error",
                 "plan_version": None,
@@ -1764,6 +2912,17 @@ def _compute_plan_update_payload_hash(
 
 
 def _get_raw_coach_profile(athlete_id: str) -> Optional[Dict[str, Any]]:
+    item = _get_stored_coach_profile(athlete_id)
+    unit = get_active_coach_profile_unit_of_work(athlete_id)
+    if unit is not None:
+        return unit.overlay(item)
+    return item
+
+
+def _get_stored_coach_profile(athlete_id: str) -> Optional[Dict[str, Any]]:
+    hit, item = lookup_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
+    if hit:
+        return item
     try:
         table = dynamodb.Table(COACH_PROFILES_TABLE)
         response = table.get_item(Key={"athlete_id": athlete_id})
@@ -1806,25 +2965,35 @@ def ensure_current_plan(athlete_id: str, fallback_goal: Optional[str] = None) ->
         default_plan = _build_default_current_plan(goal=goal)
         now = int(time.time())
         table = dynamodb.Table(COACH_PROFILES_TABLE)
-        table.update_item(
+        invalidate_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
+        response = table.update_item(
             Key={"athlete_id": athlete_id},
             UpdateExpression="""
                 SET #created_at = if_not_exists(#created_at, :created_at),
                     #updated_at = :updated_at,
-                    #current_plan = :current_plan
+                    #current_plan = :current_plan,
+                    #state_version = if_not_exists(#state_version, :zero) + :one
             """,
             ExpressionAttributeNames={
                 "#created_at": "created_at",
                 "#updated_at": "updated_at",
                 "#current_plan": "current_plan",
+                "#state_version": "state_version",
             },
             ExpressionAttributeValues={
                 ":created_at": now,
                 ":updated_at": now,
                 ":current_plan": default_plan,
+                ":zero": 0,
+                ":one": 1,
             },
             ConditionExpression="attribute_not_exists(#current_plan)",
+            ReturnValues="UPDATED_NEW",
         )
+        unit = get_active_coach_profile_unit_of_work(athlete_id)
+        written_version = ((response or {}).get("Attributes") or {}).get("state_version")
+        if unit is not None and written_version is not None:
+            unit.observe_direct_write(int(written_version))
         history_ok = append_plan_history(
             athlete_id=athlete_id,
             plan_version=1,
@@ -1983,15 +3152,15 @@ def update_current_plan(
 
         serialized_ledger_item = _serialize_item(ledger_item)
         serialized_profile_key = _serialize_item({"athlete_id": athlete_id})
-        serialized_update_values = _serialize_values(
-            {
-                ":updated_at": now,
-                ":current_plan": merged,
-                ":expected_version": expected_version,
-            }
-        )
         serialized_history_item = _serialize_item(history_item)
+        profile_update, unit, expected_state_version = _plan_profile_update(
+            athlete_id, merged, expected_version, now
+        )
+        profile_update["ExpressionAttributeValues"] = _serialize_values(
+            profile_update["ExpressionAttributeValues"]
+        )
 
+        invalidate_athlete_state_snapshot(athlete_id, COACH_PROFILES_TABLE)
         try:
             dynamodb.meta.client.transact_write_items(
                 TransactItems=[
@@ -2006,14 +3175,7 @@ def update_current_plan(
                         "Update": {
                             "TableName": COACH_PROFILES_TABLE,
                             "Key": serialized_profile_key,
-                            "UpdateExpression": "SET #updated_at = :updated_at, #current_plan = :current_plan",
-                            "ConditionExpression": "#current_plan.#plan_version = :expected_version",
-                            "ExpressionAttributeNames": {
-                                "#updated_at": "updated_at",
-                                "#current_plan": "current_plan",
-                                "#plan_version": "plan_version",
-                            },
-                            "ExpressionAttributeValues": serialized_update_values,
+                            **profile_update,
                         }
                     },
                     {
@@ -2025,8 +3187,12 @@ def update_current_plan(
                     },
                 ],
             )
+            if unit is not None:
+                unit.mark_written(expected_state_version + 1)
             return {"status": "applied", "plan_version": next_version, "error_code": None}
         except ClientError as e:
+            if unit is not None:
+                unit.mark_conflict()
             error_code = e.response.get("Error", {}).get("Code", "")
             if error_code != "TransactionCanceledException":
                 logger.error("Error updating current plan athlete_id=%s: %s", athlete_id, e)
@@ -2201,6 +3367,8 @@ def get_and_consume_action_token(token_id: str) -> Optional[Dict[str, Any]]:
 def is_verified(email: str) -> bool:
     """
     Checks if an email has a valid verified session.
+    With ENABLE_LOOKUP_CACHE a verified answer is reused until the cache TTL
+    or the session expiry, whichever comes first.
     
     Args:
         email: Email address
@@ -2208,6 +3376,9 @@ def is_verified(email: str) -> bool:
     Returns:
         True if verified and session not expired, False otherwise
     """
+    cache_enabled = is_lookup_cache_enabled()
+    if cache_enabled and verified_session_cache.get(email.lower()):
+        return True
     try:
         table = dynamodb.Table(VERIFIED_SESSIONS_TABLE)
         response = table.get_item(Key={"email": email.lower()})
@@ -2223,6 +3394,9 @@ def is_verified(email: str) -> bool:
         if session_expires_at < now:
             return False
         
+        if cache_enabled:
+            # Never trust the cached answer past the session's own expiry.
+            verified_session_cache.put(email.lower(), True, expires_at=int(session_expires_at) + 1)
         return True
     except ClientError as e:
         logger.error(f"Error checking verification for {email}: {e}")
@@ -2343,6 +3517,23 @@ def _current_utc_buckets(now_epoch: Optional[int] = None) -> Dict[str, str]:
     }
 
 
+def _quota_result(
+    allowed: bool,
+    reason: str,
+    buckets: Dict[str, str],
+    hour_count: int = 0,
+    day_count: int = 0,
+) -> Dict[str, Any]:
+    return {
+        "allowed": allowed,
+        "reason": reason,
+        "hour_bucket": buckets["hour_bucket"],
+        "day_bucket": buckets["day_bucket"],
+        "hour_count": int(hour_count),
+        "day_count": int(day_count),
+    }
+
+
 def claim_verified_quota_slot(
     email: str,
     hourly_limit: int,
@@ -2353,124 +3544,131 @@ def claim_verified_quota_slot(
     """
     Atomically claims one verified-user quota slot across both hour and day.
 
-    This uses optimistic locking with conditional updates to stay race-safe:
-    when only one slot remains, concurrent requests will allow at most one.
+    The common case is one conditional UpdateItem that increments both
+    counters while the stored buckets are current and under their limits.
+    When that condition fails, the old item comes back with the error
+    (falling back to a consistent read when it does not): an over-limit item
+    in the current buckets is a block, and stale buckets are rolled over by a
+    second conditional write. Concurrent requests for the last slot allow at
+    most one; max_retries bounds the rollover races.
     """
     if now_epoch is None:
         now_epoch = int(time.time())
 
     table = dynamodb.Table(RATE_LIMITS_TABLE)
+    key = {"email": email.lower()}
     buckets = _current_utc_buckets(now_epoch=now_epoch)
-    current_hour_bucket = buckets["hour_bucket"]
-    current_day_bucket = buckets["day_bucket"]
-
-    for _ in range(max_retries):
-        try:
-            response = table.get_item(
-                Key={"email": email.lower()},
-                ConsistentRead=True,
-            )
-            item = response.get("Item", {})
-
-            stored_hour_bucket = item.get("hour_bucket")
-            stored_day_bucket = item.get("day_bucket")
-            stored_hour_count = int(item.get("verified_requests_hour", 0))
-            stored_day_count = int(item.get("verified_requests_day", 0))
-
-            effective_hour_count = (
-                stored_hour_count if stored_hour_bucket == current_hour_bucket else 0
-            )
-            effective_day_count = (
-                stored_day_count if stored_day_bucket == current_day_bucket else 0
-            )
-
-            if effective_hour_count >= hourly_limit:
-                return {
-                    "allowed": False,
-                    "reason": "hourly_limit_exceeded",
-                    "hour_bucket": current_hour_bucket,
-                    "day_bucket": current_day_bucket,
-                    "hour_count": effective_hour_count,
-                    "day_count": effective_day_count,
-                }
-
-            if effective_day_count >= daily_limit:
-                return {
-                    "allowed": False,
-                    "reason": "daily_limit_exceeded",
-                    "hour_bucket": current_hour_bucket,
-                    "day_bucket": current_day_bucket,
-                    "hour_count": effective_hour_count,
-                    "day_count": effective_day_count,
-                }
-
-            new_hour_count = effective_hour_count + 1
-            new_day_count = effective_day_count + 1
-
-            expr_values = {
-                ":new_hour_bucket": current_hour_bucket,
-                ":new_day_bucket": current_day_bucket,
-                ":new_hour_count": new_hour_count,
-                ":new_day_count": new_day_count,
-                ":now": now_epoch,
-            }
-            condition_parts = []
-
-            for attr_name, prev_token in (
-                ("hour_bucket", ":prev_hour_bucket"),
-                ("day_bucket", ":prev_day_bucket"),
-                ("verified_requests_hour", ":prev_hour_count"),
-                ("verified_requests_day", ":prev_day_count"),
-            ):
-                if attr_name in item:
-                    condition_parts.append(f"{attr_name} = {prev_token}")
-                    expr_values[prev_token] = item[attr_name]
-                else:
-                    condition_parts.append(f"attribute_not_exists({attr_name})")
+    if hourly_limit <= 0:
+        return _quota_result(False, "hourly_limit_exceeded", buckets)
+    if daily_limit <= 0:
+        return _quota_result(False, "daily_limit_exceeded", buckets)
+    values = {
+        ":hour_bucket": buckets["hour_bucket"],
+        ":day_bucket": buckets["day_bucket"],
+        ":hourly_limit": int(hourly_limit),
+        ":daily_limit": int(daily_limit),
+        ":one": 1,
+        ":zero": 0,
+        ":now": now_epoch,
+    }
 
-            table.update_item(
-                Key={"email": email.lower()},
-                UpdateExpression="""
-                    SET hour_bucket = :new_hour_bucket,
-                        day_bucket = :new_day_bucket,
-                        verified_requests_hour = :new_hour_count,
-                        verified_requests_day = :new_day_count,
-                        last_verified_request_at = :now
-                """,
-                ConditionExpression=" AND ".join(condition_parts),
-                ExpressionAttributeValues=expr_values,
-            )
+    try:
+        for _ in range(max(1, max_retries)):
+            try:
+                response = table.update_item(
+                    Key=key,
+                    UpdateExpression=(
+                        "SET verified_requests_hour = verified_requests_hour + :one, "
+                        "verified_requests_day = verified_requests_day + :one, "
+                        "last_verified_request_at = :now"
+                    ),
+                    ConditionExpression=(
+                        "hour_bucket = :hour_bucket AND day_bucket = :day_bucket AND "
+                        "verified_requests_hour < :hourly_limit AND verified_requests_day < :daily_limit"
+                    ),
+                    ExpressionAttributeValues={
+                        name: values[name]
+                        for name in (":hour_bucket", ":day_bucket", ":hourly_limit", ":daily_limit", ":one", ":now")
+                    },
+                    ReturnValues="UPDATED_NEW",
+                    ReturnValuesOnConditionCheckFailure="ALL_OLD",
+                )
+                attributes = response.get("Attributes") or {}
+                return _quota_result(
+                    True,
+                    "allowed",
+                    buckets,
+                    attributes.get("verified_requests_hour", 0),
+                    attributes.get("verified_requests_day", 0),
+                )
+            except ClientError as e:
+                if not _is_conditional_check_failure(e):
+                    raise
+                # The Table resource leaves error shapes in wire format.
+                old_item = e.response.get("Item")
+                item = _deserialize_item(old_item) if old_item is not None else None
+            if item is None:
+                item = table.get_item(Key=key, ConsistentRead=True).get("Item") or {}
+
+            hour_current = item.get("hour_bucket") == buckets["hour_bucket"]
+            day_current = item.get("day_bucket") == buckets["day_bucket"]
+            hour_count = int(item.get("verified_requests_hour", 0)) if hour_current else 0
+            day_count = int(item.get("verified_requests_day", 0)) if day_current else 0
+            if hour_count >= hourly_limit:
+                return _quota_result(False, "hourly_limit_exceeded", buckets, hour_count, day_count)
+            if day_count >= daily_limit:
+                return _quota_result(False, "daily_limit_exceeded", buckets, hour_count, day_count)
+            if hour_current and day_current:
+                # Under both limits in the current buckets: the fast path lost a race; retry it.
+                continue
 
-            return {
-                "allowed": True,
-                "reason": "allowed",
-                "hour_bucket": current_hour_bucket,
-                "day_bucket": current_day_bucket,
-                "hour_count": new_hour_count,
-                "day_count": new_day_count,
-            }
-        except ClientError as e:
-            error_code = e.response.get("Error", {}).get("Code", "")
-            if error_code == "ConditionalCheckFailedException":
+            if day_current:
+                # New hour, same day: restart the hour and keep counting the day.
+                update_expression = (
+                    "SET hour_bucket = :hour_bucket, verified_requests_hour = :one, "
+                    "verified_requests_day = if_not_exists(verified_requests_day, :zero) + :one, "
+                    "last_verified_request_at = :now"
+                )
+                condition_expression = (
+                    "day_bucket = :day_bucket AND "
+                    "(attribute_not_exists(verified_requests_day) OR verified_requests_day < :daily_limit) AND "
+                    "(attribute_not_exists(hour_bucket) OR hour_bucket <> :hour_bucket)"
+                )
+                names = (":hour_bucket", ":day_bucket", ":daily_limit", ":one", ":zero", ":now")
+            else:
+                update_expression = (
+                    "SET hour_bucket = :hour_bucket, day_bucket = :day_bucket, "
+                    "verified_requests_hour = :one, verified_requests_day = :one, "
+                    "last_verified_request_at = :now"
+                )
+                condition_expression = "attribute_not_exists(day_bucket) OR day_bucket <> :day_bucket"
+                names = (":hour_bucket", ":day_bucket", ":one", ":now")
+            try:
+                response = table.update_item(
+                    Key=key,
+                    UpdateExpression=update_expression,
+                    ConditionExpression=condition_expression,
+                    ExpressionAttributeValues={name: values[name] for name in names},
+                    ReturnValues="UPDATED_NEW",
+                )
+            except ClientError as e:
+                if not _is_conditional_check_failure(e):
+                    raise
+                # Another request rolled the bucket first; claim against its row.
                 continue
-            logger.error(f"Error claiming verified quota slot for {email}: {e}")
-            return {
-                "allowed": False,
-                "reason": "quota_check_error",
-                "hour_bucket": current_hour_bucket,
-                "day_bucket": current_day_bucket,
-                "hour_count": 0,
-                "day_count": 0,
-            }
+            attributes = response.get("Attributes") or {}
+            return _quota_result(
+                True,
+                "allowed",
+                buckets,
+                attributes.get("verified_requests_hour", 1),
+                attributes.get("verified_requests_day", day_count + 1),
+            )
+    except ClientError as e:
+        logger.error(f"Error claiming verified quota slot for {email}: {e}")
+        return _quota_result(False, "quota_check_error", buckets)
 
-    return {
-        "allowed": False,
-        "reason": "quota_claim_conflict",
-        "hour_bucket": current_hour_bucket,
-        "day_bucket": current_day_bucket,
-        "hour_count": 0,
-        "day_count": 0,
-    }
+    return _quota_result(False, "quota_claim_conflict", buckets)
 
 
 def atomically_set_verified_notice_cooldown_if_allowed(
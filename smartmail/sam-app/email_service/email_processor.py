@@ -1,12 +1,18 @@
 """
-Parsing of inbound emails from SNS: decode content, extract body, build email_data dict.
-No auth, no LLM—pure parsing.
+Parsing of inbound emails from SNS or SQS: decode content, extract body, build email_data dict.
+No auth, no LLM—pure parsing. Messages SES stored in S3 instead of inlining
+are streamed through inbound_s3.
 """
 import json
 import base64
 import logging
 from email import message_from_string
 
+from config import ENABLE_REPLY_QUOTE_STRIPPING
+from inbound_message import REPLAYED_EMAIL_FIELD
+from inbound_s3 import InboundContentUnavailableError, read_s3_text_body, s3_object_location
+from reply_parser import parse_reply
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +23,41 @@ class EmailProcessor:
     def parse_sns_event(event):
         """Extracts sender, subject, recipients (To & CC), and decoded email body from SNS event."""
         try:
-            sns_message = json.loads(event["Records"][0]["Sns"]["Message"])
+            raw_message = event["Records"][0]["Sns"]["Message"]
+        except Exception as e:
+            logger.error("Error parsing SNS event: %s", e)
+            return None
+        return EmailProcessor.parse_ses_notification(raw_message)
+
+    @staticmethod
+    def parse_sqs_record(record):
+        """
+        Parses one SQS record carrying an SES notification.
+
+        Accepts both the SNS envelope (SNS -> SQS subscription) and raw
+        message delivery, where the body is the SES notification itself,
+        plus email_data replayed by an athlete lease holder.
+        """
+        try:
+            body = json.loads(record["body"])
+        except Exception as e:
+            logger.error("Error parsing SQS record: %s", e)
+            return None
+        if isinstance(body, dict) and isinstance(body.get(REPLAYED_EMAIL_FIELD), dict):
+            return dict(body[REPLAYED_EMAIL_FIELD])
+        if isinstance(body, dict) and isinstance(body.get("Message"), str):
+            return EmailProcessor.parse_ses_notification(body["Message"])
+        return EmailProcessor.parse_ses_notification(body)
+
+    @staticmethod
+    def parse_ses_notification(raw_message):
+        """
+        Builds email_data from an SES receipt notification (JSON string or dict).
+        Raises InboundContentUnavailableError when a message stored in S3
+        cannot be read, so the delivery is retried rather than dropped.
+        """
+        try:
+            sns_message = json.loads(raw_message) if isinstance(raw_message, str) else raw_message
             sender_email = sns_message["mail"]["source"]
             recipient_email = sns_message["mail"]["destination"][0]
             subject = sns_message["mail"]["commonHeaders"]["subject"]
@@ -34,14 +74,22 @@ class EmailProcessor:
             )
 
             encoded_content = sns_message.get("content", "")
-            email_body = (
-                EmailProcessor.extract_text_from_email(encoded_content)
-                if encoded_content
-                else "No content found."
-            )
+            s3_location = None if encoded_content else s3_object_location(sns_message)
+            text_body = None
+            if encoded_content:
+                text_body = EmailProcessor.decode_text_body(encoded_content)
+            elif s3_location is not None:
+                text_body = read_s3_text_body(*s3_location)
+            quoted_body = None
+            if text_body is None:
+                email_body = "No content found."
+            elif ENABLE_REPLY_QUOTE_STRIPPING:
+                email_body, quoted_body = EmailProcessor.split_reply_text(text_body)
+            else:
+                email_body = EmailProcessor.clean_email_body(text_body)
             logger.info("Parsed email from %s with subject: %s", sender_email, subject)
 
-            return {
+            email_data = {
                 "sender": sender_email,
                 "recipient": recipient_email,
                 "subject": subject,
@@ -53,25 +101,42 @@ class EmailProcessor:
                 "in_reply_to": in_reply_to,
                 "references": references,
             }
+            if quoted_body is not None:
+                email_data["quoted_body"] = quoted_body
+            return email_data
+        except InboundContentUnavailableError:
+            raise
         except Exception as e:
             logger.error("Error parsing SNS event: %s", e)
             return None            
 
     @staticmethod
-    def extract_text_from_email(email_content):
-        """Extracts the plain text body from a multipart email."""
+    def decode_text_body(email_content):
+        """Decodes the plain text body of a (possibly multipart) email, uncleaned."""
         email_msg = message_from_string(email_content)
         if email_msg.is_multipart():
             for part in email_msg.walk():
                 if part.get_content_type() == "text/plain" and "attachment" not in str(
                     part.get("Content-Disposition")
                 ):
-                    return EmailProcessor.clean_email_body(
-                        part.get_payload(decode=True).decode("utf-8", errors="ignore")
-                    )
-        return EmailProcessor.clean_email_body(
-            email_msg.get_payload(decode=True).decode("utf-8", errors="ignore")
-        )
+                    return part.get_payload(decode=True).decode("utf-8", errors="ignore")
+        return email_msg.get_payload(decode=True).decode("utf-8", errors="ignore")
+
+    @staticmethod
+    def extract_text_from_email(email_content):
+        """Extracts the plain text body from a multipart email."""
+        return EmailProcessor.clean_email_body(EmailProcessor.decode_text_body(email_content))
+
+    @staticmethod
+    def split_reply_text(body):
+        """
+        Returns (new_text, quoted_history) for a reply body. Falls back to the
+        cleaned full body when nothing but quoted history was found.
+        """
+        reply = parse_reply(body)
+        if not reply.new_text:
+            return EmailProcessor.clean_email_body(body), reply.quoted_text
+        return reply.new_text, reply.quoted_text
 
     @staticmethod
     def clean_email_body(body):
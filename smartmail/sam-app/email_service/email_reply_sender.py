@@ -1,5 +1,6 @@
 """
-Sending replies via SES: format as HTML and send.
+Sending replies via SES: format as HTML and hand to outbound_mail, which sends
+it (paced, with backoff on throttling) or queues it per OUTBOUND_MAIL_MODE.
 Depends on business/LLM only for the reply content; no auth or rate-limit logic here.
 """
 import logging
@@ -8,12 +9,10 @@ from html import escape
 import email.utils
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-import boto3  # type: ignore
 
-from config import AWS_REGION
 from email_copy import EmailCopy
+from outbound_mail import OutboundEmail, deliver
 logger = logging.getLogger(__name__)
-ses_client = boto3.client("ses", region_name=AWS_REGION)
 _CONTROL_CHARS_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]")
 
 
@@ -50,7 +49,10 @@ class EmailReplySender:
 
     @staticmethod
     def send_reply(email_data, reply_content, include_thread_context=None):
-        """Sends a reply email using AWS SES."""
+        """
+        Sends a reply email using AWS SES. Returns the SES MessageId, or the
+        reply's Message-ID when OUTBOUND_MAIL_MODE=queued; None on failure.
+        """
         try:
             should_include_thread_context = (
                 EmailReplySender._is_existing_thread(email_data)
@@ -95,14 +97,16 @@ class EmailReplySender:
                 logger.error("No valid recipients found. Aborting email send.")
                 return None
 
-            response = ses_client.send_raw_email(
-                Source=from_ai_address,
-                Destinations=to_recipients + cc_recipients,
-                RawMessage={"Data": msg.as_string()},
+            job = OutboundEmail.from_mime(
+                "reply",
+                msg,
+                source=from_ai_address,
+                destinations=to_recipients + cc_recipients,
             )
+            sent_message_id = deliver(job)
             logger.info("From: %s, To: %s, CC: %s", from_ai_address, to_recipients, cc_recipients)
-            logger.info("Reply sent successfully! Message ID: %s", response["MessageId"])
-            return response["MessageId"]
+            logger.info("Reply sent successfully! Message ID: %s", sent_message_id)
+            return sent_message_id
         except Exception as e:
             logger.error("Error sending reply: %s", e)
             return None
@@ -0,0 +1,144 @@
+"""Import-time profile for the Lambda handler module.
+
+Runs ``python -X importtime`` in a fresh interpreter and summarizes which
+modules a cold start loads and what they cost. Used to keep the cheap
+rejection paths (unregistered / unverified senders) from pulling in the LLM
+stack at module load.
+
+Usage:
+    python3 import_profile.py                 # profile `import app`
+    python3 import_profile.py --module business --top 25
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence
+
+# Modules that belong to the reply pipeline and must not load with `app`.
+LLM_STACK_MODULES = (
+    "business",
+    "coaching",
+    "conversation_intelligence",
+    "skills.coaching_reasoning.doctrine",
+    "openai",
+    "skills.runtime",
+)
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr_text: str) -> List[ImportTiming]:
+    """Parses ``-X importtime`` stderr lines, skipping the header and other output."""
+    timings: List[ImportTiming] = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_raw, cumulative_raw, name_raw = parts
+        if not self_raw.strip().isdigit():
+            continue
+        name = name_raw.rstrip()
+        stripped = name.lstrip()
+        timings.append(
+            ImportTiming(
+                module=stripped,
+                self_us=int(self_raw),
+                cumulative_us=int(cumulative_raw),
+                depth=(len(name) - len(stripped)) // 2,
+            )
+        )
+    return timings
+
+
+def profile_module_imports(
+    module: str,
+    *,
+    prelude: str = "",
+    cwd: Optional[str] = None,
+    extra_paths: Sequence[str] = (),
+) -> List[ImportTiming]:
+    """Imports ``module`` in a subprocess and returns its import timings."""
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([cwd, *extra_paths, env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    code = f"{prelude}\nimport {module}\n"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import of {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def loaded_modules(timings: Iterable[ImportTiming]) -> List[str]:
+    return [timing.module for timing in timings]
+
+
+def format_import_report(timings: Sequence[ImportTiming], *, top: int = 15) -> str:
+    """Top modules by self time, plus the total and any LLM-stack modules loaded."""
+    total_us = sum(timing.self_us for timing in timings)
+    names = set(loaded_modules(timings))
+    llm_loaded = [name for name in LLM_STACK_MODULES if name in names]
+    lines = [
+        f"modules={len(timings)} total_ms={total_us / 1000:.1f}",
+        f"llm_stack_loaded={','.join(llm_loaded) if llm_loaded else 'none'}",
+        f"{'self_ms':>9} {'cumul_ms':>9}  module",
+    ]
+    for timing in sorted(timings, key=lambda t: t.self_us, reverse=True)[:top]:
+        lines.append(f"{timing.self_us / 1000:>9.1f} {timing.cumulative_us / 1000:>9.1f}  {timing.module}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Summarize `python -X importtime` for an email_service module.",
+    )
+    parser.add_argument(
+        "--module",
+        default="app",
+        help="Module to import (default: app).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=15,
+        help="Number of modules to list by self time.",
+    )
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        timings = profile_module_imports(args.module)
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+    print(format_import_report(timings, top=args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
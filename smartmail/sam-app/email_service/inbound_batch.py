@@ -0,0 +1,71 @@
+"""
+Keyed batch runner for SQS-fed inbound mail.
+
+Records that share a key (the sender) run one after another in arrival
+order; different keys run concurrently on a thread pool. When a record
+fails, the rest of its key's records are not attempted and are reported as
+failed too, so an SQS retry replays them in their original order.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    item_id: str
+    key: str
+    payload: Any
+
+
+def group_batch_items(items: Sequence[BatchItem]) -> "OrderedDict[str, List[BatchItem]]":
+    """Groups items by key, keeping first-seen key order and arrival order within a key."""
+    groups: "OrderedDict[str, List[BatchItem]]" = OrderedDict()
+    for item in items:
+        groups.setdefault(item.key, []).append(item)
+    return groups
+
+
+def _run_group(group: List[BatchItem], process_fn: Callable[[Any], bool]) -> List[str]:
+    for index, item in enumerate(group):
+        try:
+            ok = bool(process_fn(item.payload))
+        except Exception as e:
+            logger.error("batch_item_failed item_id=%s key=%s error=%s", item.item_id, item.key, e)
+            ok = False
+        if not ok:
+            return [pending.item_id for pending in group[index:]]
+    return []
+
+
+def run_keyed_batch(
+    items: Sequence[BatchItem],
+    process_fn: Callable[[Any], bool],
+    *,
+    max_workers: int = 4,
+) -> List[str]:
+    """
+    Processes every item and returns the ids of items that failed or were
+    skipped behind a failure, in input order.
+    """
+    groups = group_batch_items(items)
+    if not groups:
+        return []
+    failed: Dict[str, bool] = {}
+    workers = max(1, min(int(max_workers), len(groups)))
+    if workers == 1:
+        results = [_run_group(group, process_fn) for group in groups.values()]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inbound-batch") as executor:
+            results = list(executor.map(lambda group: _run_group(group, process_fn), groups.values()))
+    for group_failures in results:
+        for item_id in group_failures:
+            failed[item_id] = True
+    return [item.item_id for item in items if item.item_id in failed]
@@ -0,0 +1,22 @@
+"""
+Lightweight inbound-message primitives shared by the handler and the reply
+pipeline. Kept free of LLM/skill imports so the handler can use them without
+loading the coaching stack.
+"""
+import hashlib
+from typing import Optional
+
+# Returned by the reply pipeline when no coaching response should be sent.
+SUPPRESSED_REPLY = object()
+
+# SQS body field carrying an already-parsed email_data re-published by the
+# athlete lease holder for a queued message it did not answer.
+REPLAYED_EMAIL_FIELD = "replayed_email_data"
+
+
+def build_message_key(inbound_message_id: Optional[str], inbound_body: str) -> str:
+    message_id = str(inbound_message_id or "").strip()
+    if message_id:
+        return message_id[:256]
+    body_digest = hashlib.sha256(inbound_body.encode("utf-8")).hexdigest()[:24]
+    return f"bodyhash:{body_digest}"
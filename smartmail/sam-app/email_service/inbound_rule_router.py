@@ -125,6 +125,7 @@ def _extract_checkin_for_routing(
     from_email: str,
     aws_request_id: Optional[str],
     log_outcome: Optional[Callable[..., None]],
+    run_checkin_extraction_fn: Callable[[str], Dict[str, Any]],
 ) -> tuple[Dict[str, Any], bool, list[str]]:
     extracted_checkin: Dict[str, Any] = {}
     extraction_failed = False
@@ -139,7 +140,7 @@ def _extract_checkin_for_routing(
             body_chars=len(inbound_body),
         )
     try:
-        extracted_checkin = run_session_checkin_extraction_workflow(inbound_body)
+        extracted_checkin = run_checkin_extraction_fn(inbound_body)
         if extracted_checkin:
             missing_or_low = list_missing_or_low_confidence_critical_fields(extracted_checkin)
             if log_outcome is not None:
@@ -176,7 +177,9 @@ def route_inbound_with_rule_engine(
     *,
     aws_request_id: Optional[str] = None,
     log_outcome: Optional[Callable[..., None]] = None,
+    run_checkin_extraction_fn: Optional[Callable[[str], Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
+    """Routes one inbound email; ``run_checkin_extraction_fn`` lets callers supply a prefetched extraction."""
     if not isinstance(athlete_id, str) or not athlete_id.strip():
         raise InboundRuleRouterError("athlete_id must be a non-empty string")
     if not isinstance(from_email, str) or not from_email.strip():
@@ -210,6 +213,7 @@ def route_inbound_with_rule_engine(
         from_email=from_email,
         aws_request_id=aws_request_id,
         log_outcome=log_outcome,
+        run_checkin_extraction_fn=run_checkin_extraction_fn or run_session_checkin_extraction_workflow,
     )
 
     clarification_needed = extraction_failed
@@ -0,0 +1,163 @@
+"""
+Streaming ingestion of inbound emails stored by the SES S3 receipt action.
+
+SES inlines a message in the notification only when it is under 150 KB;
+larger ones (forwarded training logs, GPX/FIT attachments) arrive as an S3
+object reference. The object is streamed in chunks into a BytesFeedParser
+whose parts drop non-text payloads as soon as each part ends, and reading
+stops once the first text/plain part is complete, so memory stays bounded by
+the largest part ahead of the text rather than by the whole message. When
+the message has no plain part, the first text/html part is converted to
+text.
+
+boto3 is imported on first use so that importing this module stays cheap.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from email.feedparser import BytesFeedParser
+from email.message import Message
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import AWS_REGION, INBOUND_S3_READ_CHUNK_BYTES
+from telemetry import instrument_aws_client, span
+
+logger = logging.getLogger(__name__)
+
+_TEXT_TYPES = ("text/plain", "text/html")
+
+_s3_client: Any = None
+
+
+class InboundContentUnavailableError(RuntimeError):
+    """Raised when a stored inbound message cannot be read; the delivery should be retried."""
+
+
+def s3_object_location(notification: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(bucket, key) of the stored message for an SES S3-action notification, else None."""
+    action = (notification.get("receipt") or {}).get("action") or {}
+    if str(action.get("type", "")).upper() != "S3":
+        return None
+    bucket = action.get("bucketName")
+    key = action.get("objectKey")
+    if not bucket or not key:
+        return None
+    return str(bucket), str(key)
+
+
+class _HtmlTextExtractor(HTMLParser):
+    _BLOCK_TAGS = frozenset(
+        {"br", "p", "div", "li", "tr", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "table", "ul", "ol"}
+    )
+    _SKIPPED_TAGS = frozenset({"script", "style", "head", "title"})
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._pieces: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in self._BLOCK_TAGS:
+            self._pieces.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self._BLOCK_TAGS:
+            self._pieces.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._pieces.append(data)
+
+    def text(self) -> str:
+        lines = [re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in "".join(self._pieces).split("\n")]
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def html_to_text(html: str) -> str:
+    """Readable text from an HTML body: tags and scripts dropped, blocks on their own lines."""
+    extractor = _HtmlTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+
+def _is_attachment(part: Message) -> bool:
+    return "attachment" in str(part.get("Content-Disposition", "")).lower()
+
+
+def _text_part_factory(found: Dict[str, Message]) -> type:
+    class _StreamedPart(Message):
+        def set_payload(self, payload: Any, charset: Any = None) -> None:
+            # The feed parser sets a leaf part's payload once the part ends.
+            content_type = self.get_content_type()
+            if content_type not in _TEXT_TYPES or _is_attachment(self):
+                payload = ""
+            super().set_payload(payload, charset)
+            if payload and content_type in _TEXT_TYPES and content_type not in found:
+                found[content_type] = self
+
+    return _StreamedPart
+
+
+def _decoded_text(part: Message) -> str:
+    payload = part.get_payload(decode=True) or b""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def read_text_body_stream(chunks: Iterable[bytes]) -> Optional[str]:
+    """
+    Text body of a raw MIME message fed as byte chunks: the first inline
+    text/plain part, else the first text/html part as text, else None.
+    Stops consuming ``chunks`` once the plain part is complete.
+    """
+    found: Dict[str, Message] = {}
+    parser = BytesFeedParser(_factory=_text_part_factory(found))
+    for chunk in chunks:
+        parser.feed(chunk)
+        if "text/plain" in found:
+            break
+    else:
+        parser.close()
+    if "text/plain" in found:
+        return _decoded_text(found["text/plain"])
+    if "text/html" in found:
+        return html_to_text(_decoded_text(found["text/html"]))
+    return None
+
+
+def _get_s3_client() -> Any:
+    global _s3_client
+    if _s3_client is None:
+        import boto3  # type: ignore
+
+        _s3_client = instrument_aws_client(boto3.client("s3", region_name=AWS_REGION))
+    return _s3_client
+
+
+def read_s3_text_body(bucket: str, key: str, *, client: Any = None) -> Optional[str]:
+    """Streams a stored inbound message from S3 and returns its text body (see read_text_body_stream)."""
+    client = client or _get_s3_client()
+    with span("s3_ingest"):
+        try:
+            body = client.get_object(Bucket=bucket, Key=key)["Body"]
+        except Exception as exc:
+            logger.error("inbound_s3_read_failed bucket=%s key=%s error=%s", bucket, key, exc)
+            raise InboundContentUnavailableError(f"could not read s3://{bucket}/{key}") from exc
+        try:
+            return read_text_body_stream(body.iter_chunks(chunk_size=INBOUND_S3_READ_CHUNK_BYTES))
+        except Exception as exc:
+            logger.error("inbound_s3_stream_failed bucket=%s key=%s error=%s", bucket, key, exc)
+            raise InboundContentUnavailableError(f"could not stream s3://{bucket}/{key}") from exc
+        finally:
+            body.close()
@@ -0,0 +1,199 @@
+"""
+LLM token and cost accounting per skill, per reply turn and per athlete-day.
+
+Skill calls report their OpenAI ``usage`` through ``record_llm_response``.
+Tokens always reach the request telemetry; while ``llm_usage_accounting()``
+is active they are also priced and collected in a UsageLedger keyed by skill,
+which is added to the athlete's and the fleet's daily rollup on exit.
+
+``spend_budget_exceeded`` reads those rollups so model routing can fall back
+to the lightweight model once a daily budget is spent.
+
+Skill code imports this module, so the DynamoDB helpers are imported on
+first use to keep it free of boto3 at import time.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import telemetry
+from config import (
+    ENABLE_LLM_COST_ACCOUNTING,
+    LLM_ATHLETE_DAILY_BUDGET_USD,
+    LLM_FLEET_DAILY_BUDGET_USD,
+    LLM_MODEL_PRICES,
+    LLM_USAGE_ROLLUP_TTL_DAYS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rollup partition that aggregates every athlete's usage.
+FLEET_ROLLUP_ID = "__fleet__"
+
+BUDGET_SCOPE_ATHLETE = "athlete"
+BUDGET_SCOPE_FLEET = "fleet"
+
+_MICRO_USD_PER_USD = 1_000_000
+
+
+def parse_model_prices(raw: str) -> Dict[str, Tuple[float, float, float]]:
+    """Parses "model=input:cached_input:output" USD-per-1M-token pairs; malformed pairs are ignored."""
+    prices: Dict[str, Tuple[float, float, float]] = {}
+    for pair in (raw or "").split(","):
+        model, sep, rates = pair.partition("=")
+        parts = rates.split(":")
+        if not sep or not model.strip() or len(parts) != 3:
+            continue
+        try:
+            prices[model.strip()] = (float(parts[0]), float(parts[1]), float(parts[2]))
+        except ValueError:
+            continue
+    return prices
+
+
+_MODEL_PRICES = parse_model_prices(LLM_MODEL_PRICES)
+
+
+def model_prices(model_name: Optional[str]) -> Optional[Tuple[float, float, float]]:
+    """Prices for ``model_name``; dated snapshots ("gpt-5-mini-2025-08-07") use their base model's."""
+    name = str(model_name or "").strip()
+    if name in _MODEL_PRICES:
+        return _MODEL_PRICES[name]
+    matches = [model for model in _MODEL_PRICES if name.startswith(model + "-")]
+    return _MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def usage_cost_micro_usd(model_name: Optional[str], tokens: Dict[str, int]) -> int:
+    """Cost of one call in micro-USD (0 for unpriced models)."""
+    prices = model_prices(model_name)
+    if prices is None:
+        return 0
+    input_price, cached_price, output_price = prices
+    cached = min(tokens.get("cached_input_tokens", 0), tokens.get("input_tokens", 0))
+    uncached = tokens.get("input_tokens", 0) - cached
+    # USD per 1M tokens times tokens is exactly micro-USD.
+    return round(uncached * input_price + cached * cached_price + tokens.get("output_tokens", 0) * output_price)
+
+
+class UsageLedger:
+    """Thread-safe per-skill token and cost totals for one reply turn."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_skill: Dict[str, Dict[str, int]] = {}
+
+    def record(self, skill: str, model_name: Optional[str], tokens: Dict[str, int]) -> int:
+        cost = usage_cost_micro_usd(model_name, tokens)
+        with self._lock:
+            usage = self._by_skill.setdefault(
+                skill,
+                {"calls": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0, "cost_micro_usd": 0},
+            )
+            usage["calls"] += 1
+            for field in ("input_tokens", "cached_input_tokens", "output_tokens"):
+                usage[field] += tokens.get(field, 0)
+            usage["cost_micro_usd"] += cost
+        return cost
+
+    def by_skill(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {skill: dict(usage) for skill, usage in self._by_skill.items()}
+
+    def totals(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for usage in self.by_skill().values():
+            for field, value in usage.items():
+                totals[field] = totals.get(field, 0) + value
+        return totals
+
+
+_active_ledger: ContextVar[Optional[UsageLedger]] = ContextVar("llm_usage_ledger", default=None)
+
+
+def _usage_date() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+@contextmanager
+def llm_usage_accounting(athlete_id: str, *, enabled: Optional[bool] = None) -> Iterator[Optional[UsageLedger]]:
+    """
+    Collects the enclosed block's LLM usage and adds it to the daily rollups
+    on exit. Nested blocks share the outer ledger; yields None when disabled.
+    """
+    outer = _active_ledger.get()
+    if outer is not None or not (ENABLE_LLM_COST_ACCOUNTING if enabled is None else enabled):
+        yield outer
+        return
+    ledger = UsageLedger()
+    token = _active_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _active_ledger.reset(token)
+        persist_usage_rollup(athlete_id, ledger)
+
+
+def record_llm_response(skill: str, model_name: Optional[str], response: Any) -> None:
+    """Accounts the ``usage`` reported on one OpenAI response to ``skill``."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    tokens = telemetry.llm_usage_tokens(usage)
+    telemetry.record_llm_usage(str(model_name or ""), response)
+    ledger = _active_ledger.get()
+    cost = ledger.record(skill, model_name, tokens) if ledger is not None else usage_cost_micro_usd(model_name, tokens)
+    telemetry.increment("llm_cost_micro_usd", cost)
+
+
+def persist_usage_rollup(athlete_id: str, ledger: UsageLedger, *, usage_date: Optional[str] = None) -> bool:
+    """Adds the ledger to the athlete's and the fleet's rollup for ``usage_date`` (UTC today)."""
+    usage_by_skill = ledger.by_skill()
+    if not usage_by_skill:
+        return True
+    from dynamodb_models import add_llm_usage_rollup
+
+    usage_date = usage_date or _usage_date()
+    ttl_seconds = LLM_USAGE_ROLLUP_TTL_DAYS * 86400
+    athlete_ok = add_llm_usage_rollup(athlete_id, usage_date, usage_by_skill, ttl_seconds=ttl_seconds)
+    fleet_ok = add_llm_usage_rollup(FLEET_ROLLUP_ID, usage_date, usage_by_skill, ttl_seconds=ttl_seconds)
+    totals = ledger.totals()
+    logger.info(
+        "llm_usage_recorded athlete_id=%s usage_date=%s calls=%s input_tokens=%s output_tokens=%s cost_micro_usd=%s",
+        athlete_id,
+        usage_date,
+        totals.get("calls", 0),
+        totals.get("input_tokens", 0),
+        totals.get("output_tokens", 0),
+        totals.get("cost_micro_usd", 0),
+    )
+    return athlete_ok and fleet_ok
+
+
+def spend_budget_exceeded(athlete_id: Optional[str], *, usage_date: Optional[str] = None) -> Optional[str]:
+    """
+    Returns "athlete" or "fleet" when that scope has spent its daily budget,
+    otherwise None. Always None while cost accounting is off.
+    """
+    if not ENABLE_LLM_COST_ACCOUNTING:
+        return None
+    checks = []
+    if athlete_id and LLM_ATHLETE_DAILY_BUDGET_USD > 0:
+        checks.append((BUDGET_SCOPE_ATHLETE, athlete_id, LLM_ATHLETE_DAILY_BUDGET_USD))
+    if LLM_FLEET_DAILY_BUDGET_USD > 0:
+        checks.append((BUDGET_SCOPE_FLEET, FLEET_ROLLUP_ID, LLM_FLEET_DAILY_BUDGET_USD))
+    if not checks:
+        return None
+    from dynamodb_models import get_llm_usage_rollup
+
+    usage_date = usage_date or _usage_date()
+    for scope, rollup_id, budget_usd in checks:
+        rollup = get_llm_usage_rollup(rollup_id, usage_date) or {}
+        if int(rollup.get("cost_micro_usd") or 0) >= budget_usd * _MICRO_USD_PER_USD:
+            return scope
+    return None
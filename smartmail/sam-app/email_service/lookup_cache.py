@@ -0,0 +1,90 @@
+"""
+Warm-container caches for per-sender lookups that rarely change.
+
+Every inbound email checks registration and the verified session, and
+ensures the email -> athlete_id mapping, the profile shell and the progress
+snapshot exist. With ENABLE_LOOKUP_CACHE these answers are kept for
+LOOKUP_CACHE_TTL_SECONDS in small LRUs that live as long as the Lambda
+container:
+
+- registration: only positive answers (a new sign-up must be seen at once)
+- verified sessions: only verified answers, never past session_expires_at
+- athlete ids: the email -> athlete_id mapping, which never changes
+- progress snapshots: athlete ids whose default snapshot row exists
+
+A hit lets the caller skip the read, or the idempotent ``ensure_*`` write.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from config import ENABLE_LOOKUP_CACHE, LOOKUP_CACHE_MAX_ENTRIES, LOOKUP_CACHE_TTL_SECONDS
+from telemetry import increment
+
+
+class TTLCache:
+    """Thread-safe LRU whose entries expire after ttl_seconds, or earlier when put with expires_at."""
+
+    def __init__(self, name: str, *, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        increment(f"{self.name}_cache_hits")
+        return value
+
+    def put(self, key: str, value: Any, *, expires_at: Optional[float] = None) -> None:
+        expiry = time.time() + self.ttl_seconds
+        if expires_at is not None:
+            expiry = min(expiry, float(expires_at))
+        with self._lock:
+            self._entries[key] = (expiry, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _cache(name: str) -> TTLCache:
+    return TTLCache(name, max_entries=LOOKUP_CACHE_MAX_ENTRIES, ttl_seconds=LOOKUP_CACHE_TTL_SECONDS)
+
+
+registration_cache = _cache("registration")
+verified_session_cache = _cache("verified_session")
+athlete_id_cache = _cache("athlete_id")
+progress_snapshot_cache = _cache("progress_snapshot")
+
+
+def is_lookup_cache_enabled() -> bool:
+    return ENABLE_LOOKUP_CACHE
+
+
+def clear_lookup_caches() -> None:
+    for cache in (registration_cache, verified_session_cache, athlete_id_cache, progress_snapshot_cache):
+        cache.clear()
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional, Tuple
 
+from prompt_budget import estimate_tokens
 from sectioned_memory_contract import (
     BUCKET_CONSTRAINTS,
     BUCKET_CONTEXT_NOTES,
@@ -41,6 +42,9 @@ MAX_SCHEDULE_IN_PROMPT = 4
 MAX_PREFERENCE_IN_PROMPT = 2
 MAX_CONTEXT_IN_PROMPT = 3
 
+# Under a token budget, bounded sections give up their lowest-ranked facts in this order.
+BUDGET_TRIM_ORDER = ("context_facts", "preference_facts", "structure_facts")
+
 
 def _subtype_rank(section: str, subtype: str) -> int:
     if section == SECTION_SCHEDULE_ANCHOR:
@@ -65,6 +69,31 @@ def _sort_bounded_facts(facts: List[Dict[str, Any]], section: str) -> List[Dict[
     return sorted(facts, key=key)
 
 
+def _fact_tokens(fact: Dict[str, Any]) -> int:
+    return estimate_tokens(str(fact.get("summary") or ""))
+
+
+def _trim_to_token_budget(
+    sections: Dict[str, List[Dict[str, Any]]],
+    token_budget: int,
+    fixed_tokens: int,
+) -> Dict[str, Any]:
+    """Drops facts (trim order, lowest rank first) until everything fits; returns a report."""
+    used = fixed_tokens + sum(_fact_tokens(f) for name in BUDGET_TRIM_ORDER for f in sections[name])
+    dropped = {name: 0 for name in BUDGET_TRIM_ORDER}
+    for name in BUDGET_TRIM_ORDER:
+        facts = sections[name]
+        while facts and used > token_budget:
+            used -= _fact_tokens(facts.pop())
+            dropped[name] += 1
+    return {
+        "token_budget": token_budget,
+        "fixed_tokens": fixed_tokens,
+        "tokens_used": used,
+        "dropped": dropped,
+    }
+
+
 def _take_active(bucket: str, memory: Dict[str, Any]) -> List[Dict[str, Any]]:
     raw = memory.get(bucket) or {}
     active = raw.get("active") or []
@@ -78,8 +107,14 @@ def _take_active(bucket: str, memory: Dict[str, Any]) -> List[Dict[str, Any]]:
 def compile_prompt_memory(
     sectioned_memory: Dict[str, Any],
     continuity: Optional[Dict[str, Any]] = None,
+    *,
+    token_budget: Optional[int] = None,
 ) -> Dict[str, Any]:
-    """Select bounded, deterministic facts for the response-generation prompt."""
+    """Select bounded, deterministic facts for the response-generation prompt.
+
+    With ``token_budget``, schedule/preference/context facts are further
+    trimmed to fit it and the result carries a ``budget_report``.
+    """
     if not isinstance(sectioned_memory, dict):
         sectioned_memory = empty_sectioned_memory()
 
@@ -96,7 +131,7 @@ def compile_prompt_memory(
     ctx_sorted = _sort_bounded_facts(ctx_raw, SECTION_CONTEXT)
 
     # Per-section compiler caps. Goals/constraints are never trimmed here (storage caps apply).
-    # Safety ordering for future global budgets: trim context → preferences → schedule.
+    # A token budget trims further in safety order: context → preferences → schedule.
     schedule_sel = schedule_sorted[:MAX_SCHEDULE_IN_PROMPT]
     pref_sel = pref_sorted[:MAX_PREFERENCE_IN_PROMPT]
     ctx_sel = ctx_sorted[:MAX_CONTEXT_IN_PROMPT]
@@ -107,10 +142,23 @@ def compile_prompt_memory(
         if isinstance(s, str) and s.strip():
             continuity_focus = s.strip()
 
-    return {
+    budget_report: Optional[Dict[str, Any]] = None
+    if token_budget is not None:
+        # Goals, constraints and the continuity focus count against the budget but are never dropped.
+        fixed_tokens = sum(_fact_tokens(f) for f in priority_facts) + estimate_tokens(continuity_focus)
+        budget_report = _trim_to_token_budget(
+            {"structure_facts": schedule_sel, "preference_facts": pref_sel, "context_facts": ctx_sel},
+            max(0, int(token_budget)),
+            fixed_tokens,
+        )
+
+    compiled = {
         "priority_facts": priority_facts,
         "structure_facts": schedule_sel,
         "preference_facts": pref_sel,
         "context_facts": ctx_sel,
         "continuity_focus": continuity_focus,
     }
+    if budget_report is not None:
+        compiled["budget_report"] = budget_report
+    return compiled
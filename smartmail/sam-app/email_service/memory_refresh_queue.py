@@ -0,0 +1,303 @@
+"""
+Deferred post-reply memory refresh.
+
+In deferred mode the reply turn enqueues a MemoryRefreshJob instead of
+running the sectioned-memory LLM before the reply is sent. Jobs go to SQS
+when MEMORY_REFRESH_QUEUE_URL is set (consumed by sqs_memory_refresh_handler)
+and otherwise to an in-process queue that the handler drains after sending.
+
+Jobs for the same athlete are coalesced into one refresh. The worker writes
+with an optimistic memory_version check and re-reads and retries when
+another writer got there first.
+
+The sectioned-memory stack is imported on first use so that importing this
+module stays cheap for the handler.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+
+from config import (
+    AWS_REGION,
+    MEMORY_REFRESH_MAX_VERSION_RETRIES,
+    MEMORY_REFRESH_MODE,
+    MEMORY_REFRESH_QUEUE_URL,
+)
+from dynamodb_models import (
+    get_continuity_summary,
+    get_memory_version,
+    get_sectioned_memory,
+    replace_memory,
+)
+from llm_usage import llm_usage_accounting
+
+logger = logging.getLogger(__name__)
+
+MEMORY_REFRESH_MODE_SYNC = "sync"
+MEMORY_REFRESH_MODE_DEFERRED = "deferred"
+
+COALESCED_TEXT_SEPARATOR = "\n\n-----\n\n"
+
+
+@dataclass
+class MemoryRefreshJob:
+    athlete_id: str
+    interaction_context: Dict[str, Any]
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    enqueued_at: int = field(default_factory=lambda: int(time.time()))
+    job_count: int = 1
+
+    def to_message(self) -> str:
+        return json.dumps(
+            {
+                "athlete_id": self.athlete_id,
+                "interaction_context": self.interaction_context,
+                "job_id": self.job_id,
+                "enqueued_at": self.enqueued_at,
+            },
+            sort_keys=True,
+            default=str,
+        )
+
+    @classmethod
+    def from_message(cls, body: str) -> "MemoryRefreshJob":
+        payload = json.loads(body)
+        if not isinstance(payload, dict) or not payload.get("athlete_id"):
+            raise ValueError("memory refresh job requires athlete_id")
+        return cls(
+            athlete_id=str(payload["athlete_id"]),
+            interaction_context=dict(payload.get("interaction_context") or {}),
+            job_id=str(payload.get("job_id") or uuid.uuid4().hex),
+            enqueued_at=int(payload.get("enqueued_at") or 0),
+        )
+
+
+def _joined(values: Sequence[Any]) -> str:
+    return COALESCED_TEXT_SEPARATOR.join(str(value).strip() for value in values if str(value or "").strip())
+
+
+def coalesce_jobs(jobs: Sequence[MemoryRefreshJob]) -> MemoryRefreshJob:
+    """
+    Folds one athlete's jobs (oldest first) into a single refresh: inbound
+    emails and coach replies are joined in order, applied profile fields are
+    unioned, and the latest turn supplies subject, model and rule decision.
+    """
+    if not jobs:
+        raise ValueError("coalesce_jobs requires at least one job")
+    if len(jobs) == 1:
+        return jobs[0]
+    contexts = [job.interaction_context for job in jobs]
+    latest = contexts[-1]
+    merged: Dict[str, Any] = dict(latest)
+    merged["inbound_email"] = _joined([context.get("inbound_email", "") for context in contexts])
+    if any("coach_reply" in context for context in contexts):
+        merged["coach_reply"] = _joined([context.get("coach_reply", "") for context in contexts])
+    merged["profile_updates_applied"] = sorted(
+        {name for context in contexts for name in context.get("profile_updates_applied") or []}
+    )
+    merged["manual_activity_detected"] = any(context.get("manual_activity_detected") for context in contexts)
+    merged["rule_engine_decision"] = next(
+        (context["rule_engine_decision"] for context in reversed(contexts) if context.get("rule_engine_decision")),
+        None,
+    )
+    return MemoryRefreshJob(
+        athlete_id=jobs[0].athlete_id,
+        interaction_context=merged,
+        job_id=jobs[-1].job_id,
+        enqueued_at=jobs[0].enqueued_at,
+        job_count=sum(job.job_count for job in jobs),
+    )
+
+
+class LocalMemoryRefreshQueue:
+    """In-process stand-in for the SQS queue; jobs are grouped per athlete in arrival order."""
+
+    def __init__(self) -> None:
+        self._jobs: "OrderedDict[str, List[MemoryRefreshJob]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, job: MemoryRefreshJob) -> None:
+        with self._lock:
+            self._jobs.setdefault(job.athlete_id, []).append(job)
+
+    def drain(self) -> List[MemoryRefreshJob]:
+        """Removes all queued jobs and returns one coalesced job per athlete."""
+        with self._lock:
+            groups = list(self._jobs.values())
+            self._jobs.clear()
+        return [coalesce_jobs(group) for group in groups]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(group) for group in self._jobs.values())
+
+
+class SqsMemoryRefreshQueue:
+    """Sends jobs to SQS; FIFO queues get the athlete as message group so one athlete's jobs stay ordered."""
+
+    def __init__(self, queue_url: str, client: Any = None):
+        self.queue_url = queue_url
+        self._client = client
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            import boto3  # type: ignore
+
+            self._client = boto3.client("sqs", region_name=AWS_REGION)
+        return self._client
+
+    def put(self, job: MemoryRefreshJob) -> None:
+        kwargs: Dict[str, Any] = {"QueueUrl": self.queue_url, "MessageBody": job.to_message()}
+        if self.queue_url.endswith(".fifo"):
+            kwargs["MessageGroupId"] = job.athlete_id
+            kwargs["MessageDeduplicationId"] = job.job_id
+        self._get_client().send_message(**kwargs)
+
+
+_UNSET = object()
+_queue: Any = _UNSET
+_queue_lock = threading.Lock()
+
+
+def get_memory_refresh_queue() -> Any:
+    """Returns the process-wide queue: SQS when MEMORY_REFRESH_QUEUE_URL is set, else in-process."""
+    global _queue
+    if _queue is _UNSET:
+        with _queue_lock:
+            if _queue is _UNSET:
+                if MEMORY_REFRESH_QUEUE_URL:
+                    _queue = SqsMemoryRefreshQueue(MEMORY_REFRESH_QUEUE_URL)
+                else:
+                    _queue = LocalMemoryRefreshQueue()
+    return _queue
+
+
+def set_memory_refresh_queue(queue: Any) -> None:
+    global _queue
+    with _queue_lock:
+        _queue = queue
+
+
+def reset_memory_refresh_queue() -> None:
+    global _queue
+    with _queue_lock:
+        _queue = _UNSET
+
+
+def is_memory_refresh_deferred() -> bool:
+    return MEMORY_REFRESH_MODE == MEMORY_REFRESH_MODE_DEFERRED
+
+
+def enqueue_memory_refresh(athlete_id: str, interaction_context: Dict[str, Any]) -> bool:
+    """defer_fn for maybe_post_reply_memory_refresh; False makes the caller refresh inline."""
+    try:
+        job = MemoryRefreshJob(athlete_id=athlete_id, interaction_context=interaction_context)
+        get_memory_refresh_queue().put(job)
+    except Exception as exc:
+        logger.warning("memory_refresh_enqueue_failed athlete_id=%s error=%s", athlete_id, exc)
+        return False
+    logger.info("memory_refresh_enqueued athlete_id=%s job_id=%s", athlete_id, job.job_id)
+    return True
+
+
+def process_memory_refresh_job(
+    job: MemoryRefreshJob,
+    *,
+    max_version_retries: int = MEMORY_REFRESH_MAX_VERSION_RETRIES,
+) -> bool:
+    """
+    Applies one (possibly coalesced) job. The write is conditioned on the
+    memory_version read before the LLM call; on a conflict the job re-reads
+    memory and runs again, up to max_version_retries extra attempts.
+    """
+    from coaching_memory import refresh_and_persist_memory
+    from sectioned_memory_reducer import SectionedCandidateReducerError
+    from skills.memory.errors import MemoryRefreshError
+
+    for attempt in range(max(0, int(max_version_retries)) + 1):
+        version = get_memory_version(job.athlete_id)
+
+        def _replace_if_unchanged(athlete_id: str, sectioned_memory: Dict[str, Any], continuity: Dict[str, Any]) -> bool:
+            return replace_memory(athlete_id, sectioned_memory, continuity, expected_version=version)
+
+        try:
+            refresh_and_persist_memory(
+                athlete_id=job.athlete_id,
+                interaction_context=job.interaction_context,
+                get_sectioned_memory_fn=get_sectioned_memory,
+                get_continuity_summary_fn=get_continuity_summary,
+                replace_memory_fn=_replace_if_unchanged,
+            )
+        except MemoryRefreshError as exc:
+            if get_memory_version(job.athlete_id) != version:
+                logger.info(
+                    "memory_refresh_version_conflict athlete_id=%s attempt=%s version=%s",
+                    job.athlete_id,
+                    attempt + 1,
+                    version,
+                )
+                continue
+            logger.warning("memory_refresh_job_failed athlete_id=%s error=%s", job.athlete_id, exc)
+            return False
+        except SectionedCandidateReducerError as exc:
+            logger.warning("memory_refresh_job_failed athlete_id=%s error=%s", job.athlete_id, exc)
+            return False
+        logger.info(
+            "memory_refresh_job_persisted athlete_id=%s jobs=%s written_over_version=%s lag_seconds=%s",
+            job.athlete_id,
+            job.job_count,
+            version,
+            max(0, int(time.time()) - job.enqueued_at),
+        )
+        return True
+    logger.warning("memory_refresh_job_gave_up athlete_id=%s reason=version_conflicts", job.athlete_id)
+    return False
+
+
+def drain_local_memory_refresh_queue() -> int:
+    """Runs queued in-process jobs (after the reply has been sent); returns how many were applied."""
+    queue = get_memory_refresh_queue()
+    if not isinstance(queue, LocalMemoryRefreshQueue) or not len(queue):
+        return 0
+    applied = 0
+    for job in queue.drain():
+        try:
+            with llm_usage_accounting(job.athlete_id):
+                applied += int(process_memory_refresh_job(job))
+        except Exception:
+            logger.exception("memory_refresh_job_error athlete_id=%s", job.athlete_id)
+    return applied
+
+
+def sqs_memory_refresh_handler(event, context):
+    """Worker Lambda for the SQS queue: coalesces per athlete and reports partial batch failures."""
+    from inbound_batch import BatchItem, group_batch_items
+
+    items = []
+    for record in event.get("Records", []):
+        try:
+            job = MemoryRefreshJob.from_message(record["body"])
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.error("Dropping unparseable memory refresh job message_id=%s error=%s", record.get("messageId"), exc)
+            continue
+        items.append(BatchItem(item_id=record["messageId"], key=job.athlete_id, payload=job))
+
+    failed_ids: List[str] = []
+    for group in group_batch_items(items).values():
+        try:
+            with llm_usage_accounting(group[0].key):
+                ok = process_memory_refresh_job(coalesce_jobs([item.payload for item in group]))
+        except Exception:
+            logger.exception("memory_refresh_job_error athlete_id=%s", group[0].key)
+            ok = False
+        if not ok:
+            failed_ids.extend(item.item_id for item in group)
+    return {"batchItemFailures": [{"itemIdentifier": item_id} for item_id in failed_ids]}
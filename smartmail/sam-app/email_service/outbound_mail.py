@@ -0,0 +1,485 @@
+"""
+Outbound mail: one pooled SES client, paced sends and an optional queue.
+
+Every message (coach replies, registration replies, verification emails and
+rate-limit notices) is built as a raw MIME message and wrapped in an
+OutboundEmail. ``deliver`` either sends it now (OUTBOUND_MAIL_MODE=sync) or
+enqueues it and returns its Message-ID (queued), so the inbound Lambda does
+not wait on SES. Queued jobs go to SQS on OUTBOUND_MAIL_QUEUE_URL (consumed
+by sqs_outbound_mail_handler, which SQS redelivers until the send settles);
+without a queue URL, queued mode falls back to sending inline. An in-process
+queue can be installed with set_outbound_mail_queue for local runs; its
+drain keeps unsettled jobs for the next drain.
+
+Sends take a token from a per-container token bucket refilled at
+OUTBOUND_SES_MAX_SEND_RATE, and a Throttling error is retried with capped,
+jittered exponential backoff. In queued mode each job's delivery status
+(queued, sent, retrying, failed) is written to the outbound_mail_status
+table.
+
+boto3 and the DynamoDB helpers are imported on first use so that importing
+this module stays cheap.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.message import Message
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from config import (
+    AWS_REGION,
+    OUTBOUND_MAIL_MODE,
+    OUTBOUND_MAIL_QUEUE_URL,
+    OUTBOUND_MAIL_STATUS_TTL_DAYS,
+    OUTBOUND_SEND_BACKOFF_BASE_SECONDS,
+    OUTBOUND_SEND_BACKOFF_MAX_SECONDS,
+    OUTBOUND_SEND_MAX_ATTEMPTS,
+    OUTBOUND_SES_MAX_SEND_RATE,
+)
+from telemetry import increment, instrument_aws_client
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_MAIL_MODE_SYNC = "sync"
+OUTBOUND_MAIL_MODE_QUEUED = "queued"
+
+OUTBOUND_STATUS_QUEUED = "queued"
+OUTBOUND_STATUS_SENT = "sent"
+OUTBOUND_STATUS_RETRYING = "retrying"
+OUTBOUND_STATUS_FAILED = "failed"
+
+_THROTTLING_ERROR_CODES = frozenset({"Throttling", "ThrottlingException", "TooManyRequestsException"})
+# SES rejections that will fail the same way on every retry.
+_PERMANENT_ERROR_CODES = frozenset(
+    {
+        "MessageRejected",
+        "MailFromDomainNotVerifiedException",
+        "ConfigurationSetDoesNotExistException",
+        "InvalidParameterValue",
+    }
+)
+
+
+class OutboundThrottledError(RuntimeError):
+    """Raised when SES keeps throttling a send after every backoff attempt."""
+
+
+@dataclass
+class OutboundEmail:
+    kind: str
+    source: str
+    destinations: List[str]
+    raw_message: str
+    message_id: str
+    enqueued_at: int = field(default_factory=lambda: int(time.time()))
+
+    @classmethod
+    def from_mime(cls, kind: str, msg: Message, *, source: str, destinations: Sequence[str]) -> "OutboundEmail":
+        """Wraps a built MIME message, giving it a Message-ID when it has none."""
+        if not msg["Message-ID"]:
+            msg["Message-ID"] = email.utils.make_msgid(domain=source.split("@")[-1])
+        return cls(
+            kind=kind,
+            source=source,
+            destinations=list(destinations),
+            raw_message=msg.as_string(),
+            message_id=str(msg["Message-ID"]),
+        )
+
+    def to_message(self) -> str:
+        return json.dumps(
+            {
+                "kind": self.kind,
+                "source": self.source,
+                "destinations": self.destinations,
+                "raw_message": self.raw_message,
+                "message_id": self.message_id,
+                "enqueued_at": self.enqueued_at,
+            },
+            sort_keys=True,
+        )
+
+    @classmethod
+    def from_message(cls, body: str) -> "OutboundEmail":
+        payload = json.loads(body)
+        if not isinstance(payload, dict) or not payload.get("raw_message") or not payload.get("destinations"):
+            raise ValueError("outbound email requires raw_message and destinations")
+        return cls(
+            kind=str(payload.get("kind") or "unknown"),
+            source=str(payload["source"]),
+            destinations=[str(destination) for destination in payload["destinations"]],
+            raw_message=str(payload["raw_message"]),
+            message_id=str(payload.get("message_id") or ""),
+            enqueued_at=int(payload.get("enqueued_at") or 0),
+        )
+
+
+def build_simple_email(
+    kind: str,
+    *,
+    source: str,
+    recipient: str,
+    subject: str,
+    text: str,
+    html: str,
+) -> OutboundEmail:
+    """A text + HTML (multipart/alternative) message to one recipient."""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = source
+    msg["To"] = recipient
+    msg["Date"] = email.utils.formatdate(localtime=True)
+    msg.attach(MIMEText(text, "plain", "utf-8"))
+    msg.attach(MIMEText(html, "html", "utf-8"))
+    return OutboundEmail.from_mime(kind, msg, source=source, destinations=[recipient])
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``acquire`` takes one token, sleeping until the
+    bucket has refilled enough. A rate of 0 or less disables pacing.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        capacity: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes one token; returns how long the caller waited for it in seconds."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            # The token is reserved now, so concurrent callers queue up behind it.
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+_ses_client: Any = None
+_ses_client_lock = threading.Lock()
+_rate_limiter = TokenBucket(OUTBOUND_SES_MAX_SEND_RATE)
+
+
+def get_ses_client() -> Any:
+    """The process-wide SES client, shared by every sender in this container."""
+    global _ses_client
+    if _ses_client is None:
+        with _ses_client_lock:
+            if _ses_client is None:
+                import boto3  # type: ignore
+
+                _ses_client = instrument_aws_client(boto3.client("ses", region_name=AWS_REGION))
+    return _ses_client
+
+
+def get_send_rate_limiter() -> TokenBucket:
+    return _rate_limiter
+
+
+def _error_code(exc: BaseException) -> str:
+    response = getattr(exc, "response", None)
+    if not isinstance(response, dict):
+        return ""
+    return str((response.get("Error") or {}).get("Code") or "")
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    return _error_code(exc) in _THROTTLING_ERROR_CODES
+
+
+def is_permanent_send_error(exc: BaseException) -> bool:
+    return _error_code(exc) in _PERMANENT_ERROR_CODES
+
+
+def backoff_delay(
+    attempt: int,
+    *,
+    base_seconds: float = OUTBOUND_SEND_BACKOFF_BASE_SECONDS,
+    max_seconds: float = OUTBOUND_SEND_BACKOFF_MAX_SECONDS,
+    rand: Callable[[], float] = random.random,
+) -> float:
+    """Delay before retry ``attempt`` (0-based): capped exponential with equal jitter."""
+    ceiling = min(max_seconds, base_seconds * (2 ** max(0, int(attempt))))
+    return ceiling / 2 + rand() * ceiling / 2
+
+
+def send_outbound_email(
+    job: OutboundEmail,
+    *,
+    client: Any = None,
+    rate_limiter: Optional[TokenBucket] = None,
+    max_attempts: Optional[int] = None,
+    sleep: Optional[Callable[[float], None]] = None,
+) -> str:
+    """
+    Sends one message through SES and returns the SES MessageId. Throttling is
+    retried with backoff, then raised as OutboundThrottledError; other errors
+    propagate.
+    """
+    client = client or get_ses_client()
+    rate_limiter = rate_limiter or get_send_rate_limiter()
+    sleep = sleep or time.sleep
+    attempts = max(1, int(OUTBOUND_SEND_MAX_ATTEMPTS if max_attempts is None else max_attempts))
+    for attempt in range(attempts):
+        rate_limiter.acquire()
+        try:
+            response = client.send_raw_email(
+                Source=job.source,
+                Destinations=job.destinations,
+                RawMessage={"Data": job.raw_message},
+            )
+            return response["MessageId"]
+        except Exception as exc:
+            if not is_throttling_error(exc):
+                raise
+            increment("ses_throttled")
+            if attempt + 1 >= attempts:
+                raise OutboundThrottledError(
+                    f"SES throttled {job.kind} {job.message_id} after {attempts} attempts"
+                ) from exc
+            delay = backoff_delay(attempt)
+            logger.warning(
+                "outbound_mail_throttled kind=%s message_id=%s attempt=%s delay_seconds=%.2f",
+                job.kind,
+                job.message_id,
+                attempt + 1,
+                delay,
+            )
+            sleep(delay)
+    raise AssertionError("unreachable")
+
+
+class LocalOutboundMailQueue:
+    """In-process stand-in for the SQS queue (local runs and tests); jobs are sent in arrival order."""
+
+    def __init__(self) -> None:
+        self._jobs: Deque[OutboundEmail] = deque()
+        self._lock = threading.Lock()
+
+    def put(self, job: OutboundEmail) -> None:
+        with self._lock:
+            self._jobs.append(job)
+
+    def drain(self) -> List[OutboundEmail]:
+        with self._lock:
+            jobs = list(self._jobs)
+            self._jobs.clear()
+        return jobs
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+
+class SqsOutboundMailQueue:
+    """Sends jobs to SQS; FIFO queues deduplicate on the Message-ID."""
+
+    def __init__(self, queue_url: str, client: Any = None):
+        self.queue_url = queue_url
+        self._client = client
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            import boto3  # type: ignore
+
+            self._client = boto3.client("sqs", region_name=AWS_REGION)
+        return self._client
+
+    def put(self, job: OutboundEmail) -> None:
+        kwargs: Dict[str, Any] = {"QueueUrl": self.queue_url, "MessageBody": job.to_message()}
+        if self.queue_url.endswith(".fifo"):
+            kwargs["MessageGroupId"] = job.kind
+            kwargs["MessageDeduplicationId"] = job.message_id
+        self._get_client().send_message(**kwargs)
+
+
+_UNSET = object()
+_queue: Any = _UNSET
+_queue_lock = threading.Lock()
+
+
+def get_outbound_mail_queue() -> Any:
+    """Returns the process-wide queue: SQS when OUTBOUND_MAIL_QUEUE_URL is set, else None."""
+    global _queue
+    if _queue is _UNSET:
+        with _queue_lock:
+            if _queue is _UNSET:
+                if OUTBOUND_MAIL_QUEUE_URL:
+                    _queue = SqsOutboundMailQueue(OUTBOUND_MAIL_QUEUE_URL)
+                else:
+                    if OUTBOUND_MAIL_MODE == OUTBOUND_MAIL_MODE_QUEUED:
+                        logger.warning("outbound_mail_queue_unconfigured mode=queued fallback=sync")
+                    _queue = None
+    return _queue
+
+
+def set_outbound_mail_queue(queue: Any) -> None:
+    global _queue
+    with _queue_lock:
+        _queue = queue
+
+
+def reset_outbound_mail_queue() -> None:
+    global _queue
+    with _queue_lock:
+        _queue = _UNSET
+
+
+def is_outbound_mail_queued() -> bool:
+    return OUTBOUND_MAIL_MODE == OUTBOUND_MAIL_MODE_QUEUED and get_outbound_mail_queue() is not None
+
+
+def _record_status(job: OutboundEmail, status: str, **fields: Any) -> None:
+    from dynamodb_models import put_outbound_mail_status
+
+    try:
+        put_outbound_mail_status(
+            job.message_id,
+            status,
+            ttl_seconds=OUTBOUND_MAIL_STATUS_TTL_DAYS * 86400,
+            kind=job.kind,
+            **fields,
+        )
+    except Exception as exc:
+        logger.warning("outbound_mail_status_failed message_id=%s status=%s error=%s", job.message_id, status, exc)
+
+
+def enqueue_outbound_email(job: OutboundEmail) -> bool:
+    """Queues one message; False means the caller should send it inline."""
+    try:
+        get_outbound_mail_queue().put(job)
+    except Exception as exc:
+        logger.warning("outbound_mail_enqueue_failed kind=%s message_id=%s error=%s", job.kind, job.message_id, exc)
+        return False
+    increment("outbound_mail_queued")
+    _record_status(job, OUTBOUND_STATUS_QUEUED)
+    logger.info("outbound_mail_enqueued kind=%s message_id=%s", job.kind, job.message_id)
+    return True
+
+
+def deliver(job: OutboundEmail, *, client: Any = None) -> str:
+    """
+    Sends or queues one message. Returns the SES MessageId when sent inline
+    and the RFC 5322 Message-ID when queued; send errors propagate.
+    """
+    if is_outbound_mail_queued() and enqueue_outbound_email(job):
+        return job.message_id
+    return send_outbound_email(job, client=client)
+
+
+def process_outbound_job(job: OutboundEmail, *, client: Any = None) -> bool:
+    """
+    Sends one queued message and records its status. Returns False only when
+    the job should be retried later (SES still throttling or a transient
+    error); permanent rejections are recorded as failed and not retried.
+    """
+    try:
+        ses_message_id = send_outbound_email(job, client=client)
+    except OutboundThrottledError as exc:
+        logger.warning("outbound_mail_deferred kind=%s message_id=%s error=%s", job.kind, job.message_id, exc)
+        _record_status(job, OUTBOUND_STATUS_RETRYING)
+        return False
+    except Exception as exc:
+        permanent = is_permanent_send_error(exc)
+        logger.error(
+            "outbound_mail_failed kind=%s message_id=%s permanent=%s error=%s",
+            job.kind,
+            job.message_id,
+            permanent,
+            exc,
+        )
+        status = OUTBOUND_STATUS_FAILED if permanent else OUTBOUND_STATUS_RETRYING
+        _record_status(job, status, error=str(exc)[:500])
+        return permanent
+    _record_status(job, OUTBOUND_STATUS_SENT, ses_message_id=ses_message_id)
+    logger.info(
+        "outbound_mail_sent kind=%s message_id=%s ses_message_id=%s lag_seconds=%s",
+        job.kind,
+        job.message_id,
+        ses_message_id,
+        max(0, int(time.time()) - job.enqueued_at),
+    )
+    return True
+
+
+def drain_local_outbound_mail_queue() -> int:
+    """
+    Sends queued in-process jobs; returns how many were sent or settled.
+    A job that has to be retried is put back for the next drain.
+    """
+    queue = get_outbound_mail_queue()
+    if not isinstance(queue, LocalOutboundMailQueue) or not len(queue):
+        return 0
+    settled = 0
+    for job in queue.drain():
+        try:
+            ok = process_outbound_job(job)
+        except Exception:
+            logger.exception("outbound_mail_job_error message_id=%s", job.message_id)
+            ok = False
+        if ok:
+            settled += 1
+        else:
+            queue.put(job)
+    return settled
+
+
+def sqs_outbound_mail_handler(event, context):
+    """
+    Worker Lambda for the SQS queue. Records are sent in order at the paced
+    rate; once a send has to be retried (SES still throttling after backoff,
+    or a transient error), the rest of the batch is returned as failures
+    without another attempt so SQS redelivers it later.
+    """
+    failed_ids: List[str] = []
+    backing_off = False
+    for record in event.get("Records", []):
+        try:
+            job = OutboundEmail.from_message(record["body"])
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.error("Dropping unparseable outbound email message_id=%s error=%s", record.get("messageId"), exc)
+            continue
+        if backing_off:
+            failed_ids.append(record["messageId"])
+            continue
+        try:
+            ok = process_outbound_job(job)
+        except Exception:
+            logger.exception("outbound_mail_job_error message_id=%s", job.message_id)
+            ok = False
+        if not ok:
+            failed_ids.append(record["messageId"])
+            backing_off = True
+    logger.info(
+        "outbound_mail_batch_processed records=%s failed=%s",
+        len(event.get("Records", [])),
+        len(failed_ids),
+    )
+    return {"batchItemFailures": [{"itemIdentifier": item_id} for item_id in failed_ids]}
@@ -0,0 +1,49 @@
+"""Local token estimates and per-model prompt budgets (no tokenizer dependency)."""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Optional
+
+from config import ENABLE_PROMPT_TOKEN_BUDGET, PROMPT_TOKEN_BUDGET_DEFAULT, PROMPT_TOKEN_BUDGETS
+
+# Words, numbers and single punctuation marks; long pieces split roughly the
+# way BPE vocabularies split them (about one extra token per 6 characters).
+_TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_EXTRA_TOKEN = 6
+
+
+def estimate_tokens(value: Any) -> int:
+    """Approximate token count of a string, or of a value's compact JSON form."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        text = value
+    else:
+        text = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    return sum(1 + len(piece) // _CHARS_PER_EXTRA_TOKEN for piece in _TOKEN_PIECE_RE.findall(text))
+
+
+def parse_model_budgets(raw: str) -> Dict[str, int]:
+    """Parses "model=tokens,model2=tokens"; malformed pairs are ignored."""
+    budgets: Dict[str, int] = {}
+    for pair in (raw or "").split(","):
+        model, sep, tokens = pair.partition("=")
+        if not sep or not model.strip():
+            continue
+        try:
+            budgets[model.strip()] = int(tokens)
+        except ValueError:
+            continue
+    return budgets
+
+
+_MODEL_BUDGETS = parse_model_budgets(PROMPT_TOKEN_BUDGETS)
+
+
+def prompt_token_budget(model_name: Optional[str]) -> Optional[int]:
+    """Token budget for a response brief sent to ``model_name``; None when budgeting is off."""
+    if not ENABLE_PROMPT_TOKEN_BUDGET:
+        return None
+    return _MODEL_BUDGETS.get(str(model_name or ""), PROMPT_TOKEN_BUDGET_DEFAULT)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 from functools import lru_cache
@@ -125,3 +126,12 @@ def load_coach_reply_prompt_pack(*, version: str | None = None) -> Dict[str, Any
             **split,
         },
     }
+
+
+def prompt_prefix_cache_key(skill: str, static_prefix: str) -> str:
+    """
+    Provider prompt_cache_key for a static system-prompt prefix. Requests that
+    share a prefix share a key, so they are routed to the same prompt cache.
+    """
+    digest = hashlib.sha256(static_prefix.encode("utf-8")).hexdigest()[:16]
+    return f"{skill}:{digest}"
@@ -3,25 +3,70 @@ Rate limiting and spam protection for verified users.
 Quota claiming and throttled rate-limit notices; no business/LLM logic.
 """
 import logging
+import threading
 import time
-import boto3  # type: ignore
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 from dynamodb_models import (
     claim_verified_quota_slot,
     atomically_set_verified_notice_cooldown_if_allowed,
 )
 from config import (
-    AWS_REGION,
     VERIFIED_HOURLY_QUOTA,
     VERIFIED_DAILY_QUOTA,
     SEND_RATE_LIMIT_NOTICE,
     RATE_LIMIT_NOTICE_COOLDOWN_MINUTES,
+    ENABLE_QUOTA_NEGATIVE_CACHE,
+    QUOTA_NEGATIVE_CACHE_MAX_ENTRIES,
 )
 from email_copy import EmailCopy
+from outbound_mail import build_simple_email, deliver
+from telemetry import increment
 
 logger = logging.getLogger(__name__)
 
+# email -> (blocked_until epoch, claim result) for senders known to be over quota.
+_quota_blocks: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_quota_blocks_lock = threading.Lock()
+
+
+def _quota_block_expiry(reason: str, now: int) -> Optional[int]:
+    """Start of the next UTC hour/day bucket for an hourly/daily block; None for other reasons."""
+    if reason == "hourly_limit_exceeded":
+        return (now // 3600 + 1) * 3600
+    if reason == "daily_limit_exceeded":
+        return (now // 86400 + 1) * 86400
+    return None
+
+
+def _cached_quota_block(email: str, now: int) -> Optional[Dict[str, Any]]:
+    with _quota_blocks_lock:
+        entry = _quota_blocks.get(email)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del _quota_blocks[email]
+            return None
+        return entry[1]
+
+
+def _cache_quota_block(email: str, quota_result: Dict[str, Any], now: int) -> None:
+    blocked_until = _quota_block_expiry(str(quota_result.get("reason", "")), now)
+    if blocked_until is None:
+        return
+    with _quota_blocks_lock:
+        if len(_quota_blocks) >= QUOTA_NEGATIVE_CACHE_MAX_ENTRIES:
+            for cached_email in [key for key, (until, _) in _quota_blocks.items() if until <= now]:
+                del _quota_blocks[cached_email]
+            if len(_quota_blocks) >= QUOTA_NEGATIVE_CACHE_MAX_ENTRIES:
+                _quota_blocks.pop(next(iter(_quota_blocks)))
+        _quota_blocks[email] = (blocked_until, quota_result)
+
+
+def clear_quota_block_cache() -> None:
+    with _quota_blocks_lock:
+        _quota_blocks.clear()
+
 
 class RateLimitNoticeSender:
     """Sends throttled rate-limit notices (no business logic)."""
@@ -29,17 +74,15 @@ class RateLimitNoticeSender:
     @staticmethod
     def send_rate_limit_notice(email: str) -> bool:
         try:
-            ses_client = boto3.client("ses", region_name=AWS_REGION)
-            ses_client.send_email(
-                Source="hello@geniml.com",
-                Destination={"ToAddresses": [email]},
-                Message={
-                    "Subject": {"Data": EmailCopy.RATE_LIMIT_SUBJECT, "Charset": "UTF-8"},
-                    "Body": {
-                        "Text": {"Data": EmailCopy.RATE_LIMIT_TEXT, "Charset": "UTF-8"},
-                        "Html": {"Data": EmailCopy.RATE_LIMIT_HTML, "Charset": "UTF-8"},
-                    },
-                },
+            deliver(
+                build_simple_email(
+                    "rate_limit_notice",
+                    source="hello@geniml.com",
+                    recipient=email,
+                    subject=EmailCopy.RATE_LIMIT_SUBJECT,
+                    text=EmailCopy.RATE_LIMIT_TEXT,
+                    html=EmailCopy.RATE_LIMIT_HTML,
+                )
             )
             logger.info("Rate-limit notice sent to %s", email)
             return True
@@ -100,14 +143,24 @@ def check_verified_quota_or_block(
     """
     Claims a quota slot for the verified user. Returns None if allowed;
     returns a response dict (statusCode 200, body) if blocked (quota exceeded or error).
+    With ENABLE_QUOTA_NEGATIVE_CACHE a sender blocked for the hour or day is
+    blocked again from memory, without a claim, until that bucket rolls over.
     """
-    quota_result = claim_verified_quota_slot(
-        email=from_email,
-        hourly_limit=VERIFIED_HOURLY_QUOTA,
-        daily_limit=VERIFIED_DAILY_QUOTA,
-    )
+    now = int(time.time())
+    quota_result = _cached_quota_block(from_email, now) if ENABLE_QUOTA_NEGATIVE_CACHE else None
+    cache_hit = quota_result is not None
+    if cache_hit:
+        increment("quota_cache_hits")
+    else:
+        quota_result = claim_verified_quota_slot(
+            email=from_email,
+            hourly_limit=VERIFIED_HOURLY_QUOTA,
+            daily_limit=VERIFIED_DAILY_QUOTA,
+        )
     if quota_result.get("allowed", False):
         return None
+    if ENABLE_QUOTA_NEGATIVE_CACHE and not cache_hit:
+        _cache_quota_block(from_email, quota_result, now)
 
     block_reason = str(quota_result.get("reason", ""))
     fail_closed = block_reason in {"quota_check_error", "quota_claim_conflict"}
@@ -121,6 +174,7 @@ def check_verified_quota_or_block(
         f"day_bucket={quota_result.get('day_bucket')}",
         f"hour_count={quota_result.get('hour_count')}",
         f"day_count={quota_result.get('day_count')}",
+        f"cached={str(cache_hit).lower()}",
     ]
     if aws_request_id:
         log_parts.append(f"aws_request_id={aws_request_id}")
@@ -0,0 +1,205 @@
+"""
+Deterministic split of an inbound reply into new text and quoted history.
+
+A reply usually carries the whole thread below it: "On ... wrote:"
+attributions, ">"-prefixed blocks, Outlook header blocks and our own
+previous coach reply. ``parse_reply`` separates the athlete's new text from
+the quoted history, the signature and any trailing legal disclaimer, so the
+LLM skills only read what the athlete just wrote.
+
+Rules, applied in one pass over the lines with precompiled patterns:
+
+1. The first quote attribution ("On ... wrote:" and its common translations,
+   possibly wrapped over three lines), "-----Original Message-----" line or
+   From:/Sent:/To: header block starts the quoted history; everything after
+   it is quoted.
+2. Above that, ">"-prefixed lines are quoted too. Inline answers between
+   quoted lines stay in the new text.
+3. A trailing disclaimer, then the signature ("-- " delimiter or a mobile
+   client's "Sent from my ..." line), are cut from the end.
+
+Forwarded messages ("Begin forwarded message:", "---------- Forwarded
+message ----------") are new content: an athlete forwarding a workout wants
+it read, so their header block does not start the quoted history.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# How many physical lines one wrapped attribution line may span.
+_ATTRIBUTION_MAX_LINES = 3
+# Header fields that must follow a "From:" line for it to open a quoted block.
+_HEADER_BLOCK_LOOKAHEAD = 5
+_HEADER_BLOCK_MIN_FIELDS = 2
+
+_ATTRIBUTION_START_RE = re.compile(r"^(?:on|le|am|el|op|il|em)\s", re.IGNORECASE)
+_ATTRIBUTION_RE = re.compile(
+    r"^(?:"
+    r"on\s.{1,300}?\swrote"
+    r"|le\s.{1,300}?\sa\s+écrit"
+    r"|am\s.{1,300}?\sschrieb.{0,120}?"
+    r"|el\s.{1,300}?\sescribió"
+    r"|op\s.{1,300}?\sschreef.{0,120}?"
+    r"|il\s.{1,300}?\sha\s+scritto"
+    r"|em\s.{1,300}?\sescreveu"
+    r")\s*:\s*$",
+    re.IGNORECASE,
+)
+_ORIGINAL_MESSAGE_RE = re.compile(
+    r"^-{2,}\s*(?:original message|ursprüngliche nachricht|message d'origine|mensaje original)\s*-{2,}$",
+    re.IGNORECASE,
+)
+_UNDERSCORE_RULE_RE = re.compile(r"^_{10,}$")
+_HEADER_FROM_RE = re.compile(r"^\*?(?:from|von|de|da|van)\s*:\*?\s*\S", re.IGNORECASE)
+_HEADER_FIELD_RE = re.compile(
+    r"^\*?(?:sent|date|to|cc|subject|gesendet|datum|an|betreff|envoyé|objet|à|enviado|fecha|para|asunto)"
+    r"\s*:\*?\s*\S",
+    re.IGNORECASE,
+)
+_FORWARDED_RE = re.compile(
+    r"^(?:begin forwarded message:|-{2,}\s*forwarded message\s*-{2,})$",
+    re.IGNORECASE,
+)
+_SIGNATURE_DELIMITER_RE = re.compile(r"^--\s?$")
+_MOBILE_SIGNATURE_RE = re.compile(
+    r"^(?:sent from my \S.{0,60}"
+    r"|sent from (?:outlook|mail|yahoo mail|gmail|proton mail)\b.{0,60}"
+    r"|get outlook for \S.{0,40}"
+    r"|sent via \S.{0,60})$",
+    re.IGNORECASE,
+)
+_DISCLAIMER_RE = re.compile(
+    r"^(?:confidentiality notice|disclaimer\s*:|important notice\s*:"
+    r"|this (?:e-?mail|message|communication)\b.{0,160}?\b(?:confidential|privileged|intended (?:solely |only )?for))",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ParsedReply:
+    """The parts of one reply body; joining them in order does not reproduce it exactly."""
+
+    new_text: str
+    quoted_text: str = ""
+    signature: str = ""
+    disclaimer: str = ""
+
+    @property
+    def has_quoted_history(self) -> bool:
+        return bool(self.quoted_text)
+
+
+def _is_attribution(lines: List[str], index: int) -> bool:
+    first = lines[index].strip()
+    if not _ATTRIBUTION_START_RE.match(first):
+        return False
+    window = first
+    for offset in range(_ATTRIBUTION_MAX_LINES):
+        if offset:
+            if index + offset >= len(lines) or not lines[index + offset].strip():
+                return False
+            window = f"{window} {lines[index + offset].strip()}"
+        if _ATTRIBUTION_RE.match(window):
+            return True
+    return False
+
+
+def _is_header_block(lines: List[str], index: int) -> bool:
+    if not _HEADER_FROM_RE.match(lines[index].strip()):
+        return False
+    following = lines[index + 1:index + 1 + _HEADER_BLOCK_LOOKAHEAD]
+    return sum(1 for line in following if _HEADER_FIELD_RE.match(line.strip())) >= _HEADER_BLOCK_MIN_FIELDS
+
+
+def _previous_non_blank(lines: List[str], index: int) -> Optional[str]:
+    for line in reversed(lines[:index]):
+        if line.strip():
+            return line.strip()
+    return None
+
+
+def _quoted_history_start(lines: List[str]) -> Optional[int]:
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if _ORIGINAL_MESSAGE_RE.match(stripped) or _is_attribution(lines, index):
+            return index
+        if _UNDERSCORE_RULE_RE.match(stripped) and index + 1 < len(lines) and _is_header_block(lines, index + 1):
+            return index
+        if _is_header_block(lines, index):
+            previous = _previous_non_blank(lines, index)
+            if previous is not None and _FORWARDED_RE.match(previous):
+                continue
+            return index
+    return None
+
+
+def _first_content_index(lines: List[str]) -> int:
+    for index, line in enumerate(lines):
+        if line.strip():
+            return index
+    return len(lines)
+
+
+def _disclaimer_start(lines: List[str]) -> Optional[int]:
+    first_content = _first_content_index(lines)
+    for index in range(first_content + 1, len(lines)):
+        if _DISCLAIMER_RE.match(lines[index].strip()):
+            return index
+    return None
+
+
+def _signature_start(lines: List[str]) -> Optional[int]:
+    first_content = _first_content_index(lines)
+    for index in range(first_content + 1, len(lines)):
+        if _SIGNATURE_DELIMITER_RE.match(lines[index].rstrip()):
+            return index
+    last = len(lines) - 1
+    while last > first_content and not lines[last].strip():
+        last -= 1
+    if last > first_content and _MOBILE_SIGNATURE_RE.match(lines[last].strip()):
+        return last
+    return None
+
+
+def _joined(lines: List[str]) -> str:
+    return "\n".join(lines).strip()
+
+
+def parse_reply(body: str) -> ParsedReply:
+    """Splits a text/plain reply body into new text, quoted history, signature and disclaimer."""
+    lines = str(body or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+    quoted: List[str] = []
+    history_start = _quoted_history_start(lines)
+    if history_start is not None:
+        quoted_tail = lines[history_start:]
+        lines = lines[:history_start]
+    else:
+        quoted_tail = []
+
+    kept: List[str] = []
+    for line in lines:
+        (quoted if line.lstrip().startswith(">") else kept).append(line)
+    quoted.extend(quoted_tail)
+
+    disclaimer: List[str] = []
+    start = _disclaimer_start(kept)
+    if start is not None:
+        kept, disclaimer = kept[:start], kept[start:]
+
+    signature: List[str] = []
+    start = _signature_start(kept)
+    if start is not None:
+        kept, signature = kept[:start], kept[start:]
+
+    return ParsedReply(
+        new_text=_joined(kept),
+        quoted_text=_joined(quoted),
+        signature=_joined(signature),
+        disclaimer=_joined(disclaimer),
+    )
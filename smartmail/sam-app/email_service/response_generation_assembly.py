@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import logging
 import re
 import time as _time
 from typing import Any, Dict, List, Optional
 
 from memory_compiler import compile_prompt_memory
+from prompt_budget import estimate_tokens
 from response_generation_contract import ResponseBrief, normalize_reply_mode
 from sectioned_memory_contract import (
     ContinuitySummary,
@@ -16,6 +18,8 @@ from sectioned_memory_contract import (
 )
 from skills.response_generation import build_clarification_questions
 
+logger = logging.getLogger(__name__)
+
 
 def _string_field(value: Any) -> Optional[str]:
     if not isinstance(value, str):
@@ -129,6 +133,39 @@ def detect_contradicted_facts(
     return contradictions
 
 
+def _fit_sectioned_memory_to_budget(
+    memory_payload: Dict[str, Any],
+    *,
+    budget_report: Dict[str, Any],
+    token_budget: int,
+    base_tokens: int,
+    model_name: Optional[str],
+) -> None:
+    """Drops the raw sectioned memory when it does not fit; the compiled facts already summarize it."""
+    facts_tokens = budget_report["tokens_used"] + estimate_tokens(memory_payload.get("contradicted_facts"))
+    remaining = token_budget - base_tokens - facts_tokens
+    sectioned_tokens = estimate_tokens(memory_payload.get("sectioned_memory"))
+    sectioned_included = sectioned_tokens <= remaining
+    if not sectioned_included:
+        memory_payload.pop("sectioned_memory", None)
+    dropped = budget_report["dropped"]
+    logger.info(
+        "response_brief_budget model=%s token_budget=%s base_tokens=%s memory_tokens=%s "
+        "sectioned_memory_tokens=%s sectioned_memory_included=%s total_tokens=%s "
+        "dropped_context=%s dropped_preference=%s dropped_structure=%s",
+        model_name,
+        token_budget,
+        base_tokens,
+        facts_tokens,
+        sectioned_tokens,
+        sectioned_included,
+        base_tokens + facts_tokens + (sectioned_tokens if sectioned_included else 0),
+        dropped["context_facts"],
+        dropped["preference_facts"],
+        dropped["structure_facts"],
+    )
+
+
 def _missing_injury_only(missing_profile_fields: list[str]) -> bool:
     return set(missing_profile_fields) == {"injury_status"}
 
@@ -149,6 +186,8 @@ def build_response_brief(
     intake_completed_this_turn: bool = False,
     current_plan: Optional[Dict[str, Any]] = None,
     active_monitoring_rules: Optional[list] = None,
+    token_budget: Optional[int] = None,
+    reserved_tokens: int = 0,
     # Legacy kwargs (ignored, kept for backward compat during transition)
     pre_reply_refresh_attempted: bool = False,
     post_reply_refresh_eligible: bool = False,
@@ -291,7 +330,32 @@ def build_response_brief(
         except SectionedMemoryContractError:
             continuity_summary = None
 
-    compiled = compile_prompt_memory(sectioned_memory, continuity_summary)
+    monitoring_rules = (
+        [dict(rule) for rule in active_monitoring_rules if isinstance(rule, dict)]
+        if isinstance(active_monitoring_rules, list)
+        else []
+    )
+    memory_token_budget: Optional[int] = None
+    if token_budget is not None:
+        # Everything except the memory facts is fixed for this turn; memory gets what is left.
+        base_tokens = int(reserved_tokens) + estimate_tokens(
+            {
+                "reply_mode": reply_mode,
+                "athlete_context": athlete_context,
+                "decision_context": decision_context,
+                "validated_plan": validated_plan,
+                "delivery_context": delivery_context,
+                "active_monitoring_rules": monitoring_rules,
+                "continuity_summary": continuity_summary,
+            }
+        )
+        memory_token_budget = int(token_budget) - base_tokens
+
+    compiled = compile_prompt_memory(
+        sectioned_memory,
+        continuity_summary,
+        token_budget=memory_token_budget,
+    )
     priority_facts = _fact_summaries(compiled["priority_facts"])
     structure_facts = _fact_summaries(compiled["structure_facts"])
     preference_facts = _fact_summaries(compiled["preference_facts"])
@@ -333,6 +397,15 @@ def build_response_brief(
     if contradicted:
         memory_payload["contradicted_facts"] = contradicted
 
+    if memory_token_budget is not None:
+        _fit_sectioned_memory_to_budget(
+            memory_payload,
+            budget_report=compiled["budget_report"],
+            token_budget=int(token_budget),
+            base_tokens=int(token_budget) - memory_token_budget,
+            model_name=normalized_model_name,
+        )
+
     payload = {
         "reply_mode": reply_mode,
         "athlete_context": athlete_context,
@@ -341,10 +414,8 @@ def build_response_brief(
         "delivery_context": delivery_context,
         "memory_context": memory_payload,
     }
-    if isinstance(active_monitoring_rules, list) and active_monitoring_rules:
-        payload["active_monitoring_rules"] = [
-            dict(rule) for rule in active_monitoring_rules if isinstance(rule, dict)
-        ]
+    if monitoring_rules:
+        payload["active_monitoring_rules"] = monitoring_rules
     return ResponseBrief.from_dict(payload)
 
 
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import json
+from copy import deepcopy
 from datetime import date
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence
 
 import logging as _logging
 
@@ -243,27 +245,17 @@ def _extract_session_preferences(sectioned_memory: Dict[str, Any] | None) -> lis
     return preferences
 
 
-def run_rule_engine_for_week(
-    athlete_id: str,
+def evaluate_week_decision(
     profile: Dict[str, Any],
     checkin: Dict[str, Any],
     today_date: date,
-    *,
-    persist_state: bool = True,
-    sectioned_memory: Dict[str, Any] | None = None,
-) -> RuleEngineOutput:
-    if not isinstance(athlete_id, str) or not athlete_id.strip():
-        raise RuleEngineOrchestratorError("athlete_id must be a non-empty string")
-    if not isinstance(profile, dict):
-        raise RuleEngineOrchestratorError("profile must be a dict")
-    if not isinstance(checkin, dict):
-        raise RuleEngineOrchestratorError("checkin must be a dict")
-    if not isinstance(today_date, date):
-        raise RuleEngineOrchestratorError("today_date must be a datetime.date")
-    if not isinstance(persist_state, bool):
-        raise RuleEngineOrchestratorError("persist_state must be a bool")
-
-    rule_state = load_rule_state(athlete_id)
+    rule_state: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Deterministic core of run_rule_engine_for_week: risk, phase (with event
+    guard and upgrade hysteresis), track, weekly skeleton, deload, routing and
+    the rule-state fields to persist. Pure; no I/O.
+    """
     phase_history = _phase_history_from_rule_state(rule_state)
     prior_phase = _prior_phase_from_rule_state(rule_state)
     prior_upgrade_streak = int(rule_state.get("phase_upgrade_streak", 0) or 0)
@@ -355,6 +347,114 @@ def run_rule_engine_for_week(
     if inconsistent_training and phase != candidate_phase:
         adjustments.append("phase_upgrade_requires_two_consecutive_qualifying_checkins")
 
+    prior_weeks_since_deload = int(rule_state.get("weeks_since_deload", 0) or 0)
+    return {
+        "effective_profile": effective_profile,
+        "effective_performance_intent": effective_performance_intent,
+        "candidate_phase": candidate_phase,
+        "phase": phase,
+        "risk_flag": risk_flag,
+        "track": track,
+        "weekly_skeleton": weekly_skeleton,
+        "adjustments": adjustments,
+        "plan_update_status": plan_update_status,
+        "deload_applied": deload_applied,
+        "today_action": today_action,
+        "routing_context": routed_plan["routing_context"],
+        "state_updates": {
+            "weeks_since_deload": 0 if deload_applied else max(0, prior_weeks_since_deload + 1),
+            "phase_upgrade_streak": phase_upgrade_streak,
+            "main_sport_switched": bool(
+                should_switch and resolved_main_sport and resolved_main_sport != profile.get("main_sport_current")
+            ),
+            "previous_main_sport": profile.get("main_sport_current"),
+        },
+    }
+
+
+def _batch_row_key(profile: Dict[str, Any], checkin: Dict[str, Any], rule_state: Dict[str, Any], today: date) -> str:
+    return json.dumps([profile, checkin, rule_state, today.isoformat()], sort_keys=True, default=str)
+
+
+def run_rule_engine_batch(
+    profiles: Sequence[Dict[str, Any]],
+    checkins: Sequence[Dict[str, Any]],
+    rule_states: Sequence[Dict[str, Any]],
+    today: date | Sequence[date],
+) -> List[Dict[str, Any]]:
+    """
+    Evaluates the deterministic weekly decision for many athlete-weeks.
+
+    Inputs are parallel columns: row ``i`` is ``profiles[i]``, ``checkins[i]``,
+    ``rule_states[i]`` and ``today`` (one date for every row, or one per row).
+    Each result is exactly what evaluate_week_decision returns for that row,
+    i.e. what run_rule_engine_for_week decides before the planner, renderer
+    and persistence. Nothing is read from or written to DynamoDB. Identical
+    rows, common in sweeps and what-if reruns, are evaluated once.
+    """
+    row_count = len(profiles)
+    if len(checkins) != row_count or len(rule_states) != row_count:
+        raise RuleEngineOrchestratorError("profiles, checkins and rule_states must have the same length")
+    if isinstance(today, date):
+        today_column: Sequence[date] = [today] * row_count
+    else:
+        today_column = list(today)
+        if len(today_column) != row_count:
+            raise RuleEngineOrchestratorError("today must be a date or one date per row")
+
+    decisions_by_key: Dict[str, Dict[str, Any]] = {}
+    results: List[Dict[str, Any]] = []
+    for index in range(row_count):
+        profile, checkin = profiles[index], checkins[index]
+        rule_state, today_date = rule_states[index] or {}, today_column[index]
+        if not isinstance(profile, dict) or not isinstance(checkin, dict) or not isinstance(rule_state, dict):
+            raise RuleEngineOrchestratorError(f"row {index}: profile, checkin and rule_state must be dicts")
+        if not isinstance(today_date, date):
+            raise RuleEngineOrchestratorError(f"row {index}: today must be a datetime.date")
+        key = _batch_row_key(profile, checkin, rule_state, today_date)
+        decision = decisions_by_key.get(key)
+        if decision is None:
+            decision = evaluate_week_decision(deepcopy(profile), deepcopy(checkin), today_date, deepcopy(rule_state))
+            decisions_by_key[key] = decision
+        results.append(deepcopy(decision))
+    _orch_logger.debug("rule_engine_batch rows=%s unique_rows=%s", row_count, len(decisions_by_key))
+    return results
+
+
+def run_rule_engine_for_week(
+    athlete_id: str,
+    profile: Dict[str, Any],
+    checkin: Dict[str, Any],
+    today_date: date,
+    *,
+    persist_state: bool = True,
+    sectioned_memory: Dict[str, Any] | None = None,
+) -> RuleEngineOutput:
+    if not isinstance(athlete_id, str) or not athlete_id.strip():
+        raise RuleEngineOrchestratorError("athlete_id must be a non-empty string")
+    if not isinstance(profile, dict):
+        raise RuleEngineOrchestratorError("profile must be a dict")
+    if not isinstance(checkin, dict):
+        raise RuleEngineOrchestratorError("checkin must be a dict")
+    if not isinstance(today_date, date):
+        raise RuleEngineOrchestratorError("today_date must be a datetime.date")
+    if not isinstance(persist_state, bool):
+        raise RuleEngineOrchestratorError("persist_state must be a bool")
+
+    rule_state = load_rule_state(athlete_id)
+    decision = evaluate_week_decision(profile, checkin, today_date, rule_state)
+    effective_profile = decision["effective_profile"]
+    effective_performance_intent = decision["effective_performance_intent"]
+    phase = decision["phase"]
+    risk_flag = decision["risk_flag"]
+    track = decision["track"]
+    weekly_skeleton = list(decision["weekly_skeleton"])
+    adjustments = list(decision["adjustments"])
+    plan_update_status = decision["plan_update_status"]
+    deload_applied = decision["deload_applied"]
+    today_action = decision["today_action"]
+    routing_context = decision["routing_context"]
+
     decision_envelope = build_decision_envelope(
         effective_profile,
         checkin,
@@ -367,7 +467,7 @@ def run_rule_engine_for_week(
         adjustments=adjustments,
         plan_update_status=plan_update_status,
         today_action=today_action,
-        routing_context=routed_plan["routing_context"],
+        routing_context=routing_context,
     )
     # Load previously persisted continuity state for planner context
     planner_continuity_context = None
@@ -405,7 +505,7 @@ def run_rule_engine_for_week(
         {
             "today_action": today_action,
             "adjustments": list(adjustments),
-            "routing_context": dict(routed_plan["routing_context"]),
+            "routing_context": dict(routing_context),
             "plan_update_status": plan_update_status,
         }
     )
@@ -456,8 +556,6 @@ def run_rule_engine_for_week(
         output_payload["planner_rationale"] = planner_rationale
     validate_rule_engine_output(output_payload)
 
-    prior_weeks_since_deload = int(rule_state.get("weeks_since_deload", 0) or 0)
-    next_weeks_since_deload = 0 if deload_applied else max(0, prior_weeks_since_deload + 1)
     if persist_state:
         update_rule_state(
             athlete_id,
@@ -468,13 +566,9 @@ def run_rule_engine_for_week(
             {
                 "phase": phase,
                 "risk_flag": risk_flag,
-                "weeks_since_deload": next_weeks_since_deload,
-                "phase_upgrade_streak": phase_upgrade_streak,
-                "main_sport_switched": bool(
-                    should_switch and resolved_main_sport and resolved_main_sport != profile.get("main_sport_current")
-                ),
-                "previous_main_sport": profile.get("main_sport_current"),
+                **decision["state_updates"],
             },
+            current_state=rule_state,
         )
 
     return RuleEngineOutput.from_dict(output_payload)
@@ -9,14 +9,30 @@ from decimal import Decimal
 import logging
 import math
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import boto3
 from botocore.exceptions import ClientError
 
+try:  # pragma: no cover - import style depends on runner context
+    from .dynamodb_models import (
+        RULE_STATE_TABLE as _SNAPSHOT_RULE_STATE_TABLE,
+        invalidate_athlete_state_snapshot,
+        lookup_athlete_state_snapshot,
+    )
+    from .telemetry import instrument_aws_resource
+except ImportError:  # pragma: no cover
+    from dynamodb_models import (
+        RULE_STATE_TABLE as _SNAPSHOT_RULE_STATE_TABLE,
+        invalidate_athlete_state_snapshot,
+        lookup_athlete_state_snapshot,
+    )
+    from telemetry import instrument_aws_resource
+
 logger = logging.getLogger()
 
 dynamodb = boto3.resource("dynamodb", region_name=os.getenv("AWS_REGION", "us-west-2"))
+instrument_aws_resource(dynamodb)
 RULE_STATE_TABLE = os.getenv("RULE_STATE_TABLE_NAME", "rule_state")
 
 
@@ -79,6 +95,7 @@ def _empty_rule_state(athlete_id: str) -> Dict[str, Any]:
         "last_main_sport_switch_week_start": "",
         "last_main_sport": None,
         "last_updated_week_start": "",
+        "state_version": 0,
     }
 
 
@@ -149,6 +166,7 @@ def _normalize_state(state: Dict[str, Any], athlete_id: str) -> Dict[str, Any]:
             else None
         ),
         "last_updated_week_start": str(state.get("last_updated_week_start", "") or "").strip(),
+        "state_version": max(0, _coerce_int(state.get("state_version"), 0)),
     }
 
     normalized["weekly_signals_last_4"] = [
@@ -210,9 +228,11 @@ def load_rule_state(athlete_id: str) -> Dict[str, Any]:
     normalized_athlete_id = _require_athlete_id(athlete_id)
     default_state = _empty_rule_state(normalized_athlete_id)
     try:
-        table = dynamodb.Table(RULE_STATE_TABLE)
-        response = table.get_item(Key={"athlete_id": normalized_athlete_id})
-        item = response.get("Item")
+        hit, item = lookup_athlete_state_snapshot(normalized_athlete_id, _SNAPSHOT_RULE_STATE_TABLE)
+        if not hit:
+            table = dynamodb.Table(RULE_STATE_TABLE)
+            response = table.get_item(Key={"athlete_id": normalized_athlete_id})
+            item = response.get("Item")
         if not isinstance(item, dict):
             return default_state
         normalized = _normalize_state(item, normalized_athlete_id)
@@ -226,14 +246,103 @@ def update_rule_state(
     athlete_id: str,
     weekly_inputs: Dict[str, Any],
     decisions: Dict[str, Any],
+    *,
+    current_state: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
+    """
+    Folds one week's inputs and decisions into the athlete's rule state.
+
+    Every write bumps state_version. Without current_state the state is
+    re-read and written back whole. With the state the caller already loaded,
+    only the attributes that changed are written, conditioned on the stored
+    state_version still being the one loaded, and nothing is written when the
+    week is re-processed unchanged. A failed condition (another writer got
+    there first) falls back to the re-read path.
+    """
     normalized_athlete_id = _require_athlete_id(athlete_id)
     if not isinstance(weekly_inputs, dict):
         raise RuleEngineStateError("weekly_inputs must be a dict")
     if not isinstance(decisions, dict):
         raise RuleEngineStateError("decisions must be a dict")
 
-    current = load_rule_state(normalized_athlete_id)
+    if current_state is None:
+        current = load_rule_state(normalized_athlete_id)
+        normalized = _next_rule_state(current, weekly_inputs, decisions, normalized_athlete_id)
+        normalized["state_version"] = current["state_version"] + 1
+        _put_rule_state(normalized_athlete_id, normalized)
+        return deepcopy(normalized)
+
+    prior = _normalize_state(current_state, normalized_athlete_id)
+    normalized = _next_rule_state(deepcopy(prior), weekly_inputs, decisions, normalized_athlete_id)
+    changed = {
+        attribute: value
+        for attribute, value in normalized.items()
+        if attribute not in {"athlete_id", "state_version"}
+        # Compare stored forms so Decimal-loaded scores match their float recomputation.
+        and _serialize_dynamodb_payload(prior.get(attribute)) != _serialize_dynamodb_payload(value)
+    }
+    if not changed:
+        logger.info("rule_state_write_skipped athlete_id=%s reason=unchanged", normalized_athlete_id)
+        return deepcopy(normalized)
+    if not _write_changed_rule_state(normalized_athlete_id, changed, prior["state_version"]):
+        return update_rule_state(normalized_athlete_id, weekly_inputs, decisions)
+    normalized["state_version"] = prior["state_version"] + 1
+    return deepcopy(normalized)
+
+
+def _put_rule_state(athlete_id: str, normalized: Dict[str, Any]) -> None:
+    invalidate_athlete_state_snapshot(athlete_id, _SNAPSHOT_RULE_STATE_TABLE)
+    try:
+        table = dynamodb.Table(RULE_STATE_TABLE)
+        table.put_item(Item=_serialize_dynamodb_payload(deepcopy(normalized)))
+    except ClientError as exc:
+        logger.error("Error updating rule_state athlete_id=%s: %s", athlete_id, exc)
+        raise RuleEngineStateError("failed to persist rule_state to DynamoDB") from exc
+
+
+def _write_changed_rule_state(athlete_id: str, changed: Dict[str, Any], expected_version: int) -> bool:
+    """SETs only ``changed`` and bumps state_version; False when another writer bumped it first."""
+    names = {"#state_version": "state_version"}
+    values: Dict[str, Any] = {":expected_version": expected_version, ":next_version": expected_version + 1}
+    clauses = ["#state_version = :next_version"]
+    for index, (attribute, value) in enumerate(changed.items()):
+        names[f"#a{index}"] = attribute
+        values[f":a{index}"] = value
+        clauses.append(f"#a{index} = :a{index}")
+    condition = "#state_version = :expected_version"
+    if not expected_version:
+        # Rows written before state_version existed read as version 0.
+        condition = "attribute_not_exists(#state_version) OR " + condition
+    invalidate_athlete_state_snapshot(athlete_id, _SNAPSHOT_RULE_STATE_TABLE)
+    try:
+        table = dynamodb.Table(RULE_STATE_TABLE)
+        table.update_item(
+            Key={"athlete_id": athlete_id},
+            UpdateExpression="SET " + ", ".join(clauses),
+            ConditionExpression=condition,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=_serialize_dynamodb_payload(values),
+        )
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            logger.warning(
+                "rule_state_write_conflict athlete_id=%s expected_version=%s",
+                athlete_id,
+                expected_version,
+            )
+            return False
+        logger.error("Error updating rule_state athlete_id=%s: %s", athlete_id, exc)
+        raise RuleEngineStateError("failed to persist rule_state to DynamoDB") from exc
+    logger.info("rule_state_write_elided athlete_id=%s attributes=%s", athlete_id, ",".join(sorted(changed)))
+    return True
+
+
+def _next_rule_state(
+    current: Dict[str, Any],
+    weekly_inputs: Dict[str, Any],
+    decisions: Dict[str, Any],
+    athlete_id: str,
+) -> Dict[str, Any]:
     week_start = _normalized_week_start(weekly_inputs, decisions, current)
     current["last_updated_week_start"] = week_start
 
@@ -312,12 +421,4 @@ def update_rule_state(
             or ""
         ).strip()
 
-    normalized = _normalize_state(current, normalized_athlete_id)
-    try:
-        table = dynamodb.Table(RULE_STATE_TABLE)
-        table.put_item(Item=_serialize_dynamodb_payload(deepcopy(normalized)))
-    except ClientError as exc:
-        logger.error("Error updating rule_state athlete_id=%s: %s", normalized_athlete_id, exc)
-        raise RuleEngineStateError("failed to persist rule_state to DynamoDB") from exc
-
-    return deepcopy(normalized)
+    return _normalize_state(current, athlete_id)
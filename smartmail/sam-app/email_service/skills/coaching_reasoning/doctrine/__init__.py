@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
+import json
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 
 from .manifest import (
     CORE_UNIVERSAL_FILES,
@@ -14,6 +20,7 @@ from .manifest import (
     RUNNING_OPTIONAL_ORDER,
     SPORT_ALIASES,
 )
+from .matcher import PhraseHits, PhraseMatcher
 
 _DIR = Path(__file__).parent
 _CACHE: dict[str, str] = {}
@@ -90,11 +97,24 @@ def _parse_frontmatter(text: str) -> tuple[dict[str, Any], str]:
     return meta, body
 
 
+def _read_doctrine_file(relative_path: str) -> tuple[dict[str, Any], str]:
+    raw = (_DIR / relative_path).read_text().strip()
+    meta, body = _parse_frontmatter(raw)
+    return meta, body.strip()
+
+
 def _load(relative_path: str) -> str:
     if relative_path not in _CACHE:
-        raw = (_DIR / relative_path).read_text().strip()
-        meta, body = _parse_frontmatter(raw)
-        _CACHE[relative_path] = body.strip()
+        indexed = _DOCTRINE_INDEX.files.get(relative_path) if _DOCTRINE_INDEX is not None else None
+        if indexed is not None:
+            meta = {
+                key: list(value) if isinstance(value, tuple) else value
+                for key, value in indexed.meta.items()
+            }
+            body = indexed.body
+        else:
+            meta, body = _read_doctrine_file(relative_path)
+        _CACHE[relative_path] = body
         _META_CACHE[relative_path] = meta
     return _CACHE[relative_path]
 
@@ -127,7 +147,7 @@ def _resolve_sport_from_brief(brief: dict[str, Any]) -> Optional[str]:
     return None
 
 
-def _signal_blob(brief: dict[str, Any]) -> str:
+def _signal_parts(brief: dict[str, Any]) -> list[str]:
     parts: list[str] = []
     parts.append(str(brief.get("reply_mode") or ""))
 
@@ -150,7 +170,11 @@ def _signal_blob(brief: dict[str, Any]) -> str:
         elif rh is not None:
             parts.append(str(rh))
 
-    return " ".join(parts).lower()
+    return [part.lower() for part in parts]
+
+
+def _signal_blob(brief: dict[str, Any]) -> str:
+    return " ".join(_signal_parts(brief))
 
 
 _SETBACK_PHRASES = (
@@ -345,9 +369,47 @@ _DIRECT_QUESTION_PREFIXES = (
 
 _SIGNAL_STRENGTH_ORDER = {"none": 0, "weak": 1, "strong": 2}
 
+# Every phrase group above, compiled once; signal checks read group hits from
+# a single scan of each text instead of looping over the tuples.
+_SIGNAL_MATCHER = PhraseMatcher(
+    {
+        "setback": _SETBACK_PHRASES,
+        "illness": _ILLNESS_PHRASES,
+        "travel": _TRAVEL_PHRASES,
+        "intensity": _INTENSITY_PHRASES,
+        "steady": ("steady",),
+        "steady_context": ("session", "work", "workout", "run", "next week", "plan"),
+        "prescription": _PRESCRIPTION_PHRASES,
+        "reading": _READING_PHRASES,
+        "recommend": (_RECOMMEND_TRIGGER,),
+        "milestone": _MILESTONE_PHRASES,
+        "reflection": _REFLECTION_PHRASES,
+        "return_progress": _RETURN_PROGRESS_PHRASES,
+        "planning": _PLANNING_PHRASES,
+        "mutation": _MUTATION_PHRASES,
+        "clarification": ("clarification",),
+    }
+)
+
 
-def _has_setback_signals(blob: str, brief: dict[str, Any]) -> bool:
-    if any(p in blob for p in _SETBACK_PHRASES):
+@lru_cache(maxsize=512)
+def _phrase_hits(text: str) -> PhraseHits:
+    """Group hits for one (lowercased) text; several checks per brief read the same text."""
+    return _SIGNAL_MATCHER.scan(text)
+
+
+@lru_cache(maxsize=256)
+def _joined_phrase_hits(parts: tuple[str, ...]) -> PhraseHits:
+    return _SIGNAL_MATCHER.scan_joined(parts, scan_part=_phrase_hits)
+
+
+def _signal_hits(brief: dict[str, Any]) -> PhraseHits:
+    """Hits for ``_signal_blob(brief)``, reusing the per-part scans (the inbound body is scanned once)."""
+    return _joined_phrase_hits(tuple(_signal_parts(brief)))
+
+
+def _has_setback_signals(hits: PhraseHits, brief: dict[str, Any]) -> bool:
+    if hits.any("setback"):
         return True
     decision = brief.get("decision_context")
     if not isinstance(decision, dict):
@@ -362,25 +424,22 @@ def _has_setback_signals(blob: str, brief: dict[str, Any]) -> bool:
     return False
 
 
-def _has_illness_signals(blob: str) -> bool:
-    return any(p in blob for p in _ILLNESS_PHRASES)
+def _has_illness_signals(hits: PhraseHits) -> bool:
+    return hits.any("illness")
 
 
-def _has_travel_signals(blob: str) -> bool:
-    return any(p in blob for p in _TRAVEL_PHRASES)
+def _has_travel_signals(hits: PhraseHits) -> bool:
+    return hits.any("travel")
 
 
-def _has_intensity_signals(blob: str) -> bool:
-    if any(p in blob for p in _INTENSITY_PHRASES):
+def _has_intensity_signals(hits: PhraseHits) -> bool:
+    if hits.any("intensity"):
         return True
-    return "steady" in blob and any(
-        token in blob
-        for token in ("session", "work", "workout", "run", "next week", "plan")
-    )
+    return hits.any("steady") and hits.any("steady_context")
 
 
 def _needs_common_failures_backstop(
-    brief: dict[str, Any], blob: str, *, setback: bool, intensity: bool
+    brief: dict[str, Any], hits: PhraseHits, *, setback: bool, intensity: bool
 ) -> bool:
     decision = brief.get("decision_context")
     if isinstance(decision, dict):
@@ -391,19 +450,17 @@ def _needs_common_failures_backstop(
             return True
     if setback or intensity:
         return True
-    if "clarification" in blob:
+    if hits.any("clarification"):
         return True
     return False
 
 
-def _has_prescription_signals(blob: str) -> bool:
-    return any(p in blob for p in _PRESCRIPTION_PHRASES)
+def _has_prescription_signals(hits: PhraseHits) -> bool:
+    return hits.any("prescription")
 
 
-def _wants_running_reading_recommendations(blob: str) -> bool:
-    if _RECOMMEND_TRIGGER not in blob:
-        return False
-    return any(p in blob for p in _READING_PHRASES)
+def _wants_running_reading_recommendations(hits: PhraseHits) -> bool:
+    return hits.any("recommend") and hits.any("reading")
 
 
 def _extract_inbound_body(brief: dict[str, Any]) -> str:
@@ -433,14 +490,6 @@ def _extract_open_loops(brief: dict[str, Any]) -> str:
     return str(open_loops or "").lower()
 
 
-def _contains_any(text: str, phrases: tuple[str, ...]) -> bool:
-    return any(phrase in text for phrase in phrases)
-
-
-def _count_phrase_matches(text: str, phrases: tuple[str, ...]) -> int:
-    return sum(1 for phrase in phrases if phrase in text)
-
-
 def _history_has_risk(brief: dict[str, Any]) -> bool:
     decision = brief.get("decision_context")
     if not isinstance(decision, dict):
@@ -470,12 +519,12 @@ def _has_real_planning_ask(brief: dict[str, Any], blob: str) -> bool:
     # (requested_action=plan_update) and routed via inbound_rule_router.
     del blob  # retained in signature for callsite compatibility
     inbound = _extract_inbound_body(brief)
-    return _contains_any(inbound, _PLANNING_PHRASES)
+    return _phrase_hits(inbound).any("planning")
 
 
 def _has_real_mutation_ask(brief: dict[str, Any]) -> bool:
     inbound = _extract_inbound_body(brief)
-    if not _contains_any(inbound, _MUTATION_PHRASES):
+    if not _phrase_hits(inbound).any("mutation"):
         return False
     return _has_known_plan_structure(brief)
 
@@ -495,7 +544,7 @@ def _strong_setback_signal(brief: dict[str, Any], blob: str) -> bool:
     if isinstance(decision, dict):
         risk_flag = str(decision.get("risk_flag") or "").strip().lower()
     inbound = _extract_inbound_body(brief)
-    return _contains_any(inbound, _SETBACK_PHRASES) or (
+    return _phrase_hits(inbound).any("setback") or (
         risk_flag in {"yellow", "red"} and _history_has_risk(brief)
     )
 
@@ -503,16 +552,16 @@ def _strong_setback_signal(brief: dict[str, Any], blob: str) -> bool:
 def _derive_setback_strength(brief: dict[str, Any], blob: str) -> str:
     if _strong_setback_signal(brief, blob):
         return "strong"
-    if _has_setback_signals(blob, brief):
+    if _has_setback_signals(_signal_hits(brief), brief):
         return "weak"
     return "none"
 
 
 def _derive_illness_strength(brief: dict[str, Any]) -> str:
     inbound = _extract_inbound_body(brief)
-    if _contains_any(inbound, _ILLNESS_PHRASES):
+    if _phrase_hits(inbound).any("illness"):
         return "strong"
-    if _contains_any(_extract_constraints_summary(brief), _ILLNESS_PHRASES):
+    if _phrase_hits(_extract_constraints_summary(brief)).any("illness"):
         return "weak"
     return "none"
 
@@ -525,10 +574,10 @@ def _derive_travel_strength(brief: dict[str, Any]) -> str:
     #   constraints kept in memory pull in irrelevant doctrine on every turn.
     # - Otherwise "none".
     inbound = _extract_inbound_body(brief)
-    if _contains_any(inbound, _TRAVEL_PHRASES):
+    if _phrase_hits(inbound).any("travel"):
         return "strong"
     supporting = f"{_extract_constraints_summary(brief)} {_extract_open_loops(brief)}".strip()
-    if not _contains_any(supporting, _TRAVEL_PHRASES):
+    if not _phrase_hits(supporting).any("travel"):
         return "none"
     blob = _signal_blob(brief)
     if _has_real_planning_ask(brief, blob) or _has_real_mutation_ask(brief):
@@ -537,13 +586,13 @@ def _derive_travel_strength(brief: dict[str, Any]) -> str:
 
 
 def _derive_milestone_strength(brief: dict[str, Any]) -> str:
-    if _contains_any(_extract_inbound_body(brief), _MILESTONE_PHRASES):
+    if _phrase_hits(_extract_inbound_body(brief)).any("milestone"):
         return "strong"
     return "none"
 
 
 def _derive_reflection_strength(brief: dict[str, Any]) -> str:
-    if _contains_any(_extract_inbound_body(brief), _REFLECTION_PHRASES):
+    if _phrase_hits(_extract_inbound_body(brief)).any("reflection"):
         return "strong"
     return "none"
 
@@ -593,10 +642,10 @@ def _derive_intensity_return_strength(
     # safety_protocol for return-from-setback; loading it for healthy progression
     # is noise.
     inbound = _extract_inbound_body(brief)
-    has_intensity = _has_intensity_signals(blob)
+    has_intensity = _has_intensity_signals(_signal_hits(brief))
     if not has_intensity:
         return "none"
-    if _contains_any(inbound, _RETURN_PROGRESS_PHRASES) or setback_strength != "none":
+    if _phrase_hits(inbound).any("return_progress") or setback_strength != "none":
         return "strong"
     return "none"
 
@@ -604,7 +653,7 @@ def _derive_intensity_return_strength(
 def _derive_prescription_strength(brief: dict[str, Any], blob: str) -> str:
     if _has_real_planning_ask(brief, blob) or _has_real_mutation_ask(brief):
         return "strong"
-    if _has_prescription_signals(blob):
+    if _has_prescription_signals(_signal_hits(brief)):
         return "weak"
     return "none"
 
@@ -633,7 +682,10 @@ def _derive_trajectory(brief: dict[str, Any]) -> str:
 
 def derive_situation_tags(brief: dict[str, Any]) -> dict[str, str]:
     """Derive situation tags with bounded signal strengths."""
-    blob = _signal_blob(brief)
+    return _derive_situation_tags(brief, _signal_blob(brief))
+
+
+def _derive_situation_tags(brief: dict[str, Any], blob: str) -> dict[str, str]:
     setback_strength = _derive_setback_strength(brief, blob)
     tags = {
         "setback": setback_strength,
@@ -656,9 +708,12 @@ def _strongest_signal(tags: dict[str, str], *names: str) -> bool:
 
 def derive_turn_purpose(brief: dict[str, Any]) -> str:
     """Derive the primary operational purpose for the turn."""
-    reply_mode = str(brief.get("reply_mode") or "").strip().lower()
     blob = _signal_blob(brief)
-    tags = derive_situation_tags(brief)
+    return _derive_turn_purpose(brief, blob, _derive_situation_tags(brief, blob))
+
+
+def _derive_turn_purpose(brief: dict[str, Any], blob: str, tags: dict[str, str]) -> str:
+    reply_mode = str(brief.get("reply_mode") or "").strip().lower()
     has_planning = _has_real_planning_ask(brief, blob)
     has_mutation = _has_real_mutation_ask(brief)
 
@@ -722,7 +777,8 @@ def derive_control_hints(
 ) -> dict[str, Any]:
     """Return deterministic, bounded control hints for strategist use."""
     purpose = purpose or derive_turn_purpose(brief)
-    situation_tags = situation_tags or derive_situation_tags(brief)
+    if situation_tags is None:
+        situation_tags = derive_situation_tags(brief)
     trajectory = _derive_trajectory(brief)
 
     posture = "logistics_delivery"
@@ -778,7 +834,7 @@ PURPOSE_COST_BUDGETS: dict[str, dict[str, int]] = {
 }
 
 
-def _ordered_registered_doctrine_paths() -> list[str]:
+def _manifest_ordered_paths() -> list[str]:
     ordered = list(CORE_UNIVERSAL_FILES)
     ordered.extend(path for _, path in OPTIONAL_UNIVERSAL_ORDER)
     ordered.extend(path for _, path in RUNNING_OPTIONAL_ORDER)
@@ -793,6 +849,52 @@ def _ordered_registered_doctrine_paths() -> list[str]:
     return result
 
 
+@dataclass(frozen=True)
+class DoctrineFile:
+    path: str
+    meta: Mapping[str, Any]
+    body: str
+
+
+@dataclass(frozen=True)
+class DoctrineIndex:
+    """Frontmatter-parsed doctrine corpus in manifest order, built once at import."""
+
+    ordered_paths: tuple[str, ...]
+    optional_paths: tuple[str, ...]
+    files: Mapping[str, DoctrineFile]
+
+
+def _build_doctrine_index() -> DoctrineIndex:
+    ordered = tuple(_manifest_ordered_paths())
+    files: dict[str, DoctrineFile] = {}
+    for path in ordered:
+        meta, body = _read_doctrine_file(path)
+        meta = {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in meta.items()
+        }
+        files[path] = DoctrineFile(path=path, meta=MappingProxyType(meta), body=body)
+    excluded = set(CORE_UNIVERSAL_FILES) | set(LEGACY_UNIVERSAL_FILES)
+    return DoctrineIndex(
+        ordered_paths=ordered,
+        optional_paths=tuple(path for path in ordered if path not in excluded),
+        files=MappingProxyType(files),
+    )
+
+
+_DOCTRINE_INDEX: Optional[DoctrineIndex] = None
+_DOCTRINE_INDEX = _build_doctrine_index()
+
+
+def get_doctrine_index() -> DoctrineIndex:
+    return _DOCTRINE_INDEX
+
+
+def _ordered_registered_doctrine_paths() -> list[str]:
+    return list(_DOCTRINE_INDEX.ordered_paths)
+
+
 def _metadata_matches_sport(meta: dict[str, Any], sport: Optional[str]) -> bool:
     sports = meta.get("sports", [])
     if not sports:
@@ -818,10 +920,8 @@ def _meets_strength_threshold(strength: str, minimum: str) -> bool:
     return _SIGNAL_STRENGTH_ORDER[strength] >= _SIGNAL_STRENGTH_ORDER[minimum]
 
 
-def _recommendation_intent_is_explicit(blob: str) -> bool:
-    return _wants_running_reading_recommendations(blob) or (
-        _RECOMMEND_TRIGGER in blob and any(term in blob for term in _READING_PHRASES)
-    )
+def _recommendation_intent_is_explicit(hits: PhraseHits) -> bool:
+    return _wants_running_reading_recommendations(hits)
 
 
 def _build_backstop_reason(
@@ -858,6 +958,7 @@ def _evaluate_doctrine_candidate(
     purpose: str,
     situation_tags: dict[str, str],
     recommendation_intent: bool,
+    trajectory: Optional[str] = None,
 ) -> tuple[bool, str]:
     meta = get_doctrine_metadata(path)
     if not _metadata_matches_sport(meta, sport):
@@ -866,7 +967,8 @@ def _evaluate_doctrine_candidate(
     scope = meta["scope"]
     purposes = set(meta.get("purposes", []))
     situations = list(meta.get("situations", []))
-    trajectory = _derive_trajectory(brief)
+    if trajectory is None:
+        trajectory = _derive_trajectory(brief)
 
     if scope == "always_on":
         return True, "always_on"
@@ -931,15 +1033,19 @@ def _evaluate_doctrine_candidate(
 def _select_optional_candidates(
     brief: dict[str, Any], blob: str, sport: Optional[str],
     setback: bool, intensity: bool, purpose: str,
+    *,
+    situation_tags: Optional[dict[str, str]] = None,
+    trajectory: Optional[str] = None,
 ) -> list[str]:
     """Purpose-aware selection of optional doctrine files (no budget applied)."""
     del setback, intensity
-    situation_tags = derive_situation_tags(brief)
-    recommendation_intent = _recommendation_intent_is_explicit(blob)
+    if situation_tags is None:
+        situation_tags = _derive_situation_tags(brief, blob)
+    if trajectory is None:
+        trajectory = _derive_trajectory(brief)
+    recommendation_intent = _recommendation_intent_is_explicit(_signal_hits(brief))
     candidates: list[str] = []
-    for path in _ordered_registered_doctrine_paths():
-        if path in CORE_UNIVERSAL_FILES or path in LEGACY_UNIVERSAL_FILES:
-            continue
+    for path in _DOCTRINE_INDEX.optional_paths:
         load, _ = _evaluate_doctrine_candidate(
             path,
             brief=brief,
@@ -948,6 +1054,7 @@ def _select_optional_candidates(
             purpose=purpose,
             situation_tags=situation_tags,
             recommendation_intent=recommendation_intent,
+            trajectory=trajectory,
         )
         if load:
             if path == "general/recommendations.md" and sport == "running":
@@ -966,9 +1073,7 @@ def _score_file(path: str, brief: dict[str, Any], blob: str) -> float:
     delivery = brief.get("delivery_context")
     if isinstance(delivery, dict):
         body = str(delivery.get("inbound_body") or "").lower()
-        if body and path in _SIGNAL_FILE_PHRASES and any(
-            p in body for p in _SIGNAL_FILE_PHRASES[path]
-        ):
+        if body and path in _SIGNAL_FILE_GROUPS and _phrase_hits(body).any(_SIGNAL_FILE_GROUPS[path]):
             boost += 15
 
     # Boost for risk-flag alignment
@@ -981,14 +1086,14 @@ def _score_file(path: str, brief: dict[str, Any], blob: str) -> float:
     return base + boost
 
 
-# Maps doctrine paths to their trigger phrases for body-match boosting
-_SIGNAL_FILE_PHRASES: dict[str, tuple[str, ...]] = {
-    "universal/return_from_setback.md": _SETBACK_PHRASES,
-    "universal/illness_and_low_energy.md": _ILLNESS_PHRASES,
-    "universal/travel_and_disruption.md": _TRAVEL_PHRASES,
-    "universal/intensity_reintroduction.md": _INTENSITY_PHRASES,
-    "running/injury_return_patterns.md": _SETBACK_PHRASES,
-    "running/common_prescription_errors.md": _PRESCRIPTION_PHRASES,
+# Maps doctrine paths to their trigger phrase groups for body-match boosting
+_SIGNAL_FILE_GROUPS: dict[str, str] = {
+    "universal/return_from_setback.md": "setback",
+    "universal/illness_and_low_energy.md": "illness",
+    "universal/travel_and_disruption.md": "travel",
+    "universal/intensity_reintroduction.md": "intensity",
+    "running/injury_return_patterns.md": "setback",
+    "running/common_prescription_errors.md": "prescription",
 }
 
 
@@ -1066,36 +1171,52 @@ def _apply_cost_budgets(
     return ordered_selected, dropped
 
 
-def select_doctrine_files(brief: dict[str, Any]) -> list[str]:
-    """Deterministic doctrine paths for this response brief (ordered, deduped)."""
+@dataclass(frozen=True)
+class DoctrineSelection:
+    """Everything derived from one brief by doctrine selection, computed once."""
+
+    turn_purpose: str
+    situation_tags: Mapping[str, str]
+    control_hints: Mapping[str, Any]
+    loaded_files: tuple[str, ...]
+    loaded_file_reasons: Mapping[str, str]
+    dropped_files: Mapping[str, str]
+    skipped_files: Mapping[str, str]
+
+    def to_trace(self) -> dict[str, Any]:
+        """Return a fresh trace dict (callers may mutate it)."""
+        return {
+            "turn_purpose": self.turn_purpose,
+            "situation_tags": [
+                {"tag": tag, "strength": strength}
+                for tag, strength in sorted(
+                    self.situation_tags.items(),
+                    key=lambda item: (-_SIGNAL_STRENGTH_ORDER[item[1]], item[0]),
+                )
+            ],
+            "posture": self.control_hints["posture"],
+            "trajectory": self.control_hints["trajectory"],
+            "purpose_micro_avoid": list(self.control_hints["purpose_micro_avoid"]),
+            "response_shape": self.control_hints["response_shape"],
+            "loaded_files": list(self.loaded_files),
+            "loaded_file_reasons": dict(self.loaded_file_reasons),
+            "dropped_files": dict(self.dropped_files),
+            "skipped_files": dict(self.skipped_files),
+        }
+
+    def build_context(self) -> str:
+        """Doctrine text for the selected files, in selection order."""
+        return "\n\n".join(_load(path) for path in self.loaded_files)
+
+
+def _compute_doctrine_selection(brief: dict[str, Any]) -> DoctrineSelection:
     blob = _signal_blob(brief)
     sport = _resolve_sport_from_brief(brief)
-    setback = _has_setback_signals(blob, brief)
-    intensity = _has_intensity_signals(blob)
-    purpose = derive_turn_purpose(brief)
-
-    core: list[str] = list(CORE_UNIVERSAL_FILES)
-    candidates = _select_optional_candidates(brief, blob, sport, setback, intensity, purpose)
-    budgeted, _ = _apply_cost_budgets(candidates, brief, blob, purpose)
-
-    combined = core + budgeted
-    seen: set[str] = set()
-    ordered: list[str] = []
-    for p in combined:
-        if p not in seen:
-            seen.add(p)
-            ordered.append(p)
-    return ordered
-
-
-def build_doctrine_selection_trace(brief: dict[str, Any]) -> dict[str, Any]:
-    """Return the deterministic doctrine trace used for observability and tests."""
-    blob = _signal_blob(brief)
-    sport = _resolve_sport_from_brief(brief)
-    purpose = derive_turn_purpose(brief)
-    situation_tags = derive_situation_tags(brief)
+    situation_tags = _derive_situation_tags(brief, blob)
+    purpose = _derive_turn_purpose(brief, blob, situation_tags)
     control_hints = derive_control_hints(brief, purpose=purpose, situation_tags=situation_tags)
-    recommendation_intent = _recommendation_intent_is_explicit(blob)
+    trajectory = control_hints["trajectory"]
+    recommendation_intent = _recommendation_intent_is_explicit(_signal_hits(brief))
     unbudgeted_candidates = _select_optional_candidates(
         brief,
         blob,
@@ -1103,6 +1224,8 @@ def build_doctrine_selection_trace(brief: dict[str, Any]) -> dict[str, Any]:
         setback="setback" in situation_tags,
         intensity="intensity_return" in situation_tags,
         purpose=purpose,
+        situation_tags=situation_tags,
+        trajectory=trajectory,
     )
     budgeted_candidates, dropped_files = _apply_cost_budgets(
         unbudgeted_candidates,
@@ -1110,11 +1233,14 @@ def build_doctrine_selection_trace(brief: dict[str, Any]) -> dict[str, Any]:
         blob,
         purpose,
     )
-    loaded_files = list(CORE_UNIVERSAL_FILES) + budgeted_candidates
+    loaded_files: list[str] = []
+    for path in list(CORE_UNIVERSAL_FILES) + budgeted_candidates:
+        if path not in loaded_files:
+            loaded_files.append(path)
     loaded_reasons: dict[str, str] = {}
     skipped_candidates: list[tuple[str, str, int]] = []
 
-    for path in _ordered_registered_doctrine_paths():
+    for path in _DOCTRINE_INDEX.ordered_paths:
         if path in LEGACY_UNIVERSAL_FILES:
             continue
         meta = get_doctrine_metadata(path)
@@ -1128,6 +1254,7 @@ def build_doctrine_selection_trace(brief: dict[str, Any]) -> dict[str, Any]:
             purpose=purpose,
             situation_tags=situation_tags,
             recommendation_intent=recommendation_intent,
+            trajectory=trajectory,
         )
         if path in loaded_files:
             loaded_reasons[path] = reason
@@ -1140,31 +1267,57 @@ def build_doctrine_selection_trace(brief: dict[str, Any]) -> dict[str, Any]:
         for path, reason, _ in skipped_candidates[:3]
     }
 
-    return {
-        "turn_purpose": purpose,
-        "situation_tags": [
-            {"tag": tag, "strength": strength}
-            for tag, strength in sorted(
-                situation_tags.items(),
-                key=lambda item: (-_SIGNAL_STRENGTH_ORDER[item[1]], item[0]),
-            )
-        ],
-        "posture": control_hints["posture"],
-        "trajectory": control_hints["trajectory"],
-        "purpose_micro_avoid": control_hints["purpose_micro_avoid"],
-        "response_shape": control_hints["response_shape"],
-        "loaded_files": loaded_files,
-        "loaded_file_reasons": loaded_reasons,
-        "dropped_files": dropped_files,
-        "skipped_files": top_skipped,
-    }
+    return DoctrineSelection(
+        turn_purpose=purpose,
+        situation_tags=MappingProxyType(dict(situation_tags)),
+        control_hints=MappingProxyType(control_hints),
+        loaded_files=tuple(loaded_files),
+        loaded_file_reasons=MappingProxyType(loaded_reasons),
+        dropped_files=MappingProxyType(dropped_files),
+        skipped_files=MappingProxyType(top_skipped),
+    )
+
+
+# Selection is a pure function of the brief; identical briefs (prompt assembly,
+# runner bookkeeping, retries) share one result.
+_SELECTION_CACHE_SIZE = 64
+_SELECTION_CACHE: "OrderedDict[str, DoctrineSelection]" = OrderedDict()
+_SELECTION_CACHE_LOCK = threading.Lock()
+
+
+def _selection_cache_key(brief: dict[str, Any]) -> str:
+    return json.dumps(brief, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def select_doctrine(brief: dict[str, Any]) -> DoctrineSelection:
+    """Return the (memoized) doctrine selection for this brief."""
+    key = _selection_cache_key(brief)
+    with _SELECTION_CACHE_LOCK:
+        cached = _SELECTION_CACHE.get(key)
+        if cached is not None:
+            _SELECTION_CACHE.move_to_end(key)
+            return cached
+    selection = _compute_doctrine_selection(brief)
+    with _SELECTION_CACHE_LOCK:
+        _SELECTION_CACHE[key] = selection
+        while len(_SELECTION_CACHE) > _SELECTION_CACHE_SIZE:
+            _SELECTION_CACHE.popitem(last=False)
+    return selection
+
+
+def select_doctrine_files(brief: dict[str, Any]) -> list[str]:
+    """Deterministic doctrine paths for this response brief (ordered, deduped)."""
+    return list(select_doctrine(brief).loaded_files)
+
+
+def build_doctrine_selection_trace(brief: dict[str, Any]) -> dict[str, Any]:
+    """Return the deterministic doctrine trace used for observability and tests."""
+    return select_doctrine(brief).to_trace()
 
 
 def build_doctrine_context_for_brief(brief: dict[str, Any]) -> str:
     """Assemble doctrine text for the strategist using selective loading."""
-    paths = select_doctrine_files(brief)
-    sections = [_load(p) for p in paths]
-    return "\n\n".join(sections)
+    return select_doctrine(brief).build_context()
 
 
 def list_loaded_files(brief: dict[str, Any]) -> list[str]:
@@ -0,0 +1,113 @@
+"""Precompiled multi-phrase matcher for doctrine signal detection.
+
+All phrase groups are compiled into one prefix-trie regex at import. A scan
+walks the text once and reports every group whose phrases occur as
+substrings, with the same semantics as ``any(phrase in text for phrase in group)``.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Iterable, Mapping, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class PhraseHits:
+    """Phrases found in one text and, per group, how many of its phrases occurred."""
+
+    phrases: frozenset[str]
+    group_counts: Mapping[str, int]
+
+    def any(self, group: str) -> bool:
+        return group in self.group_counts
+
+    def count(self, group: str) -> int:
+        return self.group_counts.get(group, 0)
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Alternation nested by shared prefix so the regex engine never retries a common prefix."""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def _render(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + _render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Longest match first; the shorter phrase is credited as a prefix below.
+            return "(?:" + body + ")?"
+        return body
+
+    return _render(trie)
+
+
+class PhraseMatcher:
+    """Finds every phrase of every group in a single pass over the text."""
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        groups_by_phrase: dict[str, list[str]] = {}
+        for name, phrases in groups.items():
+            for phrase in phrases:
+                if phrase:
+                    groups_by_phrase.setdefault(phrase, []).append(name)
+        self._groups_by_phrase = {phrase: tuple(names) for phrase, names in groups_by_phrase.items()}
+        vocabulary = sorted(self._groups_by_phrase)
+        # Zero-width lookahead: findall reports the longest phrase at every offset, overlaps included.
+        self._pattern = re.compile("(?=(" + _trie_pattern(vocabulary) + "))")
+        self._max_phrase_len = max((len(phrase) for phrase in vocabulary), default=0)
+        # The longest phrase at an offset hides any phrase that is its prefix.
+        self._prefixes = {
+            phrase: tuple(other for other in vocabulary if other != phrase and phrase.startswith(other))
+            for phrase in vocabulary
+        }
+
+    def _find(self, text: str, found: set[str]) -> None:
+        for phrase in set(self._pattern.findall(text)) - found:
+            found.add(phrase)
+            found.update(self._prefixes[phrase])
+
+    def _hits(self, found: set[str]) -> PhraseHits:
+        counts: dict[str, int] = {}
+        for phrase in found:
+            for name in self._groups_by_phrase[phrase]:
+                counts[name] = counts.get(name, 0) + 1
+        return PhraseHits(phrases=frozenset(found), group_counts=MappingProxyType(counts))
+
+    def scan(self, text: str) -> PhraseHits:
+        found: set[str] = set()
+        self._find(text, found)
+        return self._hits(found)
+
+    def scan_joined(
+        self,
+        parts: Sequence[str],
+        separator: str = " ",
+        *,
+        scan_part: Optional[Callable[[str], PhraseHits]] = None,
+    ) -> PhraseHits:
+        """
+        Hits for ``separator.join(parts)`` without rescanning the parts: each
+        part is scanned on its own (through ``scan_part``, e.g. a cached scan)
+        and only a window around each seam is scanned for phrases that cross it.
+        """
+        scan_part = scan_part or self.scan
+        found: set[str] = set()
+        for part in parts:
+            found.update(scan_part(part).phrases)
+        joined = separator.join(parts)
+        reach = self._max_phrase_len - 1
+        seam = 0
+        for part in parts[:-1]:
+            seam += len(part)
+            self._find(joined[max(0, seam - reach):seam + len(separator) + reach], found)
+            seam += len(separator)
+        return self._hits(found)
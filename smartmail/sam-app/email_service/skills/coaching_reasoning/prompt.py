@@ -1,12 +1,9 @@
 """Prompt text for the coaching-reasoning workflow."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from prompt_pack_loader import load_coach_reply_prompt_pack
-from skills.coaching_reasoning.doctrine import (
-    build_doctrine_context_for_brief,
-    build_doctrine_selection_trace,
-)
+from skills.coaching_reasoning.doctrine import DoctrineSelection, select_doctrine
 
 _PROMPT_PACK = load_coach_reply_prompt_pack()
 _CR = _PROMPT_PACK["coaching_reasoning"]
@@ -15,6 +12,9 @@ _CONSTITUTION = _CR["constitution"]
 _OPERATIONAL_RULES = _CR["operational_rules"]
 _REPLY_MODE_RULES = _CR["reply_mode_rules"]
 
+# Static prefixes keyed by (prompt-pack version, base prompt, doctrine files).
+_STATIC_PREFIX_CACHE: Dict[Tuple[str, str, Tuple[str, ...]], str] = {}
+_STATIC_PREFIX_CACHE_MAX = 256
 
 
 def _build_contradicted_facts_section(response_brief: Dict[str, Any]) -> str:
@@ -95,8 +95,8 @@ def _build_tiered_base_prompt(reply_mode: str) -> str:
     return _BASE_PROMPT
 
 
-def _build_selector_hints_section(response_brief: Dict[str, Any]) -> str:
-    trace = build_doctrine_selection_trace(response_brief)
+def _build_selector_hints_section(selection: DoctrineSelection) -> str:
+    trace = selection.to_trace()
     lines = [
         "## Selector hints",
         "",
@@ -115,19 +115,49 @@ def _build_selector_hints_section(response_brief: Dict[str, Any]) -> str:
     return "\n".join([""] + lines + [""])
 
 
-def build_system_prompt(
+def build_static_prompt_prefix(base: str, selection: DoctrineSelection) -> str:
+    """Base prompt plus doctrine; byte-identical for every turn with the same doctrine files."""
+    key = (_PROMPT_PACK["version"], base, tuple(selection.loaded_files))
+    prefix = _STATIC_PREFIX_CACHE.get(key)
+    if prefix is None:
+        prefix = f"{base}\nCoaching methodology:\n{selection.build_context()}"
+        if len(_STATIC_PREFIX_CACHE) >= _STATIC_PREFIX_CACHE_MAX:
+            _STATIC_PREFIX_CACHE.clear()
+        _STATIC_PREFIX_CACHE[key] = prefix
+    return prefix
+
+
+def build_system_prompt_parts(
     response_brief: Dict[str, Any],
     continuity_context: Optional[Dict[str, Any]] = None,
-) -> str:
-    """Assemble the system prompt with selectively loaded doctrine, continuity context,
-    athlete instructions, and contradicted facts."""
+    doctrine_selection: Optional[DoctrineSelection] = None,
+) -> Tuple[str, str]:
+    """Return (static prefix, per-turn suffix) for the strategist system prompt.
+
+    Per-turn sections (selector hints, continuity, contradicted facts) go after
+    the doctrine so the provider can cache the shared prefix.
+    """
     reply_mode = response_brief.get("reply_mode", "normal_coaching")
     base = _build_tiered_base_prompt(reply_mode)
-    selector_hints = _build_selector_hints_section(response_brief)
-    doctrine = build_doctrine_context_for_brief(response_brief)
-    continuity_section = _build_continuity_section(continuity_context)
-    contradicted_section = _build_contradicted_facts_section(response_brief)
-    return (
-        f"{base}{selector_hints}\nCoaching methodology:\n{doctrine}"
-        f"{continuity_section}{contradicted_section}"
+    selection = doctrine_selection or select_doctrine(response_brief)
+    prefix = build_static_prompt_prefix(base, selection)
+    suffix = (
+        f"{_build_selector_hints_section(selection)}"
+        f"{_build_continuity_section(continuity_context)}"
+        f"{_build_contradicted_facts_section(response_brief)}"
     )
+    return prefix, suffix
+
+
+def build_system_prompt(
+    response_brief: Dict[str, Any],
+    continuity_context: Optional[Dict[str, Any]] = None,
+    doctrine_selection: Optional[DoctrineSelection] = None,
+) -> str:
+    """Assemble the system prompt with selectively loaded doctrine, continuity context,
+    athlete instructions, and contradicted facts.
+
+    Pass ``doctrine_selection`` when the caller already ran selection for this brief.
+    """
+    prefix, suffix = build_system_prompt_parts(response_brief, continuity_context, doctrine_selection)
+    return prefix + suffix
@@ -8,9 +8,10 @@ from typing import Any, Dict, Optional
 
 import skills.runtime as skill_runtime
 from config import LANGUAGE_RENDER_MODEL
-from skills.coaching_reasoning.doctrine import build_doctrine_selection_trace, list_loaded_files
+from prompt_pack_loader import prompt_prefix_cache_key
+from skills.coaching_reasoning.doctrine import select_doctrine
 from skills.coaching_reasoning.errors import CoachingReasoningError
-from skills.coaching_reasoning.prompt import build_system_prompt
+from skills.coaching_reasoning.prompt import build_system_prompt_parts
 from skills.coaching_reasoning.schema import JSON_SCHEMA, JSON_SCHEMA_NAME
 from skills.coaching_reasoning.validator import validate_coaching_directive
 
@@ -67,11 +68,17 @@ def run_coaching_reasoning_workflow(
 
     try:
         selected_model = str(model_name or LANGUAGE_RENDER_MODEL).strip() or LANGUAGE_RENDER_MODEL
-        doctrine_trace = build_doctrine_selection_trace(response_brief)
+        doctrine_selection = select_doctrine(response_brief)
+        doctrine_trace = doctrine_selection.to_trace()
         response_shape = doctrine_trace.get("response_shape")
         turn_purpose = doctrine_trace.get("turn_purpose")
         force_send = _brief_has_missing_profile_fields(response_brief)
-        system_prompt = build_system_prompt(response_brief, continuity_context=continuity_context)
+        prompt_prefix, prompt_suffix = build_system_prompt_parts(
+            response_brief,
+            continuity_context=continuity_context,
+            doctrine_selection=doctrine_selection,
+        )
+        system_prompt = prompt_prefix + prompt_suffix
         user_content = json.dumps(response_brief, separators=(",", ":"), ensure_ascii=True)
         validated = None
 
@@ -86,6 +93,7 @@ def run_coaching_reasoning_workflow(
                 disabled_message="live coaching-reasoning LLM calls are disabled",
                 warning_log_name="coaching_reasoning",
                 retries=1,
+                prompt_cache_key=prompt_prefix_cache_key("coaching_reasoning", prompt_prefix),
             )
 
             try:
@@ -120,7 +128,7 @@ def run_coaching_reasoning_workflow(
 
         return {
             "directive": validated,
-            "doctrine_files_loaded": list_loaded_files(response_brief),
+            "doctrine_files_loaded": list(doctrine_selection.loaded_files),
             "doctrine_trace": doctrine_trace,
             "continuity_recommendation": continuity_recommendation,
         }
@@ -1,6 +1,23 @@
 """Obedience evaluation skill — LLM-based last-line compliance checker."""
 
 from skills.obedience_eval.errors import ObedienceEvalError
+from skills.obedience_eval.prescreen import (
+    ObedienceGateDecision,
+    PrescreenResult,
+    decide_obedience_eval,
+    prescreen_obedience,
+    prescreen_outcome_label,
+    skipped_obedience_result,
+)
 from skills.obedience_eval.runner import run_obedience_eval
 
-__all__ = ["ObedienceEvalError", "run_obedience_eval"]
+__all__ = [
+    "ObedienceEvalError",
+    "ObedienceGateDecision",
+    "PrescreenResult",
+    "decide_obedience_eval",
+    "prescreen_obedience",
+    "prescreen_outcome_label",
+    "run_obedience_eval",
+    "skipped_obedience_result",
+]
@@ -0,0 +1,210 @@
+"""Deterministic obedience pre-screen.
+
+Cheap text checks that run before the LLM evaluator. A clean pre-screen
+lets the caller skip the LLM call (subject to a sampling rate); any risk
+flag sends the reply to the full evaluator. The checks are deliberately
+over-eager: a false positive costs one LLM call, a false negative ships an
+unchecked reply.
+
+Flags:
+- avoid_term_overlap: most significant words of an avoid item appear in the reply
+- content_plan_gap: a content_plan item shares no significant word with the reply
+- too_short / too_long: word count outside the directive's length bounds
+- url_not_in_sources: the reply contains a URL that no source text contains
+- unsupported_week_label: "week N" that the continuity context does not mention
+- physical_presence_phrase: a phrase from the physical-presence taxonomy
+- header_block: a line that looks like a forwarded email header
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_URL_RE = re.compile(r"(?:https?://|www\.)[^\s<>()\"']+", re.IGNORECASE)
+_WEEK_LABEL_RE = re.compile(r"\bweek\s+(\d{1,2})\b", re.IGNORECASE)
+_HEADER_LINE_RE = re.compile(r"^\s*(from|sent|to|cc|subject|date):\s+\S", re.IGNORECASE | re.MULTILINE)
+_PHYSICAL_PRESENCE_RE = re.compile(
+    r"\b(see you (there|at|on|tomorrow)|i'?ll be there|i'?ll (text|call|book|meet)|let'?s meet|"
+    r"meeting point|arrive early|meet you)\b",
+    re.IGNORECASE,
+)
+
+_STOPWORDS = frozenset(
+    """
+    a about above after again against all also am an and any are as at be because been before being
+    below between both but by can could did do does doing don dont down during each few for from
+    further had has have having he her here hers him his how i if in into is it its itself just
+    me more most my no nor not now of off on once only or other our ours out over own same she
+    should so some such than that the their theirs them then there these they this those through
+    to too under until up very was we were what when where which while who whom why will with
+    would you your yours avoid mention mentioning reference referencing restate restating repeat
+    repeating bring raise discuss anything athlete email reply message
+    """.split()
+)
+
+_STEM_LENGTH = 5
+_DEFAULT_MIN_WORDS = 3
+_DEFAULT_MAX_WORDS = 450
+
+
+@dataclass(frozen=True)
+class PrescreenResult:
+    flags: Tuple[str, ...]
+    details: Dict[str, Any] = field(default_factory=dict)
+    word_count: int = 0
+
+    @property
+    def clean(self) -> bool:
+        return not self.flags
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"flags": list(self.flags), "details": dict(self.details), "word_count": self.word_count}
+
+
+def _stems(text: str) -> List[str]:
+    return [
+        word[:_STEM_LENGTH]
+        for word in _WORD_RE.findall(str(text or "").lower())
+        if len(word) > 2 and word not in _STOPWORDS
+    ]
+
+
+def _supported_week_numbers(continuity_context: Optional[Dict[str, Any]]) -> set:
+    """Week numbers grounded in continuity: numeric *week* fields and "week N" in string values."""
+    supported = set()
+    for key, value in (continuity_context or {}).items():
+        if isinstance(value, bool):
+            continue
+        if "week" in str(key).lower() and isinstance(value, (int, float)):
+            supported.add(int(value))
+        elif isinstance(value, str):
+            supported.update(int(number) for number in _WEEK_LABEL_RE.findall(value))
+    return supported
+
+
+def default_length_bounds(directive: Dict[str, Any]) -> Tuple[int, int]:
+    """Narrow directives (few content_plan items) get a tighter word ceiling."""
+    plan_items = len(directive.get("content_plan") or [])
+    return _DEFAULT_MIN_WORDS, min(_DEFAULT_MAX_WORDS, 90 + 70 * max(1, plan_items))
+
+
+def prescreen_obedience(
+    email_body: str,
+    directive: Dict[str, Any],
+    continuity_context: Optional[Dict[str, Any]] = None,
+    *,
+    source_texts: Iterable[str] = (),
+    check_content_plan: bool = True,
+    max_words: Optional[int] = None,
+) -> PrescreenResult:
+    """Runs every deterministic check and returns the flags that fired."""
+    body = str(email_body or "")
+    reply_stems = set(_stems(body))
+    flags: List[str] = []
+    details: Dict[str, Any] = {}
+
+    avoid_hits = []
+    for item in directive.get("avoid") or []:
+        item_stems = set(_stems(item))
+        if not item_stems:
+            continue
+        overlap = item_stems & reply_stems
+        if len(overlap) * 2 >= len(item_stems):
+            avoid_hits.append(str(item))
+    if avoid_hits:
+        flags.append("avoid_term_overlap")
+        details["avoid_term_overlap"] = avoid_hits
+
+    if check_content_plan:
+        gaps = [
+            str(item)
+            for item in directive.get("content_plan") or []
+            if set(_stems(item)) and not (set(_stems(item)) & reply_stems)
+        ]
+        if gaps:
+            flags.append("content_plan_gap")
+            details["content_plan_gap"] = gaps
+
+    word_count = len(body.split())
+    min_words, default_max = default_length_bounds(directive)
+    upper = default_max if max_words is None else int(max_words)
+    if word_count < min_words:
+        flags.append("too_short")
+    elif word_count > upper:
+        flags.append("too_long")
+        details["too_long"] = {"word_count": word_count, "max_words": upper}
+
+    sources = "\n".join(str(text or "") for text in source_texts).lower()
+    sources += "\n" + json.dumps(directive, default=str).lower()
+    fabricated_urls = [url for url in _URL_RE.findall(body) if url.lower().rstrip(".,;:!?") not in sources]
+    if fabricated_urls:
+        flags.append("url_not_in_sources")
+        details["url_not_in_sources"] = fabricated_urls
+
+    supported_weeks = _supported_week_numbers(continuity_context)
+    unsupported_weeks = sorted(
+        {number for number in _WEEK_LABEL_RE.findall(body) if int(number) not in supported_weeks}
+    )
+    if unsupported_weeks:
+        flags.append("unsupported_week_label")
+        details["unsupported_week_label"] = unsupported_weeks
+
+    if _PHYSICAL_PRESENCE_RE.search(body):
+        flags.append("physical_presence_phrase")
+    if _HEADER_LINE_RE.search(body):
+        flags.append("header_block")
+
+    return PrescreenResult(flags=tuple(flags), details=details, word_count=word_count)
+
+
+@dataclass(frozen=True)
+class ObedienceGateDecision:
+    invoke_llm: bool
+    reason: str
+    prescreen: PrescreenResult
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"invoke_llm": self.invoke_llm, "reason": self.reason, "prescreen": self.prescreen.to_dict()}
+
+
+def decide_obedience_eval(
+    prescreen: PrescreenResult,
+    *,
+    sample_rate: float,
+    rng: Callable[[], float] = random.random,
+) -> ObedienceGateDecision:
+    """Flagged replies always go to the LLM; clean ones only when sampled."""
+    if not prescreen.clean:
+        return ObedienceGateDecision(invoke_llm=True, reason="prescreen_flagged", prescreen=prescreen)
+    if rng() < float(sample_rate):
+        return ObedienceGateDecision(invoke_llm=True, reason="sampled", prescreen=prescreen)
+    return ObedienceGateDecision(invoke_llm=False, reason="prescreen_clean", prescreen=prescreen)
+
+
+def skipped_obedience_result() -> Dict[str, Any]:
+    """run_obedience_eval-shaped result for a reply that skipped the LLM evaluator."""
+    return {
+        "passed": True,
+        "violations": [],
+        "corrected_email_body": None,
+        "reasoning": "Deterministic pre-screen found no risk; LLM evaluation skipped.",
+    }
+
+
+def prescreen_outcome_label(decision: ObedienceGateDecision, llm_passed: Optional[bool]) -> str:
+    """
+    Labels each gated evaluation for sampling-rate tuning. "clean_miss" (a
+    sampled clean reply the LLM corrected) is the pre-screen's false-negative
+    rate; "flagged_passed" is its false-positive rate.
+    """
+    if not decision.invoke_llm:
+        return "skipped"
+    if decision.reason == "sampled":
+        return "clean_miss" if llm_passed is False else "clean_confirmed"
+    return "flagged_passed" if llm_passed else "flagged_corrected"
+
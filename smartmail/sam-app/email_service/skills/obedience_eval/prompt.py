@@ -1,26 +1,25 @@
 """System prompt assembly for the obedience evaluation skill."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 
-def build_system_prompt(
+def build_system_prompt_parts(
     directive: Dict[str, Any],
     continuity_context: Optional[Dict[str, Any]] = None,
-) -> str:
-    """Build the system prompt for the obedience evaluator.
+) -> Tuple[str, str]:
+    """Return (static prefix, per-turn suffix) for the obedience evaluator.
 
-    The prompt gives the LLM the coaching directive (the contract the writer was
-    supposed to follow) and the rules for detecting + correcting violations.
+    The role, taxonomy, correction and output rules never change between
+    turns, so they lead the prompt where the provider can cache them; the
+    directive and continuity context follow.
     """
     avoid: List[str] = directive.get("avoid") or []
     content_plan: List[str] = directive.get("content_plan") or []
     main_message: str = directive.get("main_message") or ""
     tone: str = directive.get("tone") or ""
 
-    sections: List[str] = [_ROLE_SECTION]
-
     # Inject directive fields so the evaluator knows the contract
-    sections.append(_build_directive_section(avoid, content_plan, main_message, tone))
+    sections: List[str] = [_build_directive_section(avoid, content_plan, main_message, tone)]
 
     # Inject continuity context for week/block grounding
     if continuity_context:
@@ -32,11 +31,20 @@ def build_system_prompt(
             "Any week numbers, block labels, or phase names in the email are unsupported assumptions."
         )
 
-    sections.append(_TAXONOMY_SECTION)
-    sections.append(_CORRECTION_RULES_SECTION)
-    sections.append(_OUTPUT_SECTION)
+    return STATIC_PROMPT_PREFIX, "\n" + "\n".join(sections)
 
-    return "\n".join(sections)
+
+def build_system_prompt(
+    directive: Dict[str, Any],
+    continuity_context: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Build the system prompt for the obedience evaluator.
+
+    The prompt gives the LLM the coaching directive (the contract the writer was
+    supposed to follow) and the rules for detecting + correcting violations.
+    """
+    prefix, suffix = build_system_prompt_parts(directive, continuity_context)
+    return prefix + suffix
 
 
 # ---------------------------------------------------------------------------
@@ -139,3 +147,7 @@ _OUTPUT_SECTION = """
 ## Output
 
 Return JSON matching the schema exactly. Do not output markdown, prose outside JSON, or extra keys."""
+
+STATIC_PROMPT_PREFIX = "\n".join(
+    [_ROLE_SECTION, _TAXONOMY_SECTION, _CORRECTION_RULES_SECTION, _OUTPUT_SECTION]
+)
@@ -5,9 +5,10 @@ import logging
 from typing import Any, Dict, Optional
 
 from config import OPENAI_CLASSIFICATION_MODEL
+from prompt_pack_loader import prompt_prefix_cache_key
 from skills import runtime as skill_runtime
 from skills.obedience_eval.errors import ObedienceEvalError
-from skills.obedience_eval.prompt import build_system_prompt
+from skills.obedience_eval.prompt import build_system_prompt_parts
 from skills.obedience_eval.schema import JSON_SCHEMA, JSON_SCHEMA_NAME
 from skills.obedience_eval.validator import validate_obedience_eval
 
@@ -33,7 +34,8 @@ def run_obedience_eval(
             or OPENAI_CLASSIFICATION_MODEL
         )
 
-        system_prompt = build_system_prompt(directive, continuity_context)
+        prompt_prefix, prompt_suffix = build_system_prompt_parts(directive, continuity_context)
+        system_prompt = prompt_prefix + prompt_suffix
 
         user_content = json.dumps(
             {
@@ -45,7 +47,7 @@ def run_obedience_eval(
             ensure_ascii=True,
         )
 
-        payload, raw_content = skill_runtime.execute_json_schema(
+        evaluation, raw_content = skill_runtime.execute_json_schema(
             logger=logger,
             model_name=selected_model,
             system_prompt=system_prompt,
@@ -55,9 +57,11 @@ def run_obedience_eval(
             disabled_message="live obedience-eval LLM calls are disabled",
             warning_log_name="obedience_eval",
             retries=1,
+            prompt_cache_key=prompt_prefix_cache_key("obedience_eval", prompt_prefix),
+            validate_payload=validate_obedience_eval,
         )
 
-        return validate_obedience_eval(payload)
+        return evaluation
 
     except ObedienceEvalError:
         raise
@@ -0,0 +1,259 @@
+"""Content-addressed cache for structured LLM responses.
+
+Entries are keyed on a hash of (model, system prompt, user content, schema
+name, schema) and hold the raw JSON text returned by the model. Lookups go
+through an in-memory LRU tier first and an optional SQLite tier second; both
+tiers apply the same TTL and entry-count bound.
+
+Only skills listed in LLM_RESPONSE_CACHE_SKILLS are cached. The default list
+covers the classification and extraction skills whose output should be a
+pure function of the input; free-text skills opt in explicitly.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODE_OFF = "off"
+CACHE_MODE_MEMORY = "memory"
+CACHE_MODE_SQLITE = "sqlite"
+
+DEFAULT_CACHEABLE_SKILLS: FrozenSet[str] = frozenset(
+    {
+        "conversation_intelligence_response",
+        "profile_extraction_response",
+        "session_checkin_extraction_response",
+        "obedience_evaluation",
+    }
+)
+
+
+def build_cache_key(
+    *,
+    model_name: str,
+    system_prompt: str,
+    user_content: str,
+    schema_name: str,
+    schema: Dict[str, Any],
+) -> str:
+    material = json.dumps(
+        [model_name, system_prompt, user_content, schema_name, schema],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheTier:
+    """Thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str, *, stored_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() if stored_at is None else stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """On-disk tier shared by bench re-runs; evicts least recently used rows."""
+
+    def __init__(self, path: str, *, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "cache_key TEXT PRIMARY KEY, raw_response TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_with_timestamp(self, key: str) -> Optional[Tuple[float, str]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT raw_response, stored_at FROM llm_responses WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            raw_response, stored_at = row
+            if now - stored_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE llm_responses SET accessed_at = ? WHERE cache_key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            return stored_at, raw_response
+
+    def get(self, key: str) -> Optional[str]:
+        hit = self.get_with_timestamp(key)
+        return hit[1] if hit is not None else None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (cache_key, raw_response, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE cache_key IN ("
+                "SELECT cache_key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0])
+
+
+class LLMResponseCache:
+    """Two-tier cache front; a disk hit is promoted into the memory tier."""
+
+    def __init__(
+        self,
+        *,
+        memory_tier: MemoryCacheTier,
+        disk_tier: Optional[SQLiteCacheTier] = None,
+        cacheable_skills: FrozenSet[str] = DEFAULT_CACHEABLE_SKILLS,
+    ):
+        self.memory_tier = memory_tier
+        self.disk_tier = disk_tier
+        self.cacheable_skills = frozenset(cacheable_skills)
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, schema_name: str) -> bool:
+        return "*" in self.cacheable_skills or schema_name in self.cacheable_skills
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory_tier.get(key)
+        if value is None and self.disk_tier is not None:
+            hit = self.disk_tier.get_with_timestamp(key)
+            if hit is not None:
+                stored_at, value = hit
+                self.memory_tier.put(key, value, stored_at=stored_at)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        self.memory_tier.put(key, value)
+        if self.disk_tier is not None:
+            try:
+                self.disk_tier.put(key, value)
+            except sqlite3.Error as exc:
+                logger.warning("llm_response_cache_disk_write_failed error=%s", exc)
+
+    def clear(self) -> None:
+        self.memory_tier.clear()
+        if self.disk_tier is not None:
+            self.disk_tier.clear()
+
+
+def _parse_skill_list(raw: str) -> FrozenSet[str]:
+    names: List[str] = [part.strip() for part in raw.split(",")]
+    return frozenset(name for name in names if name)
+
+
+def build_response_cache_from_env() -> Optional[LLMResponseCache]:
+    mode = os.getenv("LLM_RESPONSE_CACHE_MODE", CACHE_MODE_OFF).strip().lower()
+    if mode not in {CACHE_MODE_MEMORY, CACHE_MODE_SQLITE}:
+        return None
+    ttl_seconds = float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", "86400"))
+    max_entries = int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "512"))
+    skills_raw = os.getenv("LLM_RESPONSE_CACHE_SKILLS", "")
+    cacheable_skills = _parse_skill_list(skills_raw) if skills_raw.strip() else DEFAULT_CACHEABLE_SKILLS
+    disk_tier = None
+    if mode == CACHE_MODE_SQLITE:
+        disk_tier = SQLiteCacheTier(
+            os.getenv("LLM_RESPONSE_CACHE_PATH", "/tmp/llm_response_cache.sqlite3"),
+            max_entries=int(os.getenv("LLM_RESPONSE_CACHE_DISK_MAX_ENTRIES", "20000")),
+            ttl_seconds=ttl_seconds,
+        )
+    return LLMResponseCache(
+        memory_tier=MemoryCacheTier(max_entries=max_entries, ttl_seconds=ttl_seconds),
+        disk_tier=disk_tier,
+        cacheable_skills=cacheable_skills,
+    )
+
+
+_UNSET = object()
+_response_cache: Any = _UNSET
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Returns the process-wide cache, building it from the environment on first use."""
+    global _response_cache
+    if _response_cache is _UNSET:
+        with _response_cache_lock:
+            if _response_cache is _UNSET:
+                _response_cache = build_response_cache_from_env()
+    return _response_cache
+
+
+def set_response_cache(cache: Optional[LLMResponseCache]) -> None:
+    """Installs a cache (or None to disable caching) for benches and tests."""
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = cache
+
+
+def reset_response_cache() -> None:
+    """Forgets the installed cache so the next lookup re-reads the environment."""
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = _UNSET
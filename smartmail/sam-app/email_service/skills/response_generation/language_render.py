@@ -11,6 +11,8 @@ try:
 except ModuleNotFoundError:  # pragma: no cover
     openai = None  # type: ignore
 
+import llm_usage
+import telemetry
 from config import LANGUAGE_RENDER_MODEL
 
 logger = logging.getLogger(__name__)
@@ -68,14 +70,17 @@ class LanguageReplyRenderer:
                 "validated_plan": validated_plan,
                 "decision_envelope": decision_envelope,
             }
-            response = client.chat.completions.create(
-                model=selected_model,
-                messages=[
-                    {"role": "system", "content": LanguageReplyRenderer.SYSTEM_PROMPT},
-                    {"role": "user", "content": json.dumps(payload, separators=(",", ":"), ensure_ascii=True)},
-                ],
-                response_format={"type": "json_object"},
-            )
+            with telemetry.span("llm.language_render"):
+                response = client.chat.completions.create(
+                    model=selected_model,
+                    messages=[
+                        {"role": "system", "content": LanguageReplyRenderer.SYSTEM_PROMPT},
+                        {"role": "user", "content": json.dumps(payload, separators=(",", ":"), ensure_ascii=True)},
+                    ],
+                    response_format={"type": "json_object"},
+                )
+            telemetry.increment("llm_calls")
+            llm_usage.record_llm_response("language_render", selected_model, response)
             raw_content = response.choices[0].message.content or ""
             parsed = json.loads(raw_content)
             if not isinstance(parsed, dict):
@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional
 
 import skills.runtime as skill_runtime
 from config import LANGUAGE_RENDER_MODEL
+from prompt_pack_loader import prompt_prefix_cache_key
 from skills.response_generation.errors import (
     ResponseGenerationContractError,
     ResponseGenerationProposalError,
@@ -68,6 +69,8 @@ class ResponseGenerationLLM:
                 disabled_message="live response-generation LLM calls are disabled",
                 warning_log_name="response_generation",
                 retries=1,
+                # The pack's directive prompt leads every variant of the system prompt.
+                prompt_cache_key=prompt_prefix_cache_key("response_generation", DIRECTIVE_SYSTEM_PROMPT),
             )
             validated = validate_response_generation_output(payload)
             validated["model_name"] = selected_model
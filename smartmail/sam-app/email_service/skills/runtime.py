@@ -1,9 +1,11 @@
 """Lightweight shared runtime helpers for skill execution."""
 
+import asyncio
 import json
 import logging
 import os
-from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 try:
     import openai  # type: ignore
@@ -11,6 +13,10 @@ except ModuleNotFoundError:  # pragma: no cover - exercised via tests with stubs
     openai = None  # type: ignore
 
 
+import llm_usage
+import telemetry
+from skills.response_cache import build_cache_key, get_response_cache
+
 if openai is not None:
     openai.api_key = os.getenv("OPENAI_API_KEY")
 
@@ -37,12 +43,87 @@ def live_llm_enabled() -> bool:
     return os.getenv("ENABLE_LIVE_LLM_CALLS", "false").strip().lower() == "true"
 
 
-def require_openai_client(*, require_live_llm: bool, disabled_message: str):
+# Warm-container client reuse — one pooled client per module object (tests swap
+# in stub modules) so consecutive LLM calls share keep-alive connections
+# instead of paying a fresh TLS handshake each time.
+_client_lock = threading.Lock()
+_sync_client: Optional[Tuple[Any, Any]] = None
+_async_client: Optional[Tuple[Any, Any, Any]] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def _http_client_kwargs() -> Dict[str, Any]:
+    import httpx  # type: ignore
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=_env_int("OPENAI_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=_env_int("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 10),
+            keepalive_expiry=_env_float("OPENAI_KEEPALIVE_EXPIRY_SECONDS", 60.0),
+        ),
+        "timeout": httpx.Timeout(_env_float("OPENAI_REQUEST_TIMEOUT_SECONDS", 120.0), connect=5.0),
+    }
+
+
+def _build_openai_client(client_factory_name: str, http_client_factory_name: str):
+    client_factory = getattr(openai, client_factory_name)
+    http_client_factory = getattr(openai, http_client_factory_name, None)
+    if http_client_factory is None:
+        return client_factory()
+    return client_factory(http_client=http_client_factory(**_http_client_kwargs()))
+
+
+def _ensure_openai_available(*, require_live_llm: bool, disabled_message: str) -> None:
     if require_live_llm and not live_llm_enabled():
         raise RuntimeError(disabled_message)
     if openai is None:
         raise RuntimeError("openai package is not installed")
-    return openai.OpenAI()
+
+
+def require_openai_client(*, require_live_llm: bool, disabled_message: str):
+    global _sync_client
+    _ensure_openai_available(require_live_llm=require_live_llm, disabled_message=disabled_message)
+    with _client_lock:
+        if _sync_client is None or _sync_client[0] is not openai:
+            _sync_client = (openai, _build_openai_client("OpenAI", "DefaultHttpxClient"))
+        return _sync_client[1]
+
+
+def require_async_openai_client(*, require_live_llm: bool, disabled_message: str):
+    """
+    Returns the pooled AsyncOpenAI client for the running event loop.
+
+    Async connection pools are bound to the loop that opened them, so a new
+    loop (for example a fresh ``asyncio.run`` per invocation) gets a new client.
+    """
+    global _async_client
+    _ensure_openai_available(require_live_llm=require_live_llm, disabled_message=disabled_message)
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        if _async_client is None or _async_client[0] is not openai or _async_client[1] is not loop:
+            _async_client = (openai, loop, _build_openai_client("AsyncOpenAI", "DefaultAsyncHttpxClient"))
+        return _async_client[2]
+
+
+def reset_openai_clients() -> None:
+    """Drops the pooled clients; the next call builds fresh ones."""
+    global _sync_client, _async_client
+    with _client_lock:
+        _sync_client = None
+        _async_client = None
 
 
 def preview_text(value: Any, *, limit: int = 240) -> str:
@@ -53,6 +134,256 @@ def preview_text(value: Any, *, limit: int = 240) -> str:
     return f"{collapsed[:limit]}..."
 
 
+def _record_prompt_trace(*, schema_name: str, model_name: str, system_prompt: str, user_content: str) -> None:
+    if _prompt_trace_enabled():
+        prompt_trace.append({
+            "skill": schema_name,
+            "model": model_name,
+            "system_prompt": system_prompt,
+            "user_content": user_content,
+        })
+
+
+def _json_schema_request(
+    *,
+    model_name: str,
+    system_prompt: str,
+    user_content: str,
+    schema_name: str,
+    schema: Dict[str, Any],
+    prompt_cache_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    request: Dict[str, Any] = {
+        "model": model_name,
+        "input": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ],
+        "text": {
+            "format": {
+                "type": "json_schema",
+                "name": schema_name,
+                "strict": True,
+                "schema": schema,
+            }
+        },
+    }
+    if prompt_cache_key:
+        request["prompt_cache_key"] = prompt_cache_key
+    return request
+
+
+def _parse_json_object(response: Any) -> Tuple[Optional[Dict[str, Any]], str]:
+    return _parse_json_text(str(getattr(response, "output_text", "") or ""))
+
+
+def _parse_json_text(raw_content: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    try:
+        payload = json.loads(raw_content)
+        if isinstance(payload, dict):
+            return payload, raw_content
+    except Exception:
+        pass
+    return None, raw_content
+
+
+def _response_cache_key(
+    *,
+    use_cache: Optional[bool],
+    model_name: str,
+    system_prompt: str,
+    user_content: str,
+    schema_name: str,
+    schema: Dict[str, Any],
+) -> Optional[str]:
+    if use_cache is False:
+        return None
+    cache = get_response_cache()
+    if cache is None or (use_cache is None and not cache.is_cacheable(schema_name)):
+        return None
+    return build_cache_key(
+        model_name=model_name,
+        system_prompt=system_prompt,
+        user_content=user_content,
+        schema_name=schema_name,
+        schema=schema,
+    )
+
+
+def _cached_json_response(
+    cache_key: Optional[str], *, logger: logging.Logger, schema_name: str
+) -> Optional[Tuple[Dict[str, Any], str]]:
+    if cache_key is None:
+        return None
+    cache = get_response_cache()
+    raw_content = cache.get(cache_key) if cache is not None else None
+    if raw_content is None:
+        return None
+    payload, raw_content = _parse_json_text(raw_content)
+    if payload is None:
+        return None
+    logger.info("llm_response_cache_hit skill=%s", schema_name)
+    telemetry.increment("llm_cache_hits")
+    return payload, raw_content
+
+
+def _store_json_response(cache_key: Optional[str], raw_content: str) -> None:
+    cache = get_response_cache() if cache_key is not None else None
+    if cache is not None:
+        cache.put(cache_key, raw_content)
+
+
+class _JsonSchemaCall:
+    """
+    One json-schema LLM call up to the network: prompt trace, request, cache,
+    retries, parsing, validation and accounting. The sync and async entry
+    points differ only in how they issue ``request``.
+
+    A response is cached only once it parses and, when ``validate`` is given,
+    passes it, so a payload the skill rejects is never served again.
+    """
+
+    def __init__(
+        self,
+        *,
+        logger: logging.Logger,
+        model_name: str,
+        system_prompt: str,
+        user_content: str,
+        schema_name: str,
+        schema: Dict[str, Any],
+        warning_log_name: str,
+        retries: int,
+        use_cache: Optional[bool],
+        prompt_cache_key: Optional[str] = None,
+        validate: Optional[Callable[[Dict[str, Any], str], Any]] = None,
+    ) -> None:
+        self.logger = logger
+        self.model_name = model_name
+        self.schema_name = schema_name
+        self.warning_log_name = warning_log_name
+        self.retries = retries
+        self.validate = validate
+        self.raw_content = ""
+        _record_prompt_trace(
+            schema_name=schema_name,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            user_content=user_content,
+        )
+        self.request = _json_schema_request(
+            model_name=model_name,
+            system_prompt=system_prompt,
+            user_content=user_content,
+            schema_name=schema_name,
+            schema=schema,
+            prompt_cache_key=prompt_cache_key,
+        )
+        self.cache_key = _response_cache_key(
+            use_cache=use_cache,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            user_content=user_content,
+            schema_name=schema_name,
+            schema=schema,
+        )
+
+    @property
+    def span_name(self) -> str:
+        return f"llm.{self.schema_name}"
+
+    def _result(self, payload: Dict[str, Any]) -> Any:
+        return payload if self.validate is None else self.validate(payload, self.raw_content)
+
+    def cached(self) -> Optional[Tuple[Any, str]]:
+        """The cached (payload, raw) when there is a usable entry; checked before any client is built."""
+        cached = _cached_json_response(self.cache_key, logger=self.logger, schema_name=self.schema_name)
+        if cached is None:
+            return None
+        payload, self.raw_content = cached
+        try:
+            return self._result(payload), self.raw_content
+        except Exception as exc:
+            # An entry the current validator rejects (e.g. stored before a contract change) is a miss.
+            self.logger.warning("llm_response_cache_rejected skill=%s error=%s", self.schema_name, exc)
+            return None
+
+    def attempts(self) -> Iterator[int]:
+        for attempt in range(max(1, int(self.retries) + 1)):
+            if attempt:
+                telemetry.increment("llm_retries")
+            yield attempt
+
+    def accept(self, attempt: int, response: Any) -> Optional[Tuple[Any, str]]:
+        """
+        Records one response; returns (payload, raw) once it parses and
+        validates, else None to retry. Validation errors propagate uncached.
+        """
+        telemetry.increment("llm_calls")
+        llm_usage.record_llm_response(self.schema_name, self.model_name, response)
+        payload, self.raw_content = _parse_json_object(response)
+        if payload is not None:
+            result = self._result(payload)
+            _store_json_response(self.cache_key, self.raw_content)
+            return result, self.raw_content
+        self.logger.warning("%s invalid_json attempt=%s", self.warning_log_name, attempt + 1)
+        telemetry.increment("llm_invalid_json")
+        return None
+
+    def failure(self) -> SkillExecutionError:
+        return SkillExecutionError(
+            "invalid_json_response",
+            code="invalid_json_response",
+            raw_response=self.raw_content,
+        )
+
+
+def _complete_json_schema_call(
+    call: _JsonSchemaCall, *, require_live_llm: bool, disabled_message: str
+) -> Tuple[Any, str]:
+    cached = call.cached()
+    if cached is not None:
+        return cached
+    client = require_openai_client(
+        require_live_llm=require_live_llm,
+        disabled_message=disabled_message,
+    )
+    for attempt in call.attempts():
+        with telemetry.span(call.span_name):
+            response = client.responses.create(**call.request)
+        result = call.accept(attempt, response)
+        if result is not None:
+            return result
+    raise call.failure()
+
+
+async def _complete_json_schema_call_async(
+    call: _JsonSchemaCall, *, require_live_llm: bool, disabled_message: str
+) -> Tuple[Any, str]:
+    cached = call.cached()
+    if cached is not None:
+        return cached
+    client = require_async_openai_client(
+        require_live_llm=require_live_llm,
+        disabled_message=disabled_message,
+    )
+    for attempt in call.attempts():
+        with telemetry.span(call.span_name):
+            response = await client.responses.create(**call.request)
+        result = call.accept(attempt, response)
+        if result is not None:
+            return result
+    raise call.failure()
+
+
+def _plain_validator(
+    validate_payload: Optional[Callable[[Dict[str, Any]], Any]],
+) -> Optional[Callable[[Dict[str, Any], str], Any]]:
+    if validate_payload is None:
+        return None
+    return lambda payload, _raw_content: validate_payload(payload)
+
+
 def execute_json_schema(
     *,
     logger: logging.Logger,
@@ -65,58 +396,120 @@ def execute_json_schema(
     warning_log_name: str,
     retries: int = 0,
     require_live_llm: bool = True,
-) -> Tuple[Dict[str, Any], str]:
-    client = require_openai_client(
-        require_live_llm=require_live_llm,
-        disabled_message=disabled_message,
+    use_cache: Optional[bool] = None,
+    prompt_cache_key: Optional[str] = None,
+    validate_payload: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Tuple[Any, str]:
+    # use_cache=None defers to the per-skill allowlist of the response cache;
+    # True/False force caching on or off for this call. With validate_payload
+    # the first element is its result and only validated responses are cached.
+    call = _JsonSchemaCall(
+        logger=logger,
+        model_name=model_name,
+        system_prompt=system_prompt,
+        user_content=user_content,
+        schema_name=schema_name,
+        schema=schema,
+        warning_log_name=warning_log_name,
+        retries=retries,
+        use_cache=use_cache,
+        prompt_cache_key=prompt_cache_key,
+        validate=_plain_validator(validate_payload),
     )
-    if _prompt_trace_enabled():
-        prompt_trace.append({
-            "skill": schema_name,
-            "model": model_name,
-            "system_prompt": system_prompt,
-            "user_content": user_content,
-        })
+    return _complete_json_schema_call(call, require_live_llm=require_live_llm, disabled_message=disabled_message)
 
-    attempts = max(1, int(retries) + 1)
-    raw_content = ""
-
-    for attempt in range(attempts):
-        response = client.responses.create(
-            model=model_name,
-            input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": schema_name,
-                    "strict": True,
-                    "schema": schema,
-                }
-            },
-        )
-        raw_content = str(getattr(response, "output_text", "") or "")
-        try:
-            payload = json.loads(raw_content)
-            if isinstance(payload, dict):
-                return payload, raw_content
-        except Exception:
-            pass
-
-        logger.warning("%s invalid_json attempt=%s", warning_log_name, attempt + 1)
-
-    raise SkillExecutionError(
-        "invalid_json_response",
-        code="invalid_json_response",
-        raw_response=raw_content,
+
+async def execute_json_schema_async(
+    *,
+    logger: logging.Logger,
+    model_name: str,
+    system_prompt: str,
+    user_content: str,
+    schema_name: str,
+    schema: Dict[str, Any],
+    disabled_message: str,
+    warning_log_name: str,
+    retries: int = 0,
+    require_live_llm: bool = True,
+    use_cache: Optional[bool] = None,
+    prompt_cache_key: Optional[str] = None,
+    validate_payload: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Tuple[Any, str]:
+    """Awaitable counterpart of execute_json_schema built on AsyncOpenAI."""
+    call = _JsonSchemaCall(
+        logger=logger,
+        model_name=model_name,
+        system_prompt=system_prompt,
+        user_content=user_content,
+        schema_name=schema_name,
+        schema=schema,
+        warning_log_name=warning_log_name,
+        retries=retries,
+        use_cache=use_cache,
+        prompt_cache_key=prompt_cache_key,
+        validate=_plain_validator(validate_payload),
+    )
+    return await _complete_json_schema_call_async(
+        call, require_live_llm=require_live_llm, disabled_message=disabled_message
     )
 
 
 TValidated = TypeVar("TValidated")
 
 
+def _workflow_call(
+    *,
+    logger: logging.Logger,
+    model_name: str,
+    system_prompt: str,
+    user_content: str,
+    schema_name: str,
+    schema: Dict[str, Any],
+    warning_log_name: str,
+    validate_payload: Callable[[Dict[str, Any]], TValidated],
+    retries: int,
+    on_raw_llm_response: Optional[Callable[[str], None]],
+    use_cache: Optional[bool],
+) -> _JsonSchemaCall:
+    def _validate(payload: Dict[str, Any], raw_content: str) -> TValidated:
+        if on_raw_llm_response is not None:
+            on_raw_llm_response(raw_content)
+        with telemetry.span(f"validate.{schema_name}"):
+            return validate_payload(payload)
+
+    return _JsonSchemaCall(
+        logger=logger,
+        model_name=model_name,
+        system_prompt=system_prompt,
+        user_content=user_content,
+        schema_name=schema_name,
+        schema=schema,
+        warning_log_name=warning_log_name,
+        retries=retries,
+        use_cache=use_cache,
+        validate=_validate,
+    )
+
+
+def _workflow_failure(
+    exc: Exception,
+    raw_content: str,
+    *,
+    logger: logging.Logger,
+    workflow_label: str,
+    proposal_error_factory: Callable[[str], Exception],
+) -> Exception:
+    """Logs a failed workflow and returns the proposal error to raise from ``exc``."""
+    raw_response = exc.raw_response if isinstance(exc, SkillExecutionError) else ""
+    logger.error(
+        "%s failed: %s (raw_response_preview=%s)",
+        workflow_label,
+        exc,
+        preview_text(raw_response or raw_content),
+    )
+    return proposal_error_factory(f"{workflow_label}_failed")
+
+
 def run_validated_json_schema_workflow(
     *,
     logger: logging.Logger,
@@ -133,37 +526,78 @@ def run_validated_json_schema_workflow(
     retries: int = 0,
     require_live_llm: bool = True,
     on_raw_llm_response: Optional[Callable[[str], None]] = None,
+    use_cache: Optional[bool] = None,
 ) -> TValidated:
-    raw_content = ""
+    call = _workflow_call(
+        logger=logger,
+        model_name=model_name,
+        system_prompt=system_prompt,
+        user_content=user_content,
+        schema_name=schema_name,
+        schema=schema,
+        warning_log_name=warning_log_name,
+        validate_payload=validate_payload,
+        retries=retries,
+        on_raw_llm_response=on_raw_llm_response,
+        use_cache=use_cache,
+    )
     try:
-        payload, raw_content = execute_json_schema(
-            logger=logger,
-            model_name=model_name,
-            system_prompt=system_prompt,
-            user_content=user_content,
-            schema_name=schema_name,
-            schema=schema,
-            disabled_message=disabled_message,
-            warning_log_name=warning_log_name,
-            retries=retries,
-            require_live_llm=require_live_llm,
+        validated, _ = _complete_json_schema_call(
+            call, require_live_llm=require_live_llm, disabled_message=disabled_message
         )
-        if on_raw_llm_response is not None:
-            on_raw_llm_response(raw_content)
-        return validate_payload(payload)
-    except SkillExecutionError as exc:
-        logger.error(
-            "%s failed: %s (raw_response_preview=%s)",
-            workflow_label,
+        return validated
+    except Exception as exc:
+        raise _workflow_failure(
             exc,
-            preview_text(exc.raw_response or raw_content),
+            call.raw_content,
+            logger=logger,
+            workflow_label=workflow_label,
+            proposal_error_factory=proposal_error_factory,
+        ) from exc
+
+
+async def run_validated_json_schema_workflow_async(
+    *,
+    logger: logging.Logger,
+    model_name: str,
+    system_prompt: str,
+    user_content: str,
+    schema_name: str,
+    schema: Dict[str, Any],
+    disabled_message: str,
+    warning_log_name: str,
+    validate_payload: Callable[[Dict[str, Any]], TValidated],
+    workflow_label: str,
+    proposal_error_factory: Callable[[str], Exception],
+    retries: int = 0,
+    require_live_llm: bool = True,
+    on_raw_llm_response: Optional[Callable[[str], None]] = None,
+    use_cache: Optional[bool] = None,
+) -> TValidated:
+    """Awaitable counterpart of run_validated_json_schema_workflow."""
+    call = _workflow_call(
+        logger=logger,
+        model_name=model_name,
+        system_prompt=system_prompt,
+        user_content=user_content,
+        schema_name=schema_name,
+        schema=schema,
+        warning_log_name=warning_log_name,
+        validate_payload=validate_payload,
+        retries=retries,
+        on_raw_llm_response=on_raw_llm_response,
+        use_cache=use_cache,
+    )
+    try:
+        validated, _ = await _complete_json_schema_call_async(
+            call, require_live_llm=require_live_llm, disabled_message=disabled_message
         )
-        raise proposal_error_factory(f"{workflow_label}_failed") from exc
+        return validated
     except Exception as exc:
-        logger.error(
-            "%s failed: %s (raw_response_preview=%s)",
-            workflow_label,
+        raise _workflow_failure(
             exc,
-            preview_text(raw_content),
-        )
-        raise proposal_error_factory(f"{workflow_label}_failed") from exc
+            call.raw_content,
+            logger=logger,
+            workflow_label=workflow_label,
+            proposal_error_factory=proposal_error_factory,
+        ) from exc
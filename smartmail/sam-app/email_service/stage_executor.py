@@ -0,0 +1,199 @@
+"""
+Small DAG executor for running independent pipeline stages concurrently.
+
+Stages declare their upstream dependencies by name. Stages whose dependencies
+have completed are submitted to a thread pool together; each stage gets its
+own timeout. A stage that fails, times out or is cancelled causes every
+downstream stage to be cancelled without running.
+
+Python threads cannot be interrupted, so a timed-out stage is abandoned: its
+result is discarded and the executor does not wait for it on shutdown.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from telemetry import record_duration
+
+logger = logging.getLogger(__name__)
+
+STAGE_COMPLETED = "completed"
+STAGE_FAILED = "failed"
+STAGE_TIMED_OUT = "timed_out"
+STAGE_CANCELLED = "cancelled"
+
+
+class StageExecutorError(ValueError):
+    """Raised when a stage graph is malformed."""
+
+
+@dataclass(frozen=True)
+class PipelineStage:
+    """One unit of work; ``run`` receives upstream values keyed by stage name."""
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    timeout_seconds: Optional[float] = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    duration_ms: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STAGE_COMPLETED
+
+
+@dataclass
+class _RunningStage:
+    stage: PipelineStage
+    future: Future
+    started_at: float
+    deadline: Optional[float] = field(default=None)
+
+
+def _validate_stages(stages: Sequence[PipelineStage]) -> Dict[str, PipelineStage]:
+    by_name: Dict[str, PipelineStage] = {}
+    for stage in stages:
+        if not stage.name:
+            raise StageExecutorError("stage name must be non-empty")
+        if stage.name in by_name:
+            raise StageExecutorError(f"duplicate stage name: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in stages:
+        for upstream in stage.depends_on:
+            if upstream not in by_name:
+                raise StageExecutorError(f"stage {stage.name} depends on unknown stage {upstream}")
+
+    visiting: set[str] = set()
+    visited: set[str] = set()
+
+    def _visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise StageExecutorError(f"stage graph has a cycle through {name}")
+        visiting.add(name)
+        for upstream in by_name[name].depends_on:
+            _visit(upstream)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in by_name:
+        _visit(name)
+    return by_name
+
+
+def _elapsed_ms(started_at: float) -> int:
+    return int((time.monotonic() - started_at) * 1000)
+
+
+def run_stage_dag(
+    stages: Sequence[PipelineStage],
+    *,
+    max_workers: int = 4,
+    default_timeout_seconds: Optional[float] = None,
+) -> Dict[str, StageResult]:
+    """
+    Runs ``stages`` respecting dependencies and returns one StageResult per stage.
+
+    Each stage runs in a copy of the caller's contextvars context, so
+    request-scoped state (for example the athlete state snapshot) stays visible.
+    """
+    by_name = _validate_stages(stages)
+    results: Dict[str, StageResult] = {}
+    running: Dict[str, _RunningStage] = {}
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, int(max_workers)),
+        thread_name_prefix="pipeline-stage",
+    )
+
+    def _submit_ready() -> None:
+        for name, stage in by_name.items():
+            if name in results or name in running:
+                continue
+            upstream_results = [results.get(upstream) for upstream in stage.depends_on]
+            if any(result is None for result in upstream_results):
+                continue
+            if not all(result.ok for result in upstream_results):
+                results[name] = StageResult(name=name, status=STAGE_CANCELLED)
+                continue
+            upstream_values = {upstream: results[upstream].value for upstream in stage.depends_on}
+            timeout = stage.timeout_seconds if stage.timeout_seconds is not None else default_timeout_seconds
+            started_at = time.monotonic()
+            context = contextvars.copy_context()
+            running[name] = _RunningStage(
+                stage=stage,
+                future=executor.submit(context.run, stage.run, upstream_values),
+                started_at=started_at,
+                deadline=(started_at + timeout) if timeout is not None else None,
+            )
+
+    try:
+        while len(results) < len(by_name):
+            _submit_ready()
+            if not running:
+                continue
+
+            deadlines = [entry.deadline for entry in running.values() if entry.deadline is not None]
+            wait_timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            wait([entry.future for entry in running.values()], timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for name, entry in list(running.items()):
+                if entry.future.done():
+                    error = entry.future.exception()
+                    if error is None:
+                        results[name] = StageResult(
+                            name=name,
+                            status=STAGE_COMPLETED,
+                            value=entry.future.result(),
+                            duration_ms=_elapsed_ms(entry.started_at),
+                        )
+                    else:
+                        logger.warning("pipeline_stage_failed stage=%s error=%s", name, error)
+                        results[name] = StageResult(
+                            name=name,
+                            status=STAGE_FAILED,
+                            error=error,
+                            duration_ms=_elapsed_ms(entry.started_at),
+                        )
+                    del running[name]
+                elif entry.deadline is not None and now >= entry.deadline:
+                    entry.future.cancel()
+                    logger.warning(
+                        "pipeline_stage_timed_out stage=%s timeout_seconds=%s",
+                        name,
+                        entry.stage.timeout_seconds or default_timeout_seconds,
+                    )
+                    results[name] = StageResult(
+                        name=name,
+                        status=STAGE_TIMED_OUT,
+                        duration_ms=_elapsed_ms(entry.started_at),
+                    )
+                    del running[name]
+    finally:
+        for entry in running.values():
+            entry.future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for result in results.values():
+        record_duration(f"stage.{result.name}", result.duration_ms)
+    return {stage.name: results[stage.name] for stage in stages}
+
+
+def summarize_stage_results(results: Dict[str, StageResult]) -> List[str]:
+    """Returns ``name:status:duration_ms`` strings for structured outcome logging."""
+    return [f"{name}:{result.status}:{result.duration_ms}" for name, result in results.items()]
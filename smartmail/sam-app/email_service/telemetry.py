@@ -0,0 +1,270 @@
+"""
+Per-request latency telemetry emitted as CloudWatch Embedded Metric Format.
+
+``request_telemetry()`` activates a collector for one inbound email. While it
+is active, ``span()`` / ``timed()`` record stage durations, ``increment()``
+bumps counters (retries, cache hits) and ``record_llm_usage()`` adds token
+usage from an OpenAI response. Instrumented boto3 clients time every AWS call
+on their own. On exit the collector prints one JSON record whose ``_aws``
+block tells CloudWatch Logs which fields to extract as metrics.
+
+Every recording helper is a no-op when no collector is active, so library
+code can be instrumented unconditionally. Stages that run in worker threads
+see the collector through their copied contextvars context.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from config import ENABLE_REQUEST_TELEMETRY, TELEMETRY_NAMESPACE, TELEMETRY_SERVICE_NAME
+
+# CloudWatch rejects EMF directives with more than 100 metrics.
+_EMF_MAX_METRICS_PER_DIRECTIVE = 100
+
+_TIMING_STARTED_AT = "telemetry_started_at"
+
+TCallable = TypeVar("TCallable", bound=Callable[..., Any])
+
+
+def _elapsed_ms(started_at: float) -> float:
+    return round((time.perf_counter() - started_at) * 1000.0, 3)
+
+
+def _usage_value(usage: Any, *names: str) -> Any:
+    for name in names:
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if value is not None:
+            return value
+    return None
+
+
+def _usage_tokens(usage: Any, *names: str) -> int:
+    value = _usage_value(usage, *names)
+    return value if isinstance(value, int) else 0
+
+
+def llm_usage_tokens(usage: Any) -> Dict[str, int]:
+    """Normalized token counts from a Responses API or Chat Completions ``usage`` object."""
+    # Responses API names first, Chat Completions names as the fallback.
+    input_details = _usage_value(usage, "input_tokens_details", "prompt_tokens_details")
+    return {
+        "input_tokens": _usage_tokens(usage, "input_tokens", "prompt_tokens"),
+        "output_tokens": _usage_tokens(usage, "output_tokens", "completion_tokens"),
+        "cached_input_tokens": _usage_tokens(input_details, "cached_tokens") if input_details else 0,
+    }
+
+
+class RequestTelemetry:
+    """Thread-safe collector for one request's stage timings, counters and LLM usage."""
+
+    def __init__(self, **properties: Any):
+        self._lock = threading.Lock()
+        self._started_at = time.perf_counter()
+        self.properties: Dict[str, Any] = {key: value for key, value in properties.items() if value is not None}
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.llm_usage: Dict[str, Dict[str, int]] = {}
+
+    def record_duration(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            stage = self.stages.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] = round(stage["total_ms"] + duration_ms, 3)
+            stage["max_ms"] = max(stage["max_ms"], duration_ms)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_property(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.properties[key] = value
+
+    def record_llm_usage(self, model_name: str, usage: Any) -> None:
+        tokens = llm_usage_tokens(usage)
+        with self._lock:
+            per_model = self.llm_usage.setdefault(
+                str(model_name or "unknown"),
+                {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cached_input_tokens": 0},
+            )
+            per_model["calls"] += 1
+            for key, value in tokens.items():
+                per_model[key] += value
+                counter = f"llm_{key}"
+                self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def to_emf(self, *, namespace: str, service: str) -> Dict[str, Any]:
+        """The EMF record: metrics are top-level fields named in the ``_aws`` directive."""
+        with self._lock:
+            record: Dict[str, Any] = {"Service": service, "duration_ms": _elapsed_ms(self._started_at)}
+            metrics: List[Dict[str, str]] = [{"Name": "duration_ms", "Unit": "Milliseconds"}]
+            for name, stage in sorted(self.stages.items()):
+                metric_name = f"{name}_ms"
+                record[metric_name] = stage["total_ms"]
+                metrics.append({"Name": metric_name, "Unit": "Milliseconds"})
+            for name, value in sorted(self.counters.items()):
+                record[name] = value
+                metrics.append({"Name": name, "Unit": "Count"})
+            record["stages"] = {name: dict(stage) for name, stage in self.stages.items()}
+            if self.llm_usage:
+                record["llm_usage"] = {name: dict(usage) for name, usage in self.llm_usage.items()}
+            for key, value in self.properties.items():
+                record.setdefault(key, value)
+        record["_aws"] = {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": namespace,
+                    "Dimensions": [["Service"]],
+                    "Metrics": metrics[start:start + _EMF_MAX_METRICS_PER_DIRECTIVE],
+                }
+                for start in range(0, len(metrics), _EMF_MAX_METRICS_PER_DIRECTIVE)
+            ],
+        }
+        return record
+
+
+_active_telemetry: ContextVar[Optional[RequestTelemetry]] = ContextVar("request_telemetry", default=None)
+
+
+def get_active_telemetry() -> Optional[RequestTelemetry]:
+    return _active_telemetry.get()
+
+
+@contextmanager
+def request_telemetry(
+    *,
+    enabled: Optional[bool] = None,
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+    **properties: Any,
+) -> Iterator[Optional[RequestTelemetry]]:
+    """
+    Collects telemetry for the enclosed block and emits one EMF record on exit.
+    Yields None (and records nothing) when telemetry is disabled.
+    """
+    if not (ENABLE_REQUEST_TELEMETRY if enabled is None else enabled):
+        yield None
+        return
+    collector = RequestTelemetry(**properties)
+    token = _active_telemetry.set(collector)
+    try:
+        yield collector
+    except BaseException:
+        collector.set_property("error", True)
+        raise
+    finally:
+        _active_telemetry.reset(token)
+        record = collector.to_emf(namespace=TELEMETRY_NAMESPACE, service=TELEMETRY_SERVICE_NAME)
+        (emit or _print_record)(record)
+
+
+def _print_record(record: Dict[str, Any]) -> None:
+    # Lambda ships stdout lines to CloudWatch Logs verbatim, which is where EMF is parsed.
+    print(json.dumps(record, separators=(",", ":"), default=str), flush=True)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Times the enclosed block as stage ``name``; failures are timed too."""
+    collector = _active_telemetry.get()
+    if collector is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.record_duration(name, _elapsed_ms(started_at))
+
+
+def timed(name: str) -> Callable[[TCallable], TCallable]:
+    """Decorator form of ``span`` for functions that are a stage on their own."""
+
+    def _decorate(func: TCallable) -> TCallable:
+        @functools.wraps(func)
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return _wrapper  # type: ignore[return-value]
+
+    return _decorate
+
+
+def record_duration(name: str, duration_ms: float) -> None:
+    collector = _active_telemetry.get()
+    if collector is not None:
+        collector.record_duration(name, duration_ms)
+
+
+def increment(name: str, amount: int = 1) -> None:
+    collector = _active_telemetry.get()
+    if collector is not None:
+        collector.increment(name, amount)
+
+
+def set_property(key: str, value: Any) -> None:
+    collector = _active_telemetry.get()
+    if collector is not None:
+        collector.set_property(key, value)
+
+
+def record_llm_usage(model_name: str, response: Any) -> None:
+    """Adds the token usage reported on an OpenAI API result, if any."""
+    collector = _active_telemetry.get()
+    usage = getattr(response, "usage", None) if collector is not None else None
+    if usage is not None:
+        collector.record_llm_usage(model_name, usage)
+
+
+def _before_aws_call(context: Optional[Dict[str, Any]] = None, **_kwargs: Any) -> None:
+    # botocore short-circuits the request if a before-call handler returns a value.
+    if context is not None and _active_telemetry.get() is not None:
+        context[_TIMING_STARTED_AT] = time.perf_counter()
+
+
+def _after_aws_call(
+    model: Any = None,
+    context: Optional[Dict[str, Any]] = None,
+    parsed: Any = None,
+    **_kwargs: Any,
+) -> None:
+    collector = _active_telemetry.get()
+    started_at = context.pop(_TIMING_STARTED_AT, None) if context is not None else None
+    if collector is None or started_at is None:
+        return
+    service = getattr(getattr(model, "service_model", None), "service_name", "aws")
+    collector.record_duration(f"{service}.{getattr(model, 'name', 'call')}", _elapsed_ms(started_at))
+    metadata = parsed.get("ResponseMetadata") if isinstance(parsed, dict) else None
+    retries = metadata.get("RetryAttempts") if isinstance(metadata, dict) else None
+    if retries:
+        collector.increment("aws_retries", int(retries))
+
+
+def _after_aws_call_error(**kwargs: Any) -> None:
+    _after_aws_call(**kwargs)
+    increment("aws_errors")
+
+
+def instrument_aws_client(client: Any) -> Any:
+    """Registers botocore hooks that time each API call (retries included) on ``client``."""
+    events = getattr(getattr(client, "meta", None), "events", None)
+    if events is None or not hasattr(events, "register"):
+        return client
+    events.register("before-call", _before_aws_call, unique_id="request-telemetry-before-call")
+    events.register("after-call", _after_aws_call, unique_id="request-telemetry-after-call")
+    events.register("after-call-error", _after_aws_call_error, unique_id="request-telemetry-after-call-error")
+    return client
+
+
+def instrument_aws_resource(resource: Any) -> Any:
+    """instrument_aws_client for the low-level client behind a boto3 resource."""
+    instrument_aws_client(getattr(getattr(resource, "meta", None), "client", None))
+    return resource
@@ -0,0 +1,214 @@
+"""
+Reply-parsing corpus: real-world text/plain reply shapes from common mail
+clients. Each case lists the exact new text the parser must keep and a
+fragment that must land in the quoted history (None when nothing is quoted).
+"""
+
+COACH_REPLY = (
+    "Great work on the long run. This week keep Tuesday easy, hold the tempo at\n"
+    "threshold effort on Thursday and add 10 minutes to Sunday's long run."
+)
+
+REPLY_CORPUS = [
+    {
+        "name": "plain_message",
+        "body": "Ran 8k easy today, legs felt good.\n\nAny changes for the weekend?",
+        "new_text": "Ran 8k easy today, legs felt good.\n\nAny changes for the weekend?",
+        "quoted_fragment": None,
+    },
+    {
+        "name": "gmail_web",
+        "body": (
+            "Thanks coach! Tempo went well, 5x1k at 4:10.\n\n"
+            "On Mon, Mar 3, 2025 at 9:14 AM Coach <coach@geniml.com> wrote:\n\n"
+            + "\n".join("> " + line for line in COACH_REPLY.split("\n"))
+        ),
+        "new_text": "Thanks coach! Tempo went well, 5x1k at 4:10.",
+        "quoted_fragment": "> Great work on the long run.",
+    },
+    {
+        "name": "gmail_wrapped_attribution",
+        "body": (
+            "Knee is a bit sore after Sunday.\n\n"
+            "On Mon, Mar 3, 2025 at 9:14 AM SmartMail Coach <\n"
+            "coach@geniml.com> wrote:\n\n"
+            "> " + COACH_REPLY.split("\n")[0]
+        ),
+        "new_text": "Knee is a bit sore after Sunday.",
+        "quoted_fragment": "coach@geniml.com> wrote:",
+    },
+    {
+        "name": "apple_mail_ios",
+        "body": (
+            "Done! 14 miles at 8:45 pace.\n\n"
+            "Sent from my iPhone\n\n"
+            "> On Mar 3, 2025, at 09:14, Coach <coach@geniml.com> wrote:\n"
+            ">\n"
+            "> " + COACH_REPLY.split("\n")[0]
+        ),
+        "new_text": "Done! 14 miles at 8:45 pace.",
+        "quoted_fragment": "> On Mar 3, 2025, at 09:14",
+        "signature": "Sent from my iPhone",
+    },
+    {
+        "name": "apple_mail_macos",
+        "body": (
+            "Swapped Thursday and Friday this week because of work.\n\n"
+            "> On 3 Mar 2025, at 09:14, Coach <coach@geniml.com> wrote:\n"
+            "> \n"
+            "> " + COACH_REPLY.split("\n")[0] + "\n"
+        ),
+        "new_text": "Swapped Thursday and Friday this week because of work.",
+        "quoted_fragment": "> On 3 Mar 2025",
+    },
+    {
+        "name": "outlook_desktop",
+        "body": (
+            "Hi,\r\n\r\nI can do three runs this week, not four.\r\n\r\nThanks,\r\nDana\r\n\r\n"
+            "________________________________\r\n"
+            "From: Coach <coach@geniml.com>\r\n"
+            "Sent: Monday, March 3, 2025 9:14 AM\r\n"
+            "To: Dana Runner <dana@example.com>\r\n"
+            "Subject: RE: Week 4\r\n\r\n"
+            + COACH_REPLY.replace("\n", "\r\n")
+        ),
+        "new_text": "Hi,\n\nI can do three runs this week, not four.\n\nThanks,\nDana",
+        "quoted_fragment": "From: Coach <coach@geniml.com>",
+    },
+    {
+        "name": "outlook_original_message",
+        "body": (
+            "Race went great, PR by 2 minutes!\n\n"
+            "-----Original Message-----\n"
+            "From: Coach [mailto:coach@geniml.com]\n"
+            "Sent: Monday, March 03, 2025 9:14 AM\n"
+            "To: runner@example.com\n"
+            "Subject: Race week\n\n"
+            + COACH_REPLY
+        ),
+        "new_text": "Race went great, PR by 2 minutes!",
+        "quoted_fragment": "-----Original Message-----",
+    },
+    {
+        "name": "outlook_mobile",
+        "body": (
+            "Easy 5k done.\n\n"
+            "Get Outlook for iOS\n"
+            "From: Coach <coach@geniml.com>\n"
+            "Sent: Monday, March 3, 2025 9:14:02 AM\n"
+            "To: runner@example.com <runner@example.com>\n"
+            "Subject: Re: Week 4\n\n"
+            + COACH_REPLY
+        ),
+        "new_text": "Easy 5k done.",
+        "quoted_fragment": "Subject: Re: Week 4",
+        "signature": "Get Outlook for iOS",
+    },
+    {
+        "name": "yahoo",
+        "body": (
+            "Sounds good, I'll keep Tuesday easy.\n\n"
+            "    On Monday, March 3, 2025, 09:14:02 AM PST, Coach <coach@geniml.com> wrote:\n\n"
+            + COACH_REPLY
+        ),
+        "new_text": "Sounds good, I'll keep Tuesday easy.",
+        "quoted_fragment": "Great work on the long run.",
+    },
+    {
+        "name": "german_attribution",
+        "body": (
+            "Lauf war gut, danke!\n\n"
+            "Am 03.03.2025 um 09:14 schrieb Coach <coach@geniml.com>:\n\n"
+            "> " + COACH_REPLY.split("\n")[0]
+        ),
+        "new_text": "Lauf war gut, danke!",
+        "quoted_fragment": "schrieb Coach",
+    },
+    {
+        "name": "french_attribution",
+        "body": (
+            "Sortie longue faite, 24 km.\n\n"
+            "Le lun. 3 mars 2025 à 09:14, Coach <coach@geniml.com> a écrit :\n\n"
+            "> " + COACH_REPLY.split("\n")[0]
+        ),
+        "new_text": "Sortie longue faite, 24 km.",
+        "quoted_fragment": "a écrit :",
+    },
+    {
+        "name": "inline_answers",
+        "body": (
+            "> How did the tempo feel?\n"
+            "Controlled, maybe a 7/10.\n"
+            "> Any pain in the knee?\n"
+            "None at all.\n"
+        ),
+        "new_text": "Controlled, maybe a 7/10.\nNone at all.",
+        "quoted_fragment": "> Any pain in the knee?",
+    },
+    {
+        "name": "signature_and_disclaimer",
+        "body": (
+            "Can we move the long run to Saturday?\n\n"
+            "-- \n"
+            "Jordan Lee\n"
+            "Senior Analyst, Acme Corp\n\n"
+            "CONFIDENTIALITY NOTICE: This e-mail and any attachments are confidential and may be privileged.\n"
+            "If you are not the intended recipient, please delete it.\n"
+        ),
+        "new_text": "Can we move the long run to Saturday?",
+        "quoted_fragment": None,
+        "signature": "-- \nJordan Lee\nSenior Analyst, Acme Corp",
+        "disclaimer_fragment": "CONFIDENTIALITY NOTICE",
+    },
+    {
+        "name": "disclaimer_without_signature",
+        "body": (
+            "Skipped today, sick with a cold.\n\n"
+            "This message and any attachments are intended solely for the addressee and may contain "
+            "confidential information.\n"
+        ),
+        "new_text": "Skipped today, sick with a cold.",
+        "quoted_fragment": None,
+        "disclaimer_fragment": "intended solely for the addressee",
+    },
+    {
+        "name": "forwarded_workout_is_new_content",
+        "body": (
+            "FYI, here's my run from this morning.\n\n"
+            "Begin forwarded message:\n\n"
+            "From: Strava <no-reply@strava.com>\n"
+            "Subject: You just completed a run\n"
+            "Date: March 3, 2025 at 7:02:11 AM EST\n"
+            "To: runner@example.com\n\n"
+            "10.2 km in 52:40, avg HR 148"
+        ),
+        "new_text": (
+            "FYI, here's my run from this morning.\n\n"
+            "Begin forwarded message:\n\n"
+            "From: Strava <no-reply@strava.com>\n"
+            "Subject: You just completed a run\n"
+            "Date: March 3, 2025 at 7:02:11 AM EST\n"
+            "To: runner@example.com\n\n"
+            "10.2 km in 52:40, avg HR 148"
+        ),
+        "quoted_fragment": None,
+    },
+    {
+        "name": "sentence_starting_with_on_is_not_an_attribution",
+        "body": "On Monday I ran 10k and wrote down my splits:\n5:10, 5:05, 5:00.",
+        "new_text": "On Monday I ran 10k and wrote down my splits:\n5:10, 5:05, 5:00.",
+        "quoted_fragment": None,
+    },
+    {
+        "name": "from_line_in_prose_is_not_a_header",
+        "body": "From: the track, 6x400.\nFelt strong all the way through.",
+        "new_text": "From: the track, 6x400.\nFelt strong all the way through.",
+        "quoted_fragment": None,
+    },
+    {
+        "name": "quoted_only",
+        "body": "On Mon, Mar 3, 2025 at 9:14 AM Coach <coach@geniml.com> wrote:\n> " + COACH_REPLY.split("\n")[0],
+        "new_text": "",
+        "quoted_fragment": "> Great work on the long run.",
+    },
+]
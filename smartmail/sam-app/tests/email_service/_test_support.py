@@ -48,6 +48,11 @@ def install_boto_stubs() -> None:
             def serialize(self, value):
                 return {"S": str(value)}
 
+        class TypeDeserializer:
+            def deserialize(self, value):
+                ((type_code, raw),) = value.items()
+                return int(raw) if type_code == "N" else raw
+
         class _Boto3StubTable:
             def update_item(self, *args, **kwargs):
                 return {}
@@ -70,8 +75,18 @@ def install_boto_stubs() -> None:
             return _Boto3StubResource()
 
         boto3_module.resource = _resource
+
+        class _Boto3ClientStub:
+            def send_email(self, *args, **kwargs):
+                return {"MessageId": "stub-message-id"}
+
+            def send_raw_email(self, *args, **kwargs):
+                return {"MessageId": "stub-message-id"}
+
+        boto3_module.client = lambda *args, **kwargs: _Boto3ClientStub()
         dynamodb_conditions_module.Key = Key
         dynamodb_types_module.TypeSerializer = TypeSerializer
+        dynamodb_types_module.TypeDeserializer = TypeDeserializer
         dynamodb_module.conditions = dynamodb_conditions_module
         dynamodb_module.types = dynamodb_types_module
 
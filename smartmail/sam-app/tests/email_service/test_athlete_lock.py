@@ -0,0 +1,409 @@
+"""Tests for the per-athlete lease lock and turn coalescing."""
+
+import copy
+import json
+import unittest
+from contextlib import nullcontext
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+from botocore.exceptions import ClientError
+
+import app
+import athlete_lock
+import dynamodb_models
+from inbound_message import REPLAYED_EMAIL_FIELD
+
+
+def _conditional_failure():
+    return ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+
+
+class _LockTable:
+    """In-memory stand-in that evaluates the lease lock's condition expressions."""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key, ConsistentRead=False):  # noqa: N803
+        item = self.items.get(Key["athlete_id"])
+        return {"Item": copy.deepcopy(item)} if item else {}
+
+    def delete_item(self, Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):  # noqa: N803
+        item = self.items.get(Key["athlete_id"])
+        if item is None or item["owner"] != ExpressionAttributeValues[":owner"] or item.get("pending"):
+            raise _conditional_failure()
+        del self.items[Key["athlete_id"]]
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None,  # noqa: N803
+                    ExpressionAttributeNames=None, ConditionExpression=None, ReturnValues=None):
+        athlete_id = Key["athlete_id"]
+        values = ExpressionAttributeValues or {}
+        item = self.items.get(athlete_id)
+        if "list_append(:messages" in UpdateExpression:
+            if item is None:
+                raise _conditional_failure()
+            item["pending"] = copy.deepcopy(values[":messages"]) + item.get("pending", [])
+            return {}
+        if "list_append" in UpdateExpression:
+            if item is None or item["lease_expires_at"] < values[":now"]:
+                raise _conditional_failure()
+            if len(item.get("pending", [])) >= values[":max_pending"]:
+                raise _conditional_failure()
+            item.setdefault("pending", []).extend(copy.deepcopy(values[":message"]))
+            return {}
+        if UpdateExpression.startswith("SET #owner"):
+            if item is not None and item["lease_expires_at"] >= values[":now"] and item["owner"] != values[":owner"]:
+                raise _conditional_failure()
+            item = self.items.setdefault(athlete_id, {"athlete_id": athlete_id})
+            item.update(
+                owner=values[":owner"],
+                lease_expires_at=values[":lease_expires_at"],
+                expires_at=values[":expires_at"],
+            )
+            return {"Attributes": copy.deepcopy(item)}
+        if item is None or item["owner"] != values[":owner"]:
+            raise _conditional_failure()
+        if UpdateExpression == "REMOVE pending":
+            return {"Attributes": {"pending": item.pop("pending", [])}}
+        if UpdateExpression.endswith("REMOVE pending"):
+            item["lease_expires_at"] = values[":released"]
+            return {"Attributes": {"pending": item.pop("pending", [])}}
+        item["lease_expires_at"] = values.get(":lease_expires_at", values.get(":released"))
+        return {}
+
+
+class _Dynamo:
+    def __init__(self, table):
+        self.table = table
+
+    def Table(self, _name):  # noqa: N802
+        return self.table
+
+
+class TestLeasePrimitives(unittest.TestCase):
+    def setUp(self):
+        self.table = _LockTable()
+        patcher = mock.patch.object(dynamodb_models, "dynamodb", _Dynamo(self.table))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _acquire(self, owner, now):
+        return dynamodb_models.acquire_athlete_lease(
+            "ath_1", owner, lease_seconds=60, ttl_seconds=3600, now=now
+        )
+
+    def test_held_lease_blocks_other_owners_until_expiry(self):
+        self.assertTrue(self._acquire("a", 1000)["acquired"])
+        blocked = self._acquire("b", 1030)
+        self.assertFalse(blocked["acquired"])
+        self.assertEqual(blocked["record"]["owner"], "a")
+        self.assertTrue(self._acquire("b", 1061)["acquired"])
+
+    def test_renew_fails_after_takeover(self):
+        self._acquire("a", 1000)
+        self._acquire("b", 1100)
+        self.assertFalse(dynamodb_models.renew_athlete_lease("ath_1", "a", lease_seconds=60))
+
+    def test_queued_messages_are_drained_before_release(self):
+        self._acquire("a", 1000)
+        self.assertTrue(
+            dynamodb_models.enqueue_athlete_message("ath_1", {"message_key": "m2"}, max_pending=2, now=1010)
+        )
+        self.assertEqual(
+            dynamodb_models.take_pending_or_release_athlete_lease("ath_1", "a"),
+            [{"message_key": "m2"}],
+        )
+        self.assertIn("ath_1", self.table.items)
+        self.assertEqual(dynamodb_models.take_pending_or_release_athlete_lease("ath_1", "a"), [])
+        self.assertNotIn("ath_1", self.table.items)
+
+    def test_enqueue_refused_when_lease_missing_or_full(self):
+        self.assertFalse(dynamodb_models.enqueue_athlete_message("ath_1", {}, max_pending=1, now=1000))
+        self._acquire("a", 1000)
+        self.assertTrue(dynamodb_models.enqueue_athlete_message("ath_1", {}, max_pending=1, now=1000))
+        self.assertFalse(dynamodb_models.enqueue_athlete_message("ath_1", {}, max_pending=1, now=1000))
+
+    def test_release_taking_pending_expires_lease_and_empties_queue(self):
+        self._acquire("a", 1000)
+        dynamodb_models.enqueue_athlete_message("ath_1", {"message_key": "m2"}, max_pending=2, now=1000)
+        self.assertEqual(
+            dynamodb_models.release_athlete_lease_taking_pending("ath_1", "a"),
+            [{"message_key": "m2"}],
+        )
+        self.assertEqual(self.table.items["ath_1"]["lease_expires_at"], 0)
+        self.assertNotIn("pending", self.table.items["ath_1"])
+        self.assertEqual(dynamodb_models.release_athlete_lease_taking_pending("ath_1", "b"), [])
+
+    def test_requeue_puts_messages_ahead_of_newer_ones(self):
+        self._acquire("a", 1000)
+        dynamodb_models.enqueue_athlete_message("ath_1", {"message_key": "m3"}, max_pending=2, now=1000)
+        self.assertTrue(dynamodb_models.requeue_athlete_messages("ath_1", [{"message_key": "m2"}]))
+        self.assertEqual(
+            self.table.items["ath_1"]["pending"],
+            [{"message_key": "m2"}, {"message_key": "m3"}],
+        )
+
+    def test_release_keeps_queued_messages_for_next_holder(self):
+        self._acquire("a", 1000)
+        dynamodb_models.enqueue_athlete_message("ath_1", {"message_key": "m2"}, max_pending=2, now=1000)
+        self.assertTrue(dynamodb_models.release_athlete_lease("ath_1", "a"))
+        self.assertTrue(self._acquire("b", 1001)["acquired"])
+        self.assertEqual(
+            dynamodb_models.take_pending_or_release_athlete_lease("ath_1", "b"),
+            [{"message_key": "m2"}],
+        )
+
+
+class TestMergeCoalescedEmails(unittest.TestCase):
+    def test_latest_headers_and_bodies_in_order(self):
+        merged = athlete_lock.merge_coalesced_emails(
+            [
+                {"message_id": "m1", "subject": "first", "body": "Ran 5k. "},
+                {"message_id": "m2", "subject": "Re: first", "body": "Also knee is sore"},
+            ]
+        )
+        self.assertEqual(merged["message_id"], "m2")
+        self.assertEqual(merged["subject"], "Re: first")
+        self.assertEqual(merged["body"], "Ran 5k." + athlete_lock.COALESCED_BODY_SEPARATOR + "Also knee is sore")
+
+
+class _Sqs:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    def send_message(self, **kwargs):
+        if self.fail:
+            raise RuntimeError("sqs down")
+        self.sent.append(kwargs)
+        return {"MessageId": f"sqs-{len(self.sent)}"}
+
+
+class TestLambdaHandlerLeaseLock(unittest.TestCase):
+    REPLAY_QUEUE_URL = "https://sqs.example/inbound"
+
+    def setUp(self):
+        self.table = _LockTable()
+        self.sqs = _Sqs()
+        self.email_data = {
+            "sender": "verified@example.com",
+            "subject": "Hello",
+            "body": "Hi coach",
+            "message_id": "msg-1",
+            "to_recipients": ["hello@geniml.com"],
+            "cc_recipients": [],
+        }
+        patches = [
+            mock.patch.object(app, "ENABLE_ATHLETE_LEASE_LOCK", True),
+            mock.patch.object(app, "ATHLETE_LEASE_MODE", athlete_lock.LEASE_MODE_COALESCE),
+            mock.patch.object(app, "ATHLETE_LEASE_REPLAY_QUEUE_URL", self.REPLAY_QUEUE_URL),
+            mock.patch.object(dynamodb_models, "dynamodb", _Dynamo(self.table)),
+            mock.patch.object(app, "is_registered", return_value=True),
+            mock.patch.object(app, "is_verified", return_value=True),
+            mock.patch.object(app, "check_verified_quota_or_block", return_value=None),
+            mock.patch.object(app, "ensure_athlete_id_for_email", return_value="ath_1"),
+            mock.patch.object(app, "ensure_progress_snapshot_exists", return_value=True),
+            mock.patch.object(app, "release_inbound_message", return_value=True),
+            mock.patch.object(athlete_lock, "_get_sqs_client", return_value=self.sqs),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_message_arriving_mid_turn_is_folded_into_one_follow_up_turn(self):
+        second = dict(self.email_data, message_id="msg-2", body="One more thing")
+        third = dict(self.email_data, message_id="msg-3", body="And another")
+        seen_bodies = []
+
+        def _reply(**kwargs):
+            seen_bodies.append(kwargs["email_data"]["body"])
+            if len(seen_bodies) == 1:
+                for email in (second, third):
+                    response = app._process_inbound_email(dict(email), "req-other")
+                    self.assertEqual(response["statusCode"], 200)
+            return "reply"
+
+        with mock.patch.object(app, "get_reply_for_inbound", side_effect=_reply), \
+                mock.patch.object(app.EmailReplySender, "send_reply", return_value="out-1") as send:
+            response = app._process_inbound_email(dict(self.email_data), "req-1")
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(
+            seen_bodies,
+            ["Hi coach", "One more thing" + athlete_lock.COALESCED_BODY_SEPARATOR + "And another"],
+        )
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(send.call_args_list[1].args[0]["message_id"], "msg-3")
+        self.assertEqual(self.table.items, {})
+
+    def _replayed_message_ids(self):
+        return [
+            json.loads(sent["MessageBody"])[REPLAYED_EMAIL_FIELD]["message_id"] for sent in self.sqs.sent
+        ]
+
+    def test_failed_follow_up_turn_replays_its_messages(self):
+        second = dict(self.email_data, message_id="msg-2", body="One more thing")
+        calls = []
+
+        def _reply(**kwargs):
+            calls.append(kwargs["email_data"]["message_id"])
+            if len(calls) == 1:
+                app._process_inbound_email(dict(second), "req-other")
+                return "reply"
+            raise RuntimeError("follow-up boom")
+
+        with mock.patch.object(app, "get_reply_for_inbound", side_effect=_reply), \
+                mock.patch.object(app.EmailReplySender, "send_reply", return_value="out-1"):
+            response = app._process_inbound_email(dict(self.email_data), "req-1")
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(calls, ["msg-1", "msg-2"])
+        self.assertEqual(self._replayed_message_ids(), ["msg-2"])
+        self.assertEqual(self.table.items["ath_1"]["lease_expires_at"], 0)
+        self.assertNotIn("pending", self.table.items["ath_1"])
+
+    def test_holder_crash_replays_queued_messages(self):
+        second = dict(self.email_data, message_id="msg-2", body="One more thing")
+
+        def _reply(**_kwargs):
+            app._process_inbound_email(dict(second), "req-other")
+            raise RuntimeError("boom")
+
+        with mock.patch.object(app, "get_reply_for_inbound", side_effect=_reply):
+            response = app._process_inbound_email(dict(self.email_data), "req-1")
+
+        self.assertEqual(response["statusCode"], 500)
+        self.assertEqual(self._replayed_message_ids(), ["msg-2"])
+        self.assertEqual(self.table.items["ath_1"]["lease_expires_at"], 0)
+
+    def test_messages_left_after_the_last_follow_up_are_replayed(self):
+        second = dict(self.email_data, message_id="msg-2", body="One more thing")
+        third = dict(self.email_data, message_id="msg-3", body="And another")
+        calls = []
+
+        def _reply(**kwargs):
+            calls.append(kwargs["email_data"]["message_id"])
+            follow_up = {1: second, 2: third}.get(len(calls))
+            if follow_up is not None:
+                app._process_inbound_email(dict(follow_up), "req-other")
+            return "reply"
+
+        with mock.patch.object(app, "ATHLETE_LEASE_MAX_FOLLOW_UP_TURNS", 1), \
+                mock.patch.object(app, "get_reply_for_inbound", side_effect=_reply), \
+                mock.patch.object(app.EmailReplySender, "send_reply", return_value="out-1"):
+            app._process_inbound_email(dict(self.email_data), "req-1")
+
+        self.assertEqual(calls, ["msg-1", "msg-2"])
+        self.assertEqual(self._replayed_message_ids(), ["msg-3"])
+
+    def test_unpublished_replays_go_back_on_the_lease_row(self):
+        self.sqs.fail = True
+        second = dict(self.email_data, message_id="msg-2", body="One more thing")
+
+        def _reply(**_kwargs):
+            app._process_inbound_email(dict(second), "req-other")
+            raise RuntimeError("boom")
+
+        with mock.patch.object(app, "get_reply_for_inbound", side_effect=_reply):
+            app._process_inbound_email(dict(self.email_data), "req-1")
+
+        pending = self.table.items["ath_1"]["pending"]
+        self.assertEqual([entry["email_data"]["message_id"] for entry in pending], ["msg-2"])
+
+    def test_coalesce_without_replay_queue_waits_instead(self):
+        dynamodb_models.acquire_athlete_lease("ath_1", "someone-else", lease_seconds=600, ttl_seconds=3600)
+        with mock.patch.object(app, "ATHLETE_LEASE_REPLAY_QUEUE_URL", ""), \
+                mock.patch.object(app, "ATHLETE_LEASE_WAIT_SECONDS", 0), \
+                mock.patch.object(app, "get_reply_for_inbound") as reply:
+            response = app._process_inbound_email(dict(self.email_data), "req-1")
+        self.assertEqual(response["statusCode"], 503)
+        self.assertNotIn("pending", self.table.items["ath_1"])
+        reply.assert_not_called()
+
+    def test_replayed_record_parses_back_to_email_data(self):
+        record = {"messageId": "r1", "body": json.dumps({REPLAYED_EMAIL_FIELD: self.email_data})}
+        self.assertEqual(app.EmailProcessor.parse_sqs_record(record), self.email_data)
+
+    def test_wait_mode_reports_busy_for_redelivery(self):
+        dynamodb_models.acquire_athlete_lease("ath_1", "someone-else", lease_seconds=600, ttl_seconds=3600)
+        with mock.patch.object(app, "ATHLETE_LEASE_MODE", athlete_lock.LEASE_MODE_WAIT), \
+                mock.patch.object(app, "ATHLETE_LEASE_WAIT_SECONDS", 0), \
+                mock.patch.object(app, "get_reply_for_inbound") as reply:
+            response = app._process_inbound_email(dict(self.email_data), "req-1")
+        self.assertEqual(response["statusCode"], 503)
+        reply.assert_not_called()
+
+    def test_sns_handler_raises_when_busy_so_the_message_is_redelivered(self):
+        dynamodb_models.acquire_athlete_lease("ath_1", "someone-else", lease_seconds=600, ttl_seconds=3600)
+        with mock.patch.object(app, "ATHLETE_LEASE_MODE", athlete_lock.LEASE_MODE_WAIT), \
+                mock.patch.object(app, "ATHLETE_LEASE_WAIT_SECONDS", 0), \
+                mock.patch.object(app.EmailProcessor, "parse_sns_event", return_value=dict(self.email_data)), \
+                mock.patch.object(app, "get_reply_for_inbound") as reply:
+            with self.assertRaises(athlete_lock.AthleteTurnBusyError):
+                app.lambda_handler(event={}, context=None)
+        reply.assert_not_called()
+
+    def test_sqs_handler_reports_busy_turn_as_a_batch_item_failure(self):
+        dynamodb_models.acquire_athlete_lease("ath_1", "someone-else", lease_seconds=600, ttl_seconds=3600)
+        event = {"Records": [{"messageId": "r1", "body": "{}"}]}
+        with mock.patch.object(app, "ATHLETE_LEASE_MODE", athlete_lock.LEASE_MODE_WAIT), \
+                mock.patch.object(app, "ATHLETE_LEASE_WAIT_SECONDS", 0), \
+                mock.patch.object(app.EmailProcessor, "parse_sqs_record", return_value=dict(self.email_data)):
+            response = app.sqs_batch_handler(event, None)
+        self.assertEqual(response, {"batchItemFailures": [{"itemIdentifier": "r1"}]})
+
+    def _lose_lease_mid_turn(self):
+        """Patches the heartbeat out and returns a get_reply side effect that drops the lease."""
+        heartbeat = mock.patch.object(athlete_lock.AthleteLease, "start_heartbeat", autospec=True)
+        start = heartbeat.start()
+        self.addCleanup(heartbeat.stop)
+        flush = mock.patch.object(dynamodb_models.CoachProfileUnitOfWork, "flush", autospec=True)
+        self.flush = flush.start()
+        self.addCleanup(flush.stop)
+
+        def _reply(**_kwargs):
+            unit = dynamodb_models._active_unit_of_work.get()
+            if unit is not None:
+                unit.stage({"memory_notes": []})
+            start.call_args.args[0].lost = True
+            return "reply"
+
+        return _reply
+
+    def test_lost_lease_abandons_the_turn_before_flush_or_send(self):
+        with mock.patch.object(app, "ENABLE_COACH_PROFILE_UNIT_OF_WORK", True), \
+                mock.patch.object(app, "athlete_state_snapshot", return_value=nullcontext()), \
+                mock.patch.object(app.EmailProcessor, "parse_sns_event", return_value=dict(self.email_data)), \
+                mock.patch.object(app, "get_reply_for_inbound", side_effect=self._lose_lease_mid_turn()), \
+                mock.patch.object(app, "record_inbound_reply") as record, \
+                mock.patch.object(app.EmailReplySender, "send_reply", return_value="out-1") as send:
+            with self.assertRaises(athlete_lock.AthleteLeaseLostError):
+                app.lambda_handler(event={}, context=None)
+        self.flush.assert_not_called()
+        record.assert_not_called()
+        send.assert_not_called()
+
+    def test_sqs_handler_retries_a_turn_whose_lease_was_lost(self):
+        event = {"Records": [{"messageId": "r1", "body": "{}"}]}
+        with mock.patch.object(app, "ENABLE_COACH_PROFILE_UNIT_OF_WORK", False), \
+                mock.patch.object(app.EmailProcessor, "parse_sqs_record", return_value=dict(self.email_data)), \
+                mock.patch.object(app, "get_reply_for_inbound", side_effect=self._lose_lease_mid_turn()), \
+                mock.patch.object(app.EmailReplySender, "send_reply", return_value="out-1") as send:
+            response = app.sqs_batch_handler(event, None)
+        self.assertEqual(response, {"batchItemFailures": [{"itemIdentifier": "r1"}]})
+        send.assert_not_called()
+
+    def test_failed_turn_releases_lease(self):
+        with mock.patch.object(app, "get_reply_for_inbound", side_effect=RuntimeError("boom")):
+            response = app._process_inbound_email(dict(self.email_data), "req-1")
+        self.assertEqual(response["statusCode"], 500)
+        self.assertEqual(self.table.items["ath_1"]["lease_expires_at"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""Tests for the request-scoped AthleteStateSnapshot read cache."""
+
+import types
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+import dynamodb_models
+import rule_engine_state
+
+
+class _CountingTable:
+    def __init__(self, item=None):
+        self.item = item
+        self.get_calls = 0
+        self.update_calls = 0
+
+    def get_item(self, **kwargs):
+        self.get_calls += 1
+        return {"Item": self.item} if self.item is not None else {}
+
+    def update_item(self, **kwargs):
+        self.update_calls += 1
+        return {}
+
+    def put_item(self, **kwargs):
+        self.item = kwargs["Item"]
+        return {}
+
+
+class _BatchDynamo:
+    def __init__(self, tables, unprocessed_rounds=0):
+        self.tables = tables
+        self.batch_requests = []
+        # Rounds that return every requested key as unprocessed (throttled).
+        self.unprocessed_rounds = unprocessed_rounds
+        self.meta = types.SimpleNamespace(client=types.SimpleNamespace())
+
+    def Table(self, name):  # noqa: N802
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems):  # noqa: N803
+        self.batch_requests.append(RequestItems)
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            return {"Responses": {}, "UnprocessedKeys": RequestItems}
+        responses = {}
+        for table_name in RequestItems:
+            item = self.tables[table_name].item
+            responses[table_name] = [item] if item is not None else []
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+
+def _build_dynamo():
+    return _BatchDynamo(
+        {
+            dynamodb_models.COACH_PROFILES_TABLE: _CountingTable(
+                {
+                    "athlete_id": "ath_1",
+                    "primary_goal": "10k",
+                    "current_plan": {"plan_version": 3, "primary_goal": "10k"},
+                }
+            ),
+            dynamodb_models.ATHLETE_IDENTITIES_TABLE: _CountingTable(
+                {"email": "a@example.com", "athlete_id": "ath_1"}
+            ),
+            dynamodb_models.RULE_STATE_TABLE: _CountingTable(
+                {"athlete_id": "ath_1", "weeks_since_deload": 2}
+            ),
+            dynamodb_models.PROGRESS_SNAPSHOTS_TABLE: _CountingTable(
+                {"athlete_id": "ath_1", "last_7d_activity_count": 3}
+            ),
+        }
+    )
+
+
+class TestAthleteStateSnapshot(unittest.TestCase):
+    def test_accessors_share_one_batch_read(self):
+        dynamo = _build_dynamo()
+        with mock.patch.object(dynamodb_models, "dynamodb", dynamo), \
+             mock.patch.object(rule_engine_state, "dynamodb", dynamo):
+            with dynamodb_models.athlete_state_snapshot("ath_1", email="A@example.com"):
+                profile = dynamodb_models.get_coach_profile("ath_1")
+                plan = dynamodb_models.get_current_plan("ath_1")
+                dynamodb_models.get_sectioned_memory("ath_1")
+                dynamodb_models.get_continuity_state("ath_1")
+                dynamodb_models.fetch_current_plan_summary("ath_1")
+                progress = dynamodb_models.get_progress_snapshot("ath_1")
+                rule_state = rule_engine_state.load_rule_state("ath_1")
+                athlete_id = dynamodb_models.get_athlete_id_for_email("a@example.com")
+
+        self.assertEqual(len(dynamo.batch_requests), 1)
+        self.assertEqual(len(dynamo.batch_requests[0]), 4)
+        for table in dynamo.tables.values():
+            self.assertEqual(table.get_calls, 0)
+        self.assertEqual(profile["primary_goal"], "10k")
+        self.assertEqual(plan["plan_version"], 3)
+        self.assertEqual(progress["last_7d_activity_count"], 3)
+        self.assertEqual(rule_state["weeks_since_deload"], 2)
+        self.assertEqual(athlete_id, "ath_1")
+
+    def test_unprocessed_keys_are_retried_after_a_backoff(self):
+        dynamo = _build_dynamo()
+        dynamo.unprocessed_rounds = 1
+        with mock.patch.object(dynamodb_models, "dynamodb", dynamo), \
+             mock.patch.object(dynamodb_models.time, "sleep") as sleep:
+            with dynamodb_models.athlete_state_snapshot("ath_1"):
+                profile = dynamodb_models.get_coach_profile("ath_1")
+
+        self.assertEqual(profile["primary_goal"], "10k")
+        self.assertEqual(len(dynamo.batch_requests), 2)
+        sleep.assert_called_once()
+        self.assertLessEqual(sleep.call_args.args[0], dynamodb_models._SNAPSHOT_BACKOFF_BASE_SECONDS)
+
+    def test_persistently_unprocessed_keys_fall_back_to_get_item(self):
+        dynamo = _build_dynamo()
+        dynamo.unprocessed_rounds = 100
+        with mock.patch.object(dynamodb_models, "dynamodb", dynamo), \
+             mock.patch.object(dynamodb_models.time, "sleep") as sleep:
+            with dynamodb_models.athlete_state_snapshot("ath_1"):
+                profile = dynamodb_models.get_coach_profile("ath_1")
+                progress = dynamodb_models.get_progress_snapshot("ath_1")
+
+        self.assertEqual(len(dynamo.batch_requests), dynamodb_models._SNAPSHOT_BATCH_MAX_ATTEMPTS)
+        self.assertEqual(sleep.call_count, dynamodb_models._SNAPSHOT_BATCH_MAX_ATTEMPTS - 1)
+        for delay in (call.args[0] for call in sleep.call_args_list):
+            self.assertLessEqual(delay, dynamodb_models._SNAPSHOT_BACKOFF_MAX_SECONDS)
+        self.assertEqual(profile["primary_goal"], "10k")
+        self.assertEqual(progress["last_7d_activity_count"], 3)
+        self.assertEqual(dynamo.tables[dynamodb_models.COACH_PROFILES_TABLE].get_calls, 1)
+        self.assertEqual(dynamo.tables[dynamodb_models.PROGRESS_SNAPSHOTS_TABLE].get_calls, 1)
+
+    def test_write_invalidates_only_affected_table(self):
+        dynamo = _build_dynamo()
+        with mock.patch.object(dynamodb_models, "dynamodb", dynamo):
+            with dynamodb_models.athlete_state_snapshot("ath_1"):
+                dynamodb_models.get_coach_profile("ath_1")
+                self.assertTrue(
+                    dynamodb_models.merge_coach_profile_fields("ath_1", {"primary_goal": "marathon"})
+                )
+                dynamodb_models.get_coach_profile("ath_1")
+                dynamodb_models.get_progress_snapshot("ath_1")
+
+        self.assertEqual(len(dynamo.batch_requests), 2)
+        self.assertEqual(
+            list(dynamo.batch_requests[1].keys()),
+            [dynamodb_models.COACH_PROFILES_TABLE],
+        )
+
+    def test_cached_items_are_isolated_from_caller_mutation(self):
+        dynamo = _build_dynamo()
+        with mock.patch.object(dynamodb_models, "dynamodb", dynamo):
+            with dynamodb_models.athlete_state_snapshot("ath_1"):
+                raw = dynamodb_models._get_raw_coach_profile("ath_1")
+                raw["primary_goal"] = "mutated"
+                again = dynamodb_models._get_raw_coach_profile("ath_1")
+
+        self.assertEqual(again["primary_goal"], "10k")
+
+    def test_reads_outside_scope_or_for_other_athlete_hit_table(self):
+        dynamo = _build_dynamo()
+        profiles = dynamo.tables[dynamodb_models.COACH_PROFILES_TABLE]
+        with mock.patch.object(dynamodb_models, "dynamodb", dynamo):
+            dynamodb_models.get_coach_profile("ath_1")
+            with dynamodb_models.athlete_state_snapshot("ath_2"):
+                dynamodb_models.get_coach_profile("ath_1")
+
+        self.assertEqual(profiles.get_calls, 2)
+        self.assertEqual(dynamo.batch_requests, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
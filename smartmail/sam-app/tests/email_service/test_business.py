@@ -464,5 +464,127 @@ class TestGetReplyForInbound(unittest.TestCase):
         self.assertEqual(brief["plan_data"], {"plan_summary": "Current plan - Goal: 10k."})
 
 
+@unittest.skipIf(business is None, "boto3/botocore not installed; skip business tests")
+class TestParallelInboundStages(unittest.TestCase):
+    def _patches(self, stack, *, analyze_side_effect=None):
+        stack.enter_context(mock.patch.object(business, "ENABLE_PARALLEL_INBOUND_STAGES", True))
+        analyze = stack.enter_context(
+            mock.patch.object(
+                business,
+                "analyze_conversation_intelligence",
+                return_value={"intent": "question", "complexity_score": 2, "model_name": "gpt-5-mini"},
+                side_effect=analyze_side_effect,
+            )
+        )
+        checkin = stack.enter_context(
+            mock.patch.object(
+                business,
+                "run_session_checkin_extraction_workflow",
+                return_value={"has_new_session_data": False},
+            )
+        )
+        prefetch = stack.enter_context(
+            mock.patch.object(
+                business,
+                "prefetch_profile_updates",
+                return_value={"missing_fields": None, "updates": {}},
+            )
+        )
+        self.intake_pending = stack.enter_context(
+            mock.patch.object(business, "profile_intake_pending", return_value=True)
+        )
+        stack.enter_context(mock.patch.object(business, "put_message_intelligence", return_value=True))
+        route = stack.enter_context(
+            mock.patch.object(
+                business,
+                "route_inbound_with_rule_engine",
+                return_value={"intent": "question", "mode": "read_only"},
+            )
+        )
+        build = stack.enter_context(
+            mock.patch.object(business, "build_profile_gated_reply", return_value="Ok")
+        )
+        return analyze, checkin, prefetch, route, build
+
+    def test_runs_body_only_stages_once_and_threads_results(self):
+        body = "Ran 8k easy today"
+        with ExitStack() as stack:
+            analyze, checkin, prefetch, route, build = self._patches(stack)
+            reply = business.get_reply_for_inbound("ath_1", "u@example.com", {"body": body})
+
+        self.assertEqual(reply, "Ok")
+        analyze.assert_called_once_with(body)
+        checkin.assert_called_once_with(body)
+        prefetch.assert_called_once_with("ath_1", body)
+        extraction_fn = route.call_args.kwargs["run_checkin_extraction_fn"]
+        self.assertEqual(extraction_fn(body), {"has_new_session_data": False})
+        self.assertEqual(checkin.call_count, 1)
+        self.assertEqual(
+            build.call_args.kwargs["prefetched_profile_updates"],
+            {"missing_fields": None, "updates": {}},
+        )
+
+    def test_intelligence_stage_failure_returns_none(self):
+        with ExitStack() as stack:
+            _, _, _, route, build = self._patches(
+                stack,
+                analyze_side_effect=business.ConversationIntelligenceError("boom"),
+            )
+            reply = business.get_reply_for_inbound("ath_1", "u@example.com", {"body": "Hello"})
+
+        self.assertIsNone(reply)
+        route.assert_not_called()
+        build.assert_not_called()
+
+    def test_failed_checkin_stage_surfaces_as_proposal_error(self):
+        with ExitStack() as stack:
+            _, checkin, _, route, _ = self._patches(stack)
+            checkin.side_effect = RuntimeError("upstream down")
+            business.get_reply_for_inbound("ath_1", "u@example.com", {"body": "Swam 40 minutes"})
+
+        extraction_fn = route.call_args.kwargs["run_checkin_extraction_fn"]
+        with self.assertRaises(business.SessionCheckinExtractionProposalError):
+            extraction_fn("Swam 40 minutes")
+
+    def test_body_without_training_details_is_not_extracted_speculatively(self):
+        with ExitStack() as stack:
+            analyze, checkin, prefetch, route, _ = self._patches(stack)
+            business.get_reply_for_inbound("ath_1", "u@example.com", {"body": "Any good podcasts?"})
+
+        analyze.assert_called_once()
+        prefetch.assert_called_once()
+        checkin.assert_not_called()
+        self.assertNotIn("run_checkin_extraction_fn", route.call_args.kwargs)
+
+    def test_complete_profile_is_not_extracted_speculatively(self):
+        with ExitStack() as stack:
+            analyze, _, prefetch, _, build = self._patches(stack)
+            self.intake_pending.return_value = False
+            reply = business.get_reply_for_inbound("ath_1", "u@example.com", {"body": "Any good podcasts?"})
+
+        self.assertEqual(reply, "Ok")
+        analyze.assert_called_once()
+        self.intake_pending.assert_called_once_with("ath_1")
+        prefetch.assert_not_called()
+        self.assertNotIn("prefetched_profile_updates", build.call_args.kwargs)
+
+
+
+@unittest.skipIf(business is None, "boto3/botocore not installed; skip business tests")
+class TestRouteModelBudgetDowngrade(unittest.TestCase):
+    def test_advanced_route_falls_back_when_budget_is_spent(self):
+        with mock.patch.object(business, "spend_budget_exceeded", return_value="athlete") as exceeded:
+            route = business._route_model_by_complexity(5, athlete_id="ath_1")
+        exceeded.assert_called_once_with("ath_1")
+        self.assertEqual(route["routing_decision"], "budget_downgrade_athlete")
+        self.assertEqual(route["selected_model"], business.LIGHTWEIGHT_RESPONSE_MODEL)
+
+    def test_lightweight_route_skips_the_budget_lookup(self):
+        with mock.patch.object(business, "spend_budget_exceeded") as exceeded:
+            route = business._route_model_by_complexity(1, athlete_id="ath_1")
+        exceeded.assert_not_called()
+        self.assertEqual(route["routing_decision"], "lightweight")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,231 @@
+"""Tests for the write-coalescing coach_profiles unit of work."""
+
+import types
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+from botocore.exceptions import ClientError
+
+import app
+import dynamodb_models
+from sectioned_memory_contract import empty_sectioned_memory
+
+_CONTINUITY_STATE = {
+    "goal_horizon_type": "event",
+    "current_phase": "base",
+    "current_block_focus": "controlled_load_progression",
+    "block_started_at": "2026-03-01",
+    "goal_event_date": "2026-06-15",
+    "last_transition_reason": "bootstrap_initial_state",
+    "last_transition_date": "2026-03-01",
+}
+_CONTINUITY_SUMMARY = {"summary": "s", "last_recommendation": "r", "open_loops": [], "updated_at": 1}
+_PLAN = {
+    "primary_goal": "Marathon",
+    "plan_version": 1,
+    "current_phase": "base",
+    "current_focus": "consistency",
+    "next_recommended_session": {"date": "2026-03-10", "type": "easy", "target": "40 minutes"},
+    "plan_status": "active",
+    "updated_at": 1735732800,
+}
+
+
+class _ProfilesTable:
+    def __init__(self, item=None, conflicts=0):
+        self.item = item
+        self.conflicts = conflicts
+        # Attributes another writer sets just before each injected conflict.
+        self.concurrent_write = {}
+        self.update_calls = []
+
+    def get_item(self, **kwargs):
+        return {"Item": dict(self.item)} if self.item is not None else {}
+
+    def update_item(self, **kwargs):
+        self.update_calls.append(kwargs)
+        if self.conflicts:
+            self.conflicts -= 1
+            self.item.update(self.concurrent_write)
+            self.item["state_version"] = self.item.get("state_version", 0) + 1
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        names = kwargs.get("ExpressionAttributeNames", {})
+        values = kwargs.get("ExpressionAttributeValues", {})
+        for placeholder, attribute in names.items():
+            if placeholder.startswith("#u") and ":u" + placeholder[2:] in values:
+                self.item[attribute] = values[":u" + placeholder[2:]]
+        return {}
+
+    def put_item(self, **kwargs):
+        return {}
+
+
+def _dynamo(profile_table, transacts):
+    return types.SimpleNamespace(
+        Table=lambda name: profile_table if name == dynamodb_models.COACH_PROFILES_TABLE else _ProfilesTable(),
+        meta=types.SimpleNamespace(
+            client=types.SimpleNamespace(transact_write_items=lambda **kwargs: transacts.append(kwargs))
+        ),
+    )
+
+
+class TestCoachProfileUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        self.table = _ProfilesTable({"athlete_id": "ath_1", "state_version": 4, "memory_version": 2})
+        self.transacts = []
+        patcher = mock.patch.object(dynamodb_models, "dynamodb", _dynamo(self.table, self.transacts))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_direct_writes_bump_state_version(self):
+        self.assertTrue(dynamodb_models.merge_coach_profile_fields("ath_1", {"primary_goal": "10k"}))
+        self.assertTrue(dynamodb_models.update_continuity_state("ath_1", _CONTINUITY_STATE))
+        self.assertEqual(len(self.table.update_calls), 2)
+        for call in self.table.update_calls:
+            self.assertIn("#state_version = if_not_exists(#state_version", call["UpdateExpression"])
+            self.assertNotIn("ConditionExpression", call)
+
+    def test_turn_writes_flush_as_one_conditional_update(self):
+        with dynamodb_models.coach_profile_unit_of_work("ath_1") as unit:
+            self.assertTrue(dynamodb_models.merge_coach_profile_fields("ath_1", {"primary_goal": "10k"}))
+            self.assertTrue(dynamodb_models.update_continuity_state("ath_1", _CONTINUITY_STATE))
+            self.assertTrue(
+                dynamodb_models.replace_memory("ath_1", empty_sectioned_memory(), _CONTINUITY_SUMMARY)
+            )
+            self.assertEqual(self.table.update_calls, [])
+            self.assertEqual(unit.writes_buffered, 3)
+
+        self.assertEqual(len(self.table.update_calls), 1)
+        call = self.table.update_calls[0]
+        self.assertEqual(call["ConditionExpression"], "#state_version = :expected_state_version")
+        self.assertEqual(call["ExpressionAttributeValues"][":expected_state_version"], 4)
+        written = set(call["ExpressionAttributeNames"].values())
+        self.assertTrue(
+            {"primary_goal", "continuity_state", "memory_notes", "continuity_summary", "memory_version"} <= written
+        )
+        self.assertEqual(unit.round_trips, 1)
+        self.assertFalse(unit.pending)
+
+    def test_reads_inside_unit_see_buffered_writes(self):
+        with dynamodb_models.coach_profile_unit_of_work("ath_1"):
+            dynamodb_models.merge_coach_profile_fields("ath_1", {"primary_goal": "10k"})
+            dynamodb_models.replace_memory("ath_1", empty_sectioned_memory(), _CONTINUITY_SUMMARY)
+            self.assertEqual(dynamodb_models.get_coach_profile("ath_1")["primary_goal"], "10k")
+            self.assertEqual(dynamodb_models.get_memory_version("ath_1"), 3)
+
+    def test_conflict_rebases_onto_the_concurrent_write(self):
+        self.table.conflicts = 1
+        self.table.concurrent_write = {"time_available": "5 hours", "updated_at": 99}
+        with dynamodb_models.coach_profile_unit_of_work("ath_1") as unit:
+            dynamodb_models.merge_coach_profile_fields("ath_1", {"primary_goal": "10k"})
+        self.assertEqual(len(self.table.update_calls), 2)
+        self.assertEqual(self.table.update_calls[1]["ExpressionAttributeValues"][":expected_state_version"], 5)
+        self.assertEqual(self.table.item["time_available"], "5 hours")
+        self.assertEqual(self.table.item["primary_goal"], "10k")
+        self.assertFalse(unit.pending)
+
+    def test_conflict_on_a_buffered_attribute_keeps_the_concurrent_write_and_raises(self):
+        self.table.conflicts = 1
+        self.table.concurrent_write = {"primary_goal": "marathon"}
+        with self.assertRaises(dynamodb_models.CoachProfileFlushError):
+            with dynamodb_models.coach_profile_unit_of_work("ath_1") as unit:
+                dynamodb_models.merge_coach_profile_fields("ath_1", {"primary_goal": "10k"})
+        self.assertEqual(len(self.table.update_calls), 1)
+        self.assertEqual(self.table.item["primary_goal"], "marathon")
+        self.assertTrue(unit.conflicted)
+
+    def test_write_after_fold_keeps_only_its_own_increments(self):
+        unit = dynamodb_models.CoachProfileUnitOfWork("ath_1")
+        unit.stage({"memory_notes": ["a"]}, {"memory_version": 1})
+        _, increments, expected = unit.fold({})
+        self.assertEqual(increments, {"memory_version": 1})
+        unit.stage({"memory_notes": ["b"]}, {"memory_version": 1})
+        unit.mark_written(expected + 1)
+        self.assertEqual(unit._increments, {"memory_version": 1})
+        self.assertEqual(unit._sets, {"memory_notes": ["b"]})
+        self.assertTrue(unit.pending)
+
+    def test_failed_flush_raises(self):
+        self.table.update_item = mock.Mock(
+            side_effect=ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "UpdateItem")
+        )
+        with self.assertRaises(dynamodb_models.CoachProfileFlushError):
+            with dynamodb_models.coach_profile_unit_of_work("ath_1"):
+                dynamodb_models.merge_coach_profile_fields("ath_1", {"primary_goal": "10k"})
+
+    def test_versioned_memory_write_bypasses_buffer(self):
+        with dynamodb_models.coach_profile_unit_of_work("ath_1") as unit:
+            dynamodb_models.replace_memory(
+                "ath_1", empty_sectioned_memory(), _CONTINUITY_SUMMARY, expected_version=2
+            )
+            self.assertEqual(len(self.table.update_calls), 1)
+            self.assertFalse(unit.pending)
+
+    def test_plan_update_folds_buffer_into_transaction(self):
+        with mock.patch.object(dynamodb_models, "get_current_plan", return_value=dict(_PLAN)):
+            with dynamodb_models.coach_profile_unit_of_work("ath_1") as unit:
+                dynamodb_models.update_continuity_state("ath_1", _CONTINUITY_STATE)
+                result = dynamodb_models.update_current_plan(
+                    "ath_1", {"current_phase": "build"}, logical_request_id="req-1"
+                )
+        self.assertEqual(result["status"], "applied")
+        self.assertEqual(self.table.update_calls, [])
+        self.assertEqual(len(self.transacts), 1)
+        profile_update = self.transacts[0]["TransactItems"][1]["Update"]
+        self.assertIn("continuity_state", profile_update["ExpressionAttributeNames"].values())
+        self.assertIn("#current_plan.#plan_version = :expected_version AND", profile_update["ConditionExpression"])
+        self.assertIn("#state_version = :expected_state_version", profile_update["ConditionExpression"])
+        self.assertEqual(unit.round_trips, 1)
+
+
+class TestHandlersRetryFailedFlush(unittest.TestCase):
+    def setUp(self):
+        self.email_data = {
+            "sender": "verified@example.com",
+            "subject": "Hello",
+            "body": "Hi coach",
+            "message_id": "msg-1",
+            "to_recipients": ["hello@geniml.com"],
+            "cc_recipients": [],
+        }
+        flush_error = dynamodb_models.CoachProfileFlushError("not written")
+        patches = [
+            mock.patch.object(app, "ENABLE_INBOUND_IDEMPOTENCY_LEDGER", True),
+            mock.patch.object(app, "claim_inbound_message", return_value={"claimed": True, "record": None}),
+            mock.patch.object(app, "is_registered", return_value=True),
+            mock.patch.object(app, "is_verified", return_value=True),
+            mock.patch.object(app, "check_verified_quota_or_block", return_value=None),
+            mock.patch.object(app, "ensure_athlete_id_for_email", return_value="ath_1"),
+            mock.patch.object(app, "ensure_progress_snapshot_exists", return_value=True),
+            mock.patch.object(app, "get_reply_for_inbound", side_effect=flush_error),
+        ]
+        for patcher in patches:
+            self._start(patcher)
+        self.release = self._start(mock.patch.object(app, "release_inbound_message", return_value=True))
+        self.send = self._start(mock.patch.object(app.EmailReplySender, "send_reply"))
+
+    def _start(self, patcher):
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_sns_handler_raises_so_the_message_is_redelivered(self):
+        with mock.patch.object(app.EmailProcessor, "parse_sns_event", return_value=dict(self.email_data)):
+            with self.assertRaises(dynamodb_models.CoachProfileFlushError):
+                app.lambda_handler(event={}, context=None)
+        self.release.assert_called_once_with("verified@example.com", "msg-1")
+        self.send.assert_not_called()
+
+    def test_sqs_handler_reports_a_batch_item_failure(self):
+        event = {"Records": [{"messageId": "r1", "body": "{}"}]}
+        with mock.patch.object(app.EmailProcessor, "parse_sqs_record", return_value=dict(self.email_data)):
+            response = app.sqs_batch_handler(event, None)
+        self.assertEqual(response, {"batchItemFailures": [{"itemIdentifier": "r1"}]})
+        self.release.assert_called_once_with("verified@example.com", "msg-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
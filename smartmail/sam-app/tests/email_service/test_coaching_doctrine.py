@@ -17,8 +17,10 @@ from skills.coaching_reasoning.doctrine import (
     build_doctrine_context_for_brief,
     derive_situation_tags,
     derive_turn_purpose,
+    get_doctrine_index,
     get_doctrine_metadata,
     list_loaded_files,
+    select_doctrine,
     select_doctrine_files,
 )
 from skills.coaching_reasoning.doctrine.manifest import (
@@ -1024,5 +1026,37 @@ class TestCriticalConceptsPresent(unittest.TestCase):
                 )
 
 
+class TestDoctrineSelectionSharing(unittest.TestCase):
+
+    def test_equal_briefs_share_one_selection(self):
+        brief = _base_brief()
+        first = select_doctrine(brief)
+        second = select_doctrine(dict(brief))
+        self.assertIs(first, second)
+
+    def test_selection_feeds_every_public_accessor(self):
+        brief = _base_brief()
+        selection = select_doctrine(brief)
+        self.assertEqual(list(selection.loaded_files), select_doctrine_files(brief))
+        self.assertEqual(list(selection.loaded_files), list_loaded_files(brief))
+        self.assertEqual(selection.to_trace(), build_doctrine_selection_trace(brief))
+        self.assertEqual(selection.build_context(), build_doctrine_context_for_brief(brief))
+
+    def test_trace_is_a_fresh_copy(self):
+        brief = _base_brief()
+        trace = build_doctrine_selection_trace(brief)
+        trace["loaded_files"].append("mutated.md")
+        self.assertNotIn("mutated.md", build_doctrine_selection_trace(brief)["loaded_files"])
+
+    def test_index_follows_manifest_order_and_is_read_only(self):
+        index = get_doctrine_index()
+        self.assertEqual(index.ordered_paths[: len(CORE_UNIVERSAL_FILES)], tuple(CORE_UNIVERSAL_FILES))
+        self.assertEqual(set(index.ordered_paths), set(all_registered_doctrine_paths()))
+        for path in CORE_UNIVERSAL_FILES + LEGACY_UNIVERSAL_FILES:
+            self.assertNotIn(path, index.optional_paths)
+        with self.assertRaises(TypeError):
+            index.files["universal/core.md"].meta["priority"] = 1
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -211,6 +211,33 @@ class TestMaybePostReplyMemoryRefresh(unittest.TestCase):
         self.assertEqual(call_kwargs["current_memory"], mem)
         self.assertEqual(call_kwargs["current_continuity"], continuity)
 
+    @patch("coaching_memory.run_sectioned_memory_refresh")
+    def test_defer_fn_takes_over_refresh(self, mock_run_refresh):
+        defer_fn = MagicMock(return_value=True)
+        kwargs = self._make_kwargs(defer_fn=defer_fn)
+        maybe_post_reply_memory_refresh(**kwargs)
+
+        defer_fn.assert_called_once()
+        self.assertEqual(defer_fn.call_args[0][0], "ath_123")
+        self.assertEqual(defer_fn.call_args[0][1]["coach_reply"], "Great work!")
+        mock_run_refresh.assert_not_called()
+        self.assertEqual(kwargs["log"].call_args[1]["result"], "memory_refresh_deferred")
+
+    @patch("coaching_memory.apply_sectioned_refresh")
+    @patch("coaching_memory.run_sectioned_memory_refresh")
+    def test_refreshes_inline_when_enqueue_fails(self, mock_run_refresh, mock_apply_reducer):
+        mock_run_refresh.return_value = {"candidates": [], "continuity": {}}
+        mock_apply_reducer.return_value = {
+            "sectioned_memory": empty_sectioned_memory(),
+            "continuity_summary": {"summary": "s", "last_recommendation": "r", "open_loops": []},
+        }
+        kwargs = self._make_kwargs(defer_fn=MagicMock(return_value=False))
+        maybe_post_reply_memory_refresh(**kwargs)
+
+        mock_run_refresh.assert_called_once()
+        kwargs["replace_memory_fn"].assert_called_once()
+
+
 
 if __name__ == "__main__":
     unittest.main()
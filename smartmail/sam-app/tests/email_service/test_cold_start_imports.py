@@ -0,0 +1,49 @@
+"""Cold-start import layering: the handler must not load the LLM stack at import."""
+
+import os
+import unittest
+
+import import_profile
+
+_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+_PRELUDE = "import _test_support; _test_support.install_boto_stubs()"
+
+_SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2500 | app
+import time:       380 |        380 |     config
+"""
+
+
+class TestParseImportTime(unittest.TestCase):
+    def test_parses_rows_and_depth(self):
+        timings = import_profile.parse_importtime(_SAMPLE)
+        self.assertEqual(import_profile.loaded_modules(timings), ["_io", "app", "config"])
+        self.assertEqual(timings[1].self_us, 2000)
+        self.assertEqual(timings[1].cumulative_us, 2500)
+        self.assertEqual(timings[2].depth, 2)
+
+    def test_report_flags_llm_stack(self):
+        timings = import_profile.parse_importtime(_SAMPLE + "import time:  9000 |  9000 | openai\n")
+        report = import_profile.format_import_report(timings, top=2)
+        self.assertIn("llm_stack_loaded=openai", report)
+        self.assertIn("openai", report.splitlines()[3])
+
+
+class TestHandlerColdStart(unittest.TestCase):
+    def test_app_import_skips_llm_stack(self):
+        timings = import_profile.profile_module_imports(
+            "app", prelude=_PRELUDE, extra_paths=[_TESTS_DIR]
+        )
+        modules = set(import_profile.loaded_modules(timings))
+        self.assertIn("auth", modules)
+        self.assertIn("rate_limits", modules)
+        self.assertIn("dynamodb_models", modules)
+        loaded_llm = sorted(modules.intersection(import_profile.LLM_STACK_MODULES))
+        self.assertEqual(
+            loaded_llm, [], import_profile.format_import_report(timings)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,6 +47,11 @@ if "boto3" not in sys.modules:
         def serialize(self, value):
             return {"S": str(value)}
 
+    class TypeDeserializer:
+        def deserialize(self, value):
+            ((type_code, raw),) = value.items()
+            return int(raw) if type_code == "N" else raw
+
     class _Boto3StubTable:
         def update_item(self, *args, **kwargs):
             return {}
@@ -79,6 +84,7 @@ if "boto3" not in sys.modules:
     boto3_module.client = lambda *args, **kwargs: _Boto3ClientStub()
     dynamodb_conditions_module.Key = Key
     dynamodb_types_module.TypeSerializer = TypeSerializer
+    dynamodb_types_module.TypeDeserializer = TypeDeserializer
     dynamodb_module.conditions = dynamodb_conditions_module
     dynamodb_module.types = dynamodb_types_module
 
@@ -0,0 +1,71 @@
+"""Tests for the precompiled doctrine phrase matcher."""
+
+import random
+import unittest
+
+import skills.coaching_reasoning.doctrine as doctrine
+from skills.coaching_reasoning.doctrine.matcher import PhraseMatcher
+
+_GROUPS = {
+    "setback": ("flare", "flare-up", "pain", "sore"),
+    "planning": ("next week", "week look like"),
+    "prescription": ("next week", "easy day", "easy days", " volume"),
+    "steady": ("steady",),
+}
+
+
+def _naive(text, groups):
+    return {name for name, phrases in groups.items() if any(phrase in text for phrase in phrases)}
+
+
+class TestPhraseMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = PhraseMatcher(_GROUPS)
+
+    def test_prefix_and_overlapping_phrases_are_all_reported(self):
+        hits = self.matcher.scan("a flare-up on easy days; what does next week look like")
+        self.assertEqual(
+            hits.phrases,
+            {"flare", "flare-up", "easy day", "easy days", "next week", "week look like"},
+        )
+        self.assertEqual(hits.count("prescription"), 3)
+        self.assertTrue(hits.any("planning"))
+        self.assertFalse(hits.any("steady"))
+
+    def test_substring_semantics_match_naive_scan(self):
+        rng = random.Random(11)
+        pieces = ["flare", "-up", "pain", "ting", "easy", " day", "s", "next", " week", " look like", " volume", " "]
+        for _ in range(300):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(set(self.matcher.scan(text).group_counts), _naive(text, _GROUPS), text)
+
+    def test_scan_joined_matches_scan_of_joined_text(self):
+        parts = ["easy", "days feel sore", "", "next", "week"]
+        self.assertEqual(
+            self.matcher.scan_joined(parts).phrases,
+            self.matcher.scan(" ".join(parts)).phrases,
+        )
+
+
+class TestDoctrineSignalHits(unittest.TestCase):
+    def test_signal_hits_match_phrase_tuples_on_blob(self):
+        brief = {
+            "reply_mode": "normal_coaching",
+            "athlete_context": {"constraints_summary": "Travel for a conference"},
+            "delivery_context": {"inbound_body": "Knee niggle after the tempo. What should next week look like?"},
+            "decision_context": {"risk_flag": "yellow", "risk_recent_history": ["green", "yellow"]},
+        }
+        blob = doctrine._signal_blob(brief)
+        hits = doctrine._signal_hits(brief)
+        for group, phrases in (
+            ("setback", doctrine._SETBACK_PHRASES),
+            ("travel", doctrine._TRAVEL_PHRASES),
+            ("intensity", doctrine._INTENSITY_PHRASES),
+            ("planning", doctrine._PLANNING_PHRASES),
+            ("illness", doctrine._ILLNESS_PHRASES),
+        ):
+            self.assertEqual(hits.any(group), any(phrase in blob for phrase in phrases), group)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -60,6 +60,24 @@ class TestParseSnsEvent(unittest.TestCase):
         self.assertIsNone(EmailProcessor.parse_sns_event({"Records": []}))
 
 
+class TestParseSqsRecord(unittest.TestCase):
+    def test_parses_sns_envelope_delivered_through_sqs(self):
+        sns_record = _sns_event_from_email_data(sender="user@example.com", subject="Via SNS")["Records"][0]
+        envelope = {"Type": "Notification", "Message": sns_record["Sns"]["Message"]}
+        result = EmailProcessor.parse_sqs_record({"messageId": "m-1", "body": json.dumps(envelope)})
+        self.assertEqual(result["sender"], "user@example.com")
+        self.assertEqual(result["subject"], "Via SNS")
+
+    def test_parses_raw_ses_notification_body(self):
+        sns_record = _sns_event_from_email_data(subject="Raw delivery")["Records"][0]
+        result = EmailProcessor.parse_sqs_record({"messageId": "m-2", "body": sns_record["Sns"]["Message"]})
+        self.assertEqual(result["subject"], "Raw delivery")
+
+    def test_returns_none_on_unparseable_body(self):
+        self.assertIsNone(EmailProcessor.parse_sqs_record({"messageId": "m-3", "body": "not json"}))
+        self.assertIsNone(EmailProcessor.parse_sqs_record({"messageId": "m-4"}))
+
+
 class TestDecodeAndExtract(unittest.TestCase):
     def test_extract_text_from_plain_text_body(self):
         raw = "Plain text body here"
@@ -32,6 +32,7 @@ if "openai" not in sys.modules:
     sys.modules["openai"] = openai_module
 
 import email_reply_sender
+import outbound_mail
 from email_copy import EmailCopy
 from email_reply_sender import EmailReplySender
 
@@ -82,7 +83,8 @@ class EmailReplySenderTests(unittest.TestCase):
         self.assertIn("Body", html)
 
     def test_send_reply_new_thread_omits_thread_headers(self):
-        with mock.patch.object(email_reply_sender, "ses_client") as ses_client_mock:
+        ses_client_mock = mock.Mock()
+        with mock.patch.object(outbound_mail, "get_ses_client", return_value=ses_client_mock):
             ses_client_mock.send_raw_email.return_value = {"MessageId": "m-1"}
             message_id = EmailReplySender.send_reply(self.email_data, "Hello")
 
@@ -93,7 +95,8 @@ class EmailReplySenderTests(unittest.TestCase):
 
     def test_send_reply_existing_thread_sets_thread_headers(self):
         existing_thread_email = dict(self.email_data, in_reply_to="<prior@example.com>")
-        with mock.patch.object(email_reply_sender, "ses_client") as ses_client_mock:
+        ses_client_mock = mock.Mock()
+        with mock.patch.object(outbound_mail, "get_ses_client", return_value=ses_client_mock):
             ses_client_mock.send_raw_email.return_value = {"MessageId": "m-2"}
             message_id = EmailReplySender.send_reply(existing_thread_email, "Hello again")
 
@@ -104,7 +107,8 @@ class EmailReplySenderTests(unittest.TestCase):
 
     def test_send_reply_can_force_skip_thread_context(self):
         existing_thread_email = dict(self.email_data, in_reply_to="<prior@example.com>")
-        with mock.patch.object(email_reply_sender, "ses_client") as ses_client_mock:
+        ses_client_mock = mock.Mock()
+        with mock.patch.object(outbound_mail, "get_ses_client", return_value=ses_client_mock):
             ses_client_mock.send_raw_email.return_value = {"MessageId": "m-3"}
             message_id = EmailReplySender.send_reply(
                 existing_thread_email,
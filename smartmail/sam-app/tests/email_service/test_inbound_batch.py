@@ -0,0 +1,130 @@
+"""Tests for the keyed SQS batch runner and the SQS batch handler."""
+
+import json
+import threading
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+import app
+from inbound_batch import BatchItem, run_keyed_batch
+
+
+class TestRunKeyedBatch(unittest.TestCase):
+    def test_same_key_runs_in_arrival_order(self):
+        seen = []
+        lock = threading.Lock()
+
+        def _process(payload):
+            with lock:
+                seen.append(payload)
+            return True
+
+        items = [
+            BatchItem("1", "a@example.com", "a1"),
+            BatchItem("2", "b@example.com", "b1"),
+            BatchItem("3", "a@example.com", "a2"),
+            BatchItem("4", "a@example.com", "a3"),
+        ]
+        failed = run_keyed_batch(items, _process, max_workers=4)
+
+        self.assertEqual(failed, [])
+        self.assertEqual([p for p in seen if p.startswith("a")], ["a1", "a2", "a3"])
+
+    def test_distinct_keys_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        def _process(_payload):
+            barrier.wait()
+            return True
+
+        items = [BatchItem("1", "a", "x"), BatchItem("2", "b", "y")]
+        self.assertEqual(run_keyed_batch(items, _process, max_workers=2), [])
+
+    def test_failure_fails_remaining_items_for_that_key_only(self):
+        calls = []
+
+        def _process(payload):
+            calls.append(payload)
+            if payload == "a2":
+                raise RuntimeError("boom")
+            return payload != "b1"
+
+        items = [
+            BatchItem("1", "a", "a1"),
+            BatchItem("2", "a", "a2"),
+            BatchItem("3", "b", "b1"),
+            BatchItem("4", "a", "a3"),
+            BatchItem("5", "c", "c1"),
+        ]
+        failed = run_keyed_batch(items, _process, max_workers=1)
+
+        self.assertEqual(failed, ["2", "3", "4"])
+        self.assertNotIn("a3", calls)
+        self.assertIn("c1", calls)
+
+
+def _sqs_record(message_id, sender, subject="Hi"):
+    notification = {
+        "mail": {
+            "source": sender,
+            "destination": ["hello@geniml.com"],
+            "messageId": f"ses-{message_id}",
+            "commonHeaders": {
+                "subject": subject,
+                "date": "Wed, 1 Jan 2025 12:00:00 +0000",
+                "to": ["hello@geniml.com"],
+            },
+        },
+        "content": "Body",
+    }
+    return {"messageId": message_id, "body": json.dumps({"Message": json.dumps(notification)})}
+
+
+class TestSqsBatchHandler(unittest.TestCase):
+    def test_reports_only_failed_and_blocked_records(self):
+        def _fake_process(email_data, _request_id):
+            if email_data["subject"] == "fail":
+                return {"statusCode": 500, "body": "error"}
+            return {"statusCode": 200, "body": "ok"}
+
+        event = {
+            "Records": [
+                _sqs_record("m1", "A@Example.com", subject="fail"),
+                _sqs_record("m2", "b@example.com"),
+                _sqs_record("m3", "a@example.com"),
+                {"messageId": "m4", "body": "garbage"},
+            ]
+        }
+        with mock.patch.object(app, "_process_inbound_email", side_effect=_fake_process) as process:
+            result = app.sqs_batch_handler(event, None)
+
+        self.assertEqual(
+            result,
+            {"batchItemFailures": [{"itemIdentifier": "m1"}, {"itemIdentifier": "m3"}]},
+        )
+        self.assertEqual(process.call_count, 2)
+
+    def test_client_errors_are_not_retried(self):
+        with mock.patch.object(
+            app, "_process_inbound_email", return_value={"statusCode": 400, "body": "bad"}
+        ):
+            result = app.sqs_batch_handler({"Records": [_sqs_record("m1", "a@example.com")]}, None)
+        self.assertEqual(result, {"batchItemFailures": []})
+
+    def test_unreadable_stored_message_is_retried(self):
+        with mock.patch.object(
+            app.EmailProcessor,
+            "parse_sqs_record",
+            side_effect=app.InboundContentUnavailableError("s3 unavailable"),
+        ), mock.patch.object(app, "_process_inbound_email") as process:
+            result = app.sqs_batch_handler({"Records": [_sqs_record("m1", "a@example.com")]}, None)
+        self.assertEqual(result, {"batchItemFailures": [{"itemIdentifier": "m1"}]})
+        process.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+"""Tests for idempotent inbound processing via the inbound message ledger."""
+
+import copy
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+from botocore.exceptions import ClientError
+
+import app
+import dynamodb_models
+
+
+def _conditional_failure():
+    return ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+
+
+class _LedgerTable:
+    """In-memory stand-in that evaluates the ledger's condition expressions."""
+
+    def __init__(self):
+        self.items = {}
+
+    @staticmethod
+    def _key(key):
+        return (key["email"], key["message_key"])
+
+    def _claim(self, key, values):
+        existing = self.items.get(key)
+        if existing is not None:
+            stale = (
+                existing["status"] == values[":in_progress"]
+                and existing["claimed_at"] < values[":stale_before"]
+            )
+            if not stale:
+                raise _conditional_failure()
+        previous = copy.deepcopy(existing)
+        item = self.items.setdefault(key, {"email": key[0], "message_key": key[1]})
+        item.update(
+            status=values[":in_progress"],
+            claimed_at=values[":now"],
+            expires_at=values[":expires_at"],
+        )
+        return {"Attributes": previous} if previous else {}
+
+    def get_item(self, Key, ConsistentRead=False):  # noqa: N803
+        item = self.items.get(self._key(Key))
+        return {"Item": copy.deepcopy(item)} if item else {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues,  # noqa: N803
+                    ExpressionAttributeNames=None, ConditionExpression=None, ReturnValues=None):
+        if ":stale_before" in ExpressionAttributeValues:
+            return self._claim(self._key(Key), ExpressionAttributeValues)
+        item = self.items.setdefault(self._key(Key), dict(Key))
+        if ConditionExpression and item.get("status") != ExpressionAttributeValues[":in_progress"]:
+            raise _conditional_failure()
+        if ":reply_body" in ExpressionAttributeValues:
+            item["reply_body"] = ExpressionAttributeValues[":reply_body"]
+        if ":status" in ExpressionAttributeValues:
+            item["status"] = ExpressionAttributeValues[":status"]
+        if ":outbound_message_id" in ExpressionAttributeValues:
+            item["outbound_message_id"] = ExpressionAttributeValues[":outbound_message_id"]
+        if ":released" in ExpressionAttributeValues:
+            item["claimed_at"] = ExpressionAttributeValues[":released"]
+        return {}
+
+
+class _Dynamo:
+    def __init__(self, table):
+        self.table = table
+
+    def Table(self, _name):  # noqa: N802
+        return self.table
+
+
+class TestLedgerPrimitives(unittest.TestCase):
+    def setUp(self):
+        self.table = _LedgerTable()
+        patcher = mock.patch.object(dynamodb_models, "dynamodb", _Dynamo(self.table))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _claim(self, now):
+        return dynamodb_models.claim_inbound_message(
+            "A@example.com", "msg-1", stale_after_seconds=100, ttl_seconds=1000, now=now
+        )
+
+    def test_second_claim_is_refused_while_in_progress(self):
+        self.assertEqual(self._claim(1000), {"claimed": True, "record": None})
+        refused = self._claim(1050)
+        self.assertFalse(refused["claimed"])
+        self.assertEqual(refused["record"]["status"], dynamodb_models.INBOUND_LEDGER_IN_PROGRESS)
+
+    def test_stale_claim_is_taken_over_with_previous_record(self):
+        self._claim(1000)
+        dynamodb_models.record_inbound_reply("a@example.com", "msg-1", "stored reply")
+        takeover = self._claim(1200)
+        self.assertTrue(takeover["claimed"])
+        self.assertEqual(takeover["record"]["reply_body"], "stored reply")
+
+    def test_completed_message_is_never_reclaimed(self):
+        self._claim(1000)
+        dynamodb_models.complete_inbound_message(
+            "a@example.com", "msg-1", dynamodb_models.INBOUND_LEDGER_REPLIED, outbound_message_id="out-1"
+        )
+        self.assertFalse(self._claim(10_000)["claimed"])
+
+    def test_released_claim_is_immediately_reclaimable(self):
+        self._claim(1000)
+        self.assertTrue(dynamodb_models.release_inbound_message("a@example.com", "msg-1"))
+        self.assertTrue(self._claim(1001)["claimed"])
+
+    def test_rejects_unknown_terminal_status(self):
+        with self.assertRaises(ValueError):
+            dynamodb_models.complete_inbound_message("a@example.com", "msg-1", "in_progress")
+
+
+class TestLambdaHandlerLedger(unittest.TestCase):
+    def setUp(self):
+        self.table = _LedgerTable()
+        self.email_data = {
+            "sender": "verified@example.com",
+            "subject": "Hello",
+            "body": "Hi coach",
+            "message_id": "msg-1",
+            "to_recipients": ["hello@geniml.com"],
+            "cc_recipients": [],
+        }
+        patches = [
+            mock.patch.object(app, "ENABLE_INBOUND_IDEMPOTENCY_LEDGER", True),
+            mock.patch.object(dynamodb_models, "dynamodb", _Dynamo(self.table)),
+            mock.patch.object(app.EmailProcessor, "parse_sns_event", side_effect=lambda _e: dict(self.email_data)),
+            mock.patch.object(app, "is_registered", return_value=True),
+            mock.patch.object(app, "is_verified", return_value=True),
+            mock.patch.object(app, "check_verified_quota_or_block", return_value=None),
+            mock.patch.object(app, "ensure_athlete_id_for_email", return_value="ath_1"),
+            mock.patch.object(app, "ensure_progress_snapshot_exists", return_value=True),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _ledger_row(self):
+        return self.table.items[("verified@example.com", "msg-1")]
+
+    def test_redelivery_after_reply_skips_pipeline(self):
+        with mock.patch.object(app, "get_reply_for_inbound", return_value="Reply") as get_reply, \
+             mock.patch.object(app.EmailReplySender, "send_reply", return_value="out-1") as send:
+            first = app.lambda_handler(event={}, context=None)
+            second = app.lambda_handler(event={}, context=None)
+
+        self.assertIn("Reply sent!", first["body"])
+        self.assertEqual(second["body"], "Duplicate delivery ignored.")
+        get_reply.assert_called_once()
+        send.assert_called_once()
+        self.assertEqual(self._ledger_row()["status"], dynamodb_models.INBOUND_LEDGER_REPLIED)
+        self.assertEqual(self._ledger_row()["outbound_message_id"], "out-1")
+
+    def test_failed_send_reserves_stored_reply_without_regenerating(self):
+        with mock.patch.object(app, "get_reply_for_inbound", return_value="Reply") as get_reply, \
+             mock.patch.object(app.EmailReplySender, "send_reply", side_effect=[None, "out-2"]) as send:
+            app.lambda_handler(event={}, context=None)
+            retry = app.lambda_handler(event={}, context=None)
+
+        self.assertIn("out-2", retry["body"])
+        get_reply.assert_called_once()
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(send.call_args.args[1], "Reply")
+        self.assertEqual(self._ledger_row()["status"], dynamodb_models.INBOUND_LEDGER_REPLIED)
+
+    def test_stored_reply_survives_repeated_failed_sends(self):
+        with mock.patch.object(app, "get_reply_for_inbound", return_value="Reply") as get_reply, \
+             mock.patch.object(app.EmailReplySender, "send_reply", side_effect=[None, None, "out-3"]) as send:
+            app.lambda_handler(event={}, context=None)
+            app.lambda_handler(event={}, context=None)
+            third = app.lambda_handler(event={}, context=None)
+
+        self.assertIn("out-3", third["body"])
+        get_reply.assert_called_once()
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(send.call_args.args[1], "Reply")
+        self.assertEqual(self._ledger_row()["status"], dynamodb_models.INBOUND_LEDGER_REPLIED)
+
+    def test_suppressed_reply_is_recorded(self):
+        with mock.patch.object(app, "get_reply_for_inbound", return_value=app.SUPPRESSED_REPLY), \
+             mock.patch.object(app.EmailReplySender, "send_reply") as send:
+            app.lambda_handler(event={}, context=None)
+            second = app.lambda_handler(event={}, context=None)
+
+        send.assert_not_called()
+        self.assertEqual(second["body"], "Duplicate delivery ignored.")
+        self.assertEqual(self._ledger_row()["status"], dynamodb_models.INBOUND_LEDGER_SUPPRESSED)
+
+    def test_pipeline_exception_releases_claim(self):
+        with mock.patch.object(app, "get_reply_for_inbound", side_effect=[RuntimeError("boom"), "Reply"]), \
+             mock.patch.object(app.EmailReplySender, "send_reply", return_value="out-3"):
+            failed = app.lambda_handler(event={}, context=None)
+            retried = app.lambda_handler(event={}, context=None)
+
+        self.assertEqual(failed["statusCode"], 500)
+        self.assertIn("out-3", retried["body"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Tests for streaming ingestion of SES messages stored in S3."""
+
+import json
+import unittest
+from email.message import EmailMessage
+from unittest import mock
+
+import email_processor
+import inbound_s3
+from email_processor import EmailProcessor
+
+
+def _chunks(raw, size=512):
+    return [raw[index:index + size] for index in range(0, len(raw), size)]
+
+
+class _CountingChunks:
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+        self.consumed = 0
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.consumed += 1
+            yield chunk
+
+
+def _message_with_attachment(*, text_first=True, attachment_bytes=200_000):
+    message = EmailMessage()
+    message["Subject"] = "Long run log"
+    if text_first:
+        message.set_content("Attached my GPX from Sunday.")
+        message.add_attachment(b"\x00" * attachment_bytes, maintype="application", subtype="gpx+xml", filename="run.gpx")
+    else:
+        message.make_mixed()
+        attachment = EmailMessage()
+        attachment.set_content(b"\x00" * attachment_bytes, maintype="application", subtype="octet-stream", filename="run.fit")
+        message.attach(attachment)
+        text = EmailMessage()
+        text.set_content("FIT file first, then my note.")
+        message.attach(text)
+    return message.as_bytes()
+
+
+class _Body:
+    def __init__(self, raw):
+        self.raw = raw
+        self.closed = False
+
+    def iter_chunks(self, chunk_size):
+        return iter(_chunks(self.raw, chunk_size))
+
+    def close(self):
+        self.closed = True
+
+
+class _S3Client:
+    def __init__(self, raw=None, error=None):
+        self.body = _Body(raw or b"")
+        self.error = error
+
+    def get_object(self, **kwargs):
+        if self.error is not None:
+            raise self.error
+        return {"Body": self.body}
+
+
+class TestReadTextBodyStream(unittest.TestCase):
+    def test_stops_reading_after_the_plain_part(self):
+        chunks = _CountingChunks(_chunks(_message_with_attachment()))
+        self.assertEqual(inbound_s3.read_text_body_stream(chunks).strip(), "Attached my GPX from Sunday.")
+        self.assertLess(chunks.consumed, len(chunks._chunks) // 10)
+
+    def test_attachment_ahead_of_the_text_is_skipped(self):
+        text = inbound_s3.read_text_body_stream(_chunks(_message_with_attachment(text_first=False)))
+        self.assertEqual(text.strip(), "FIT file first, then my note.")
+
+    def test_html_only_message_is_converted_to_text(self):
+        message = EmailMessage()
+        message.set_content(
+            "<html><head><style>p{}</style></head><body><p>Hello&nbsp;<b>coach</b></p>"
+            "<div>Ran 10k<br>felt &amp; looked good</div></body></html>",
+            subtype="html",
+        )
+        text = inbound_s3.read_text_body_stream(_chunks(message.as_bytes(), 64))
+        self.assertEqual(text, "Hello coach\n\nRan 10k\nfelt & looked good")
+
+    def test_declared_charset_is_honoured(self):
+        message = EmailMessage()
+        message.set_content("Café training update", charset="iso-8859-1")
+        self.assertEqual(inbound_s3.read_text_body_stream([message.as_bytes()]).strip(), "Café training update")
+
+    def test_message_without_text_parts(self):
+        message = EmailMessage()
+        message.set_content(b"\x89PNG", maintype="image", subtype="png", filename="x.png")
+        self.assertIsNone(inbound_s3.read_text_body_stream([message.as_bytes()]))
+
+
+class TestReadS3TextBody(unittest.TestCase):
+    def test_streams_and_closes_the_object(self):
+        client = _S3Client(_message_with_attachment())
+        text = inbound_s3.read_s3_text_body("bucket", "inbound/abc", client=client)
+        self.assertEqual(text.strip(), "Attached my GPX from Sunday.")
+        self.assertTrue(client.body.closed)
+
+    def test_read_failure_is_retryable(self):
+        with self.assertRaises(inbound_s3.InboundContentUnavailableError):
+            inbound_s3.read_s3_text_body("bucket", "missing", client=_S3Client(error=RuntimeError("NoSuchKey")))
+
+
+class TestSesS3Notification(unittest.TestCase):
+    def _notification(self):
+        return {
+            "mail": {
+                "source": "runner@example.com",
+                "destination": ["coach@geniml.com"],
+                "messageId": "msg-s3",
+                "commonHeaders": {"subject": "Big log", "date": "Mon, 3 Mar 2025 10:00:00 +0000"},
+            },
+            "receipt": {"action": {"type": "S3", "bucketName": "inbound-mail", "objectKey": "raw/msg-s3"}},
+        }
+
+    def test_location_requires_an_s3_action(self):
+        self.assertEqual(inbound_s3.s3_object_location(self._notification()), ("inbound-mail", "raw/msg-s3"))
+        self.assertIsNone(inbound_s3.s3_object_location({"receipt": {"action": {"type": "SNS"}}}))
+
+    def test_body_comes_from_the_stored_message(self):
+        with mock.patch.object(email_processor, "read_s3_text_body", return_value="Week log attached.\n-- \nSam") as read:
+            email_data = EmailProcessor.parse_ses_notification(json.dumps(self._notification()))
+        read.assert_called_once_with("inbound-mail", "raw/msg-s3")
+        self.assertEqual(email_data["body"], "Week log attached.\n")
+
+    def test_unreadable_stored_message_propagates(self):
+        with mock.patch.object(
+            email_processor, "read_s3_text_body", side_effect=inbound_s3.InboundContentUnavailableError("x")
+        ):
+            with self.assertRaises(inbound_s3.InboundContentUnavailableError):
+                EmailProcessor.parse_ses_notification(self._notification())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+"""Unit tests for the content-addressed LLM response cache."""
+
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import skills.runtime as skill_runtime
+from skills import response_cache
+from skills.response_cache import (
+    LLMResponseCache,
+    MemoryCacheTier,
+    SQLiteCacheTier,
+    build_cache_key,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Response:
+    def __init__(self, content: str):
+        self.output_text = content
+
+
+class _ClientStub:
+    def __init__(self, contents):
+        self.contents = list(contents)
+        self.calls = 0
+        self.responses = self
+
+    def create(self, **_kwargs):
+        self.calls += 1
+        return _Response(self.contents.pop(0) if self.contents else "{}")
+
+
+def _execute(schema_name="profile_extraction_response", user_content="hello", **overrides):
+    kwargs = {
+        "logger": _LOGGER,
+        "model_name": "gpt-test",
+        "system_prompt": "system",
+        "user_content": user_content,
+        "schema_name": schema_name,
+        "schema": {"type": "object"},
+        "disabled_message": "disabled",
+        "warning_log_name": "test",
+        "require_live_llm": False,
+    }
+    kwargs.update(overrides)
+    return skill_runtime.execute_json_schema(**kwargs)
+
+
+class TestCacheTiers(unittest.TestCase):
+    def test_key_changes_with_any_input(self):
+        base = dict(model_name="m", system_prompt="s", user_content="u", schema_name="n", schema={"a": 1})
+        key = build_cache_key(**base)
+        self.assertEqual(key, build_cache_key(**base))
+        for field, value in (("model_name", "m2"), ("user_content", "u2"), ("schema", {"a": 2})):
+            self.assertNotEqual(key, build_cache_key(**{**base, field: value}))
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        tier = MemoryCacheTier(max_entries=2, ttl_seconds=60)
+        tier.put("a", "1")
+        tier.put("b", "2")
+        tier.get("a")
+        tier.put("c", "3")
+        self.assertEqual(tier.get("a"), "1")
+        self.assertIsNone(tier.get("b"))
+
+    def test_memory_tier_expires_entries(self):
+        tier = MemoryCacheTier(max_entries=2, ttl_seconds=10)
+        with mock.patch.object(response_cache.time, "time", return_value=1000.0):
+            tier.put("a", "1")
+        with mock.patch.object(response_cache.time, "time", return_value=1011.0):
+            self.assertIsNone(tier.get("a"))
+
+    def test_sqlite_tier_persists_and_bounds_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            tier = SQLiteCacheTier(path, max_entries=2, ttl_seconds=60)
+            for index, key in enumerate(("a", "b", "c")):
+                with mock.patch.object(response_cache.time, "time", return_value=1000.0 + index):
+                    tier.put(key, key.upper())
+            with mock.patch.object(response_cache.time, "time", return_value=1005.0):
+                reopened = SQLiteCacheTier(path, max_entries=2, ttl_seconds=60)
+                self.assertEqual(len(reopened), 2)
+                self.assertIsNone(reopened.get("a"))
+                self.assertEqual(reopened.get("c"), "C")
+
+    def test_disk_hit_is_promoted_to_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            disk = SQLiteCacheTier(os.path.join(tmp, "c.sqlite3"), max_entries=10, ttl_seconds=60)
+            disk.put("k", "v")
+            cache = LLMResponseCache(memory_tier=MemoryCacheTier(max_entries=10, ttl_seconds=60), disk_tier=disk)
+            self.assertEqual(cache.get("k"), "v")
+            self.assertEqual(cache.memory_tier.get("k"), "v")
+
+
+class TestExecuteJsonSchemaCaching(unittest.TestCase):
+    def setUp(self):
+        self.cache = LLMResponseCache(memory_tier=MemoryCacheTier(max_entries=16, ttl_seconds=60))
+        response_cache.set_response_cache(self.cache)
+        self.addCleanup(response_cache.reset_response_cache)
+        self.client = _ClientStub(['{"n":1}', '{"n":2}', '{"n":3}'])
+        patcher = mock.patch.object(skill_runtime, "require_openai_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_opted_in_skill_is_served_from_cache(self):
+        first, _ = _execute()
+        second, raw = _execute()
+        self.assertEqual(first, second)
+        self.assertEqual(raw, '{"n":1}')
+        self.assertEqual(self.client.calls, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_skill_outside_allowlist_is_not_cached(self):
+        _execute(schema_name="response_generation_final_email")
+        second, _ = _execute(schema_name="response_generation_final_email")
+        self.assertEqual(second, {"n": 2})
+        self.assertEqual(self.client.calls, 2)
+
+    def test_explicit_opt_in_and_opt_out(self):
+        _execute(schema_name="response_generation_final_email", use_cache=True)
+        cached, _ = _execute(schema_name="response_generation_final_email", use_cache=True)
+        self.assertEqual(cached, {"n": 1})
+        fresh, _ = _execute(use_cache=False)
+        self.assertEqual(fresh, {"n": 2})
+
+    def test_invalid_json_is_not_cached(self):
+        self.client.contents = ["not-json", '{"n":9}']
+        with self.assertRaises(skill_runtime.SkillExecutionError):
+            _execute()
+        payload, _ = _execute()
+        self.assertEqual(payload, {"n": 9})
+
+    def test_cache_hit_needs_no_client(self):
+        _execute()
+        with mock.patch.object(
+            skill_runtime, "require_openai_client", side_effect=RuntimeError("live calls disabled")
+        ):
+            payload, _ = _execute()
+        self.assertEqual(payload, {"n": 1})
+
+    def test_payload_failing_validation_is_not_cached(self):
+        class _Rejected(Exception):
+            pass
+
+        def _reject(payload):
+            raise _Rejected("bad payload")
+
+        with self.assertRaises(_Rejected):
+            _execute(validate_payload=_reject)
+        self.assertEqual(len(self.cache.memory_tier), 0)
+        payload, _ = _execute(validate_payload=lambda payload: {"validated": payload["n"]})
+        self.assertEqual(payload, {"validated": 2})
+        self.assertEqual(self.client.calls, 2)
+
+    def test_workflow_caches_only_after_validation(self):
+        class _ProposalError(Exception):
+            pass
+
+        def _run(validate_payload):
+            return skill_runtime.run_validated_json_schema_workflow(
+                logger=_LOGGER,
+                model_name="gpt-test",
+                system_prompt="system",
+                user_content="hello",
+                schema_name="profile_extraction_response",
+                schema={"type": "object"},
+                disabled_message="disabled",
+                warning_log_name="test",
+                validate_payload=validate_payload,
+                workflow_label="demo",
+                proposal_error_factory=_ProposalError,
+                require_live_llm=False,
+            )
+
+        with self.assertRaises(_ProposalError):
+            _run(lambda payload: payload["missing"])
+        self.assertEqual(_run(lambda payload: payload["n"]), 2)
+        self.assertEqual(_run(lambda payload: payload["n"]), 2)
+        self.assertEqual(self.client.calls, 2)
+
+    def test_disabled_cache_is_bypassed(self):
+        response_cache.set_response_cache(None)
+        _execute()
+        _execute()
+        self.assertEqual(self.client.calls, 2)
+
+
+class TestBuildFromEnv(unittest.TestCase):
+    def test_off_by_default(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(response_cache.build_response_cache_from_env())
+
+    def test_skill_list_from_env(self):
+        with mock.patch.dict(
+            os.environ,
+            {"LLM_RESPONSE_CACHE_MODE": "memory", "LLM_RESPONSE_CACHE_SKILLS": "coaching_directive, obedience_evaluation"},
+            clear=True,
+        ):
+            cache = response_cache.build_response_cache_from_env()
+        self.assertTrue(cache.is_cacheable("coaching_directive"))
+        self.assertFalse(cache.is_cacheable("profile_extraction_response"))
+
+
+if __name__ == "__main__":
+    unittest.main()
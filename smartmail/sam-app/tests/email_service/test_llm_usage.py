@@ -0,0 +1,131 @@
+"""Tests for LLM token/cost accounting and the daily usage rollups."""
+
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+import dynamodb_models
+import llm_usage
+import telemetry
+
+
+class _Response:
+    def __init__(self, usage):
+        self.usage = usage
+
+
+class _RollupTable:
+    def __init__(self, item=None):
+        self.item = item
+        self.update_calls = []
+
+    def update_item(self, **kwargs):
+        self.update_calls.append(kwargs)
+        return {}
+
+    def get_item(self, **kwargs):
+        return {"Item": self.item} if self.item is not None else {}
+
+
+class TestPricing(unittest.TestCase):
+    def test_parse_ignores_malformed_pairs(self):
+        prices = llm_usage.parse_model_prices("a=1:0.1:2, bad, b=x:1:1,c=1:2")
+        self.assertEqual(prices, {"a": (1.0, 0.1, 2.0)})
+
+    def test_dated_snapshot_uses_base_model_price(self):
+        with mock.patch.object(llm_usage, "_MODEL_PRICES", {"gpt-5": (1, 0, 0), "gpt-5-mini": (2, 0, 0)}):
+            self.assertEqual(llm_usage.model_prices("gpt-5-mini-2025-08-07"), (2, 0, 0))
+            self.assertEqual(llm_usage.model_prices("gpt-5-2025-08-07"), (1, 0, 0))
+            self.assertIsNone(llm_usage.model_prices("o3"))
+
+    def test_cost_bills_cached_input_at_the_cached_rate(self):
+        with mock.patch.object(llm_usage, "_MODEL_PRICES", {"m": (1.25, 0.125, 10.0)}):
+            cost = llm_usage.usage_cost_micro_usd(
+                "m", {"input_tokens": 1000, "cached_input_tokens": 800, "output_tokens": 100}
+            )
+        self.assertEqual(cost, round(200 * 1.25 + 800 * 0.125 + 100 * 10.0))
+
+
+class TestUsageAccounting(unittest.TestCase):
+    def test_turn_usage_is_added_to_athlete_and_fleet_rollups(self):
+        response = _Response({"input_tokens": 1000, "output_tokens": 100})
+        with mock.patch.object(llm_usage, "_MODEL_PRICES", {"m": (1.0, 0.1, 10.0)}), mock.patch.object(
+            dynamodb_models, "add_llm_usage_rollup", return_value=True
+        ) as add_rollup:
+            with llm_usage.llm_usage_accounting("ath_1", enabled=True) as ledger:
+                llm_usage.record_llm_response("coaching_reasoning", "m", response)
+                with llm_usage.llm_usage_accounting("ath_1", enabled=True) as nested:
+                    self.assertIs(nested, ledger)
+                    llm_usage.record_llm_response("obedience_evaluation", "m", response)
+
+        self.assertEqual(ledger.totals()["cost_micro_usd"], 4000)
+        self.assertEqual(ledger.by_skill()["coaching_reasoning"]["calls"], 1)
+        self.assertEqual([call.args[0] for call in add_rollup.call_args_list], ["ath_1", llm_usage.FLEET_ROLLUP_ID])
+
+    def test_disabled_accounting_still_feeds_request_telemetry(self):
+        records = []
+        with mock.patch.object(llm_usage, "_MODEL_PRICES", {"m": (1.0, 0.1, 10.0)}):
+            with telemetry.request_telemetry(enabled=True, emit=records.append):
+                with llm_usage.llm_usage_accounting("ath_1", enabled=False) as ledger:
+                    llm_usage.record_llm_response("skill", "m", _Response({"input_tokens": 10}))
+        self.assertIsNone(ledger)
+        self.assertEqual(records[0]["llm_input_tokens"], 10)
+        self.assertEqual(records[0]["llm_cost_micro_usd"], 10)
+
+
+class TestUsageRollupStorage(unittest.TestCase):
+    def test_rollup_is_one_flat_atomic_add(self):
+        table = _RollupTable()
+        with mock.patch.object(dynamodb_models.dynamodb, "Table", return_value=table):
+            ok = dynamodb_models.add_llm_usage_rollup(
+                "ath_1",
+                "2026-10-17",
+                {
+                    "a": {"calls": 1, "input_tokens": 5, "cost_micro_usd": 7},
+                    "b": {"calls": 2, "input_tokens": 1, "cost_micro_usd": 3},
+                },
+                ttl_seconds=60,
+            )
+        self.assertTrue(ok)
+        call = table.update_calls[0]
+        self.assertEqual(call["Key"], {"athlete_id": "ath_1", "usage_date": "2026-10-17"})
+        added = {
+            call["ExpressionAttributeNames"][name]: call["ExpressionAttributeValues"][name.replace("#", ":")]
+            for name in call["ExpressionAttributeNames"]
+        }
+        self.assertEqual(added["calls"], 3)
+        self.assertEqual(added["cost_micro_usd"], 10)
+        self.assertEqual(added["b.cost_micro_usd"], 3)
+        self.assertIn("expires_at = :expires_at", call["UpdateExpression"])
+
+
+class TestSpendBudget(unittest.TestCase):
+    def _rollups(self, costs):
+        def _get(rollup_id, usage_date):
+            return {"cost_micro_usd": Decimal(costs.get(rollup_id, 0))}
+
+        return mock.patch.object(dynamodb_models, "get_llm_usage_rollup", side_effect=_get)
+
+    def test_athlete_and_fleet_budgets(self):
+        with mock.patch.object(llm_usage, "ENABLE_LLM_COST_ACCOUNTING", True), mock.patch.object(
+            llm_usage, "LLM_ATHLETE_DAILY_BUDGET_USD", 0.5
+        ), mock.patch.object(llm_usage, "LLM_FLEET_DAILY_BUDGET_USD", 100.0):
+            with self._rollups({"ath_1": 500_000}):
+                self.assertEqual(llm_usage.spend_budget_exceeded("ath_1"), llm_usage.BUDGET_SCOPE_ATHLETE)
+            with self._rollups({"ath_1": 10, llm_usage.FLEET_ROLLUP_ID: 100_000_000}):
+                self.assertEqual(llm_usage.spend_budget_exceeded("ath_1"), llm_usage.BUDGET_SCOPE_FLEET)
+            with self._rollups({"ath_1": 10}):
+                self.assertIsNone(llm_usage.spend_budget_exceeded("ath_1"))
+
+    def test_no_lookup_while_accounting_is_off(self):
+        with self._rollups({}) as get_rollup:
+            self.assertIsNone(llm_usage.spend_budget_exceeded("ath_1"))
+        get_rollup.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""Tests for the warm-container registration, verification and athlete-id caches."""
+
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+import auth
+import dynamodb_models
+import lookup_cache
+from lookup_cache import TTLCache
+
+
+class _Table:
+    def __init__(self, items=None, *, key_name="email"):
+        self.items = dict(items or {})
+        self.key_name = key_name
+        self.calls = []
+
+    def get_item(self, Key, **kwargs):  # noqa: N803
+        self.calls.append("get_item")
+        item = self.items.get(Key[self.key_name])
+        return {"Item": dict(item)} if item is not None else {}
+
+    def update_item(self, Key, **kwargs):  # noqa: N803
+        self.calls.append("update_item")
+        item = self.items.setdefault(Key[next(iter(Key))], dict(Key))
+        if kwargs.get("ReturnValues") == "ALL_NEW":
+            item.setdefault("athlete_id", kwargs["ExpressionAttributeValues"][":athlete_id"])
+            return {"Attributes": dict(item)}
+        return {}
+
+
+class _Resource:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def Table(self, name):  # noqa: N802
+        return self.tables[name]
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_entries_expire_after_the_ttl(self):
+        cache = TTLCache("t", max_entries=10, ttl_seconds=60)
+        with mock.patch.object(lookup_cache.time, "time", return_value=1000):
+            cache.put("a", "ath_1")
+        with mock.patch.object(lookup_cache.time, "time", return_value=1059):
+            self.assertEqual(cache.get("a"), "ath_1")
+        with mock.patch.object(lookup_cache.time, "time", return_value=1060):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_explicit_expiry_can_only_shorten_the_ttl(self):
+        cache = TTLCache("t", max_entries=10, ttl_seconds=60)
+        with mock.patch.object(lookup_cache.time, "time", return_value=1000):
+            cache.put("short", True, expires_at=1010)
+            cache.put("long", True, expires_at=5000)
+        with mock.patch.object(lookup_cache.time, "time", return_value=1030):
+            self.assertIsNone(cache.get("short"))
+            self.assertTrue(cache.get("long"))
+        with mock.patch.object(lookup_cache.time, "time", return_value=1061):
+            self.assertIsNone(cache.get("long"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache("t", max_entries=2, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+
+class _CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        lookup_cache.clear_lookup_caches()
+        self.addCleanup(lookup_cache.clear_lookup_caches)
+        patcher = mock.patch.object(lookup_cache, "ENABLE_LOOKUP_CACHE", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestRegistrationCache(_CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = _Table({"runner@example.com": {"email_address": "runner@example.com"}}, key_name="email_address")
+        patcher = mock.patch.object(auth, "dynamodb", _Resource({auth.USERS_TABLE: self.users}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_registered_sender_is_read_once(self):
+        self.assertTrue(auth.is_registered("Runner@example.com"))
+        self.assertTrue(auth.is_registered("runner@example.com"))
+        self.assertEqual(self.users.calls, ["get_item"])
+
+    def test_unregistered_sender_is_not_cached(self):
+        self.assertFalse(auth.is_registered("new@example.com"))
+        self.users.items["new@example.com"] = {"email_address": "new@example.com"}
+        self.assertTrue(auth.is_registered("new@example.com"))
+
+    def test_disabled_reads_every_time(self):
+        with mock.patch.object(lookup_cache, "ENABLE_LOOKUP_CACHE", False):
+            auth.is_registered("runner@example.com")
+            auth.is_registered("runner@example.com")
+        self.assertEqual(self.users.calls, ["get_item", "get_item"])
+
+
+class TestDynamoLookupCaches(_CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sessions = _Table()
+        self.identities = _Table()
+        self.profiles = _Table(key_name="athlete_id")
+        self.snapshots = _Table(key_name="athlete_id")
+        resource = _Resource(
+            {
+                dynamodb_models.VERIFIED_SESSIONS_TABLE: self.sessions,
+                dynamodb_models.ATHLETE_IDENTITIES_TABLE: self.identities,
+                dynamodb_models.COACH_PROFILES_TABLE: self.profiles,
+                dynamodb_models.PROGRESS_SNAPSHOTS_TABLE: self.snapshots,
+            }
+        )
+        patcher = mock.patch.object(dynamodb_models, "dynamodb", resource)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_verified_session_is_cached_until_it_expires(self):
+        self.sessions.items["runner@example.com"] = {"session_expires_at": 2000}
+        with mock.patch.object(dynamodb_models.time, "time", return_value=1900), \
+             mock.patch.object(lookup_cache.time, "time", return_value=1900):
+            self.assertTrue(dynamodb_models.is_verified("runner@example.com"))
+            self.assertTrue(dynamodb_models.is_verified("runner@example.com"))
+        self.assertEqual(self.sessions.calls, ["get_item"])
+        with mock.patch.object(dynamodb_models.time, "time", return_value=2001), \
+             mock.patch.object(lookup_cache.time, "time", return_value=2001):
+            self.assertFalse(dynamodb_models.is_verified("runner@example.com"))
+        self.assertEqual(self.sessions.calls, ["get_item", "get_item"])
+
+    def test_unverified_sender_is_not_cached(self):
+        self.assertFalse(dynamodb_models.is_verified("runner@example.com"))
+        self.assertFalse(dynamodb_models.is_verified("runner@example.com"))
+        self.assertEqual(self.sessions.calls, ["get_item", "get_item"])
+
+    def test_repeat_sender_skips_the_ensure_writes(self):
+        athlete_id = dynamodb_models.ensure_athlete_id_for_email("Runner@example.com")
+        self.assertTrue(athlete_id.startswith("ath_"))
+        self.assertTrue(dynamodb_models.ensure_progress_snapshot_exists(athlete_id))
+
+        self.assertEqual(dynamodb_models.ensure_athlete_id_for_email("runner@example.com"), athlete_id)
+        self.assertEqual(dynamodb_models.get_athlete_id_for_email("runner@example.com"), athlete_id)
+        self.assertTrue(dynamodb_models.ensure_progress_snapshot_exists(athlete_id))
+        self.assertEqual(self.identities.calls, ["update_item"])
+        self.assertEqual(self.profiles.calls, ["update_item"])
+        self.assertEqual(self.snapshots.calls, ["update_item"])
+
+    def test_disabled_ensures_on_every_email(self):
+        with mock.patch.object(lookup_cache, "ENABLE_LOOKUP_CACHE", False):
+            first = dynamodb_models.ensure_athlete_id_for_email("runner@example.com")
+            second = dynamodb_models.ensure_athlete_id_for_email("runner@example.com")
+        self.assertEqual(first, second)
+        self.assertEqual(self.identities.calls, ["update_item", "update_item"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -159,6 +159,60 @@ class TestMemoryCompiler(unittest.TestCase):
         self.assertEqual(out["structure_facts"], [])
         self.assertEqual(out["continuity_focus"], None)
 
+    def test_token_budget_trims_context_then_preferences_then_schedule(self) -> None:
+        m = empty_sectioned_memory()
+        m["goals"]["active"].append(
+            _af(section=SECTION_GOAL, subtype="primary", fact_key="goal:a", summary="Run a spring marathon")
+        )
+        for i in range(2):
+            m["schedule_anchors"]["active"].append(
+                _af(
+                    section=SECTION_SCHEDULE_ANCHOR,
+                    subtype="recurring_anchor",
+                    fact_key=f"schedule:{i}",
+                    summary=f"Long run every Sunday morning {i}",
+                )
+            )
+            m["preferences"]["active"].append(
+                _af(
+                    section=SECTION_PREFERENCE,
+                    subtype="communication",
+                    fact_key=f"preference:{i}",
+                    summary=f"Prefers short bullet emails {i}",
+                )
+            )
+            m["context_notes"]["active"].append(
+                _af(
+                    section=SECTION_CONTEXT,
+                    subtype="life_context",
+                    fact_key=f"context:{i}",
+                    summary=f"Works rotating hospital shifts {i}",
+                )
+            )
+        unbounded = compile_prompt_memory(m, None, token_budget=10_000)
+        self.assertEqual(unbounded["budget_report"]["dropped"], {
+            "context_facts": 0, "preference_facts": 0, "structure_facts": 0,
+        })
+        fixed = unbounded["budget_report"]["fixed_tokens"]
+        used = unbounded["budget_report"]["tokens_used"]
+
+        # Every fact here is 8 tokens; shedding 17 takes both context facts
+        # go, then the lowest-ranked preference; schedule is untouched.
+        out = compile_prompt_memory(m, None, token_budget=used - 17)
+        self.assertEqual(out["context_facts"], [])
+        self.assertEqual(len(out["preference_facts"]), 1)
+        self.assertEqual(len(out["structure_facts"]), 2)
+        self.assertEqual(len(out["priority_facts"]), 1)
+        self.assertLessEqual(out["budget_report"]["tokens_used"], used - 17)
+
+        starved = compile_prompt_memory(m, None, token_budget=0)
+        self.assertEqual(starved["structure_facts"], [])
+        self.assertEqual(len(starved["priority_facts"]), 1)
+        self.assertEqual(starved["budget_report"]["tokens_used"], fixed)
+
+    def test_no_budget_report_without_budget(self) -> None:
+        self.assertNotIn("budget_report", compile_prompt_memory(empty_sectioned_memory(), None))
+
     def test_deterministic(self) -> None:
         m = empty_sectioned_memory()
         m["schedule_anchors"]["active"].append(
@@ -0,0 +1,182 @@
+"""Tests for the deferred post-reply memory refresh queue."""
+
+import json
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+from botocore.exceptions import ClientError
+
+import coaching_memory
+import dynamodb_models
+import memory_refresh_queue
+from memory_refresh_queue import LocalMemoryRefreshQueue, MemoryRefreshJob, coalesce_jobs
+from sectioned_memory_contract import empty_sectioned_memory
+from skills.memory.errors import MemoryRefreshError
+
+
+def _job(athlete_id, inbound, reply, *, job_id=None, updates=(), decision=None):
+    return MemoryRefreshJob(
+        athlete_id=athlete_id,
+        interaction_context={
+            "inbound_email": inbound,
+            "inbound_subject": f"re {inbound}",
+            "profile_updates_applied": list(updates),
+            "manual_activity_detected": False,
+            "selected_model_name": "gpt",
+            "rule_engine_decision": decision,
+            "coach_reply": reply,
+        },
+        job_id=job_id or f"{athlete_id}-{inbound}",
+        enqueued_at=1000,
+    )
+
+
+class TestCoalesceJobs(unittest.TestCase):
+    def test_joins_turns_in_order_and_unions_updates(self):
+        merged = coalesce_jobs(
+            [
+                _job("ath_1", "Ran 5k", "Nice", updates=["goal"], decision={"track": "a"}),
+                _job("ath_1", "Knee sore", "Rest", job_id="job-2", updates=["constraints", "goal"]),
+            ]
+        )
+        sep = memory_refresh_queue.COALESCED_TEXT_SEPARATOR
+        context = merged.interaction_context
+        self.assertEqual(context["inbound_email"], "Ran 5k" + sep + "Knee sore")
+        self.assertEqual(context["coach_reply"], "Nice" + sep + "Rest")
+        self.assertEqual(context["inbound_subject"], "re Knee sore")
+        self.assertEqual(context["profile_updates_applied"], ["constraints", "goal"])
+        self.assertEqual(context["rule_engine_decision"], {"track": "a"})
+        self.assertEqual(merged.job_id, "job-2")
+        self.assertEqual(merged.job_count, 2)
+
+    def test_local_queue_drains_one_job_per_athlete(self):
+        queue = LocalMemoryRefreshQueue()
+        queue.put(_job("ath_1", "a", "x"))
+        queue.put(_job("ath_2", "b", "y"))
+        queue.put(_job("ath_1", "c", "z"))
+        drained = queue.drain()
+        self.assertEqual([job.athlete_id for job in drained], ["ath_1", "ath_2"])
+        self.assertEqual(drained[0].job_count, 2)
+        self.assertEqual(len(queue), 0)
+
+    def test_message_round_trip(self):
+        job = _job("ath_1", "a", "x", job_id="job-7")
+        restored = MemoryRefreshJob.from_message(job.to_message())
+        self.assertEqual(restored.athlete_id, "ath_1")
+        self.assertEqual(restored.job_id, "job-7")
+        self.assertEqual(restored.interaction_context, job.interaction_context)
+
+
+class TestProcessMemoryRefreshJob(unittest.TestCase):
+    def _fake_refresh(self, **kwargs):
+        self.refresh_calls += 1
+        if not kwargs["replace_memory_fn"](kwargs["athlete_id"], {}, {}):
+            raise MemoryRefreshError("memory persistence failed")
+        return {}
+
+    def setUp(self):
+        self.refresh_calls = 0
+        patcher = mock.patch.object(coaching_memory, "refresh_and_persist_memory", side_effect=self._fake_refresh)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_with_fresh_version_after_conflict(self):
+        with mock.patch.object(memory_refresh_queue, "get_memory_version", side_effect=[3, 4, 4]), \
+                mock.patch.object(memory_refresh_queue, "replace_memory", side_effect=[False, True]) as replace:
+            ok = memory_refresh_queue.process_memory_refresh_job(_job("ath_1", "a", "x"), max_version_retries=1)
+        self.assertTrue(ok)
+        self.assertEqual(self.refresh_calls, 2)
+        self.assertEqual([c.kwargs["expected_version"] for c in replace.call_args_list], [3, 4])
+
+    def test_gives_up_when_write_fails_without_conflict(self):
+        with mock.patch.object(memory_refresh_queue, "get_memory_version", return_value=3), \
+                mock.patch.object(memory_refresh_queue, "replace_memory", return_value=False):
+            ok = memory_refresh_queue.process_memory_refresh_job(_job("ath_1", "a", "x"), max_version_retries=3)
+        self.assertFalse(ok)
+        self.assertEqual(self.refresh_calls, 1)
+
+    def test_sqs_worker_fails_whole_athlete_group(self):
+        event = {
+            "Records": [
+                {"messageId": "m1", "body": _job("ath_1", "a", "x").to_message()},
+                {"messageId": "m2", "body": _job("ath_2", "b", "y").to_message()},
+                {"messageId": "m3", "body": _job("ath_1", "c", "z").to_message()},
+                {"messageId": "m4", "body": "not json"},
+            ]
+        }
+        with mock.patch.object(
+            memory_refresh_queue,
+            "process_memory_refresh_job",
+            side_effect=lambda job: job.athlete_id != "ath_1",
+        ) as process:
+            result = memory_refresh_queue.sqs_memory_refresh_handler(event, None)
+        self.assertEqual(result, {"batchItemFailures": [{"itemIdentifier": "m1"}, {"itemIdentifier": "m3"}]})
+        self.assertEqual(process.call_count, 2)
+
+
+class TestEnqueueAndDrain(unittest.TestCase):
+    def setUp(self):
+        self.queue = LocalMemoryRefreshQueue()
+        memory_refresh_queue.set_memory_refresh_queue(self.queue)
+        self.addCleanup(memory_refresh_queue.reset_memory_refresh_queue)
+
+    def test_enqueue_and_drain_applies(self):
+        self.assertTrue(memory_refresh_queue.enqueue_memory_refresh("ath_1", {"inbound_email": "hi"}))
+        self.assertEqual(len(self.queue), 1)
+        with mock.patch.object(memory_refresh_queue, "process_memory_refresh_job", return_value=True) as process:
+            self.assertEqual(memory_refresh_queue.drain_local_memory_refresh_queue(), 1)
+        self.assertEqual(process.call_args[0][0].interaction_context, {"inbound_email": "hi"})
+        self.assertEqual(len(self.queue), 0)
+
+    def test_fifo_jobs_enqueued_in_the_same_second_are_not_deduplicated(self):
+        client = mock.Mock()
+        queue = memory_refresh_queue.SqsMemoryRefreshQueue("https://sqs/refresh.fifo", client=client)
+        with mock.patch.object(memory_refresh_queue.time, "time", return_value=1000):
+            queue.put(MemoryRefreshJob(athlete_id="ath_1", interaction_context={"inbound_email": "a"}))
+            queue.put(MemoryRefreshJob(athlete_id="ath_1", interaction_context={"inbound_email": "b"}))
+        dedup_ids = {call.kwargs["MessageDeduplicationId"] for call in client.send_message.call_args_list}
+        self.assertEqual(len(dedup_ids), 2)
+
+
+class _ProfilesTable:
+    def __init__(self):
+        self.calls = []
+
+    def update_item(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("ExpressionAttributeValues", {}).get(":expected_version") == 9:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        return {}
+
+
+class TestReplaceMemoryVersion(unittest.TestCase):
+    def setUp(self):
+        self.table = _ProfilesTable()
+        dynamo = mock.Mock()
+        dynamo.Table.return_value = self.table
+        patcher = mock.patch.object(dynamodb_models, "dynamodb", dynamo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.continuity = {"summary": "s", "last_recommendation": "r", "open_loops": [], "updated_at": 1}
+
+    def test_unconditional_write_bumps_version(self):
+        self.assertTrue(dynamodb_models.replace_memory("ath_1", empty_sectioned_memory(), self.continuity))
+        call = self.table.calls[0]
+        self.assertIn("#memory_version = if_not_exists(#memory_version, :zero) + :one", call["UpdateExpression"])
+        self.assertNotIn("ConditionExpression", call)
+
+    def test_version_conflict_returns_false(self):
+        self.assertFalse(
+            dynamodb_models.replace_memory(
+                "ath_1", empty_sectioned_memory(), self.continuity, expected_version=9
+            )
+        )
+        self.assertEqual(self.table.calls[0]["ConditionExpression"], "#memory_version = :expected_version")
+
+
+if __name__ == "__main__":
+    unittest.main()
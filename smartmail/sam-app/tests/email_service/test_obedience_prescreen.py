@@ -0,0 +1,135 @@
+"""Unit tests for the deterministic obedience pre-screen and its gate. No network."""
+
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+import coaching
+from skills.obedience_eval import (
+    decide_obedience_eval,
+    prescreen_obedience,
+    prescreen_outcome_label,
+)
+
+_SCHEDULE_DIRECTIVE = {
+    "avoid": ["Do not mention the Achilles"],
+    "content_plan": ["present schedule"],
+    "main_message": "Here's the schedule.",
+}
+_CLEAN_SCHEDULE = "Here's your schedule for the week: Mon easy 30, Wed easy 40, Sat long 75."
+
+
+class TestPrescreenObedience(unittest.TestCase):
+    def test_clean_reply_has_no_flags(self):
+        result = prescreen_obedience(_CLEAN_SCHEDULE, _SCHEDULE_DIRECTIVE)
+        self.assertTrue(result.clean, result.flags)
+
+    def test_avoid_topic_is_flagged(self):
+        result = prescreen_obedience(
+            "Your Achilles has been quiet this week. " + _CLEAN_SCHEDULE, _SCHEDULE_DIRECTIVE
+        )
+        self.assertIn("avoid_term_overlap", result.flags)
+        self.assertEqual(result.details["avoid_term_overlap"], ["Do not mention the Achilles"])
+
+    def test_uncovered_content_plan_item_is_flagged(self):
+        directive = dict(_SCHEDULE_DIRECTIVE, content_plan=["present schedule", "confirm hamstring status"])
+        result = prescreen_obedience(_CLEAN_SCHEDULE, directive)
+        self.assertEqual(result.details["content_plan_gap"], ["confirm hamstring status"])
+        self.assertTrue(prescreen_obedience(_CLEAN_SCHEDULE, directive, check_content_plan=False).clean)
+
+    def test_length_bounds(self):
+        self.assertIn("too_short", prescreen_obedience("Ok.", _SCHEDULE_DIRECTIVE).flags)
+        long_reply = _CLEAN_SCHEDULE + " Keep it easy." * 80
+        self.assertIn("too_long", prescreen_obedience(long_reply, _SCHEDULE_DIRECTIVE).flags)
+        self.assertIn("too_long", prescreen_obedience(_CLEAN_SCHEDULE, _SCHEDULE_DIRECTIVE, max_words=5).flags)
+
+    def test_url_must_come_from_sources(self):
+        reply = _CLEAN_SCHEDULE + " Download it at https://portal.example.com/week2.ics."
+        self.assertIn("url_not_in_sources", prescreen_obedience(reply, _SCHEDULE_DIRECTIVE).flags)
+        allowed = prescreen_obedience(
+            reply,
+            _SCHEDULE_DIRECTIVE,
+            source_texts=["my link is https://portal.example.com/week2.ics"],
+        )
+        self.assertNotIn("url_not_in_sources", allowed.flags)
+
+    def test_week_label_needs_continuity_support(self):
+        reply = "Week 3 schedule: " + _CLEAN_SCHEDULE
+        self.assertIn("unsupported_week_label", prescreen_obedience(reply, _SCHEDULE_DIRECTIVE).flags)
+        supported = prescreen_obedience(reply, _SCHEDULE_DIRECTIVE, {"weeks_in_current_block": 3})
+        self.assertNotIn("unsupported_week_label", supported.flags)
+
+    def test_taxonomy_phrases(self):
+        presence = prescreen_obedience(_CLEAN_SCHEDULE + " See you there on Saturday!", _SCHEDULE_DIRECTIVE)
+        self.assertIn("physical_presence_phrase", presence.flags)
+        leak = prescreen_obedience(_CLEAN_SCHEDULE + "\nFrom: coach@example.com", _SCHEDULE_DIRECTIVE)
+        self.assertIn("header_block", leak.flags)
+
+
+class TestObedienceGate(unittest.TestCase):
+    def test_flagged_always_invokes_llm(self):
+        flagged = prescreen_obedience("Ok.", _SCHEDULE_DIRECTIVE)
+        decision = decide_obedience_eval(flagged, sample_rate=0.0, rng=lambda: 0.99)
+        self.assertTrue(decision.invoke_llm)
+        self.assertEqual(prescreen_outcome_label(decision, True), "flagged_passed")
+
+    def test_clean_reply_sampled_by_rate(self):
+        clean = prescreen_obedience(_CLEAN_SCHEDULE, _SCHEDULE_DIRECTIVE)
+        skipped = decide_obedience_eval(clean, sample_rate=0.1, rng=lambda: 0.5)
+        sampled = decide_obedience_eval(clean, sample_rate=0.1, rng=lambda: 0.05)
+        self.assertFalse(skipped.invoke_llm)
+        self.assertEqual(prescreen_outcome_label(skipped, None), "skipped")
+        self.assertTrue(sampled.invoke_llm)
+        self.assertEqual(prescreen_outcome_label(sampled, False), "clean_miss")
+
+
+class TestCoachingObedienceGate(unittest.TestCase):
+    def _evaluate(self, email_body):
+        return coaching._evaluate_obedience(
+            athlete_id="ath_1",
+            email_body=email_body,
+            directive=_SCHEDULE_DIRECTIVE,
+            continuity_context=None,
+            source_texts=("inbound",),
+        )
+
+    def test_gate_off_always_calls_llm(self):
+        with mock.patch.object(coaching, "ENABLE_OBEDIENCE_PRESCREEN", False), \
+                mock.patch.object(coaching, "run_obedience_eval", return_value={"passed": True}) as run_eval:
+            result, gate = self._evaluate(_CLEAN_SCHEDULE)
+        run_eval.assert_called_once()
+        self.assertIsNone(gate)
+        self.assertEqual(result, {"passed": True})
+
+    def test_clean_reply_skips_llm_when_not_sampled(self):
+        with mock.patch.object(coaching, "ENABLE_OBEDIENCE_PRESCREEN", True), \
+                mock.patch.object(coaching, "OBEDIENCE_EVAL_SAMPLE_RATE", 0.0), \
+                mock.patch.object(coaching, "run_obedience_eval") as run_eval:
+            result, gate = self._evaluate(_CLEAN_SCHEDULE)
+        run_eval.assert_not_called()
+        self.assertTrue(result["passed"])
+        self.assertIsNone(result["corrected_email_body"])
+        self.assertEqual(gate["outcome"], "skipped")
+
+    def test_flagged_reply_goes_to_llm(self):
+        llm_result = {
+            "passed": False,
+            "violations": [{"violation_type": "reopened_resolved_topic", "detail": "Achilles"}],
+            "corrected_email_body": _CLEAN_SCHEDULE,
+            "reasoning": "mentions Achilles",
+        }
+        with mock.patch.object(coaching, "ENABLE_OBEDIENCE_PRESCREEN", True), \
+                mock.patch.object(coaching, "OBEDIENCE_EVAL_SAMPLE_RATE", 0.0), \
+                mock.patch.object(coaching, "run_obedience_eval", return_value=llm_result) as run_eval:
+            result, gate = self._evaluate("Your Achilles is fine. " + _CLEAN_SCHEDULE)
+        run_eval.assert_called_once()
+        self.assertIs(result, llm_result)
+        self.assertEqual(gate["outcome"], "flagged_corrected")
+        self.assertEqual(gate["prescreen"]["flags"], ["avoid_term_overlap"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+"""Tests for paced SES sends, throttling backoff and the outbound mail queue."""
+
+import json
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+from botocore.exceptions import ClientError
+
+import app
+import email_reply_sender
+import outbound_mail
+from outbound_mail import LocalOutboundMailQueue, OutboundEmail, TokenBucket, build_simple_email
+
+
+def _throttling():
+    return ClientError({"Error": {"Code": "Throttling", "Message": "Maximum sending rate exceeded."}}, "SendRawEmail")
+
+
+def _rejected():
+    return ClientError({"Error": {"Code": "MessageRejected", "Message": "Email address is not verified."}}, "SendRawEmail")
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class _SesClient:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def send_raw_email(self, **kwargs):
+        self.calls.append(kwargs)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return {"MessageId": outcome}
+
+
+def _job(message_id="<m1@geniml.com>"):
+    return OutboundEmail(
+        kind="reply",
+        source="coach@geniml.com",
+        destinations=["runner@example.com"],
+        raw_message="Subject: Re: Week 4\n\nTempo on Thursday.",
+        message_id=message_id,
+        enqueued_at=1000,
+    )
+
+
+def _unpaced():
+    return TokenBucket(0)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_up_to_capacity_then_paced_at_the_rate(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(2, clock=clock, sleep=clock.sleep)
+        waits = [bucket.acquire() for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.5)
+        self.assertAlmostEqual(waits[3], 0.5)
+        self.assertAlmostEqual(clock.now, 1.0)
+
+    def test_idle_time_refills_without_exceeding_capacity(self):
+        clock = _FakeClock()
+        bucket = TokenBucket(1, capacity=2, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        bucket.acquire()
+        clock.now += 60
+        self.assertEqual([bucket.acquire(), bucket.acquire()], [0.0, 0.0])
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+    def test_zero_rate_disables_pacing(self):
+        bucket = TokenBucket(0, sleep=mock.Mock(side_effect=AssertionError("slept")))
+        self.assertEqual([bucket.acquire() for _ in range(5)], [0.0] * 5)
+
+
+class TestSendOutboundEmail(unittest.TestCase):
+    def test_backoff_delay_is_capped_exponential_with_jitter(self):
+        self.assertEqual(outbound_mail.backoff_delay(0, base_seconds=0.5, max_seconds=8, rand=lambda: 1.0), 0.5)
+        self.assertEqual(outbound_mail.backoff_delay(2, base_seconds=0.5, max_seconds=8, rand=lambda: 0.0), 1.0)
+        self.assertEqual(outbound_mail.backoff_delay(10, base_seconds=0.5, max_seconds=8, rand=lambda: 1.0), 8)
+
+    def test_throttling_is_retried_with_backoff(self):
+        client = _SesClient([_throttling(), _throttling(), "ses-1"])
+        sleep = mock.Mock()
+        message_id = outbound_mail.send_outbound_email(
+            _job(), client=client, rate_limiter=_unpaced(), max_attempts=4, sleep=sleep
+        )
+        self.assertEqual(message_id, "ses-1")
+        self.assertEqual(len(client.calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(client.calls[0]["RawMessage"], {"Data": _job().raw_message})
+
+    def test_persistent_throttling_raises_after_the_last_attempt(self):
+        client = _SesClient([_throttling()] * 3)
+        with self.assertRaises(outbound_mail.OutboundThrottledError):
+            outbound_mail.send_outbound_email(
+                _job(), client=client, rate_limiter=_unpaced(), max_attempts=3, sleep=mock.Mock()
+            )
+        self.assertEqual(len(client.calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        client = _SesClient([_rejected()])
+        with self.assertRaises(ClientError):
+            outbound_mail.send_outbound_email(_job(), client=client, rate_limiter=_unpaced(), sleep=mock.Mock())
+        self.assertEqual(len(client.calls), 1)
+
+
+class TestOutboundQueue(unittest.TestCase):
+    def setUp(self):
+        self.queue = LocalOutboundMailQueue()
+        outbound_mail.set_outbound_mail_queue(self.queue)
+        self.addCleanup(outbound_mail.reset_outbound_mail_queue)
+        patcher = mock.patch.object(outbound_mail, "_record_status")
+        self.record_status = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_message_round_trip(self):
+        job = build_simple_email(
+            "verification",
+            source="hello@geniml.com",
+            recipient="runner@example.com",
+            subject="Verify",
+            text="Click the link",
+            html="<p>Click the link</p>",
+        )
+        self.assertTrue(job.message_id.endswith("@geniml.com>"))
+        self.assertIn("multipart/alternative", job.raw_message)
+        self.assertEqual(OutboundEmail.from_message(job.to_message()), job)
+
+    def test_queued_delivery_returns_the_message_id_without_sending(self):
+        client = _SesClient([])
+        with mock.patch.object(outbound_mail, "OUTBOUND_MAIL_MODE", "queued"):
+            self.assertEqual(outbound_mail.deliver(_job(), client=client), "<m1@geniml.com>")
+        self.assertEqual(client.calls, [])
+        self.assertEqual(len(self.queue), 1)
+        self.record_status.assert_called_once_with(mock.ANY, outbound_mail.OUTBOUND_STATUS_QUEUED)
+
+    def test_sync_delivery_sends_inline(self):
+        client = _SesClient(["ses-1"])
+        with mock.patch.object(outbound_mail, "get_send_rate_limiter", return_value=_unpaced()):
+            self.assertEqual(outbound_mail.deliver(_job(), client=client), "ses-1")
+        self.assertEqual(len(self.queue), 0)
+
+    def test_failed_enqueue_falls_back_to_sending_inline(self):
+        broken = mock.Mock()
+        broken.put.side_effect = RuntimeError("sqs down")
+        outbound_mail.set_outbound_mail_queue(broken)
+        client = _SesClient(["ses-1"])
+        with mock.patch.object(outbound_mail, "OUTBOUND_MAIL_MODE", "queued"), \
+             mock.patch.object(outbound_mail, "get_send_rate_limiter", return_value=_unpaced()):
+            self.assertEqual(outbound_mail.deliver(_job(), client=client), "ses-1")
+
+    def test_drain_sends_and_records_status(self):
+        self.queue.put(_job("<a@geniml.com>"))
+        self.queue.put(_job("<b@geniml.com>"))
+        client = _SesClient(["ses-a", "ses-b"])
+        with mock.patch.object(outbound_mail, "get_ses_client", return_value=client), \
+             mock.patch.object(outbound_mail, "get_send_rate_limiter", return_value=_unpaced()):
+            self.assertEqual(outbound_mail.drain_local_outbound_mail_queue(), 2)
+        self.assertEqual(len(self.queue), 0)
+        self.record_status.assert_any_call(mock.ANY, outbound_mail.OUTBOUND_STATUS_SENT, ses_message_id="ses-b")
+
+    def test_drain_keeps_jobs_that_must_be_retried(self):
+        self.queue.put(_job("<a@geniml.com>"))
+        self.queue.put(_job("<b@geniml.com>"))
+        client = _SesClient([_throttling(), "ses-b"])
+        with mock.patch.object(outbound_mail, "get_ses_client", return_value=client), \
+             mock.patch.object(outbound_mail, "get_send_rate_limiter", return_value=_unpaced()), \
+             mock.patch.object(outbound_mail, "OUTBOUND_SEND_MAX_ATTEMPTS", 1):
+            self.assertEqual(outbound_mail.drain_local_outbound_mail_queue(), 1)
+        self.assertEqual([job.message_id for job in self.queue.drain()], ["<a@geniml.com>"])
+
+    def test_queued_mode_without_a_queue_url_sends_inline(self):
+        outbound_mail.reset_outbound_mail_queue()
+        client = _SesClient(["ses-1"])
+        with mock.patch.object(outbound_mail, "OUTBOUND_MAIL_MODE", "queued"), \
+             mock.patch.object(outbound_mail, "OUTBOUND_MAIL_QUEUE_URL", ""), \
+             mock.patch.object(outbound_mail, "get_send_rate_limiter", return_value=_unpaced()):
+            self.assertFalse(outbound_mail.is_outbound_mail_queued())
+            self.assertEqual(outbound_mail.deliver(_job(), client=client), "ses-1")
+        self.record_status.assert_not_called()
+
+
+class TestSqsOutboundMailHandler(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(outbound_mail, "_record_status")
+        self.record_status = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(outbound_mail, "get_send_rate_limiter", return_value=_unpaced())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _event(self, count):
+        return {
+            "Records": [
+                {"messageId": f"r{index}", "body": _job(f"<m{index}@geniml.com>").to_message()}
+                for index in range(count)
+            ]
+        }
+
+    def _run(self, client, event):
+        with mock.patch.object(outbound_mail, "get_ses_client", return_value=client), \
+             mock.patch.object(outbound_mail, "OUTBOUND_SEND_MAX_ATTEMPTS", 1), \
+             mock.patch.object(outbound_mail.time, "sleep"):
+            return outbound_mail.sqs_outbound_mail_handler(event, None)
+
+    def test_sends_every_record(self):
+        client = _SesClient(["s0", "s1"])
+        self.assertEqual(self._run(client, self._event(2)), {"batchItemFailures": []})
+        self.assertEqual(len(client.calls), 2)
+
+    def test_throttled_record_and_the_rest_of_the_batch_are_retried(self):
+        client = _SesClient(["s0"] + [_throttling()] * 3)
+        result = self._run(client, self._event(3))
+        self.assertEqual(
+            result,
+            {"batchItemFailures": [{"itemIdentifier": "r1"}, {"itemIdentifier": "r2"}]},
+        )
+        self.assertEqual(len(client.calls), 2)
+        self.record_status.assert_any_call(mock.ANY, outbound_mail.OUTBOUND_STATUS_RETRYING)
+
+    def test_permanent_rejection_is_not_retried(self):
+        client = _SesClient([_rejected(), "s1"])
+        self.assertEqual(self._run(client, self._event(2)), {"batchItemFailures": []})
+        self.record_status.assert_any_call(
+            mock.ANY, outbound_mail.OUTBOUND_STATUS_FAILED, error=mock.ANY
+        )
+
+    def test_unparseable_record_is_dropped(self):
+        event = {"Records": [{"messageId": "bad", "body": json.dumps({"kind": "reply"})}]}
+        self.assertEqual(self._run(_SesClient([]), event), {"batchItemFailures": []})
+
+
+class TestReplySenderDelivery(unittest.TestCase):
+    def test_queued_reply_returns_its_message_id(self):
+        queue = LocalOutboundMailQueue()
+        outbound_mail.set_outbound_mail_queue(queue)
+        self.addCleanup(outbound_mail.reset_outbound_mail_queue)
+        email_data = {
+            "sender": "runner@example.com",
+            "to_recipients": ["coach@geniml.com"],
+            "cc_recipients": [],
+            "subject": "Week 4",
+            "body": "Done.",
+        }
+        with mock.patch.object(outbound_mail, "OUTBOUND_MAIL_MODE", "queued"), \
+             mock.patch.object(outbound_mail, "_record_status"), \
+             mock.patch.object(outbound_mail, "get_ses_client") as get_ses_client_mock:
+            message_id = email_reply_sender.EmailReplySender.send_reply(email_data, "Nice work.")
+        get_ses_client_mock.assert_not_called()
+        (job,) = queue.drain()
+        self.assertEqual(message_id, job.message_id)
+        self.assertEqual(job.source, "coach@geniml.com")
+        self.assertEqual(job.destinations, ["runner@example.com"])
+        self.assertIn("Subject: Re: Week 4", job.raw_message)
+
+
+class TestInProcessDrainOrder(unittest.TestCase):
+    def test_queued_mail_is_sent_before_deferred_memory_refresh(self):
+        calls = []
+        with mock.patch.object(app, "_handle_inbound_email", return_value={"statusCode": 200}), \
+             mock.patch.object(app, "is_outbound_mail_queued", return_value=True), \
+             mock.patch.object(app, "is_memory_refresh_deferred", return_value=True), \
+             mock.patch.object(app, "drain_local_outbound_mail_queue", side_effect=lambda: calls.append("mail")), \
+             mock.patch.object(app, "drain_local_memory_refresh_queue", side_effect=lambda: calls.append("memory")):
+            app._process_inbound_email({"sender": "runner@example.com"}, "req-1")
+        self.assertEqual(calls, ["mail", "memory"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -48,6 +48,11 @@ if "boto3" not in sys.modules:
         def serialize(self, value):
             return {"S": str(value)}
 
+    class TypeDeserializer:
+        def deserialize(self, value):
+            ((type_code, raw),) = value.items()
+            return int(raw) if type_code == "N" else raw
+
     class _Boto3StubTable:
         def update_item(self, *args, **kwargs):
             return {}
@@ -76,6 +81,7 @@ if "boto3" not in sys.modules:
     boto3_module.client = lambda *args, **kwargs: _Boto3ClientStub()
     dynamodb_conditions_module.Key = Key
     dynamodb_types_module.TypeSerializer = TypeSerializer
+    dynamodb_types_module.TypeDeserializer = TypeDeserializer
     dynamodb_module.conditions = dynamodb_conditions_module
     dynamodb_module.types = dynamodb_types_module
     sys.modules["boto3"] = boto3_module
@@ -130,6 +136,55 @@ class _SnapshotsTable:
         return {"Items": list(self.items)}
 
 
+def _snapshot_item(timestamp, event_id, activity_type="running", subjective_state=None):
+    item = {
+        "athlete_id": "ath_1",
+        "snapshot_key": f"{int(timestamp):010d}#{event_id}",
+        "timestamp": int(timestamp),
+        "event_id": event_id,
+        "activity_type": activity_type,
+    }
+    if subjective_state:
+        item["subjective_state"] = subjective_state
+    return item
+
+
+class _AnyKey:
+    """Key stand-in supporting the between() range condition used by recompute."""
+
+    def __init__(self, _name):
+        pass
+
+    def eq(self, *_args):
+        return self
+
+    def between(self, *_args):
+        return self
+
+    def __and__(self, _other):
+        return self
+
+
+class _PagedSnapshotsTable:
+    """Returns stored items newest first, split into pages via LastEvaluatedKey."""
+
+    def __init__(self, items, page_size):
+        self.items = sorted(items, key=lambda item: item["snapshot_key"], reverse=True)
+        self.page_size = page_size
+        self.queries = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        start = int(kwargs.get("ExclusiveStartKey", {}).get("offset", 0))
+        if kwargs.get("Limit"):
+            return {"Items": self.items[start:start + int(kwargs["Limit"])]}
+        page = self.items[start:start + self.page_size]
+        response = {"Items": page}
+        if start + self.page_size < len(self.items):
+            response["LastEvaluatedKey"] = {"offset": start + self.page_size}
+        return response
+
+
 class _RoutingDynamo:
     def __init__(self, tables):
         self.tables = tables
@@ -260,31 +315,84 @@ class TestProgressSnapshotModels(unittest.TestCase):
         self.assertIn("1735732800#msg-2", snapshot_keys)
 
     def test_recompute_progress_snapshot_writes_aggregate(self):
+        now = 1735732900
+        day = 86400
         progress = _ProgressTable()
+        snapshots = _PagedSnapshotsTable(
+            [
+                _snapshot_item(now - 100, "a", subjective_state={"energy": "ok", "soreness": "medium", "sleep": "good"}),
+                _snapshot_item(now - 2 * day, "b"),
+                _snapshot_item(now - 3 * day, "c"),
+                _snapshot_item(now - 9 * day, "d"),
+                _snapshot_item(now - 20 * day, "old"),
+            ],
+            page_size=2,
+        )
         with mock.patch.object(
             dynamodb_models,
             "dynamodb",
-            _RoutingDynamo({dynamodb_models.PROGRESS_SNAPSHOTS_TABLE: progress}),
-        ), mock.patch.object(
-            dynamodb_models,
-            "_latest_manual_snapshot",
-            return_value={
-                "timestamp": 1735732800,
-                "activity_type": "running",
-                "subjective_state": {"energy": "ok", "soreness": "medium", "sleep": "good"},
-            },
-        ), mock.patch.object(
-            dynamodb_models, "_count_recent_snapshots", side_effect=[3, 5]
-        ), mock.patch.object(
-            dynamodb_models, "_trend_direction", return_value="improving"
-        ):
-            ok = dynamodb_models.recompute_progress_snapshot("ath_1", now_epoch=1735732900)
+            _RoutingDynamo(
+                {
+                    dynamodb_models.PROGRESS_SNAPSHOTS_TABLE: progress,
+                    dynamodb_models.MANUAL_ACTIVITY_SNAPSHOTS_TABLE: snapshots,
+                }
+            ),
+        ), mock.patch.object(sys.modules["boto3.dynamodb.conditions"], "Key", _AnyKey):
+            ok = dynamodb_models.recompute_progress_snapshot("ath_1", now_epoch=now)
 
         self.assertTrue(ok)
         self.assertIsNotNone(progress.last_put)
         self.assertEqual(progress.last_put["last_7d_activity_count"], 3)
+        self.assertEqual(progress.last_put["last_14d_activity_count"], 4)
         self.assertEqual(progress.last_put["trend_direction"], "improving")
         self.assertEqual(progress.last_put["goal_alignment"], "on_track")
+        self.assertEqual(progress.last_put["last_reported_energy"], "ok")
+        # One logical query, followed across pages; no separate latest-item lookup.
+        self.assertEqual(len(snapshots.queries), 3)
+        self.assertTrue(all("Limit" not in query for query in snapshots.queries))
+
+    def test_recompute_progress_snapshot_falls_back_to_latest_for_inactive_athlete(self):
+        now = 1735732900
+        progress = _ProgressTable()
+        snapshots = _PagedSnapshotsTable([], page_size=10)
+        with mock.patch.object(
+            dynamodb_models,
+            "dynamodb",
+            _RoutingDynamo(
+                {
+                    dynamodb_models.PROGRESS_SNAPSHOTS_TABLE: progress,
+                    dynamodb_models.MANUAL_ACTIVITY_SNAPSHOTS_TABLE: snapshots,
+                }
+            ),
+        ), mock.patch.object(
+            dynamodb_models,
+            "_latest_manual_snapshot",
+            return_value=_snapshot_item(now - 30 * 86400, "old", activity_type="cycling"),
+        ), mock.patch.object(sys.modules["boto3.dynamodb.conditions"], "Key", _AnyKey):
+            ok = dynamodb_models.recompute_progress_snapshot("ath_1", now_epoch=now)
+
+        self.assertTrue(ok)
+        self.assertEqual(progress.last_put["last_7d_activity_count"], 0)
+        self.assertEqual(progress.last_put["last_14d_activity_count"], 0)
+        self.assertEqual(progress.last_put["trend_direction"], "unknown")
+        self.assertEqual(progress.last_put["last_activity_type"], "cycling")
+
+    def test_aggregate_window_bounds_match_snapshot_key_ranges(self):
+        now = 2_000_000
+        day = 86400
+        items = [
+            _snapshot_item(now + 5, "future"),
+            _snapshot_item(now, "edge_now"),
+            _snapshot_item(now - 7 * day, "edge_7d"),
+            _snapshot_item(now - 7 * day - 1, "prev_edge"),
+            _snapshot_item(now - 14 * day, "edge_14d"),
+            _snapshot_item(now - 14 * day - 1, "outside"),
+        ]
+        aggregate = dynamodb_models._aggregate_manual_snapshots(items, now)
+        self.assertEqual(aggregate["last_7d"], 2)
+        self.assertEqual(aggregate["last_14d"], 4)
+        self.assertEqual(aggregate["trend_direction"], "plateau")
+        self.assertEqual(aggregate["latest"]["event_id"], "future")
 
     def test_normalize_progress_snapshot_repairs_sparse_record(self):
         normalized = dynamodb_models.normalize_progress_snapshot(
@@ -0,0 +1,88 @@
+"""Tests for the static system-prompt prefixes and the provider prompt_cache_key."""
+
+import unittest
+
+import skills.runtime as skill_runtime
+from prompt_pack_loader import prompt_prefix_cache_key
+from skills.coaching_reasoning import prompt as coaching_prompt
+from skills.obedience_eval import prompt as obedience_prompt
+
+
+def _brief(inbound_body, **decision_overrides):
+    decision_context = {
+        "track": "main_build",
+        "phase": "build",
+        "risk_flag": "green",
+        "today_action": "do planned",
+        "clarification_needed": False,
+        "risk_recent_history": ["green", "green", "green", "green"],
+        "weeks_in_coaching": 8,
+    }
+    decision_context.update(decision_overrides)
+    return {
+        "reply_mode": "normal_coaching",
+        "athlete_context": {
+            "goal_summary": "Half marathon in 10 weeks",
+            "experience_level": "intermediate",
+            "structure_preference": "flexibility",
+            "primary_sport": "running",
+        },
+        "decision_context": decision_context,
+        "delivery_context": {"inbound_body": inbound_body},
+    }
+
+
+class TestCoachingReasoningPromptParts(unittest.TestCase):
+    def test_prefix_is_shared_and_suffix_carries_turn_state(self):
+        first_prefix, first_suffix = coaching_prompt.build_system_prompt_parts(
+            _brief("Solid week — legs feel good."),
+            continuity_context={"weeks_in_current_block": 2},
+        )
+        second_prefix, second_suffix = coaching_prompt.build_system_prompt_parts(
+            _brief("Legs feel good after a steady week."),
+            continuity_context={"weeks_in_current_block": 5},
+        )
+        self.assertIs(first_prefix, second_prefix)
+        self.assertNotEqual(first_suffix, second_suffix)
+        self.assertIn("Coaching methodology:", first_prefix)
+        self.assertNotIn("weeks_in_current_block", first_prefix)
+
+    def test_build_system_prompt_is_prefix_plus_suffix(self):
+        brief = _brief("Solid week — legs feel good.")
+        prefix, suffix = coaching_prompt.build_system_prompt_parts(brief)
+        self.assertEqual(coaching_prompt.build_system_prompt(brief), prefix + suffix)
+
+
+class TestObedienceEvalPromptParts(unittest.TestCase):
+    def test_prefix_does_not_depend_on_directive(self):
+        prefix, suffix = obedience_prompt.build_system_prompt_parts(
+            {"main_message": "Hold steady this week.", "avoid": ["tempo runs"]},
+            {"current_phase": "base"},
+        )
+        self.assertEqual(prefix, obedience_prompt.STATIC_PROMPT_PREFIX)
+        self.assertIn("Hold steady this week.", suffix)
+        self.assertNotIn("Hold steady this week.", prefix)
+
+
+class TestPromptCacheKey(unittest.TestCase):
+    def test_key_is_stable_per_skill_and_prefix(self):
+        key = prompt_prefix_cache_key("obedience_eval", "prefix")
+        self.assertEqual(key, prompt_prefix_cache_key("obedience_eval", "prefix"))
+        self.assertNotEqual(key, prompt_prefix_cache_key("obedience_eval", "other prefix"))
+        self.assertTrue(key.startswith("obedience_eval:"))
+
+    def test_request_includes_key_only_when_given(self):
+        kwargs = {
+            "model_name": "gpt-test",
+            "system_prompt": "system",
+            "user_content": "user",
+            "schema_name": "test_schema",
+            "schema": {"type": "object"},
+        }
+        self.assertNotIn("prompt_cache_key", skill_runtime._json_schema_request(**kwargs))
+        request = skill_runtime._json_schema_request(**kwargs, prompt_cache_key="skill:abc")
+        self.assertEqual(request["prompt_cache_key"], "skill:abc")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Corpus tests for the quoted-history and signature splitter."""
+
+import json
+import unittest
+from email.message import EmailMessage
+from unittest import mock
+
+import email_processor
+from _test_reply_corpus import REPLY_CORPUS
+from email_processor import EmailProcessor
+from reply_parser import parse_reply
+
+
+class TestReplyCorpus(unittest.TestCase):
+    def test_corpus(self):
+        for case in REPLY_CORPUS:
+            with self.subTest(case["name"]):
+                parsed = parse_reply(case["body"])
+                self.assertEqual(parsed.new_text, case["new_text"])
+                if case["quoted_fragment"] is None:
+                    self.assertEqual(parsed.quoted_text, "")
+                else:
+                    self.assertIn(case["quoted_fragment"], parsed.quoted_text)
+                    self.assertNotIn(case["quoted_fragment"], parsed.new_text)
+                self.assertEqual(parsed.signature, case.get("signature", ""))
+                if "disclaimer_fragment" in case:
+                    self.assertIn(case["disclaimer_fragment"], parsed.disclaimer)
+                else:
+                    self.assertEqual(parsed.disclaimer, "")
+
+    def test_long_thread_keeps_only_the_new_text(self):
+        history = "\n".join(f"> > line {index} of an older reply" for index in range(5000))
+        body = "Short update.\n\nOn Mon, Mar 3, 2025 at 9:14 AM Coach <coach@geniml.com> wrote:\n" + history
+        parsed = parse_reply(body)
+        self.assertEqual(parsed.new_text, "Short update.")
+        self.assertTrue(parsed.has_quoted_history)
+
+
+def _ses_notification(content):
+    return {
+        "mail": {
+            "source": "runner@example.com",
+            "destination": ["coach@geniml.com"],
+            "messageId": "msg-1",
+            "commonHeaders": {"subject": "Re: Week 4", "date": "Mon, 3 Mar 2025 10:00:00 +0000"},
+        },
+        "content": content,
+    }
+
+
+class TestEmailProcessorReplySplitting(unittest.TestCase):
+    def setUp(self):
+        message = EmailMessage()
+        message["Subject"] = "Re: Week 4"
+        message.set_content(
+            "Tempo done.\n\nOn Mon, Mar 3, 2025 at 9:14 AM Coach <coach@geniml.com> wrote:\n> Keep Tuesday easy.\n"
+        )
+        self.raw = message.as_string()
+
+    def test_body_is_new_text_and_history_is_exposed(self):
+        with mock.patch.object(email_processor, "ENABLE_REPLY_QUOTE_STRIPPING", True):
+            email_data = EmailProcessor.parse_ses_notification(json.dumps(_ses_notification(self.raw)))
+        self.assertEqual(email_data["body"], "Tempo done.")
+        self.assertIn("> Keep Tuesday easy.", email_data["quoted_body"])
+
+    def test_all_quoted_body_falls_back_to_the_full_text(self):
+        message = EmailMessage()
+        message.set_content("On Mon, Mar 3, 2025 at 9:14 AM Coach <coach@geniml.com> wrote:\n> Keep Tuesday easy.\n")
+        with mock.patch.object(email_processor, "ENABLE_REPLY_QUOTE_STRIPPING", True):
+            email_data = EmailProcessor.parse_ses_notification(_ses_notification(message.as_string()))
+        self.assertIn("Keep Tuesday easy.", email_data["body"])
+
+    def test_disabled_keeps_the_legacy_body(self):
+        email_data = EmailProcessor.parse_ses_notification(_ses_notification(self.raw))
+        self.assertIn("> Keep Tuesday easy.", email_data["body"])
+        self.assertNotIn("quoted_body", email_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+"""Tests for per-request latency telemetry and its EMF record."""
+
+import logging
+import types
+import unittest
+from unittest import mock
+
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+import app
+import skills.runtime as skill_runtime
+import telemetry
+from skills import response_cache
+from stage_executor import PipelineStage, run_stage_dag
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Response:
+    def __init__(self, content, usage=None):
+        self.output_text = content
+        self.usage = usage
+
+
+class _ClientStub:
+    def __init__(self, responses):
+        self._queue = list(responses)
+        self.responses = self
+
+    def create(self, **_kwargs):
+        return self._queue.pop(0)
+
+
+class _Events:
+    def __init__(self):
+        self.handlers = {}
+
+    def register(self, event_name, handler, unique_id=None):
+        self.handlers[event_name] = handler
+
+
+def _collect(**properties):
+    records = []
+    return records, telemetry.request_telemetry(enabled=True, emit=records.append, **properties)
+
+
+class TestRequestTelemetry(unittest.TestCase):
+    def test_helpers_are_no_ops_without_a_collector(self):
+        with telemetry.span("stage"):
+            telemetry.increment("counter")
+        telemetry.record_llm_usage("gpt-test", _Response("{}", {"input_tokens": 3}))
+        self.assertIsNone(telemetry.get_active_telemetry())
+
+    def test_disabled_collector_yields_none_and_emits_nothing(self):
+        records = []
+        with telemetry.request_telemetry(enabled=False, emit=records.append) as collector:
+            telemetry.increment("counter")
+        self.assertIsNone(collector)
+        self.assertEqual(records, [])
+
+    def test_one_emf_record_per_request(self):
+        records, context = _collect(aws_request_id="req-1")
+        with context:
+            with telemetry.span("send_reply"):
+                pass
+            with telemetry.span("send_reply"):
+                pass
+            telemetry.increment("llm_cache_hits")
+            telemetry.set_property("result", "reply_sent")
+
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record["aws_request_id"], "req-1")
+        self.assertEqual(record["result"], "reply_sent")
+        self.assertEqual(record["llm_cache_hits"], 1)
+        self.assertEqual(record["stages"]["send_reply"]["count"], 2)
+        directive = record["_aws"]["CloudWatchMetrics"][0]
+        self.assertEqual(directive["Dimensions"], [["Service"]])
+        metrics = {metric["Name"]: metric["Unit"] for metric in directive["Metrics"]}
+        self.assertEqual(metrics["send_reply_ms"], "Milliseconds")
+        self.assertEqual(metrics["llm_cache_hits"], "Count")
+        for name in metrics:
+            self.assertIn(name, record)
+
+    def test_record_is_emitted_when_the_request_raises(self):
+        records, context = _collect()
+        with self.assertRaises(RuntimeError):
+            with context:
+                raise RuntimeError("boom")
+        self.assertTrue(records[0]["error"])
+
+    def test_llm_usage_accepts_responses_and_chat_completion_shapes(self):
+        records, context = _collect()
+        with context:
+            telemetry.record_llm_usage(
+                "gpt-a",
+                _Response("{}", {"input_tokens": 100, "output_tokens": 20, "input_tokens_details": {"cached_tokens": 64}}),
+            )
+            telemetry.record_llm_usage(
+                "gpt-b",
+                _Response("{}", types.SimpleNamespace(prompt_tokens=10, completion_tokens=5)),
+            )
+        record = records[0]
+        self.assertEqual(record["llm_input_tokens"], 110)
+        self.assertEqual(record["llm_output_tokens"], 25)
+        self.assertEqual(record["llm_cached_input_tokens"], 64)
+        self.assertEqual(record["llm_usage"]["gpt-b"]["calls"], 1)
+
+    def test_pipeline_stage_threads_report_to_the_request_collector(self):
+        def _run(_upstream):
+            with telemetry.span("inner"):
+                return 1
+
+        records, context = _collect()
+        with context:
+            run_stage_dag([PipelineStage(name="a", run=_run), PipelineStage(name="b", run=_run)])
+        stages = records[0]["stages"]
+        self.assertEqual(stages["inner"]["count"], 2)
+        self.assertIn("stage.a", stages)
+        self.assertIn("stage.b", stages)
+
+
+class TestAwsClientInstrumentation(unittest.TestCase):
+    def test_hooks_time_calls_and_count_retries(self):
+        events = _Events()
+        client = types.SimpleNamespace(meta=types.SimpleNamespace(events=events))
+        self.assertIs(telemetry.instrument_aws_client(client), client)
+        model = types.SimpleNamespace(name="GetItem", service_model=types.SimpleNamespace(service_name="dynamodb"))
+
+        records, context = _collect()
+        with context:
+            request_context = {}
+            self.assertIsNone(events.handlers["before-call"](model=model, context=request_context))
+            events.handlers["after-call"](
+                model=model, context=request_context, parsed={"ResponseMetadata": {"RetryAttempts": 2}}
+            )
+        record = records[0]
+        self.assertEqual(record["stages"]["dynamodb.GetItem"]["count"], 1)
+        self.assertEqual(record["aws_retries"], 2)
+
+    def test_clients_without_an_event_system_are_left_alone(self):
+        client = types.SimpleNamespace()
+        self.assertIs(telemetry.instrument_aws_client(client), client)
+
+
+class TestExecuteJsonSchemaTelemetry(unittest.TestCase):
+    def setUp(self):
+        response_cache.set_response_cache(None)
+        self.addCleanup(response_cache.reset_response_cache)
+
+    def test_llm_span_usage_and_retries(self):
+        client = _ClientStub(
+            [
+                _Response("not json", {"input_tokens": 50, "output_tokens": 4}),
+                _Response('{"ok": true}', {"input_tokens": 50, "output_tokens": 6}),
+            ]
+        )
+        records, context = _collect()
+        with mock.patch.object(skill_runtime, "require_openai_client", return_value=client), context:
+            payload, _ = skill_runtime.execute_json_schema(
+                logger=_LOGGER,
+                model_name="gpt-test",
+                system_prompt="system",
+                user_content="user",
+                schema_name="coaching_reasoning_response",
+                schema={"type": "object"},
+                disabled_message="disabled",
+                warning_log_name="test",
+                retries=1,
+                require_live_llm=False,
+                use_cache=False,
+            )
+        self.assertEqual(payload, {"ok": True})
+        record = records[0]
+        self.assertEqual(record["stages"]["llm.coaching_reasoning_response"]["count"], 2)
+        self.assertEqual(record["llm_calls"], 2)
+        self.assertEqual(record["llm_retries"], 1)
+        self.assertEqual(record["llm_invalid_json"], 1)
+        self.assertEqual(record["llm_input_tokens"], 100)
+
+
+class TestInboundEmailTelemetry(unittest.TestCase):
+    def test_processed_email_emits_outcome_and_status(self):
+        records = []
+
+        def _handle(email_data, aws_request_id):
+            app._log_inbound_outcome(email_data["sender"], False, "unregistered_sender", aws_request_id)
+            return {"statusCode": 200, "body": "ok"}
+
+        with mock.patch.object(app, "_handle_inbound_email", side_effect=_handle), mock.patch.object(
+            telemetry, "ENABLE_REQUEST_TELEMETRY", True
+        ), mock.patch.object(telemetry, "_print_record", side_effect=records.append):
+            app._process_inbound_email({"sender": "a@example.com"}, "req-9")
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["result"], "unregistered_sender")
+        self.assertEqual(records[0]["status_code"], 200)
+        self.assertEqual(records[0]["aws_request_id"], "req-9")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -289,6 +289,51 @@ class TestBuildResponseBrief(unittest.TestCase):
         self.assertTrue(brief.memory_context["memory_available"])
 
 
+class TestBuildResponseBriefTokenBudget(unittest.TestCase):
+    def setUp(self):
+        self.memory_context = {
+            "sectioned_memory": sectioned_from_flat_memory_notes(
+                [
+                    {"fact_type": "goal", "fact_key": "goal:half", "summary": "Half marathon in October"},
+                    {"fact_type": "preference", "fact_key": "preference:a", "summary": "Prefers concise bullets"},
+                    {"fact_type": "preference", "fact_key": "preference:b", "summary": "Likes a Sunday recap"},
+                ]
+            ),
+            "continuity_summary": _continuity_summary(),
+        }
+
+    def _brief(self, **kwargs):
+        return build_response_brief(
+            athlete_id="ath_budget",
+            reply_kind="coaching_reply",
+            inbound_subject="Next week",
+            selected_model_name="gpt-5-nano",
+            profile_after={"primary_goal": "Half marathon"},
+            missing_profile_fields=[],
+            plan_summary=None,
+            rule_engine_decision=None,
+            memory_context=self.memory_context,
+            **kwargs,
+        )
+
+    def test_generous_budget_matches_unbudgeted_brief(self):
+        with self.assertLogs("response_generation_assembly", level="INFO") as logs:
+            budgeted = self._brief(token_budget=100_000)
+        self.assertEqual(budgeted.to_dict(), self._brief().to_dict())
+        self.assertIn("response_brief_budget", logs.output[0])
+        self.assertIn("sectioned_memory_included=True", logs.output[0])
+
+    def test_tight_budget_drops_raw_memory_then_bounded_facts(self):
+        with self.assertLogs("response_generation_assembly", level="INFO") as logs:
+            brief = self._brief(token_budget=0, reserved_tokens=500)
+        memory = brief.memory_context
+        self.assertNotIn("sectioned_memory", memory)
+        self.assertNotIn("preference_facts", memory)
+        self.assertEqual(memory["priority_facts"], ["Half marathon in October"])
+        self.assertEqual(memory["continuity_focus"], "Athlete is rebuilding consistency.")
+        self.assertIn("dropped_preference=2", logs.output[0])
+
+
 class TestBuildResponseGenerationInput(unittest.TestCase):
     def test_strips_strategist_only_fields_before_writer_validation(self):
         brief = ResponseBrief.from_dict(
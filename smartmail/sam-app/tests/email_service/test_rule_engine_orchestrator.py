@@ -73,6 +73,7 @@ class TestRunRuleEngineForWeek(unittest.TestCase):
         self.assertEqual(output.phase, "base")
         decisions = update_state.call_args.args[2]
         self.assertEqual(decisions["phase_upgrade_streak"], 1)
+        self.assertEqual(update_state.call_args.kwargs["current_state"]["phase_upgrade_streak"], 0)
 
     def test_second_consecutive_upgrade_allows_phase_advance(self):
         with mock.patch.object(
@@ -309,3 +310,80 @@ class TestRunRuleEngineForWeek(unittest.TestCase):
             )
         self.assertIn("subject_hint", output.next_email_payload)
         self.assertIn("sessions", output.next_email_payload)
+
+
+_BATCH_ROWS = [
+    (
+        {"goal_category": "general_consistency", "main_sport_current": "run", "time_bucket": "4_6h"},
+        {"has_upcoming_event": False, "days_available": 4, "performance_intent_this_week": True},
+        {
+            "phase_risk_time_last_6": [{"week_start": "2026-03-01", "phase": "base", "risk_flag": "green"}],
+            "phase_upgrade_streak": 1,
+        },
+    ),
+    (
+        {"goal_category": "event_8_16w", "time_bucket": "4_6h"},
+        {"has_upcoming_event": True, "event_date": None, "days_available": 4},
+        {},
+    ),
+    (
+        {"goal_category": "general_consistency", "time_bucket": "4_6h"},
+        {"has_upcoming_event": False, "days_available": 1},
+        {"weeks_since_deload": 3},
+    ),
+    (
+        {"goal_category": "general_consistency", "time_bucket": "4_6h"},
+        {"has_upcoming_event": False, "days_available": 4, "week_chaotic": True, "energy_score": 9},
+        {},
+    ),
+]
+
+
+class TestRunRuleEngineBatch(unittest.TestCase):
+    def test_batch_matches_scalar_path(self):
+        today = date(2026, 3, 4)
+        profiles, checkins, rule_states = (list(column) for column in zip(*_BATCH_ROWS))
+        decisions = rule_engine_orchestrator.run_rule_engine_batch(profiles, checkins, rule_states, today)
+
+        self.assertEqual(len(decisions), len(_BATCH_ROWS))
+        for (profile, checkin, rule_state), decision in zip(_BATCH_ROWS, decisions):
+            with mock.patch.object(
+                rule_engine_orchestrator, "load_rule_state", return_value=rule_state
+            ), mock.patch.object(rule_engine_orchestrator, "update_rule_state", return_value={}) as update_state:
+                output = rule_engine_orchestrator.run_rule_engine_for_week(
+                    athlete_id="ath_1", profile=profile, checkin=checkin, today_date=today
+                )
+            self.assertEqual(decision["phase"], output.phase)
+            self.assertEqual(decision["risk_flag"], output.risk_flag)
+            self.assertEqual(decision["track"], output.track)
+            self.assertEqual(decision["today_action"], output.today_action)
+            self.assertEqual(decision["plan_update_status"], output.plan_update_status)
+            persisted = update_state.call_args.args[2]
+            for field_name, value in decision["state_updates"].items():
+                self.assertEqual(persisted[field_name], value)
+
+    def test_identical_rows_are_evaluated_once(self):
+        profile, checkin, rule_state = _BATCH_ROWS[0]
+        with mock.patch.object(
+            rule_engine_orchestrator,
+            "evaluate_week_decision",
+            wraps=rule_engine_orchestrator.evaluate_week_decision,
+        ) as evaluate:
+            decisions = rule_engine_orchestrator.run_rule_engine_batch(
+                [profile] * 50, [checkin] * 50, [rule_state] * 50, date(2026, 3, 4)
+            )
+        self.assertEqual(evaluate.call_count, 1)
+        self.assertEqual(len(decisions), 50)
+        decisions[0]["adjustments"].append("mutated")
+        self.assertNotIn("mutated", decisions[1]["adjustments"])
+
+    def test_per_row_dates_and_length_checks(self):
+        profile, checkin, rule_state = _BATCH_ROWS[1]
+        decisions = rule_engine_orchestrator.run_rule_engine_batch(
+            [profile, profile], [checkin, checkin], [rule_state, rule_state], [date(2026, 3, 4), date(2026, 9, 1)]
+        )
+        self.assertEqual(len(decisions), 2)
+        with self.assertRaises(rule_engine_orchestrator.RuleEngineOrchestratorError):
+            rule_engine_orchestrator.run_rule_engine_batch([profile], [], [rule_state], date(2026, 3, 4))
+        with self.assertRaises(rule_engine_orchestrator.RuleEngineOrchestratorError):
+            rule_engine_orchestrator.run_rule_engine_batch([profile], [checkin], [rule_state], [])
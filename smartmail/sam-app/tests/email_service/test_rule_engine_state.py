@@ -4,6 +4,12 @@ from decimal import Decimal
 import unittest
 from unittest import mock
 
+from _test_support import install_boto_stubs
+
+install_boto_stubs()
+
+from botocore.exceptions import ClientError
+
 import rule_engine_state
 
 
@@ -24,6 +30,20 @@ class _RuleStateTable:
         self.last_put_item = dict(item)
         return {}
 
+    def update_item(self, **kwargs):
+        self.update_calls = getattr(self, "update_calls", []) + [kwargs]
+        athlete_id = kwargs["Key"]["athlete_id"]
+        item = dict(self.items.get(athlete_id) or {"athlete_id": athlete_id})
+        values = kwargs["ExpressionAttributeValues"]
+        if item.get("state_version", 0) != values[":expected_version"]:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        names = kwargs["ExpressionAttributeNames"]
+        for clause in kwargs["UpdateExpression"][len("SET "):].split(", "):
+            name_token, value_token = clause.split(" = ")
+            item[names[name_token]] = values[value_token]
+        self.items[athlete_id] = item
+        return {}
+
 
 class _RoutingDynamo:
     def __init__(self, table):
@@ -172,3 +192,73 @@ class TestRuleStateStore(unittest.TestCase):
     def test_serializer_rejects_non_finite_floats(self):
         with self.assertRaises(rule_engine_state.RuleEngineStateError):
             rule_engine_state._serialize_dynamodb_payload({"bad": float("nan")})
+
+
+class TestRuleStateElidedWrite(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.table = _RuleStateTable()
+        patcher = mock.patch.object(rule_engine_state, "dynamodb", _RoutingDynamo(self.table))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.inputs = {"week_start": "2026-03-01", "pain_score": 0.1, "planned_sessions_count": 4}
+        self.decisions = {"phase": "base", "risk_flag": "green", "weeks_since_deload": 1}
+        rule_engine_state.update_rule_state("ath_1", self.inputs, self.decisions)
+
+    def test_reprocessed_week_skips_write(self):
+        loaded = rule_engine_state.load_rule_state("ath_1")
+        with mock.patch.object(rule_engine_state, "load_rule_state") as load:
+            state = rule_engine_state.update_rule_state(
+                "ath_1", self.inputs, self.decisions, current_state=loaded
+            )
+        load.assert_not_called()
+        self.assertEqual(getattr(self.table, "update_calls", []), [])
+        self.assertEqual(state["weeks_since_deload"], 1)
+
+    def test_new_week_writes_only_changed_attributes(self):
+        loaded = rule_engine_state.load_rule_state("ath_1")
+        rule_engine_state.update_rule_state(
+            "ath_1",
+            dict(self.inputs, week_start="2026-03-08"),
+            dict(self.decisions, weeks_since_deload=2),
+            current_state=loaded,
+        )
+        call = self.table.update_calls[0]
+        written = set(call["ExpressionAttributeNames"].values()) - {"last_updated_week_start", "state_version"}
+        self.assertIn("weekly_signals_last_4", written)
+        self.assertIn("weeks_since_deload", written)
+        self.assertNotIn("phase_upgrade_streak", written)
+        self.assertNotIn("last_main_sport", written)
+        self.assertEqual(call["ExpressionAttributeValues"][":expected_version"], 1)
+        self.assertEqual(call["ExpressionAttributeValues"][":next_version"], 2)
+        state = rule_engine_state.load_rule_state("ath_1")
+        self.assertEqual(state["last_updated_week_start"], "2026-03-08")
+        self.assertEqual(len(state["phase_risk_time_last_6"]), 2)
+
+    def test_stale_state_falls_back_to_reload(self):
+        stale = rule_engine_state.load_rule_state("ath_1")
+        rule_engine_state.update_rule_state("ath_1", dict(self.inputs, week_start="2026-03-08"), self.decisions)
+        rule_engine_state.update_rule_state(
+            "ath_1", dict(self.inputs, week_start="2026-03-15"), self.decisions, current_state=stale
+        )
+        state = rule_engine_state.load_rule_state("ath_1")
+        self.assertEqual(
+            [entry["week_start"] for entry in state["phase_risk_time_last_6"]],
+            ["2026-03-01", "2026-03-08", "2026-03-15"],
+        )
+
+    def test_concurrent_writer_on_the_same_week_is_not_mixed_in(self):
+        base = rule_engine_state.load_rule_state("ath_1")
+        next_week = dict(self.inputs, week_start="2026-03-08")
+        rule_engine_state.update_rule_state(
+            "ath_1", next_week, dict(self.decisions, weeks_since_deload=2), current_state=base
+        )
+        state = rule_engine_state.update_rule_state(
+            "ath_1", dict(next_week, pain_score=4), dict(self.decisions, phase_upgrade_streak=1), current_state=base
+        )
+        self.assertEqual(len(self.table.update_calls), 2)
+        stored = rule_engine_state.load_rule_state("ath_1")
+        self.assertEqual(stored["state_version"], 3)
+        self.assertEqual(stored, state)
+        self.assertEqual(stored["weekly_signals_last_4"][-1]["pain_score"], 4.0)
+        self.assertEqual(stored["phase_upgrade_streak"], 1)
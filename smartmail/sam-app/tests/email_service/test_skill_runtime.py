@@ -0,0 +1,168 @@
+"""Unit tests for pooled client reuse and the async path in skills.runtime."""
+
+import asyncio
+import logging
+import unittest
+from unittest import mock
+
+import skills.runtime as skill_runtime
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Response:
+    def __init__(self, content: str):
+        self.output_text = content
+
+
+class _SyncClient:
+    def __init__(self, contents, **kwargs):
+        self._contents = contents
+        self.kwargs = kwargs
+        self.responses = self
+
+    def create(self, **_kwargs):
+        return _Response(self._contents.pop(0) if self._contents else "{}")
+
+
+class _AsyncClient(_SyncClient):
+    async def create(self, **_kwargs):
+        await asyncio.sleep(0)
+        return _Response(self._contents.pop(0) if self._contents else "{}")
+
+
+def _stub_openai(contents, *, with_http_client=False):
+    shared_contents = list(contents)
+    built = []
+
+    def _sync_factory(**kwargs):
+        client = _SyncClient(shared_contents, **kwargs)
+        built.append(client)
+        return client
+
+    def _async_factory(**kwargs):
+        client = _AsyncClient(shared_contents, **kwargs)
+        built.append(client)
+        return client
+
+    attrs = {"OpenAI": staticmethod(_sync_factory), "AsyncOpenAI": staticmethod(_async_factory), "built": built}
+    if with_http_client:
+        attrs["DefaultHttpxClient"] = staticmethod(lambda **kwargs: ("sync_http", kwargs))
+        attrs["DefaultAsyncHttpxClient"] = staticmethod(lambda **kwargs: ("async_http", kwargs))
+    return type("OpenAIStubModule", (), attrs)
+
+
+def _execute_kwargs():
+    return {
+        "logger": _LOGGER,
+        "model_name": "gpt-test",
+        "system_prompt": "system",
+        "user_content": "user",
+        "schema_name": "test_schema",
+        "schema": {"type": "object"},
+        "disabled_message": "disabled",
+        "warning_log_name": "test",
+        "require_live_llm": False,
+    }
+
+
+class TestPooledClient(unittest.TestCase):
+    def setUp(self):
+        skill_runtime.reset_openai_clients()
+        self.addCleanup(skill_runtime.reset_openai_clients)
+
+    def test_sync_client_is_reused_across_calls(self):
+        stub = _stub_openai(['{"a":1}', '{"a":2}'])
+        with mock.patch.object(skill_runtime, "openai", stub):
+            first, _ = skill_runtime.execute_json_schema(**_execute_kwargs())
+            second, _ = skill_runtime.execute_json_schema(**_execute_kwargs())
+
+        self.assertEqual((first, second), ({"a": 1}, {"a": 2}))
+        self.assertEqual(len(stub.built), 1)
+
+    def test_client_is_rebuilt_when_module_changes(self):
+        first_stub = _stub_openai([])
+        second_stub = _stub_openai([])
+        with mock.patch.object(skill_runtime, "openai", first_stub):
+            skill_runtime.require_openai_client(require_live_llm=False, disabled_message="")
+        with mock.patch.object(skill_runtime, "openai", second_stub):
+            skill_runtime.require_openai_client(require_live_llm=False, disabled_message="")
+
+        self.assertEqual(len(first_stub.built), 1)
+        self.assertEqual(len(second_stub.built), 1)
+
+    def test_pooled_http_client_carries_connection_limits(self):
+        stub = _stub_openai([], with_http_client=True)
+        with mock.patch.object(skill_runtime, "openai", stub), mock.patch.dict(
+            "os.environ", {"OPENAI_MAX_CONNECTIONS": "7", "OPENAI_MAX_KEEPALIVE_CONNECTIONS": "3"}
+        ):
+            client = skill_runtime.require_openai_client(require_live_llm=False, disabled_message="")
+
+        label, http_kwargs = client.kwargs["http_client"]
+        self.assertEqual(label, "sync_http")
+        self.assertEqual(http_kwargs["limits"].max_connections, 7)
+        self.assertEqual(http_kwargs["limits"].max_keepalive_connections, 3)
+
+    def test_disabled_live_calls_raise_before_building_client(self):
+        stub = _stub_openai([])
+        with mock.patch.object(skill_runtime, "openai", stub), mock.patch.object(
+            skill_runtime, "live_llm_enabled", return_value=False
+        ):
+            with self.assertRaisesRegex(RuntimeError, "disabled"):
+                skill_runtime.require_openai_client(require_live_llm=True, disabled_message="disabled")
+        self.assertEqual(stub.built, [])
+
+
+class TestExecuteJsonSchemaAsync(unittest.TestCase):
+    def setUp(self):
+        skill_runtime.reset_openai_clients()
+        self.addCleanup(skill_runtime.reset_openai_clients)
+
+    def test_concurrent_calls_share_one_async_client(self):
+        stub = _stub_openai(['{"n":1}', '{"n":2}'])
+
+        async def _run():
+            return await asyncio.gather(
+                skill_runtime.execute_json_schema_async(**_execute_kwargs()),
+                skill_runtime.execute_json_schema_async(**_execute_kwargs()),
+            )
+
+        with mock.patch.object(skill_runtime, "openai", stub):
+            results = asyncio.run(_run())
+
+        self.assertEqual(sorted(payload["n"] for payload, _ in results), [1, 2])
+        self.assertEqual(len(stub.built), 1)
+
+    def test_new_event_loop_gets_new_async_client(self):
+        stub = _stub_openai([])
+
+        async def _client():
+            return skill_runtime.require_async_openai_client(require_live_llm=False, disabled_message="")
+
+        with mock.patch.object(skill_runtime, "openai", stub):
+            first = asyncio.run(_client())
+            second = asyncio.run(_client())
+
+        self.assertIsNot(first, second)
+
+    def test_async_workflow_wraps_invalid_json_in_proposal_error(self):
+        stub = _stub_openai(["not-json", "still-not-json"])
+
+        class _ProposalError(Exception):
+            pass
+
+        with mock.patch.object(skill_runtime, "openai", stub):
+            with self.assertRaisesRegex(_ProposalError, "demo_failed"):
+                asyncio.run(
+                    skill_runtime.run_validated_json_schema_workflow_async(
+                        **_execute_kwargs(),
+                        validate_payload=lambda payload: payload,
+                        workflow_label="demo",
+                        proposal_error_factory=_ProposalError,
+                        retries=1,
+                    )
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
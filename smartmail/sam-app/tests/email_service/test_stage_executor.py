@@ -0,0 +1,118 @@
+"""Tests for the pipeline stage DAG executor."""
+
+import contextvars
+import threading
+import time
+import unittest
+
+from stage_executor import (
+    STAGE_CANCELLED,
+    STAGE_COMPLETED,
+    STAGE_FAILED,
+    STAGE_TIMED_OUT,
+    PipelineStage,
+    StageExecutorError,
+    run_stage_dag,
+    summarize_stage_results,
+)
+
+_request_marker: contextvars.ContextVar = contextvars.ContextVar("request_marker", default=None)
+
+
+class TestRunStageDag(unittest.TestCase):
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def _stage(value):
+            def _run(_upstream):
+                barrier.wait()
+                return value
+
+            return _run
+
+        results = run_stage_dag(
+            [PipelineStage(name=n, run=_stage(n)) for n in ("a", "b", "c")],
+            max_workers=3,
+        )
+
+        self.assertEqual({name: r.value for name, r in results.items()}, {"a": "a", "b": "b", "c": "c"})
+        self.assertTrue(all(r.status == STAGE_COMPLETED for r in results.values()))
+
+    def test_dependent_stage_receives_upstream_values(self):
+        results = run_stage_dag(
+            [
+                PipelineStage(name="sum", run=lambda up: up["a"] + up["b"], depends_on=("a", "b")),
+                PipelineStage(name="a", run=lambda _up: 1),
+                PipelineStage(name="b", run=lambda _up: 2),
+            ]
+        )
+
+        self.assertEqual(list(results), ["sum", "a", "b"])
+        self.assertEqual(results["sum"].value, 3)
+
+    def test_failure_cancels_downstream_only(self):
+        def _boom(_upstream):
+            raise RuntimeError("boom")
+
+        results = run_stage_dag(
+            [
+                PipelineStage(name="bad", run=_boom),
+                PipelineStage(name="child", run=lambda _up: "never", depends_on=("bad",)),
+                PipelineStage(name="other", run=lambda _up: "ok"),
+            ]
+        )
+
+        self.assertEqual(results["bad"].status, STAGE_FAILED)
+        self.assertIsInstance(results["bad"].error, RuntimeError)
+        self.assertEqual(results["child"].status, STAGE_CANCELLED)
+        self.assertEqual(results["other"].value, "ok")
+
+    def test_timeout_abandons_slow_stage(self):
+        release = threading.Event()
+        started = time.monotonic()
+        results = run_stage_dag(
+            [
+                PipelineStage(name="slow", run=lambda _up: release.wait(5), timeout_seconds=0.05),
+                PipelineStage(name="after", run=lambda _up: "never", depends_on=("slow",)),
+                PipelineStage(name="fast", run=lambda _up: "ok"),
+            ]
+        )
+        release.set()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(results["slow"].status, STAGE_TIMED_OUT)
+        self.assertEqual(results["after"].status, STAGE_CANCELLED)
+        self.assertEqual(results["fast"].status, STAGE_COMPLETED)
+
+    def test_stages_see_caller_context(self):
+        token = _request_marker.set("req-1")
+        try:
+            results = run_stage_dag([PipelineStage(name="read", run=lambda _up: _request_marker.get())])
+        finally:
+            _request_marker.reset(token)
+
+        self.assertEqual(results["read"].value, "req-1")
+
+    def test_rejects_malformed_graphs(self):
+        noop = lambda _up: None  # noqa: E731
+        with self.assertRaises(StageExecutorError):
+            run_stage_dag([PipelineStage(name="a", run=noop), PipelineStage(name="a", run=noop)])
+        with self.assertRaises(StageExecutorError):
+            run_stage_dag([PipelineStage(name="a", run=noop, depends_on=("missing",))])
+        with self.assertRaises(StageExecutorError):
+            run_stage_dag(
+                [
+                    PipelineStage(name="a", run=noop, depends_on=("b",)),
+                    PipelineStage(name="b", run=noop, depends_on=("a",)),
+                ]
+            )
+
+    def test_summarize_stage_results(self):
+        results = run_stage_dag([PipelineStage(name="a", run=lambda _up: 1)])
+        summary = summarize_stage_results(results)
+        self.assertEqual(len(summary), 1)
+        self.assertTrue(summary[0].startswith("a:completed:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -50,6 +50,11 @@ if "boto3" not in sys.modules:
         def serialize(self, value):
             return {"S": str(value)}
 
+    class TypeDeserializer:
+        def deserialize(self, value):
+            ((type_code, raw),) = value.items()
+            return int(raw) if type_code == "N" else raw
+
     class _Boto3Stub:
         def get_item(self, *args, **kwargs):
             return {}
@@ -78,6 +83,7 @@ if "boto3" not in sys.modules:
     boto3_module.client = _client
     dynamodb_conditions_module.Key = Key
     dynamodb_types_module.TypeSerializer = TypeSerializer
+    dynamodb_types_module.TypeDeserializer = TypeDeserializer
     dynamodb_module.conditions = dynamodb_conditions_module
     dynamodb_module.types = dynamodb_types_module
     sys.modules["boto3"] = boto3_module
@@ -116,18 +122,76 @@ import dynamodb_models
 import rate_limits
 
 
+def _wire_item(item):
+    # ClientError shapes from the Table resource stay in low-level wire format.
+    return {
+        name: {"N": str(value)} if isinstance(value, int) else {"S": str(value)}
+        for name, value in item.items()
+    }
+
+
+def _conditional_check_failed(item=None):
+    error_response = {"Error": {"Code": "ConditionalCheckFailedException"}}
+    if item:
+        error_response["Item"] = _wire_item(item)
+    return ClientError(error_response, "UpdateItem")
+
+
 class _InMemoryRateLimitsTable:
-    def __init__(self):
+    def __init__(self, *, return_item_on_condition_failure=True):
         self._lock = threading.Lock()
         self._items = {}
+        self.return_item_on_condition_failure = return_item_on_condition_failure
+        self.calls = []
 
     def get_item(self, Key, ConsistentRead=False):  # noqa: N803
         with self._lock:
+            self.calls.append("get_item")
             email = Key["email"]
             if email not in self._items:
                 return {}
             return {"Item": copy.deepcopy(self._items[email])}
 
+    def _claim_quota(self, item, condition, values, returns_old):
+        # Minimal evaluator for the three claim_verified_quota_slot writes.
+        def fail():
+            raise _conditional_check_failed(item if returns_old else None)
+
+        if condition.startswith("hour_bucket = :hour_bucket"):
+            if (
+                item.get("hour_bucket") != values[":hour_bucket"]
+                or item.get("day_bucket") != values[":day_bucket"]
+                or item.get("verified_requests_hour", 0) >= values[":hourly_limit"]
+                or item.get("verified_requests_day", 0) >= values[":daily_limit"]
+            ):
+                fail()
+            item["verified_requests_hour"] += values[":one"]
+            item["verified_requests_day"] += values[":one"]
+        elif condition.startswith("day_bucket = :day_bucket"):
+            if (
+                item.get("day_bucket") != values[":day_bucket"]
+                or item.get("verified_requests_day", 0) >= values[":daily_limit"]
+                or item.get("hour_bucket") == values[":hour_bucket"]
+            ):
+                fail()
+            item["hour_bucket"] = values[":hour_bucket"]
+            item["verified_requests_hour"] = values[":one"]
+            item["verified_requests_day"] = item.get("verified_requests_day", 0) + values[":one"]
+        else:
+            if item.get("day_bucket") == values[":day_bucket"]:
+                fail()
+            item["hour_bucket"] = values[":hour_bucket"]
+            item["day_bucket"] = values[":day_bucket"]
+            item["verified_requests_hour"] = values[":one"]
+            item["verified_requests_day"] = values[":one"]
+        item["last_verified_request_at"] = values[":now"]
+        return {
+            "Attributes": {
+                "verified_requests_hour": item["verified_requests_hour"],
+                "verified_requests_day": item["verified_requests_day"],
+            }
+        }
+
     def update_item(  # noqa: N803
         self,
         Key,
@@ -135,57 +199,28 @@ class _InMemoryRateLimitsTable:
         ConditionExpression=None,
         ExpressionAttributeValues=None,
         ReturnValues=None,
+        ReturnValuesOnConditionCheckFailure=None,
     ):
         with self._lock:
+            self.calls.append("update_item")
             email = Key["email"]
             item = copy.deepcopy(self._items.get(email, {}))
             values = ExpressionAttributeValues or {}
 
-            # Minimal condition evaluator for claim_verified_quota_slot optimistic lock.
-            if any(
-                token in values
-                for token in (
-                    ":prev_hour_bucket",
-                    ":prev_day_bucket",
-                    ":prev_hour_count",
-                    ":prev_day_count",
+            if ":one" in values:
+                returns_old = (
+                    self.return_item_on_condition_failure and ReturnValuesOnConditionCheckFailure == "ALL_OLD"
                 )
-            ):
-                for attr_name, token in (
-                    ("hour_bucket", ":prev_hour_bucket"),
-                    ("day_bucket", ":prev_day_bucket"),
-                    ("verified_requests_hour", ":prev_hour_count"),
-                    ("verified_requests_day", ":prev_day_count"),
-                ):
-                    if token in values:
-                        if attr_name not in item or item[attr_name] != values[token]:
-                            raise ClientError(
-                                {"Error": {"Code": "ConditionalCheckFailedException"}},
-                                "UpdateItem",
-                            )
-                    elif attr_name in item:
-                        raise ClientError(
-                            {"Error": {"Code": "ConditionalCheckFailedException"}},
-                            "UpdateItem",
-                        )
+                response = self._claim_quota(item, ConditionExpression, values, returns_old)
+                self._items[email] = item
+                return response
 
             # Minimal condition evaluator for notice cooldown claim.
             if ":cooldown_until" in values and ":now" in values:
                 active_until = item.get("verified_rate_limit_notice_cooldown_until")
                 if active_until is not None and active_until > values[":now"]:
-                    raise ClientError(
-                        {"Error": {"Code": "ConditionalCheckFailedException"}},
-                        "UpdateItem",
-                    )
-
-            if ":new_hour_bucket" in values:
-                item["hour_bucket"] = values[":new_hour_bucket"]
-            if ":new_day_bucket" in values:
-                item["day_bucket"] = values[":new_day_bucket"]
-            if ":new_hour_count" in values:
-                item["verified_requests_hour"] = values[":new_hour_count"]
-            if ":new_day_count" in values:
-                item["verified_requests_day"] = values[":new_day_count"]
+                    raise _conditional_check_failed()
+
             if ":now" in values:
                 item["last_verified_request_at"] = values[":now"]
             if ":cooldown_until" in values:
@@ -311,6 +346,111 @@ class VerifiedQuotaClaimTests(unittest.TestCase):
         self.assertTrue(day_result["allowed"])
         self.assertEqual(day_result["day_count"], 1)
 
+    def _seed(self, email, now_epoch, hour_count, day_count):
+        buckets = dynamodb_models._current_utc_buckets(now_epoch=now_epoch)
+        self.table._items[email] = {
+            "email": email,
+            "hour_bucket": buckets["hour_bucket"],
+            "day_bucket": buckets["day_bucket"],
+            "verified_requests_hour": hour_count,
+            "verified_requests_day": day_count,
+        }
+
+    def test_claim_in_current_bucket_is_one_write(self):
+        now_epoch = 1735732800
+        self._seed("user@example.com", now_epoch, 1, 4)
+        result = dynamodb_models.claim_verified_quota_slot(
+            email="user@example.com", hourly_limit=5, daily_limit=10, now_epoch=now_epoch
+        )
+        self.assertTrue(result["allowed"])
+        self.assertEqual((result["hour_count"], result["day_count"]), (2, 5))
+        self.assertEqual(self.table.calls, ["update_item"])
+
+    def test_over_limit_block_needs_no_read(self):
+        now_epoch = 1735732800
+        self._seed("user@example.com", now_epoch, 2, 2)
+        result = dynamodb_models.claim_verified_quota_slot(
+            email="user@example.com", hourly_limit=2, daily_limit=10, now_epoch=now_epoch
+        )
+        self.assertEqual(result["reason"], "hourly_limit_exceeded")
+        self.assertEqual(result["hour_count"], 2)
+        self.assertEqual(self.table.calls, ["update_item"])
+        self.assertEqual(self.table._items["user@example.com"]["verified_requests_hour"], 2)
+
+    def test_block_falls_back_to_a_read_without_the_old_item(self):
+        self.table.return_item_on_condition_failure = False
+        now_epoch = 1735732800
+        self._seed("user@example.com", now_epoch, 1, 3)
+        result = dynamodb_models.claim_verified_quota_slot(
+            email="user@example.com", hourly_limit=10, daily_limit=3, now_epoch=now_epoch
+        )
+        self.assertEqual(result["reason"], "daily_limit_exceeded")
+        self.assertEqual(self.table.calls, ["update_item", "get_item"])
+
+    def test_hour_rollover_is_one_extra_write(self):
+        previous_hour_epoch = 1735732800
+        self._seed("user@example.com", previous_hour_epoch, 5, 7)
+        result = dynamodb_models.claim_verified_quota_slot(
+            email="user@example.com", hourly_limit=5, daily_limit=10, now_epoch=previous_hour_epoch + 3600
+        )
+        self.assertTrue(result["allowed"])
+        self.assertEqual((result["hour_count"], result["day_count"]), (1, 8))
+        self.assertEqual(self.table.calls, ["update_item", "update_item"])
+
+    def test_new_hour_same_day_rolls_the_hour_from_the_wire_item(self):
+        previous_hour_epoch = 1735732800  # 2025-01-01T12:00:00Z
+        self._seed("user@example.com", previous_hour_epoch, 3, 3)
+        result = dynamodb_models.claim_verified_quota_slot(
+            email="user@example.com", hourly_limit=3, daily_limit=10, now_epoch=previous_hour_epoch + 3600
+        )
+        self.assertTrue(result["allowed"])
+        self.assertEqual((result["hour_count"], result["day_count"]), (1, 4))
+        self.assertEqual(self.table.calls, ["update_item", "update_item"])
+
+    def test_new_hour_same_day_over_daily_limit_reports_daily_exceeded(self):
+        previous_hour_epoch = 1735732800
+        self._seed("user@example.com", previous_hour_epoch, 1, 5)
+        result = dynamodb_models.claim_verified_quota_slot(
+            email="user@example.com", hourly_limit=3, daily_limit=5, now_epoch=previous_hour_epoch + 3600
+        )
+        self.assertEqual(result["reason"], "daily_limit_exceeded")
+        self.assertEqual(result["day_count"], 5)
+        self.assertEqual(self.table.calls, ["update_item"])
+
+    def test_unexpected_error_fails_closed(self):
+        with mock.patch.object(
+            self.table,
+            "update_item",
+            side_effect=ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "UpdateItem"),
+        ):
+            result = dynamodb_models.claim_verified_quota_slot(
+                email="user@example.com", hourly_limit=5, daily_limit=10, now_epoch=1735732800
+            )
+        self.assertFalse(result["allowed"])
+        self.assertEqual(result["reason"], "quota_check_error")
+
+    def test_concurrent_first_claims_in_a_new_bucket_count_every_request(self):
+        now_epoch = 1735732800
+        barrier = threading.Barrier(4)
+        results = []
+
+        def _run_claim():
+            barrier.wait()
+            results.append(
+                dynamodb_models.claim_verified_quota_slot(
+                    email="burst@example.com", hourly_limit=3, daily_limit=10, now_epoch=now_epoch
+                )
+            )
+
+        threads = [threading.Thread(target=_run_claim) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(1 for result in results if result["allowed"]), 3)
+        self.assertEqual(self.table._items["burst@example.com"]["verified_requests_hour"], 3)
+
     def test_concurrency_one_slot_allows_only_one(self):
         now_epoch = 1735732800
         buckets = dynamodb_models._current_utc_buckets(now_epoch=now_epoch)
@@ -614,5 +754,57 @@ class VerifiedPathGateTests(unittest.TestCase):
         sent_count = sum(1 for item in results if item.get("status") == "sent")
         self.assertEqual(sent_count, 1)
 
+class QuotaNegativeCacheTests(unittest.TestCase):
+    def setUp(self):
+        rate_limits.clear_quota_block_cache()
+        self.addCleanup(rate_limits.clear_quota_block_cache)
+        patcher = mock.patch.object(rate_limits, "ENABLE_QUOTA_NEGATIVE_CACHE", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(rate_limits, "maybe_send_rate_limit_notice")
+        self.notice_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _check_at(self, now_epoch):
+        with mock.patch.object(rate_limits.time, "time", return_value=now_epoch):
+            return rate_limits.check_verified_quota_or_block("verified@example.com", None)
+
+    def test_hourly_block_is_served_from_cache_until_the_next_hour(self):
+        blocked = {"allowed": False, "reason": "hourly_limit_exceeded"}
+        with mock.patch.object(rate_limits, "claim_verified_quota_slot", return_value=blocked) as claim_mock:
+            self.assertIsNotNone(self._check_at(1735732800))
+            self.assertIsNotNone(self._check_at(1735736399))
+            self.assertEqual(claim_mock.call_count, 1)
+            claim_mock.return_value = {"allowed": True, "reason": "allowed"}
+            self.assertIsNone(self._check_at(1735736400))
+            self.assertEqual(claim_mock.call_count, 2)
+        self.assertEqual(self.notice_mock.call_count, 2)
+
+    def test_daily_block_lasts_until_the_next_utc_day(self):
+        blocked = {"allowed": False, "reason": "daily_limit_exceeded"}
+        with mock.patch.object(rate_limits, "claim_verified_quota_slot", return_value=blocked) as claim_mock:
+            self._check_at(1735732800)  # 2025-01-01T12:00:00Z
+            self._check_at(1735775999)  # 2025-01-01T23:59:59Z
+            self.assertEqual(claim_mock.call_count, 1)
+            self._check_at(1735776000)
+            self.assertEqual(claim_mock.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        with mock.patch.object(
+            rate_limits, "claim_verified_quota_slot", return_value={"allowed": False, "reason": "quota_check_error"}
+        ) as claim_mock:
+            self._check_at(1735732800)
+            self._check_at(1735732801)
+        self.assertEqual(claim_mock.call_count, 2)
+
+    def test_disabled_always_claims(self):
+        blocked = {"allowed": False, "reason": "hourly_limit_exceeded"}
+        with mock.patch.object(rate_limits, "ENABLE_QUOTA_NEGATIVE_CACHE", False), \
+            mock.patch.object(rate_limits, "claim_verified_quota_slot", return_value=blocked) as claim_mock:
+            self._check_at(1735732800)
+            self._check_at(1735732801)
+        self.assertEqual(claim_mock.call_count, 2)
+
+
 if __name__ == "__main__":
     unittest.main()